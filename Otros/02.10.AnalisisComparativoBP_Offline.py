@@ -8,6 +8,11 @@ import gc
 import numpy as np
 from typing import Tuple, Set, Optional
 import logging
+import sys
+
+# Librería compartida del repositorio (fnb_comun)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from fnb_comun.ingesta.deteccion import ERRORES_DECODIFICACION, detectar_codificacion, leer_lineas_muestra
 
 class ComparativoClientesOptimizado:
     def __init__(self, ruta_base, ruta_resultados, chunk_size=100000):
@@ -50,41 +55,19 @@ class ComparativoClientesOptimizado:
     
     def detectar_encoding_y_separador(self, ruta_archivo, muestra_filas=10):
         """Detecta la codificación y el separador del archivo"""
-        codificaciones = ['utf-8', 'latin-1', 'windows-1252', 'cp1252', 'iso-8859-1']
         separadores = ['\t', ';', '|', ',']
         
-        encoding_correcto = 'utf-8'
-        
-        # Probar diferentes codificaciones
-        for encoding in codificaciones:
-            try:
-                with open(ruta_archivo, 'r', encoding=encoding) as f:
-                    # Saltar las primeras 8 filas
-                    for _ in range(8):
-                        next(f)
-                    
-                    # Leer algunas líneas de muestra
-                    lineas_muestra = [f.readline().strip() for _ in range(muestra_filas)]
-                    
-                    if lineas_muestra and any(lineas_muestra):
-                        encoding_correcto = encoding
-                        self.logger.info(f"Codificación detectada: {encoding}")
-                        break
-                        
-            except (UnicodeDecodeError, UnicodeError):
-                continue
+        # Codificación con una muestra de bytes (BOM o prueba de candidatas), sin leer el archivo completo
+        encoding_correcto = detectar_codificacion(ruta_archivo)
+        self.logger.info(f"Codificación detectada: {encoding_correcto}")
         
         # Detectar separador con la codificación correcta
         mejor_separador = '\t'
         max_columnas = 0
         
         try:
-            with open(ruta_archivo, 'r', encoding=encoding_correcto) as f:
-                # Saltar las primeras 8 filas
-                for _ in range(8):
-                    next(f)
-                
-                lineas_muestra = [f.readline().strip() for _ in range(muestra_filas)]
+            # Saltar las primeras 8 filas y tomar algunas líneas de muestra
+            lineas_muestra = [linea.strip() for linea in leer_lineas_muestra(ruta_archivo, encoding_correcto, 8 + muestra_filas)[8:]]
             
             for sep in separadores:
                 columnas_por_linea = [len(linea.split(sep)) for linea in lineas_muestra if linea]
@@ -116,7 +99,8 @@ class ComparativoClientesOptimizado:
             try:
                 # AÑADIR thousands=',' aquí también por consistencia
                 df_sample = pd.read_csv(ruta_archivo, sep=separador, skiprows=8, nrows=1000, 
-                                        encoding=encoding, low_memory=False, thousands=',') 
+                                        encoding=encoding, encoding_errors=ERRORES_DECODIFICACION,
+                                        low_memory=False, thousands=',') 
                 df_sample = df_sample.dropna(axis=1, how='all')
                 columnas = [col.strip() for col in df_sample.columns]
                 
@@ -141,6 +125,7 @@ class ComparativoClientesOptimizado:
                     sep=separador, 
                     skiprows=8,
                     encoding=encoding,
+                    encoding_errors=ERRORES_DECODIFICACION,
                     chunksize=self.chunk_size,
                     dtype=dtype_dinamico,
                     low_memory=False,
@@ -1,12 +1,17 @@
 from __future__ import annotations
 import os
 import re
+import sys
 from pathlib import Path
 from typing import Optional, Tuple, Dict, List, Set
 import polars as pl
 from datetime import datetime
 import tempfile
 
+# Librería compartida del repositorio (fnb_comun)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from fnb_comun.ingesta.deteccion import ERRORES_DECODIFICACION, detectar_codificacion, leer_lineas_muestra
+
 # =============================
 # CONFIGURACIÓN
 # =============================
@@ -63,19 +68,16 @@ def log_info(mensaje: str, nivel: int = 0):
 # =============================
 def detectar_formato_archivo(archivo: Path) -> Dict:
     log_info(f"🔍 Detectando formato de: {archivo.name}")
-    encodings = ['utf-8-sig', 'utf-8', 'latin-1', 'cp1252']
     delimitadores_cand = ['\t', '|', ';', ',', '  ', '   ', ' ', 'REGEX_SPACES']
 
     mejor = None
     mejor_score = -10**9
 
-    for encoding in encodings:
-        try:
-            with open(archivo, 'r', encoding=encoding, errors='replace') as f:
-                lines = [f.readline().rstrip('\n') for _ in range(20)]
-        except Exception:
-            continue
+    # Codificación (BOM o prueba de candidatas) con una muestra de bytes, no con el archivo completo
+    encoding = detectar_codificacion(archivo)
+    lines = [linea.rstrip('\r\n') for linea in leer_lineas_muestra(archivo, encoding, 20)]
 
+    if lines:
         for delim in delimitadores_cand:
             for fila_header in [0, 8]:  # 👈 SOLO fila 1 o 9
                 if fila_header >= len(lines):
@@ -133,7 +135,7 @@ def preprocessar_archivo_si_corresponde(archivo: Path, config: Dict) -> Path:
 
     tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".txt", mode='w', encoding=config['encoding'])
     tmp_path = Path(tmp.name)
-    with open(archivo, 'r', encoding=config['encoding'], errors='replace') as fr, open(tmp_path, 'w', encoding=config['encoding']) as fw:
+    with open(archivo, 'r', encoding=config['encoding'], errors=ERRORES_DECODIFICACION) as fr, open(tmp_path, 'w', encoding=config['encoding']) as fw:
         for line in fr:
             new = re.sub(r'\s{2,}', '\t', line.rstrip('\n'))
             fw.write(new + "\n")
@@ -213,7 +215,7 @@ def procesar_archivo_offline(archivo: Path) -> Tuple[Set[str], str, int]:
 
     except Exception as e:
         log_info(f"  ❌ Error con Polars, intentando método manual: {e}", 1)
-        with open(archivo_a_leer, 'r', encoding=config['encoding'], errors='replace') as f:
+        with open(archivo_a_leer, 'r', encoding=config['encoding'], errors=ERRORES_DECODIFICACION) as f:
             # Saltar hasta header correcto
             for _ in range(config['fila_header']):
                 next(f)
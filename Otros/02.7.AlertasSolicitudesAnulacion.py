@@ -2,10 +2,18 @@ import os
 import re
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-from PIL import Image, ImageChops
 import win32com.client as win32
+import sys
+from dataclasses import replace
 from datetime import datetime, timedelta
+from pathlib import Path
+
+# Librería compartida del repositorio (fnb_comun)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from fnb_comun.tabla_imagen import ESTILO_SIMPLE, guardar_tabla
+
+# Letra de 9 pt a 75 dpi: el mismo tamaño que la imagen a 150 dpi reducida al 50 %
+ESTILO_ALERTAS = replace(ESTILO_SIMPLE, tamaño=9, dpi=75)
 
 
 class SistemaSolicitudesAnulacion:
@@ -298,64 +306,15 @@ class SistemaSolicitudesAnulacion:
     # Guardar imagen (recorte + reducción 50%) - OPTIMIZADO
     # -----------------------
     def guardar_imagen_tabla(self, df, ruta_img):
-        """Genera imagen de la tabla optimizada y la reduce al 50%."""
+        """Genera la imagen de la tabla directamente a su tamaño final (antes: 150 dpi reducido al 50%)."""
         if df is None or df.empty:
             return False
 
-        # Estimar tamaño de figura según contenido real
-        max_lens = []
-        for col in df.columns:
-            col_values = df[col].fillna('').astype(str)
-            lens = [len(str(col))] + col_values.str.len().tolist()
-            max_lens.append(max(lens))
-
-        # Calcular dimensiones
-        total_chars = sum(max_lens) + (len(df.columns) * 2)
-        fig_w = max(8, total_chars * 0.12)
-        fig_h = max(2, (df.shape[0] + 1) * 0.4)
-
-        fig, ax = plt.subplots(figsize=(fig_w, fig_h))
-        ax.axis('off')
-
-        # Crear tabla
-        tabla = ax.table(
-            cellText=df.values,
-            colLabels=df.columns,
-            cellLoc='center',
-            loc='center'
-        )
-        tabla.auto_set_font_size(False)
-        tabla.set_fontsize(9)
-        tabla.scale(1.2, 1.5)
-
-        # Guardar con configuración optimizada
-        plt.tight_layout()
-        try:
-            plt.savefig(ruta_img, bbox_inches='tight', dpi=150, pad_inches=0.1,
-                        facecolor='white', edgecolor='none')
-        except Exception:
-            plt.savefig(ruta_img, dpi=150)
-        finally:
-            plt.close(fig)
-
-        # Optimizar imagen
         try:
-            img = Image.open(ruta_img).convert("RGB")
-
-            # Recortar márgenes blancos
-            bg = Image.new(img.mode, img.size, (255, 255, 255))
-            diff = ImageChops.difference(img, bg)
-            bbox = diff.getbbox()
-            if bbox:
-                img = img.crop(bbox)
-
-            # Reducir al 50%
-            new_size = (max(1, img.width // 2), max(1, img.height // 2))
-            img = img.resize(new_size, Image.LANCZOS)
-            img.save(ruta_img, quality=95, optimize=True)
+            guardar_tabla(df.fillna(''), ruta_img, estilo=ESTILO_ALERTAS)
             return True
         except Exception as e:
-            print(f"⚠️ No se pudo optimizar imagen {ruta_img}: {e}")
+            print(f"⚠️ No se pudo generar imagen {ruta_img}: {e}")
             return False
 
     # -----------------------
@@ -1,7 +1,9 @@
 import pandas as pd
+import numpy as np
 import os
 import tkinter as tk
 from tkinter import filedialog
+from dataclasses import replace
 from datetime import datetime, timedelta
 import win32com.client as win32
 import time
@@ -10,14 +12,21 @@ from pathlib import Path
 import logging
 from typing import List, Tuple, Optional
 from openpyxl import load_workbook
-from openpyxl.styles import Font, PatternFill, Alignment
 from openpyxl.utils.dataframe import dataframe_to_rows
 import psutil
 
+# Librería compartida del repositorio (fnb_comun)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from fnb_comun.escritura_excel import escribir_excel
+from fnb_comun.tabla_imagen import ESTILO_NEGRO, guardar_tabla
+
 # Configuración de logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Tablas de las imágenes del correo: Verdana 8 pt, cabecera negra, subtotales grises
+ESTILO_TABLA = replace(ESTILO_NEGRO, familia='Verdana', tamaño=8, fondo_total='#D9D9D9')
+
 class ReporteFNB:
     def __init__(self):
         # NOTA: La fecha se ajustará después de seleccionar la actividad
@@ -36,7 +45,6 @@ class ReporteFNB:
         self.solo_canales_propios = False
 
         # NUEVOS PARÁMETROS
-        self.modo_render = "chrome"
         self.formatear_excel = True
 
         # Crear carpetas si no existen (incluyendo padres)
@@ -279,82 +287,28 @@ class ReporteFNB:
             logger.error(f"Error creando tabla dinámica: {e}")
             return pd.DataFrame()
     def crear_imagen_tabla(self, df_tabla: pd.DataFrame, nombre_archivo: str) -> Optional[str]:
-        """Crea imagen de tabla completa usando dataframe_image y chrome sin recortes"""
+        """Crea la imagen de la tabla completa (subtotales en gris y negrita)"""
         try:
-            # Lazy import para evitar retrasos en el inicio si no se requiere
-            try:
-                import dataframe_image as dfi
-            except Exception as ie:
-                logger.error(f"dataframe_image no disponible: {ie}")
-                return None
-
             if df_tabla.empty:
                 return None
 
             df_imagen = df_tabla.drop(columns=['Es_Subtotal'], errors='ignore').reset_index(drop=True)
-
-            def aplicar_estilo(row):
-                if row.name < len(df_tabla) and 'Es_Subtotal' in df_tabla.columns:
-                    if df_tabla.iloc[row.name]['Es_Subtotal']:
-                        return ['background-color: #D9D9D9; font-weight: bold'] * len(row)
-                return ['background-color: white'] * len(row)
-
-            df_styled = df_imagen.style.apply(aplicar_estilo, axis=1)
-
-            df_styled = df_styled.set_table_styles([
-                {'selector': 'th', 'props': [
-                    ('background-color', '#000000'),
-                    ('color', 'white'),
-                    ('font-weight', 'bold'),
-                    ('text-align', 'center'),
-                    ('border', '1px solid #000'),
-                    ('padding', '6px'),
-                    ('font-family', 'Verdana'),
-                    ('font-size', '8pt')
-                ]},
-                {'selector': 'tbody td:first-child', 'props': [
-                    ('text-align', 'left'),
-                    ('border', '1px solid #000'),
-                    ('padding', '6px'),
-                    ('font-family', 'Verdana'),
-                    ('font-size', '8pt')
-                ]},
-                {'selector': 'tbody td:not(:first-child)', 'props': [
-                    ('text-align', 'center'),
-                    ('border', '1px solid #000'),
-                    ('padding', '6px'),
-                    ('font-family', 'Verdana'),
-                    ('font-size', '8pt')
-                ]},
-                {'selector': 'table', 'props': [
-                    ('border-collapse', 'collapse'),
-                    ('border', '2px solid #000'),
-                    ('width', '100%'),
-                    ('max-height', 'none'),
-                    ('overflow', 'visible')
-                ]}
-            ])
-
-            df_styled = df_styled.hide(axis='index')
+            subtotal = (df_tabla['Es_Subtotal'].fillna(False).astype(bool).to_numpy()
+                        if 'Es_Subtotal' in df_tabla.columns else None)
 
             ruta_imagen = self.ruta_imagenes / f"{nombre_archivo}.png"
-
-            # Exportar tabla sin límites de scroll ni altura
-            dfi.export(
-                df_styled,
-                str(ruta_imagen),
-                fontsize=8,
-                max_rows=-1,
-                max_cols=-1,
-                table_conversion="chrome",
-                chrome_path=None
+            guardar_tabla(
+                df_imagen, ruta_imagen, estilo=ESTILO_TABLA,
+                fondo=None if subtotal is None else np.where(subtotal, ESTILO_TABLA.fondo_total, None),
+                negrita=subtotal,
+                alineacion=['left'] + ['center'] * (len(df_imagen.columns) - 1)
             )
 
             logger.info(f"Imagen creada completa: {ruta_imagen}")
             return str(ruta_imagen)
 
         except Exception as e:
-            logger.error(f"Error creando imagen sin recorte: {e}")
+            logger.error(f"Error creando imagen de tabla: {e}")
             return None
     def generar_imagenes_proveedor(self, data: pd.DataFrame, proveedor: str) -> List[Tuple[str, str]]:
         """Genera las imágenes específicas según el proveedor"""
@@ -404,8 +358,8 @@ class ReporteFNB:
                                 imagenes.append((tipo_suffix, ruta_imagen))
 
         return imagenes
-    def guardar_excel_openpyxl(self, data: pd.DataFrame, ruta_archivo: str) -> bool:
-        """Guarda el archivo Excel usando openpyxl con formato opcional"""
+    def guardar_excel(self, data: pd.DataFrame, ruta_archivo: str) -> bool:
+        """Guarda el archivo Excel (con formato opcional) en una sola escritura"""
         try:
             data_clean = data.replace(['nan', 'NaN', pd.NA], '').fillna('')
 
@@ -417,43 +371,15 @@ class ReporteFNB:
             if os.path.exists(ruta_archivo):
                 self._cerrar_excel_procesos()
 
-            with pd.ExcelWriter(ruta_archivo, engine='openpyxl') as writer:
-                data_clean.to_excel(writer, index=False, sheet_name='Datos')
-
-                if not self.formatear_excel:
-                    return True  # Salta formato si se desactiva
-
-                workbook = writer.book
-                worksheet = workbook['Datos']
-
-                header_font = Font(name='Aptos', size=8, bold=True, color='FFFFFF')
-                header_fill = PatternFill(start_color='000000', end_color='000000', fill_type='solid')
-                data_font = Font(name='Aptos', size=8)
-
-                for col in range(1, len(data_clean.columns) + 1):
-                    cell = worksheet.cell(row=1, column=col)
-                    cell.font = header_font
-                    cell.fill = header_fill
-                    cell.alignment = Alignment(horizontal='center')
-
-                for row in range(2, len(data_clean) + 2):
-                    worksheet.row_dimensions[row].height = 11.25
-                    for col in range(1, len(data_clean.columns) + 1):
-                        cell = worksheet.cell(row=row, column=col)
-                        cell.font = data_font
-                        if col <= 2:
-                            cell.number_format = 'dd/mm/yyyy'
-
-                for column in worksheet.columns:
-                    max_length = 0
-                    column_letter = column[0].column_letter
-                    for cell in column:
-                        try:
-                            max_length = max(max_length, len(str(cell.value)))
-                        except:
-                            pass
-                    adjusted_width = min(max_length + 2, 50)
-                    worksheet.column_dimensions[column_letter].width = adjusted_width
+            if not self.formatear_excel:
+                data_clean.to_excel(ruta_archivo, index=False, sheet_name='Datos')
+            else:
+                # Las dos primeras columnas son fechas (F. Registro, F. Entrega)
+                escribir_excel(
+                    data_clean, ruta_archivo, hoja='Datos', fuente='Aptos', tamaño=8, alto_fila=11.25,
+                    formatos={col: 'dd/mm/yyyy' for col in data_clean.columns[:2]},
+                    encabezado={'negrita': True, 'color': 'FFFFFF', 'fondo': '000000', 'alineacion': 'center'},
+                )
 
             logger.info(f"Archivo Excel guardado: {ruta_archivo}")
             return True
@@ -675,7 +601,7 @@ class ReporteFNB:
                     nombre_archivo = f"{self.tipo_actividad} - {proveedor} - {self.fecha_str}.xlsx"
                     ruta_archivo = self.ruta_salida / nombre_archivo
 
-                    if self.guardar_excel_openpyxl(data, str(ruta_archivo)):
+                    if self.guardar_excel(data, str(ruta_archivo)):
                         self.enviar_correo(proveedor, str(ruta_archivo), imagenes)
 
                     duracion = round(time.time() - inicio, 2)
@@ -1,10 +1,9 @@
 import pandas as pd
 import numpy as np
 import os
-import matplotlib
-matplotlib.use('Agg')  # Usar backend no interactivo
-import matplotlib.pyplot as plt
-import seaborn as sns
+import sys
+from pathlib import Path
+from dataclasses import replace
 from datetime import datetime, time as dt_time
 import warnings
 import asyncio
@@ -15,6 +14,13 @@ import win32clipboard
 import io
 from PIL import Image
 
+# Librería compartida del repositorio (fnb_comun)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from fnb_comun.cubo_cortes import CuboCortes, comparar
+from fnb_comun.imagenes import renderizar_imagenes
+from fnb_comun.tabla_imagen import (ESTILO_AZUL, NEGATIVO, POSITIVO, colores_por_condicion, combinar_columna,
+                                    renderizar_tabla)
+
 warnings.filterwarnings('ignore', category=UserWarning, module='openpyxl')
 
 
@@ -527,6 +533,41 @@ class WhatsAppSender:
             print(f"⚠️ Error al cerrar WhatsApp Web: {e}")
 
 
+# ============================================================
+# Dibujo de tablas (corre en los procesos de render)
+# ============================================================
+def dibujar_tabla(spec):
+    """
+    Imagen de una tabla armada por SalesImageGenerator.tabla_* (a nivel de
+    módulo para poder enviarla a los procesos de render).
+
+    spec: datos, encabezados, fuente (puntos), filas_gris (índices de filas
+    gris en negrita: subtotales y TOTAL) y col_variacion (columna con formato
+    condicional: rojo si es negativa, verde si es positiva).
+    """
+    data = spec['datos']
+    num_filas = len(data)
+    num_columnas = len(spec['encabezados'])
+    
+    # Fondo gris y negrita solo en subtotales y total
+    gris = np.zeros(num_filas, dtype=bool)
+    gris[spec['filas_gris']] = True
+    fondo = np.where(gris, ESTILO_AZUL.fondo_total, None)
+    
+    # Formato condicional a la columna de variación
+    col = spec['col_variacion']
+    variacion = pd.to_numeric(
+        pd.Series([fila[col] for fila in data]).str.replace('S/ ', '').str.replace(',', '').str.replace('+', ''),
+        errors='coerce'
+    ).to_numpy()
+    reglas = [variacion < 0, variacion > 0]
+    fondo = combinar_columna(fondo, col, colores_por_condicion(zip(reglas, (NEGATIVO[0], POSITIVO[0]))), num_columnas)
+    color_texto = combinar_columna(None, col, colores_por_condicion(zip(reglas, (NEGATIVO[1], POSITIVO[1]))), num_columnas)
+    
+    return renderizar_tabla(data, spec['encabezados'], replace(ESTILO_AZUL, tamaño=spec['fuente']),
+                            fondo=fondo, color_texto=color_texto, negrita=gris)
+
+
 # ============================================================
 # Clase SalesImageGenerator (con formato condicional agregado)
 # ============================================================
@@ -555,24 +596,6 @@ class SalesImageGenerator:
         # Crear directorio de imágenes si no existe
         os.makedirs(self.ruta_imagenes, exist_ok=True)
 
-        # Estilo matplotlib / seaborn
-        plt.style.use('default')
-        sns.set_palette("husl")
-
-        plt.rcParams.update({
-            'figure.autolayout': False,
-            'figure.constrained_layout.use': False,
-            'figure.constrained_layout.h_pad': 0,
-            'figure.constrained_layout.w_pad': 0,
-            'figure.constrained_layout.hspace': 0,
-            'figure.constrained_layout.wspace': 0,
-            'figure.subplot.hspace': 0,
-            'figure.subplot.wspace': 0,
-            'figure.subplot.left': 0,
-            'figure.subplot.right': 1,
-            'figure.subplot.top': 1,
-            'figure.subplot.bottom': 0
-        })
 
     def _cargar_mapeo_canales(self):
         try:
@@ -595,53 +618,6 @@ class SalesImageGenerator:
             print(f"Error cargando sedes registradas: {e}")
             return set()
 
-    def _aplicar_formato_condicional(self, tabla, data, col_variacion_idx, num_filas_datos, es_total_idx=None):
-        """
-        Aplica formato condicional a la columna de variación
-        - Fondo rosado claro (#ffcccc) y texto rojo (#cc0000) para valores negativos
-        - Fondo verde claro (#ccffcc) y texto verde (#006600) para valores positivos
-        - Fondo blanco y texto negro para valores cero
-        """
-        # Recorrer las filas de datos (sin incluir headers)
-        for i in range(num_filas_datos):
-            fila_idx = i + 1  # +1 porque la fila 0 es el header
-            
-            # Obtener el valor de variación de los datos originales
-            try:
-                valor_texto = data[i][col_variacion_idx]
-                # Extraer el valor numérico (remover S/, espacios, comas y +)
-                valor_numerico = float(valor_texto.replace('S/ ', '').replace(',', '').replace('+', ''))
-                
-                if valor_numerico < 0:
-                    # Formato para valores negativos: fondo rosado claro y texto rojo
-                    tabla[(fila_idx, col_variacion_idx)].set_facecolor('#ffcccc')  # Rosado claro
-                    tabla[(fila_idx, col_variacion_idx)].set_text_props(color='#cc0000')  # Rojo
-                elif valor_numerico > 0:
-                    # Formato para valores positivos: fondo verde claro y texto verde
-                    if es_total_idx is not None and i == es_total_idx:
-                        # Si es la fila total con valor positivo, usar verde pero mantener negrita
-                        tabla[(fila_idx, col_variacion_idx)].set_facecolor('#ccffcc')  # Verde claro
-                        tabla[(fila_idx, col_variacion_idx)].set_text_props(weight='bold', color='#006600')  # Verde oscuro
-                    else:
-                        # Fila normal con valor positivo: verde claro
-                        tabla[(fila_idx, col_variacion_idx)].set_facecolor('#ccffcc')  # Verde claro
-                        tabla[(fila_idx, col_variacion_idx)].set_text_props(color='#006600')  # Verde oscuro
-                else:
-                    # Formato para valores cero: mantener formato neutro
-                    if es_total_idx is not None and i == es_total_idx:
-                        # Si es la fila total con valor cero, mantener el color de fondo gris
-                        tabla[(fila_idx, col_variacion_idx)].set_facecolor('#bdc3c7')
-                        tabla[(fila_idx, col_variacion_idx)].set_text_props(weight='bold', color='black')
-                    else:
-                        # Fila normal con valor cero
-                        tabla[(fila_idx, col_variacion_idx)].set_facecolor('white')
-                        tabla[(fila_idx, col_variacion_idx)].set_text_props(color='black')
-                        
-            except (ValueError, IndexError) as e:
-                # Si hay error al convertir, mantener formato por defecto
-                print(f"Error al aplicar formato condicional en fila {i}: {e}")
-                continue
-
     def validar_sedes_nuevas(self, df_anterior, df_nuevo):
         """Valida si hay sedes nuevas que no están registradas en Canal.xlsx"""
         print("\n=== VALIDACIÓN DE SEDES ===")
@@ -911,66 +887,14 @@ class SalesImageGenerator:
         print(f"   {len(df_final)} transacciones procesadas")
         return df_final
 
-    def recortar_franjas_blancas(self, ruta_imagen):
-        """Recortar automáticamente las franjas blancas de una imagen"""
-        from PIL import Image
-        import numpy as np
-        
-        try:
-            # Abrir imagen
-            img = Image.open(ruta_imagen)
-            img_array = np.array(img)
-            
-            # Encontrar los límites no blancos
-            def encontrar_limites_no_blancos(array):
-                # Convertir a escala de grises si es RGB
-                if len(array.shape) == 3:
-                    gray = np.mean(array, axis=2)
-                else:
-                    gray = array
-                
-                # Encontrar píxeles no blancos (diferentes de 255)
-                no_blancos = gray < 255
-                
-                if not np.any(no_blancos):
-                    return 0, 0, array.shape[1], array.shape[0]  # Imagen completamente blanca
-                
-                # Encontrar límites
-                filas_no_blancas = np.any(no_blancos, axis=1)
-                columnas_no_blancas = np.any(no_blancos, axis=0)
-                
-                top = np.argmax(filas_no_blancas)
-                bottom = len(filas_no_blancas) - np.argmax(filas_no_blancas[::-1])
-                left = np.argmax(columnas_no_blancas)
-                right = len(columnas_no_blancas) - np.argmax(columnas_no_blancas[::-1])
-                
-                return left, top, right, bottom
-            
-            # Recortar la imagen
-            left, top, right, bottom = encontrar_limites_no_blancos(img_array)
-            img_recortada = img.crop((left, top, right, bottom))
-            
-            # Guardar imagen recortada (sobrescribir la original)
-            img_recortada.save(ruta_imagen, 'PNG', dpi=(300, 300))
-            
-            return True
-            
-        except Exception as e:
-            print(f"Error al recortar franjas blancas de {os.path.basename(ruta_imagen)}: {e}")
-            return False
+    def _ruta_imagen(self, canal, fecha_anterior, fecha_nueva, sufijo_vista=''):
+        nombre_archivo = f"{canal.replace(' ', '_').replace('Á', 'A').lower()}{sufijo_vista}_{fecha_anterior.replace('/', '-')}_vs_{fecha_nueva.replace('/', '-')}.png"
+        return os.path.join(self.ruta_imagenes, nombre_archivo)
 
-    def crear_imagen_resumen_general(self, df_comparativo, fecha_anterior, fecha_nueva, hora_corte):
-        """Crear imagen del resumen general SIN DECIMALES y CON FORMATO CONDICIONAL"""
-        # Crear figura con configuración específica para eliminar franjas blancas
-        fig = plt.figure(figsize=(14, 8), facecolor='white', dpi=300)
-        
-        # Crear axes que ocupen toda la figura sin márgenes
-        ax = fig.add_axes([0, 0, 1, 1])
-        ax.set_facecolor('white')
-        
+    def tabla_resumen_general(self, df_comparativo, fecha_anterior, fecha_nueva, hora_corte):
+        """Tabla del resumen general SIN DECIMALES y CON FORMATO CONDICIONAL → (spec, ruta)"""
         # Preparar datos para la tabla
         data = []
-        colores_fila = []
         
         for canal, row in df_comparativo.iterrows():
             # Extraer valores numéricos para comparación
@@ -987,131 +911,41 @@ class SalesImageGenerator:
                 f"{int(row['Transacciones_Nuevo']):,}",  # Transacciones como entero
                 f"S/ {variacion:+,.0f}"  # Sin decimales
             ])
-            
-            # Determinar color según variación - solo para filas TOTAL
-            if canal == 'TOTAL':
-                colores_fila.append('#bdc3c7')  # Gris para total
-            else:
-                colores_fila.append('white')  # Fondo blanco para datos
-        
-        # Crear tabla
-        tabla = ax.table(cellText=data,
-                        colLabels=[
-                            'Canal',
-                            f'Importe {fecha_anterior}',
-                            f'# Trx {fecha_anterior}',
-                            f'Importe {fecha_nueva}',
-                            f'# Trx {fecha_nueva}',
-                            'Variación Importe'
-                        ],
-                        cellLoc='center',
-                        loc='center')
-        
-        # Configurar estilo de la tabla
-        tabla.auto_set_font_size(False)
-        tabla.set_fontsize(9)
-        tabla.scale(1.2, 1.8)
-        tabla.set_fontsize(9)
-        tabla.auto_set_column_width(col=list(range(6)))
         
-        # Ajustar ancho de columnas
-        cellDict = tabla.get_celld()
-        for i in range(len(data) + 1):  # +1 por el header
-            cellDict[(i, 0)].set_width(0.25)  # Canal más ancho
-            for j in range(1, 6):
-                cellDict[(i, j)].set_width(0.15)
-        
-        # Aplicar colores
-        for i, color in enumerate(colores_fila):
-            for j in range(6):
-                if i == len(colores_fila) - 1:  # Fila TOTAL
-                    tabla[(i+1, j)].set_facecolor('#bdc3c7')
-                    tabla[(i+1, j)].set_text_props(weight='bold')
-                else:
-                    tabla[(i+1, j)].set_facecolor('white')
-                    tabla[(i+1, j)].set_text_props(weight='normal')
-        
-        # NUEVO: Aplicar formato condicional a la columna de variación (índice 5)
-        self._aplicar_formato_condicional(tabla, data, 5, len(data), len(data) - 1)
-        
-        # Estilo de headers
-        for j in range(6):
-            tabla[(0, j)].set_facecolor('#3498db')
-            tabla[(0, j)].set_text_props(weight='bold', color='white')
-        
-        # Configurar el plot sin título y sin ejes
-        ax.axis('off')
-        ax.set_xlim(0, 1)
-        ax.set_ylim(0, 1)
+        # Fondo gris solo en TOTAL (última fila);
+        # formato condicional en la variación (índice 5)
+        spec = {
+            'datos': data,
+            'encabezados': [
+                'Canal',
+                f'Importe {fecha_anterior}',
+                f'# Trx {fecha_anterior}',
+                f'Importe {fecha_nueva}',
+                f'# Trx {fecha_nueva}',
+                'Variación Importe'
+            ],
+            'fuente': 9,
+            'filas_gris': [len(data) - 1],
+            'col_variacion': 5,
+        }
         
-        # Guardar imagen sin franjas blancas
         nombre_archivo = f"01_resumen_general_{fecha_anterior.replace('/', '-')}_vs_{fecha_nueva.replace('/', '-')}.png"
-        ruta_completa = os.path.join(self.ruta_imagenes, nombre_archivo)
-        
-        # Configuración específica para eliminar franjas blancas
-        plt.savefig(ruta_completa, 
-                   dpi=300, 
-                   bbox_inches='tight',
-                   facecolor='white', 
-                   pad_inches=0, 
-                   edgecolor='none', 
-                   transparent=False, 
-                   format='png')
-        plt.close()
-        
-        # Recortar franjas blancas automáticamente
-        self.recortar_franjas_blancas(ruta_completa)
-        
-        return ruta_completa
+        return spec, os.path.join(self.ruta_imagenes, nombre_archivo)
 
-    def crear_imagen_canal_simple(self, df_anterior, df_nuevo, canal, col_importe, fecha_anterior, fecha_nueva):
-        """Crear imagen para canales simples (una vista) CON FORMATO CONDICIONAL"""
-        # Crear figura con configuración específica
-        fig = plt.figure(figsize=(12, 6), facecolor='white', dpi=300)
-        
-        # Crear axes que ocupen toda la figura sin márgenes
-        ax = fig.add_axes([0, 0, 1, 1])
-        ax.set_facecolor('white')
-        
+    def tabla_canal_simple(self, corte, canal, fecha_anterior, fecha_nueva):
+        """Tabla para canales simples (una vista) CON FORMATO CONDICIONAL → (spec, ruta)"""
         # Configuración de columnas por canal
         if canal == 'ALO CÁLIDDA':
             columna_grupo = 'ASESOR DE VENTAS'
         else:
             columna_grupo = 'SEDE'
         
-        # Procesar datos
-        def procesar_dataframe(df, sufijo):
-            if df.empty:
-                return pd.DataFrame()
-            
-            grupo = df.groupby(columna_grupo).agg(
-                Importe=(col_importe, 'sum'),
-                Transacciones=('codigo_unico', 'nunique')
-            )
-            grupo.columns = [f'Importe_{sufijo}', f'Transacciones_{sufijo}']
-            return grupo
-        
-        tabla_anterior = procesar_dataframe(df_anterior, 'Anterior')
-        tabla_nuevo = procesar_dataframe(df_nuevo, 'Nuevo')
+        # Importes y transacciones de ambos periodos (y su variación) desde el corte del cubo
+        tabla_combinada = comparar(corte, [columna_grupo], canal)
         
-        if tabla_anterior.empty and tabla_nuevo.empty:
+        if tabla_combinada.empty:
             return None
         
-        # Combinar tablas
-        if tabla_anterior.empty:
-            tabla_combinada = tabla_nuevo.copy()
-            tabla_combinada['Importe_Anterior'] = 0
-            tabla_combinada['Transacciones_Anterior'] = 0
-        elif tabla_nuevo.empty:
-            tabla_combinada = tabla_anterior.copy()
-            tabla_combinada['Importe_Nuevo'] = 0
-            tabla_combinada['Transacciones_Nuevo'] = 0
-        else:
-            tabla_combinada = pd.merge(tabla_anterior, tabla_nuevo, left_index=True, right_index=True, how='outer').fillna(0)
-        
-        # Calcular variación
-        tabla_combinada['Variacion_Importe'] = tabla_combinada['Importe_Nuevo'] - tabla_combinada['Importe_Anterior']
-        
         # Preparar datos para la tabla
         data = []
         
@@ -1141,88 +975,25 @@ class SalesImageGenerator:
             f"S/ {total_variacion:+,.0f}"
         ])
         
-        # Crear tabla
-        tabla = ax.table(cellText=data,
-                        colLabels=[
-                            columna_grupo,
-                            f'Importe {fecha_anterior}',
-                            f'Trans. {fecha_anterior}',
-                            f'Importe {fecha_nueva}',
-                            f'Trans. {fecha_nueva}',
-                            'Variación'
-                        ],
-                        cellLoc='center',
-                        loc='center')
-        
-        # Configurar estilo
-        tabla.auto_set_font_size(False)
-        tabla.set_fontsize(8)
-        tabla.scale(1.2, 1.6)
-        
-        # Ajustar ancho de columnas
-        cellDict = tabla.get_celld()
-        for i in range(len(data) + 1):
-            cellDict[(i, 0)].set_width(0.3)  # Primera columna más ancha
-            for j in range(1, 6):
-                cellDict[(i, j)].set_width(0.14)
-        
-        # Aplicar colores - solo headers y total con fondo
-        num_filas = len(data)
-        for i in range(num_filas):
-            for j in range(6):
-                if i == num_filas - 1:  # Fila total
-                    tabla[(i+1, j)].set_facecolor('#bdc3c7')
-                    tabla[(i+1, j)].set_text_props(weight='bold')
-                else:  # Filas de datos
-                    tabla[(i+1, j)].set_facecolor('white')
-                    tabla[(i+1, j)].set_text_props(weight='normal')
-        
-        # NUEVO: Aplicar formato condicional a la columna de variación (índice 5)
-        self._aplicar_formato_condicional(tabla, data, 5, num_filas, num_filas - 1)
-        
-        # Headers
-        for j in range(6):
-            tabla[(0, j)].set_facecolor('#3498db')
-            tabla[(0, j)].set_text_props(weight='bold', color='white')
-        
-        ax.axis('off')
-        ax.set_xlim(0, 1)
-        ax.set_ylim(0, 1)
-        
-        # Guardar imagen sin franjas blancas
-        nombre_archivo = f"{canal.replace(' ', '_').replace('Á', 'A').lower()}_{fecha_anterior.replace('/', '-')}_vs_{fecha_nueva.replace('/', '-')}.png"
-        ruta_completa = os.path.join(self.ruta_imagenes, nombre_archivo)
-        
-        plt.savefig(ruta_completa, 
-                   dpi=300, 
-                   bbox_inches='tight',  # Usar 'tight' pero con pad_inches=0
-                   facecolor='white', 
-                   pad_inches=0, 
-                   edgecolor='none', 
-                   transparent=False, 
-                   format='png')
-        plt.close()
-        
-        # Recortar franjas blancas automáticamente
-        self.recortar_franjas_blancas(ruta_completa)
-        
-        return ruta_completa
+        # Fondo gris solo en el total
+        spec = {
+            'datos': data,
+            'encabezados': [
+                columna_grupo,
+                f'Importe {fecha_anterior}',
+                f'Trans. {fecha_anterior}',
+                f'Importe {fecha_nueva}',
+                f'Trans. {fecha_nueva}',
+                'Variación'
+            ],
+            'fuente': 8,
+            'filas_gris': [len(data) - 1],
+            'col_variacion': 5,
+        }
+        return spec, self._ruta_imagen(canal, fecha_anterior, fecha_nueva)
 
-    def crear_imagen_canal_doble(self, df_anterior, df_nuevo, canal, col_importe, fecha_anterior, fecha_nueva, vista='resumen'):
-        """Crear imágenes para canales con doble vista (resumen y detalle) CON FORMATO CONDICIONAL"""
-        # Configurar tamaño según vista
-        if vista == 'resumen':
-            figsize = (12, 6)
-        else:
-            figsize = (15, 8)
-            
-        # Crear figura con configuración específica
-        fig = plt.figure(figsize=figsize, facecolor='white', dpi=300)
-        
-        # Crear axes que ocupen toda la figura sin márgenes
-        ax = fig.add_axes([0, 0, 1, 1])
-        ax.set_facecolor('white')
-        
+    def tabla_canal_doble(self, corte, canal, fecha_anterior, fecha_nueva, vista='resumen'):
+        """Tabla para canales con doble vista (resumen y detalle) CON FORMATO CONDICIONAL → (spec, ruta)"""
         # Configuración de columnas por canal
         config_canales = {
             'RETAIL': ['ALIADO COMERCIAL', 'SEDE'],
@@ -1235,45 +1006,11 @@ class SalesImageGenerator:
         
         columnas_grupo = config_canales.get(canal, ['SEDE'])
         
-        # Procesar datos
-        def procesar_dataframe(df, sufijo):
-            if df.empty:
-                return pd.DataFrame()
-                
-            if len(columnas_grupo) == 1:
-                grupo = df.groupby(columnas_grupo[0]).agg(
-                    Importe=(col_importe, 'sum'),
-                    Transacciones=('codigo_unico', 'nunique')
-                )
-            else:
-                grupo = df.groupby(columnas_grupo).agg(
-                    Importe=(col_importe, 'sum'),
-                    Transacciones=('codigo_unico', 'nunique')
-                )
-            
-            grupo.columns = [f'Importe_{sufijo}', f'Transacciones_{sufijo}']
-            return grupo
-        
-        tabla_anterior = procesar_dataframe(df_anterior, 'Anterior')
-        tabla_nuevo = procesar_dataframe(df_nuevo, 'Nuevo')
+        # Importes y transacciones de ambos periodos (y su variación) desde el corte del cubo
+        tabla_combinada = comparar(corte, columnas_grupo, canal)
         
-        if tabla_anterior.empty and tabla_nuevo.empty:
+        if tabla_combinada.empty:
             return None
-            
-        # Combinar tablas
-        if tabla_anterior.empty:
-            tabla_combinada = tabla_nuevo.copy()
-            tabla_combinada['Importe_Anterior'] = 0
-            tabla_combinada['Transacciones_Anterior'] = 0
-        elif tabla_nuevo.empty:
-            tabla_combinada = tabla_anterior.copy()
-            tabla_combinada['Importe_Nuevo'] = 0
-            tabla_combinada['Transacciones_Nuevo'] = 0
-        else:
-            tabla_combinada = pd.merge(tabla_anterior, tabla_nuevo, left_index=True, right_index=True, how='outer').fillna(0)
-        
-        # Calcular variación
-        tabla_combinada['Variacion_Importe'] = tabla_combinada['Importe_Nuevo'] - tabla_combinada['Importe_Anterior']
         
         # Preparar datos según la vista
         data = []
@@ -1395,121 +1132,52 @@ class SalesImageGenerator:
             ])
         subtotales_info.append(False)  # El total no es subtotal, es total
         
-        # Crear tabla
-        tabla = ax.table(cellText=data,
-                        colLabels=headers,
-                        cellLoc='center',
-                        loc='center')
-        
-        # Configurar estilo
-        tabla.auto_set_font_size(False)
-        tabla.set_fontsize(7)
-        tabla.scale(1.1, 1.4)
+        # Fondo gris en el total y, en detalle, en los subtotales por aliado
+        filas_gris = [len(data) - 1]
+        if vista != 'resumen':
+            filas_gris += [i for i, es_subtotal in enumerate(subtotales_info) if es_subtotal]
         
-        # Ajustar ancho de columnas según vista
-        cellDict = tabla.get_celld()
-        num_columnas = len(headers)
-        tabla.auto_set_column_width(col=list(range(num_columnas)))
+        # Variación: columna 5 en resumen (sin SEDE), 6 en detalle (con SEDE)
+        col_variacion_idx = 5 if vista == 'resumen' else 6
         
-        if vista == 'resumen':
-            # Vista resumen: 6 columnas (sin SEDE)
-            for i in range(len(data) + 1):
-                cellDict[(i, 0)].set_width(0.3)  # Aliado Comercial más ancho
-                for j in range(1, 6):
-                    cellDict[(i, j)].set_width(0.14)  # Resto de columnas
-        else:
-            # Vista detalle: 7 columnas (con SEDE)
-            for i in range(len(data) + 1):
-                cellDict[(i, 0)].set_width(0.25)  # Aliado Comercial
-                cellDict[(i, 1)].set_width(0.20)  # Sede
-                for j in range(2, 7):
-                    cellDict[(i, j)].set_width(0.11)  # Resto de columnas
-        
-        # Aplicar colores
-        num_filas = len(data)
-        for i in range(num_filas):
-            for j in range(num_columnas):
-                if i == num_filas - 1:  # Fila total
-                    tabla[(i+1, j)].set_facecolor('#bdc3c7')
-                    tabla[(i+1, j)].set_text_props(weight='bold')
-                elif vista == 'resumen':  # En resumen, todas las filas de datos son blancas
-                    tabla[(i+1, j)].set_facecolor('white')
-                    tabla[(i+1, j)].set_text_props(weight='normal')
-                elif subtotales_info[i]:  # Filas de subtotal en detalle (mismo color que total)
-                    tabla[(i+1, j)].set_facecolor('#bdc3c7')
-                    tabla[(i+1, j)].set_text_props(weight='bold')
-                else:  # Filas de datos en detalle
-                    tabla[(i+1, j)].set_facecolor('white')
-                    tabla[(i+1, j)].set_text_props(weight='normal')
-        
-        # NUEVO: Aplicar formato condicional a la columna de variación
-        if vista == 'resumen':
-            col_variacion_idx = 5  # Columna de variación en vista resumen
-        else:
-            col_variacion_idx = 6  # Columna de variación en vista detalle
-            
-        self._aplicar_formato_condicional(tabla, data, col_variacion_idx, num_filas, num_filas - 1)
-        
-        # Headers
-        for j in range(num_columnas):
-            tabla[(0, j)].set_facecolor('#3498db')
-            tabla[(0, j)].set_text_props(weight='bold', color='white')
-        
-        ax.axis('off')
-        ax.set_xlim(0, 1)
-        ax.set_ylim(0, 1)
-        
-        # Guardar imagen sin franjas blancas
+        spec = {
+            'datos': data,
+            'encabezados': headers,
+            'fuente': 7,
+            'filas_gris': filas_gris,
+            'col_variacion': col_variacion_idx,
+        }
         sufijo_vista = '_resumen' if vista == 'resumen' else '_detalle'
-        nombre_archivo = f"{canal.replace(' ', '_').replace('Á', 'A').lower()}{sufijo_vista}_{fecha_anterior.replace('/', '-')}_vs_{fecha_nueva.replace('/', '-')}.png"
-        ruta_completa = os.path.join(self.ruta_imagenes, nombre_archivo)
-        
-        plt.savefig(ruta_completa, 
-                   dpi=300, 
-                   bbox_inches='tight',  # Usar 'tight' pero con pad_inches=0
-                   facecolor='white', 
-                   pad_inches=0, 
-                   edgecolor='none', 
-                   transparent=False, 
-                   format='png')
-        
-        plt.close()
-        
-        # Recortar franjas blancas automáticamente
-        self.recortar_franjas_blancas(ruta_completa)
-        
-        return ruta_completa
+        return spec, self._ruta_imagen(canal, fecha_anterior, fecha_nueva, sufijo_vista)
 
-    def generar_todas_las_imagenes(self, df_anterior_filtrado, df_nuevo_filtrado, df_comparativo, 
-                                  col_importe, fecha_anterior, fecha_nueva, hora_corte):
-        """Generar todas las imágenes según la configuración especificada"""
-        imagenes_generadas = []
+    def generar_todas_las_imagenes(self, corte, df_comparativo, fecha_anterior, fecha_nueva, hora_corte):
+        """
+        Generar todas las imágenes según la configuración especificada.
+        Las tablas se arman sobre el corte del cubo (CuboCortes.cortar) y luego
+        se dibujan en paralelo; las rutas vuelven en el orden de envío.
+        """
+        tareas = []
         
-        print("\nGenerando imágenes...")
+        print("\nPreparando tablas de imágenes...")
         
         # 1. Resumen General
-        print("1. Creando imagen de Resumen General...")
-        ruta_resumen = self.crear_imagen_resumen_general(df_comparativo, fecha_anterior, fecha_nueva, hora_corte)
-        if ruta_resumen:
-            imagenes_generadas.append(ruta_resumen)
-            print(f"   ✓ {os.path.basename(ruta_resumen)}")
+        print("1. Resumen General")
+        tareas.append(self.tabla_resumen_general(df_comparativo, fecha_anterior, fecha_nueva, hora_corte))
+        
+        # Canales con ventas en el corte
+        canales_con_datos = set(corte['CANAL_VENTA'].unique())
         
         # Canales con una sola vista
         canales_simples = ['ALO CÁLIDDA', 'CSC', 'TIENDAS CÁLIDDA', 'DIGITAL']
         
         # 2-5. Canales simples
         for i, canal in enumerate(canales_simples, 2):
-            print(f"{i}. Creando imagen para {canal}...")
-            
-            # Filtrar datos por canal
-            df_ant_canal = df_anterior_filtrado[df_anterior_filtrado['CANAL_VENTA'] == canal] if not df_anterior_filtrado.empty else pd.DataFrame()
-            df_nue_canal = df_nuevo_filtrado[df_nuevo_filtrado['CANAL_VENTA'] == canal] if not df_nuevo_filtrado.empty else pd.DataFrame()
+            print(f"{i}. {canal}")
             
-            if not df_ant_canal.empty or not df_nue_canal.empty:
-                ruta_imagen = self.crear_imagen_canal_simple(df_ant_canal, df_nue_canal, canal, col_importe, fecha_anterior, fecha_nueva)
-                if ruta_imagen:
-                    imagenes_generadas.append(ruta_imagen)
-                    print(f"   ✓ {os.path.basename(ruta_imagen)}")
+            if canal in canales_con_datos:
+                tabla = self.tabla_canal_simple(corte, canal, fecha_anterior, fecha_nueva)
+                if tabla:
+                    tareas.append(tabla)
                 else:
                     print(f"   ✗ No se pudo crear imagen para {canal}")
             else:
@@ -1521,31 +1189,27 @@ class SalesImageGenerator:
         # 6-17. Canales dobles (resumen + detalle)
         contador = len(canales_simples) + 2
         for canal in canales_dobles:
-            print(f"{contador}. Creando imágenes para {canal}...")
-            
-            # Filtrar datos por canal
-            df_ant_canal = df_anterior_filtrado[df_anterior_filtrado['CANAL_VENTA'] == canal] if not df_anterior_filtrado.empty else pd.DataFrame()
-            df_nue_canal = df_nuevo_filtrado[df_nuevo_filtrado['CANAL_VENTA'] == canal] if not df_nuevo_filtrado.empty else pd.DataFrame()
+            print(f"{contador}-{contador + 1}. {canal} (resumen y detalle)")
             
-            if not df_ant_canal.empty or not df_nue_canal.empty:
-                # Vista resumen
-                ruta_resumen = self.crear_imagen_canal_doble(df_ant_canal, df_nue_canal, canal, col_importe, fecha_anterior, fecha_nueva, 'resumen')
-                if ruta_resumen:
-                    imagenes_generadas.append(ruta_resumen)
-                    print(f"   ✓ Resumen: {os.path.basename(ruta_resumen)}")
-                
-                # Vista detalle
-                contador += 1
-                print(f"{contador}. Creando vista detallada para {canal}...")
-                ruta_detalle = self.crear_imagen_canal_doble(df_ant_canal, df_nue_canal, canal, col_importe, fecha_anterior, fecha_nueva, 'detalle')
-                if ruta_detalle:
-                    imagenes_generadas.append(ruta_detalle)
-                    print(f"   ✓ Detalle: {os.path.basename(ruta_detalle)}")
+            if canal in canales_con_datos:
+                for vista in ('resumen', 'detalle'):
+                    tabla = self.tabla_canal_doble(corte, canal, fecha_anterior, fecha_nueva, vista)
+                    if tabla:
+                        tareas.append(tabla)
             else:
                 print(f"   ✗ Sin datos para {canal}")
-                contador += 1  # Incrementar contador aunque no haya datos
             
-            contador += 1
+            contador += 2
+        
+        # Dibujo y guardado (el orden de las rutas es el de las tareas)
+        print(f"\nGenerando {len(tareas)} imágenes...")
+        rutas = renderizar_imagenes([(dibujar_tabla, spec, ruta) for spec, ruta in tareas])
+        
+        imagenes_generadas = []
+        for ruta in rutas:
+            if ruta:
+                imagenes_generadas.append(ruta)
+                print(f"   ✓ {os.path.basename(ruta)}")
         
         return imagenes_generadas
 
@@ -1752,33 +1416,20 @@ async def generar_reporte_imagenes():
     tipo_corte = determinar_hora_corte()
     hora_corte = hora_max_nueva if tipo_corte == "nuevo" else max(hora_max_anterior, hora_max_nueva)
 
-    df_anterior_filtrado = df_anterior[df_anterior['HORA VENTA'] <= hora_corte].copy()
-    df_nuevo_filtrado = df_nuevo[df_nuevo['HORA VENTA'] <= hora_corte].copy()
-
-    def crear_pivot(df, sufijo):
-        if df.empty:
-            return pd.DataFrame(columns=[f'Importe_{sufijo}', f'Transacciones_{sufijo}'])
-        pivot = df.groupby('CANAL_VENTA').agg(
-            Importe=(col_importe, 'sum'),
-            Transacciones=('codigo_unico', 'nunique')
-        )
-        pivot.columns = [f'Importe_{sufijo}', f'Transacciones_{sufijo}']
-        return pivot
-
-    pivot_anterior = crear_pivot(df_anterior_filtrado, 'Anterior')
-    pivot_nuevo = crear_pivot(df_nuevo_filtrado, 'Nuevo')
+    # Cubo preagregado (una sola agrupación) y corte a la hora elegida
+    cubo = CuboCortes(df_anterior, df_nuevo, col_importe)
+    corte = cubo.cortar(hora_corte)
 
-    if pivot_anterior.empty and pivot_nuevo.empty:
+    df_comparativo = comparar(corte, ['CANAL_VENTA'])
+    if df_comparativo.empty:
         print("No hay datos para comparar")
         return
 
-    df_comparativo = pd.merge(pivot_anterior, pivot_nuevo, left_index=True, right_index=True, how='outer').fillna(0)
-    df_comparativo['Variación Importe'] = df_comparativo['Importe_Nuevo'] - df_comparativo['Importe_Anterior']
+    df_comparativo = df_comparativo.rename(columns={'Variacion_Importe': 'Variación Importe'})
     df_comparativo.loc['TOTAL'] = df_comparativo.sum()
 
     imagenes_generadas = generator.generar_todas_las_imagenes(
-        df_anterior_filtrado, df_nuevo_filtrado, df_comparativo,
-        col_importe, fecha_anterior, fecha_nueva, hora_corte
+        corte, df_comparativo, fecha_anterior, fecha_nueva, hora_corte
     )
 
     # Enviar reporte con timeout de 10 minutos (600 segundos)
@@ -7,6 +7,12 @@ from sqlalchemy import create_engine, text
 import os
 from datetime import datetime
 import warnings
+import sys
+from pathlib import Path
+
+# Librería compartida del repositorio (fnb_comun)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from fnb_comun.ingesta import deteccion
 
 # Suprimir warnings específicos
 warnings.filterwarnings('ignore', category=UserWarning, message='.*dayfirst.*')
@@ -61,27 +67,12 @@ MAPEO_NOMBRES_COLUMNAS = {
 # ======================
 
 def detectar_codificacion(archivo):
-    """Detecta la codificación del archivo"""
-    codificaciones_comunes = ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1', 'utf-16']
-    
-    for encoding in codificaciones_comunes:
-        try:
-            with open(archivo, 'r', encoding=encoding) as file:
-                sample = file.read(5000)
-                if len(sample) > 0 and not any(ord(char) > 65535 for char in sample[:100]):
-                    return encoding
-        except (UnicodeDecodeError, UnicodeError):
-            continue
-    
-    return 'latin-1'
+    """Detecta la codificación del archivo (BOM o muestra de bytes, fnb_comun.ingesta.deteccion)"""
+    return deteccion.detectar_codificacion(archivo)
 
 def detectar_separador(linea_cabecera):
     """Detecta el separador utilizado en el archivo"""
-    separadores = ['\t', ';', ',', '|']
-    for sep in separadores:
-        if linea_cabecera.count(sep) > 5:
-            return sep
-    return '\t'
+    return deteccion.detectar_separador(linea_cabecera, min_separadores=5)
 
 def analizar_archivo_txt(archivo_entrada):
     """Analiza la estructura del archivo antes de la limpieza"""
@@ -89,7 +80,7 @@ def analizar_archivo_txt(archivo_entrada):
     
     codificacion = detectar_codificacion(archivo_entrada)
     
-    with open(archivo_entrada, 'r', encoding=codificacion) as file:
+    with open(archivo_entrada, 'r', encoding=codificacion, errors=deteccion.ERRORES_DECODIFICACION) as file:
         lineas = file.readlines()
     
     print(f"Total de líneas: {len(lineas)}")
@@ -120,7 +111,7 @@ def limpiar_archivo_txt(archivo_entrada):
     
     codificacion = detectar_codificacion(archivo_entrada)
     
-    with open(archivo_entrada, 'r', encoding=codificacion) as file:
+    with open(archivo_entrada, 'r', encoding=codificacion, errors=deteccion.ERRORES_DECODIFICACION) as file:
         lineas = file.readlines()
     
     print(f"Total de líneas leídas: {len(lineas)}")
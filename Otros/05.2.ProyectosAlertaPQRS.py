@@ -2,11 +2,20 @@ import pandas as pd
 import numpy as np
 import os
 import glob
-import matplotlib.pyplot as plt
 import win32com.client as win32
-from PIL import Image, ImageOps
+from dataclasses import replace
 from datetime import datetime, timedelta
 import shutil
+import sys
+from pathlib import Path
+
+# Librería compartida del repositorio (fnb_comun)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from fnb_comun.tabla_imagen import ESTILO_NEGRO, guardar_tabla
+
+# Ancho de las imágenes de tabla en el correo (24.5 cm a 96 dpi)
+ANCHO_IMAGEN_CORREO = 927
+ESTILO_PQRS = replace(ESTILO_NEGRO, tamaño=9, fondo_total="#E0E0E0")
 
 
 class SistemaPQRSAutomatico:
@@ -441,66 +450,15 @@ class SistemaPQRSAutomatico:
                 pivot.insert(0, "PROVEEDOR", pivot.pop("PROVEEDOR_DISPLAY"))
 
 
-                # Crear imagen
-                fig, ax = plt.subplots(figsize=(14, max(8, len(pivot) * 0.6)))
-                ax.axis("off")
-
-                tabla = ax.table(
-                    cellText=pivot.values,
-                    colLabels=pivot.columns,
-                    cellLoc="center",
-                    loc="center"
-                )
-
-                tabla.auto_set_font_size(False)
-                tabla.set_fontsize(9)
-                tabla.scale(1.2, 1.5)
-
-                # 🔹 Ajustar manualmente anchos de columnas
-                col_widths = {
-                    "PROVEEDOR": 0.35,
-                    "DETALLE DE TIPIFICACIÓN": 0.45,
-                }
-                for j, col_name in enumerate(pivot.columns):
-                    if col_name in col_widths:
-                        for i in range(len(pivot) + 1):  # incluye cabecera
-                            cell = tabla[i, j]
-                            cell.set_width(col_widths[col_name])
-
-                # Cabecera en negro
-                for i in range(len(pivot.columns)):
-                    tabla[(0, i)].set_facecolor("#000000")
-                    tabla[(0, i)].set_text_props(weight="bold", color="white")
-
-                # Subtotales en gris
-                for row in range(1, len(pivot) + 1):
-                    if pivot.iloc[row - 1]["PROVEEDOR"] == "TOTAL PROVEEDOR":
-                        for col in range(len(pivot.columns)):
-                            tabla[(row, col)].set_facecolor("#E0E0E0")
-                            tabla[(row, col)].set_text_props(weight="bold")
-
-                # Guardar imagen
+                # Imagen al ancho del correo: cabecera en negro, subtotales en gris
                 nombre_imagen = f"tabla_dinamica_pqrs_{proveedor.replace('/', '-').replace('\\', '-')}.png"
                 temp_path = os.path.join(self.carpeta_imagenes, nombre_imagen)
-                plt.tight_layout()
-                plt.savefig(temp_path, dpi=300, bbox_inches="tight")
-                plt.close()
-
-                # Recorte y resize
+                subtotal = pivot["PROVEEDOR"].eq("TOTAL PROVEEDOR").to_numpy()
                 try:
-                    img = Image.open(temp_path).convert("RGB")
-                    gray = ImageOps.grayscale(img)
-                    inverted = ImageOps.invert(gray)
-                    bbox = inverted.getbbox()
-                    if bbox:
-                        img_cropped = img.crop(bbox)
-                        new_width = 927  # 24.5 cm a 96 dpi
-                        w_percent = new_width / float(img_cropped.size[0])
-                        new_height = int(float(img_cropped.size[1]) * w_percent)
-                        img_resized = img_cropped.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                        img_resized.save(temp_path)
-                        imagenes_generadas.append(temp_path)
-                        print(f"✅ Imagen generada: {nombre_imagen}")
+                    guardar_tabla(pivot, temp_path, estilo=ESTILO_PQRS, ancho=ANCHO_IMAGEN_CORREO,
+                                  fondo=np.where(subtotal, ESTILO_PQRS.fondo_total, None), negrita=subtotal)
+                    imagenes_generadas.append(temp_path)
+                    print(f"✅ Imagen generada: {nombre_imagen}")
                 except Exception as e:
                     print(f"❌ Error al procesar imagen para {proveedor}: {e}")
                     continue
@@ -1,12 +1,16 @@
 import pandas as pd
-import numpy as np
-import re
-import chardet
 import pyodbc
 from sqlalchemy import create_engine, text
 import os
 from datetime import datetime
 import warnings
+import sys
+from dataclasses import replace
+from pathlib import Path
+
+# Librería compartida del repositorio (fnb_comun)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from fnb_comun.ingesta import esquemas, limpieza as limpieza_txt, tipos as tipos_sql
 
 # Suprimir warnings específicos
 warnings.filterwarnings('ignore', category=UserWarning, message='.*dayfirst.*')
@@ -42,291 +46,47 @@ MAPEO_NOMBRES_COLUMNAS = {
     "CTA_CONTR": "CTA_CONTR"
 }
 
+# Esquema de la fuente (reglas del TXT compartidas con la carga PostgreSQL),
+# con los tipos, nombres y prefijo de tabla de SQL Server
+ESQUEMA = replace(
+    esquemas.SEGMENTACION,
+    mapeo_columnas=MAPEO_NOMBRES_COLUMNAS,
+    tipos=COLUMN_TYPES_SQL,
+    prefijo_tabla="BD_Segmentacion_Historica",
+    minusculas=False,
+)
+
 # ======================
-# FUNCIONES DE LIMPIEZA DE ARCHIVOS TXT
+# FUNCIONES DE LIMPIEZA DE ARCHIVOS TXT (fnb_comun.ingesta)
 # ======================
 
-def detectar_codificacion(archivo):
-    """Detecta la codificación del archivo"""
-    codificaciones_comunes = ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1', 'utf-16']
-    
-    for encoding in codificaciones_comunes:
-        try:
-            with open(archivo, 'r', encoding=encoding) as file:
-                sample = file.read(5000)
-                if len(sample) > 0 and not any(ord(char) > 65535 for char in sample[:100]):
-                    return encoding
-        except (UnicodeDecodeError, UnicodeError):
-            continue
-    
-    return 'latin-1'
-
-def detectar_separador(linea_cabecera):
-    """Detecta el separador utilizado en el archivo"""
-    separadores = ['\t', ';', ',', '|']
-    for sep in separadores:
-        if linea_cabecera.count(sep) > 2:  # Al menos 3 columnas
-            return sep
-    return '\t'
-
 def analizar_archivo_txt(archivo_entrada):
     """Analiza la estructura del archivo antes de la limpieza"""
-    print("=== ANÁLISIS DEL ARCHIVO TXT SEGMENTACIÓN ===")
-    
-    codificacion = detectar_codificacion(archivo_entrada)
-    
-    with open(archivo_entrada, 'r', encoding=codificacion) as file:
-        lineas = file.readlines()
-    
-    print(f"Total de líneas: {len(lineas)}")
-    
-    if len(lineas) > 0:
-        # Asumir que la primera línea es la cabecera
-        separador = detectar_separador(lineas[0])
-        cabecera = lineas[0].strip().split(separador)
-        print(f"Cabecera detectada: {len(cabecera)} columnas")
-        print(f"Columnas: {', '.join(cabecera)}")
-        
-        # Verificar algunas filas de datos
-        problemas = 0
-        for i, linea in enumerate(lineas[1:min(100, len(lineas))], start=2):
-            if linea.strip() == '':
-                continue
-            campos = linea.strip().split(separador)
-            if len(campos) != len(cabecera):
-                problemas += 1
-        
-        if problemas > 0:
-            print(f"⚠️  Filas con estructura diferente (muestra): {problemas}")
-        else:
-            print("✅ Estructura consistente detectada")
-    
-    print("=" * 50)
+    limpieza_txt.analizar_archivo_txt(archivo_entrada, ESQUEMA)
 
 def limpiar_archivo_txt(archivo_entrada):
-    """Limpia un archivo TXT de SEGMENTACIÓN y retorna DataFrame"""
-    print("=== INICIANDO LIMPIEZA DE ARCHIVO TXT SEGMENTACIÓN ===")
-    
-    codificacion = detectar_codificacion(archivo_entrada)
-    
-    with open(archivo_entrada, 'r', encoding=codificacion) as file:
-        lineas = file.readlines()
-    
-    print(f"Total de líneas leídas: {len(lineas)}")
-    
-    if len(lineas) <= 1:
-        print("❌ Error: El archivo no tiene suficientes líneas para procesar")
-        return None
-    
-    # Primera línea es la cabecera
-    separador = detectar_separador(lineas[0])
-    cabecera_raw = lineas[0].strip().split(separador)
-    
-    # Limpiar cabecera
-    cabecera = [col.strip() for col in cabecera_raw]
-    
-    num_columnas_esperadas = len(cabecera)
-    print(f"Cabecera extraída: {num_columnas_esperadas} columnas")
-    print(f"Columnas detectadas: {', '.join(cabecera)}")
-    
-    # Procesar datos desde la línea 2 (índice 1)
-    datos_raw = lineas[1:]
-    datos_limpios = []
-    filas_omitidas = 0
-    
-    for i, linea in enumerate(datos_raw, start=2):
-        if linea.strip() == '':
-            continue
-            
-        campos = linea.strip().split(separador)
-        
-        if len(campos) == num_columnas_esperadas:
-            datos_limpios.append(campos)
-        else:
-            filas_omitidas += 1
-    
-    if filas_omitidas > 0:
-        print(f"⚠️  Filas omitidas por estructura incorrecta: {filas_omitidas}")
-    print(f"Total de filas procesadas: {len(datos_limpios)}")
-    
-    if len(datos_limpios) == 0:
-        print("❌ No se procesaron datos válidos")
-        return None
-    
-    # Crear DataFrame
-    df = pd.DataFrame(datos_limpios, columns=cabecera)
-    
-    # FILTRAR SOLO COLUMNAS MAPEADAS
-    columnas_originales_mapeadas = list(MAPEO_NOMBRES_COLUMNAS.keys())
-    columnas_existentes = [col for col in df.columns if col in columnas_originales_mapeadas]
-    
-    if len(columnas_existentes) < len(columnas_originales_mapeadas):
-        columnas_faltantes = set(columnas_originales_mapeadas) - set(columnas_existentes)
-        print(f"⚠️  Columnas esperadas pero no encontradas: {', '.join(columnas_faltantes)}")
-    
-    if len(columnas_existentes) == 0:
-        print("❌ No se encontraron columnas mapeadas en el archivo")
-        return None
-    
-    # Mantener solo las columnas mapeadas
-    df = df[columnas_existentes]
-    print(f"✅ Columnas seleccionadas (mapeadas): {len(columnas_existentes)} columnas")
-    
-    # Limpieza general
-    df = aplicar_limpieza_general(df)
-    
-    print(f"✅ DataFrame creado: {len(df)} filas x {len(df.columns)} columnas")
-    
-    return df
-
-def aplicar_limpieza_general(df):
-    """Aplica limpieza general a los datos del DataFrame"""
-    for col in df.columns:
-        if df[col].dtype == 'object':
-            df[col] = df[col].astype(str).str.replace('\n', ' ', regex=False)
-            df[col] = df[col].str.replace('\r', ' ', regex=False)
-            df[col] = df[col].str.replace('\t', ' ', regex=False)
-            df[col] = df[col].str.strip()
-            df[col] = df[col].replace(['nan', 'NaN', 'NULL', ''], np.nan)
-    
-    df = convertir_tipos_datos_basicos(df)
-    
-    return df
-
-def convertir_tipos_datos_basicos(df):
-    """Convierte tipos de datos básicos"""
-    for col in df.columns:
-        if df[col].dtype == 'object':
-            # Verificar si parece fecha
-            muestra = df[col].dropna().head(10)
-            if any(re.match(r'\d{1,2}[/-]\d{1,2}[/-]\d{2,4}', str(val)) for val in muestra):
-                try:
-                    df[col] = pd.to_datetime(df[col], errors='coerce', dayfirst=True)
-                    continue
-                except:
-                    pass
-            
-            # Verificar si parece numérico
-            try:
-                col_limpia = df[col].astype(str).str.replace(',', '').str.replace(' ', '')
-                numeric_df = pd.to_numeric(col_limpia, errors='coerce')
-                
-                if numeric_df.notna().sum() / len(df) > 0.8:
-                    df[col] = numeric_df
-            except:
-                pass
-    
-    return df
+    """Limpia un archivo TXT y retorna DataFrame (None si no hay datos válidos)"""
+    return limpieza_txt.limpiar_archivo_txt(archivo_entrada, ESQUEMA)
 
 # ======================
 # FUNCIONES OPTIMIZADAS PARA SQL SERVER
 # ======================
 
 def generar_nombre_tabla(archivo_path):
-    """Genera nombre de tabla basado en el archivo - SEGMENTACIÓN"""
-    nombre_archivo = os.path.basename(archivo_path)
-    
-    # Buscar patrón de fecha en el nombre del archivo (DDMMYYYY)
-    fecha_match = re.search(r'(\d{8})', nombre_archivo)
-    if fecha_match:
-        fecha = fecha_match.group(1)
-        # Convertir de DDMMYYYY a YYYYMMDD
-        dia = fecha[0:2]
-        mes = fecha[2:4]
-        anio = fecha[4:8]
-        fecha_sql = f"{anio}{mes}{dia}"
-        return f"BD_Segmentacion_Historica_{fecha_sql}"
-    
-    # Fallback: usar fecha actual
-    timestamp = datetime.now().strftime("%Y%m%d")
-    return f"BD_Segmentacion_Historica_{timestamp}"
+    """Genera nombre de tabla basado en el archivo"""
+    return esquemas.generar_nombre_tabla(archivo_path, ESQUEMA)
 
 def limpiar_nombres_columnas_sql(df):
     """Limpia nombres de columnas para SQL Server"""
-    print("\n=== Limpiando nombres de columnas para SQL ===")
-    
-    nuevos_nombres = []
-    cambios = []
-    
-    for col in df.columns:
-        # PRIMERO: Verificar mapeo directo
-        col_limpio = col.strip()
-        
-        if col_limpio in MAPEO_NOMBRES_COLUMNAS:
-            nuevo_nombre = MAPEO_NOMBRES_COLUMNAS[col_limpio]
-        else:
-            # SEGUNDO: Limpieza automática si no está en el mapeo
-            nuevo_nombre = col_limpio
-            nuevo_nombre = re.sub(r'[^\w\s]', '_', nuevo_nombre)
-            nuevo_nombre = re.sub(r'\s+', '_', nuevo_nombre)
-            nuevo_nombre = re.sub(r'_+', '_', nuevo_nombre)
-            nuevo_nombre = nuevo_nombre.strip('_')
-        
-        if col != nuevo_nombre:
-            cambios.append((col, nuevo_nombre))
-        
-        nuevos_nombres.append(nuevo_nombre)
-    
-    if cambios:
-        print(f"Columnas renombradas: {len(cambios)}")
-        for orig, nuevo in cambios:
-            print(f"  {orig} → {nuevo}")
-    else:
-        print("✅ No se requirieron cambios en nombres de columnas")
-    
-    df.columns = nuevos_nombres
-    return df
+    return tipos_sql.limpiar_nombres_columnas(df, ESQUEMA)
 
 def convertir_tipos_datos_sql(df):
-    """Convierte tipos de datos según mapeo SQL - SEGMENTACIÓN"""
-    print("\n=== Conversión de tipos para SQL Server ===")
-    
-    for col in df.columns:
-        # IGNORAR COLUMNAS NO MAPEADAS
-        if col not in COLUMN_TYPES_SQL:
-            continue
-            
-        sql_type = COLUMN_TYPES_SQL[col]
-        
-        try:
-            if sql_type.startswith("VARCHAR"):
-                df[col] = df[col].astype(str)
-                # Aplicar trim (strip) para eliminar espacios
-                df[col] = df[col].str.strip()
-                # Limpiar valores nulos
-                df[col] = df[col].replace(['nan', 'NaN', 'None', 'null'], pd.NA)
-                
-            elif sql_type in ("INT", "BIGINT"):
-                df[col] = pd.to_numeric(df[col], errors="coerce")
-                df[col] = df[col].round(0).astype("Int64")
-                
-            elif "DECIMAL" in sql_type:
-                df[col] = pd.to_numeric(df[col], errors="coerce")
-                df[col] = df[col].round(2)
-                
-            elif sql_type == "DATETIME":
-                df[col] = pd.to_datetime(df[col], errors="coerce", dayfirst=True)
-            
-            print(f"✓ {col}: {sql_type}")
-            
-        except Exception as e:
-            print(f"❌ Error convirtiendo {col}: {str(e)}")
-    
-    return df
+    """Convierte tipos de datos según mapeo SQL Server"""
+    return tipos_sql.convertir_tipos_datos(df, ESQUEMA)
 
 def limpiar_datos_sql(df):
     """Limpia datos para SQL Server"""
-    for col in df.select_dtypes(include=["object"]).columns:
-        if df[col].dtype == "object":
-            df[col] = df[col].astype(str)
-            df[col] = df[col].str.replace("¬", "-", regex=False)
-            df[col] = df[col].str.replace("\n", " ", regex=False)
-            df[col] = df[col].str.replace("\r", " ", regex=False)
-            df[col] = df[col].str.replace("\t", " ", regex=False)
-            df[col] = df[col].str.replace('"', '""', regex=False)
-            df[col] = df[col].replace(['nan', 'NaN', 'None'], None)
-    
-    return df
+    return tipos_sql.limpiar_datos(df)
 
 def verificar_tabla_existente(table_name):
     """Verifica si la tabla existe y consulta acción"""
@@ -381,23 +141,7 @@ def verificar_tabla_existente(table_name):
 
 def preparar_dataframe_para_sql(df):
     """Prepara el DataFrame optimizado para SQL Server"""
-    df_prep = df.copy()
-    
-    for col in df_prep.columns:
-        if df_prep[col].dtype == 'object':
-            df_prep[col] = df_prep[col].astype(str)
-            df_prep[col] = df_prep[col].replace(['<NA>', 'nan', 'NaN', 'None', 'NULL'], None)
-            df_prep[col] = df_prep[col].str.replace('\x00', '', regex=False)
-        elif pd.api.types.is_datetime64_any_dtype(df_prep[col]):
-            df_prep[col] = df_prep[col].where(pd.notnull(df_prep[col]), None)
-        elif pd.api.types.is_numeric_dtype(df_prep[col]):
-            if df_prep[col].dtype == 'Int64':
-                df_prep[col] = df_prep[col].where(pd.notnull(df_prep[col]), None)
-            else:
-                df_prep[col] = df_prep[col].replace([np.inf, -np.inf], None)
-                df_prep[col] = df_prep[col].where(pd.notnull(df_prep[col]), None)
-    
-    return df_prep
+    return tipos_sql.preparar_dataframe(df, para_insert=True)
 
 def cargar_dataframe_a_sql_optimizado(df, table_name):
     """Carga optimizada basada en CSV temporal"""
@@ -610,13 +354,12 @@ if __name__ == "__main__":
     try:
         import pandas
         import numpy
-        import chardet
         import pyodbc
         import sqlalchemy
         print("✅ Todas las dependencias están instaladas\n")
     except ImportError as e:
         print(f"❌ Falta dependencia: {e}")
-        print("Instala con: pip install pandas numpy chardet pyodbc sqlalchemy")
+        print("Instala con: pip install pandas numpy pyodbc sqlalchemy")
         exit(1)
     
     main()
\ No newline at end of file
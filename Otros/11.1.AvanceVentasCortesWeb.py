@@ -1,6 +1,8 @@
 import pandas as pd
 import numpy as np
 import os
+import sys
+from pathlib import Path
 import matplotlib.pyplot as plt
 import matplotlib.patches as patches
 from datetime import datetime, time as dt_time
@@ -12,6 +14,11 @@ import asyncio
 import zipfile
 from importlib.machinery import SourceFileLoader
 
+# Librería compartida del repositorio (fnb_comun)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from fnb_comun.cubo_cortes import CuboCortes, comparar
+from fnb_comun.dashboard_cortes import CANALES_SIN_DETALLE, generar_dashboard_cortes
+
 warnings.filterwarnings('ignore', category=UserWarning, module='openpyxl')
 
 
@@ -229,928 +236,37 @@ def determinar_hora_corte():
         return "mayor"
 
 
-def crear_tablas_detalladas(df_anterior_filtrado, df_nuevo_filtrado, col_importe, fecha_anterior, fecha_nueva):
-    """Crear tablas detalladas dinámicas por canal con orden específico"""
-    
-    # Configuración de agrupación por canal
-    config_canales = {
-        'ALO CÁLIDDA': ['ASESOR DE VENTAS'],  # Cambiado de 'ASESOR DE VENTA' a 'SEDE'
-        'CSC': ['SEDE'],
-        'DIGITAL': ['SEDE'],
-        'TIENDAS CÁLIDDA': ['SEDE'],
-        'RETAIL': ['ALIADO COMERCIAL', 'SEDE'],
-        'MOTOS': ['ALIADO COMERCIAL', 'SEDE'],
-        'GRANDES SUPERFICIES': ['ALIADO COMERCIAL', 'SEDE'],
-        'MATERIALES Y ACABADOS DE CONSTRUCCIÓN': ['ALIADO COMERCIAL', 'SEDE'],
-        'CANAL PROVEEDOR': ['ALIADO COMERCIAL', 'SEDE'],
-        'FFVV - PUERTA A PUERTA': ['ALIADO COMERCIAL', 'SEDE'],
-        # Se pueden agregar más canales dinámicamente
-    }
-    
-    # Debug: Mostrar canales disponibles
-    print(f"\n🔍 DEBUG - Canales disponibles:")
-    if not df_anterior_filtrado.empty:
-        print(f"   Anterior: {sorted(df_anterior_filtrado['CANAL_VENTA'].unique())}")
-    if not df_nuevo_filtrado.empty:
-        print(f"   Nuevo: {sorted(df_nuevo_filtrado['CANAL_VENTA'].unique())}")
-    
-    # Orden específico para mostrar los canales
-    orden_canales = [
-        'ALO CÁLIDDA',
-        'CSC', 
-        'DIGITAL',
-        'TIENDAS CÁLIDDA',
-        'RETAIL',
-        'MOTOS',
-        'GRANDES SUPERFICIES',
-        'MATERIALES Y ACABADOS DE CONSTRUCCIÓN',
-        'CANAL PROVEEDOR',
-        'FFVV - PUERTA A PUERTA'
-    ]
-    
-    tablas_html = {}
-    
-    # Obtener todos los canales únicos de ambos dataframes
-    canales_anteriores = set(df_anterior_filtrado['CANAL_VENTA'].unique()) if not df_anterior_filtrado.empty else set()
-    canales_nuevos = set(df_nuevo_filtrado['CANAL_VENTA'].unique()) if not df_nuevo_filtrado.empty else set()
-    todos_canales = canales_anteriores.union(canales_nuevos)
-    
-    # Procesar canales en orden específico primero
-    for canal in orden_canales:
-        print(f"\n🔍 Procesando canal: {canal}")
-        print(f"   ¿Está en todos_canales? {canal in todos_canales}")
-        
-        if canal in todos_canales:
-            # Filtrar datos por canal
-            df_ant_canal = df_anterior_filtrado[df_anterior_filtrado['CANAL_VENTA'] == canal] if not df_anterior_filtrado.empty else pd.DataFrame()
-            df_nue_canal = df_nuevo_filtrado[df_nuevo_filtrado['CANAL_VENTA'] == canal] if not df_nuevo_filtrado.empty else pd.DataFrame()
-            
-            print(f"   Registros anteriores: {len(df_ant_canal)}")
-            print(f"   Registros nuevos: {len(df_nue_canal)}")
-            
-            if df_ant_canal.empty and df_nue_canal.empty:
-                print(f"   ⚠️ Sin datos para {canal}")
-                continue
-                
-            # Determinar columnas de agrupación
-            if canal in config_canales:
-                columnas_grupo = config_canales[canal]
-                print(f"   Columnas configuradas: {columnas_grupo}")
-            else:
-                # Para canales no configurados, usar SEDE por defecto
-                columnas_grupo = ['SEDE']
-                print(f"   Usando columnas por defecto: {columnas_grupo}")
-                
-            # Verificar que las columnas existen en los datos
-            columnas_disponibles_ant = df_ant_canal.columns.tolist() if not df_ant_canal.empty else []
-            columnas_disponibles_nue = df_nue_canal.columns.tolist() if not df_nue_canal.empty else []
-            columnas_disponibles = set(columnas_disponibles_ant + columnas_disponibles_nue)
-            
-            columnas_grupo = [col for col in columnas_grupo if col in columnas_disponibles]
-            print(f"   Columnas disponibles: {columnas_grupo}")
-            
-            if not columnas_grupo:
-                print(f"   ❌ No hay columnas válidas para {canal}")
-                continue
-                
-            # Crear tabla detallada
-            tabla_html = crear_tabla_canal(df_ant_canal, df_nue_canal, canal, columnas_grupo, col_importe, fecha_anterior, fecha_nueva)
-            if tabla_html:
-                tablas_html[canal] = tabla_html
-                print(f"   ✅ Tabla creada para {canal}")
-            else:
-                print(f"   ❌ No se pudo crear tabla para {canal}")
-        else:
-            print(f"   ❌ Canal {canal} no encontrado en los datos")
-    
-    # Procesar canales restantes que no están en el orden específico
-    for canal in todos_canales:
-        if canal not in orden_canales and canal not in ['NO IDENTIFICADO', '']:
-            # Filtrar datos por canal
-            df_ant_canal = df_anterior_filtrado[df_anterior_filtrado['CANAL_VENTA'] == canal] if not df_anterior_filtrado.empty else pd.DataFrame()
-            df_nue_canal = df_nuevo_filtrado[df_nuevo_filtrado['CANAL_VENTA'] == canal] if not df_nuevo_filtrado.empty else pd.DataFrame()
-            
-            if df_ant_canal.empty and df_nue_canal.empty:
-                continue
-                
-            # Para canales no configurados, usar SEDE por defecto
-            columnas_grupo = ['SEDE']
-                
-            # Verificar que las columnas existen en los datos
-            columnas_disponibles_ant = df_ant_canal.columns.tolist() if not df_ant_canal.empty else []
-            columnas_disponibles_nue = df_nue_canal.columns.tolist() if not df_nue_canal.empty else []
-            columnas_disponibles = set(columnas_disponibles_ant + columnas_disponibles_nue)
-            
-            columnas_grupo = [col for col in columnas_grupo if col in columnas_disponibles]
-            
-            if not columnas_grupo:
-                continue
-                
-            # Crear tabla detallada
-            tabla_html = crear_tabla_canal(df_ant_canal, df_nue_canal, canal, columnas_grupo, col_importe, fecha_anterior, fecha_nueva)
-            if tabla_html:
-                tablas_html[canal] = tabla_html
-    
-    return tablas_html
-
-
-def crear_tabla_canal(df_anterior, df_nuevo, canal, columnas_grupo, col_importe, fecha_anterior, fecha_nueva):
-    """Crear tabla HTML para un canal específico con agrupaciones dinámicas"""
-    
-    def procesar_dataframe(df, sufijo):
-        if df.empty:
-            return pd.DataFrame()
-            
-        # Si hay una sola columna de agrupación
-        if len(columnas_grupo) == 1:
-            grupo = df.groupby(columnas_grupo[0]).agg(
-                Importe=(col_importe, 'sum'),
-                Transacciones=('codigo_unico', 'nunique')
-            )
-            grupo.columns = [f'Importe_{sufijo}', f'Transacciones_{sufijo}']
-            return grupo
-            
-        # Si hay múltiples columnas (como RETAIL y otros con ALIADO + SEDE)
-        else:
-            # Crear agrupación jerárquica
-            grupo = df.groupby(columnas_grupo).agg(
-                Importe=(col_importe, 'sum'),
-                Transacciones=('codigo_unico', 'nunique')
-            )
-            grupo.columns = [f'Importe_{sufijo}', f'Transacciones_{sufijo}']
-            return grupo
-    
-    # Procesar ambos períodos
-    tabla_anterior = procesar_dataframe(df_anterior, 'Anterior')
-    tabla_nuevo = procesar_dataframe(df_nuevo, 'Nuevo')
-    
-    if tabla_anterior.empty and tabla_nuevo.empty:
-        return None
-        
-    # Combinar tablas
-    if tabla_anterior.empty:
-        tabla_combinada = tabla_nuevo.copy()
-        tabla_combinada[f'Importe_Anterior'] = 0
-        tabla_combinada[f'Transacciones_Anterior'] = 0
-    elif tabla_nuevo.empty:
-        tabla_combinada = tabla_anterior.copy()
-        tabla_combinada[f'Importe_Nuevo'] = 0
-        tabla_combinada[f'Transacciones_Nuevo'] = 0
-    else:
-        tabla_combinada = pd.merge(tabla_anterior, tabla_nuevo, left_index=True, right_index=True, how='outer').fillna(0)
-    
-    # Calcular variación
-    tabla_combinada['Variacion_Importe'] = tabla_combinada[f'Importe_Nuevo'] - tabla_combinada[f'Importe_Anterior']
-    
-    # Determinar si necesita funcionalidad expandir/contraer
-    canales_expandibles = ['RETAIL', 'CANAL PROVEEDOR', 'GRANDES SUPERFICIES', 'FFVV - PUERTA A PUERTA', 
-                          'MATERIALES Y ACABADOS DE CONSTRUCCIÓN', 'MOTOS']
-    es_expandible = canal in canales_expandibles and len(columnas_grupo) > 1
-    
-    # Generar HTML de la tabla
-    html = f"""
-    <div class="canal-section">
-        <div class="canal-header">
-            <h3 class="canal-title">📊 {canal}</h3>
-        </div>
-        <div class="table-container">
-            <div class="table-responsive">
-                <table class="detail-table">
-                    <thead>
-                        <tr>
-    """
-    
-    # Cabeceras dinámicas según columnas de agrupación
-    for col in columnas_grupo:
-        html += f"<th>{col}</th>"
-    
-    html += f"""
-                            <th>Importe {fecha_anterior}</th>
-                            <th>Trans. {fecha_anterior}</th>
-                            <th>Importe {fecha_nueva}</th>
-                            <th>Trans. {fecha_nueva}</th>
-                            <th>Variación</th>
-                        </tr>
-                    </thead>
-                    <tbody>
-    """
-    
-    # Si hay agrupación jerárquica (múltiples columnas) con funcionalidad expandible
-    if len(columnas_grupo) > 1:
-        # Agrupar por primera columna para crear subtotales
-        primer_nivel = tabla_combinada.groupby(level=0)
-        
-        aliado_counter = 0
-        for grupo_nombre, grupo_data in primer_nivel:
-            aliado_counter += 1
-            
-            # Fila de subtotal del grupo (expandible)
-            subtotal_importe_ant = grupo_data[f'Importe_Anterior'].sum()
-            subtotal_trans_ant = grupo_data[f'Transacciones_Anterior'].sum()
-            subtotal_importe_nue = grupo_data[f'Importe_Nuevo'].sum()
-            subtotal_trans_nue = grupo_data[f'Transacciones_Nuevo'].sum()
-            subtotal_variacion = subtotal_importe_nue - subtotal_importe_ant
-            
-            # ID único para esta sección
-            section_id = f"{canal.replace(' ', '_').replace('-', '_')}_{aliado_counter}"
-            
-            # Determinar clase de variación para subtotales
-            clase_variacion_subtotal = 'positive' if subtotal_variacion > 0 else 'negative' if subtotal_variacion < 0 else ''
-            
-            if es_expandible:
-                html += f"""
-                        <tr class="subtotal-row clickable-row" onclick="toggleSection('{section_id}')">
-                            <td>
-                                <div class="expand-control">
-                                    <span class="expand-icon" id="icon_{section_id}">▼</span>
-                                    <strong>{grupo_nombre}</strong>
-                                </div>
-                            </td>
-                            <td colspan="{len(columnas_grupo)-1}"></td>
-                            <td><strong>S/ {subtotal_importe_ant:,.0f}</strong></td>
-                            <td><strong>{subtotal_trans_ant:,.0f}</strong></td>
-                            <td><strong>S/ {subtotal_importe_nue:,.0f}</strong></td>
-                            <td><strong>{subtotal_trans_nue:,.0f}</strong></td>
-                            <td class="{clase_variacion_subtotal}"><strong>S/ {subtotal_variacion:+,.0f}</strong></td>
-                        </tr>
-                """
-            else:
-                html += f"""
-                        <tr class="subtotal-row">
-                            <td><strong>{grupo_nombre}</strong></td>
-                            <td colspan="{len(columnas_grupo)-1}"></td>
-                            <td><strong>S/ {subtotal_importe_ant:,.0f}</strong></td>
-                            <td><strong>{subtotal_trans_ant:,.0f}</strong></td>
-                            <td><strong>S/ {subtotal_importe_nue:,.0f}</strong></td>
-                            <td><strong>{subtotal_trans_nue:,.0f}</strong></td>
-                            <td class="{clase_variacion_subtotal}"><strong>S/ {subtotal_variacion:+,.0f}</strong></td>
-                        </tr>
-                """
-            
-            # Filas de detalle del grupo (colapsables si es expandible)
-            for idx, row in grupo_data.iterrows():
-                valores_idx = list(idx) if isinstance(idx, tuple) else [idx]
-                
-                clase_detalle = f"detail-row-{section_id}" if es_expandible else ""
-                style_detalle = 'style="display: none;"' if es_expandible else ""
-                
-                # Determinar clase de variación para filas de detalle
-                clase_variacion_detalle = 'positive' if row['Variacion_Importe'] > 0 else 'negative' if row['Variacion_Importe'] < 0 else ''
-                
-                html += f'<tr class="{clase_detalle}" {style_detalle}>'
-                
-                # Primera columna vacía (ya mostrada en subtotal)
-                html += "<td class='detail-indent'></td>"
-                
-                # Resto de columnas
-                for i, valor in enumerate(valores_idx[1:], 1):
-                    html += f"<td class='detail-cell'>{valor}</td>"
-                
-                html += f"""
-                        <td class='detail-cell'>S/ {row[f'Importe_Anterior']:,.0f}</td>
-                        <td class='detail-cell'>{row[f'Transacciones_Anterior']:,.0f}</td>
-                        <td class='detail-cell'>S/ {row[f'Importe_Nuevo']:,.0f}</td>
-                        <td class='detail-cell'>{row[f'Transacciones_Nuevo']:,.0f}</td>
-                        <td class="detail-cell {clase_variacion_detalle}">S/ {row['Variacion_Importe']:+,.0f}</td>
-                    </tr>
-                """
-    else:
-        # Agrupación simple (una columna)
-        for idx, row in tabla_combinada.iterrows():
-            clase_variacion = 'positive' if row['Variacion_Importe'] > 0 else 'negative' if row['Variacion_Importe'] < 0 else ''
-            html += f"""
-                    <tr>
-                        <td>{idx}</td>
-                        <td>S/ {row[f'Importe_Anterior']:,.0f}</td>
-                        <td>{row[f'Transacciones_Anterior']:,.0f}</td>
-                        <td>S/ {row[f'Importe_Nuevo']:,.0f}</td>
-                        <td>{row[f'Transacciones_Nuevo']:,.0f}</td>
-                        <td class="{clase_variacion}">S/ {row['Variacion_Importe']:+,.0f}</td>
-                    </tr>
-            """
-    
-    # Fila de total con color plomo claro
-    total_importe_ant = tabla_combinada[f'Importe_Anterior'].sum()
-    total_trans_ant = tabla_combinada[f'Transacciones_Anterior'].sum()
-    total_importe_nue = tabla_combinada[f'Importe_Nuevo'].sum()
-    total_trans_nue = tabla_combinada[f'Transacciones_Nuevo'].sum()
-    total_variacion = total_importe_nue - total_importe_ant
-    
-    # Determinar clase de variación para total
-    clase_variacion_total = 'positive' if total_variacion > 0 else 'negative' if total_variacion < 0 else ''
-    
-    html += f"""
-                    <tr class="total-row-detalle">
-                        <td colspan="{len(columnas_grupo)}"><strong>TOTAL {canal}</strong></td>
-                        <td><strong>S/ {total_importe_ant:,.0f}</strong></td>
-                        <td><strong>{total_trans_ant:,.0f}</strong></td>
-                        <td><strong>S/ {total_importe_nue:,.0f}</strong></td>
-                        <td><strong>{total_trans_nue:,.0f}</strong></td>
-                        <td class="{clase_variacion_total}"><strong>S/ {total_variacion:+,.0f}</strong></td>
-                    </tr>
-                </tbody>
-            </table>
-        </div>
-    </div>
-</div>
-    """
-    
-    return html
-
-
-def generar_dashboard_html_detallado(df_comparativo, fecha_anterior, fecha_nueva, hora_corte, tablas_detalladas):
-    """Genera un dashboard HTML sin gráfico y con mejores estilos móviles"""
-    
-    # Generar HTML
-    html_template = f"""
-<!DOCTYPE html>
-<html lang="es">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Avance de Ventas FNB - {fecha_anterior} vs {fecha_nueva}</title>
-    <style>
-        * {{
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }}
-        
-        body {{
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            min-height: 100vh;
-            padding: 15px;
-            font-size: 13px;
-        }}
-        
-        .dashboard-container {{
-            max-width: 1600px;
-            margin: 0 auto;
-            background: white;
-            border-radius: 15px;
-            box-shadow: 0 20px 60px rgba(0,0,0,0.1);
-            overflow: hidden;
-        }}
-        
-        .header {{
-            background: linear-gradient(135deg, #2c3e50 0%, #3498db 100%);
-            color: white;
-            padding: 20px;
-            text-align: center;
-        }}
-        
-        .header h1 {{
-            font-size: 1.8em;
-            margin-bottom: 8px;
-            font-weight: 300;
-        }}
-        
-        .header .subtitle {{
-            font-size: 1em;
-            opacity: 0.9;
-        }}
-        
-        .summary-section {{
-            padding: 20px;
-            background: #f8f9fa;
-        }}
-        
-        .summary-container {{
-            background: white;
-            border-radius: 10px;
-            overflow: hidden;
-            box-shadow: 0 5px 15px rgba(0,0,0,0.08);
-        }}
-        
-        .summary-header {{
-            background: #34495e;
-            color: white;
-            padding: 15px;
-            text-align: center;
-        }}
-        
-        .table-responsive {{
-            overflow-x: auto;
-            -webkit-overflow-scrolling: touch;
-        }}
-        
-        table {{
-            width: 100%;
-            border-collapse: collapse;
-            min-width: 600px;
-        }}
-        
-        th, td {{
-            padding: 8px 4px;
-            text-align: center;
-            border-bottom: 1px solid #ecf0f1;
-            font-size: 11px;
-            white-space: nowrap;
-        }}
-        
-        th {{
-            background: #3498db;
-            color: white;
-            font-weight: 600;
-            font-size: 10px;
-            padding: 10px 4px;
-        }}
-        
-        tbody tr:nth-child(even) {{
-            background-color: #f8f9fa;
-        }}
-        
-        tbody tr:hover {{
-            background-color: #e3f2fd;
-        }}
-        
-        .total-row {{
-            background: #2c3e50 !important;
-            color: white;
-            font-weight: bold;
-        }}
-        
-        /* MEJORA: Clases corregidas para variaciones positivas y negativas */
-        .positive {{
-            color: #27ae60 !important;
-            font-weight: bold;
-        }}
-        
-        .negative {{
-            color: #e74c3c !important;
-            font-weight: bold;
-        }}
-        
-        .details-section {{
-            padding: 20px;
-            background: #f8f9fa;
-        }}
-        
-        .canal-section {{
-            margin-bottom: 20px;
-        }}
-        
-        .canal-header {{
-            background: #34495e;
-            border-radius: 8px 8px 0 0;
-        }}
-        
-        .canal-title {{
-            background: transparent;
-            color: white;
-            padding: 12px 15px;
-            margin: 0;
-            font-size: 1.1em;
-            text-align: center;
-        }}
-        
-        .table-container {{
-            background: white;
-            border-radius: 0 0 8px 8px;
-            overflow: hidden;
-            box-shadow: 0 5px 15px rgba(0,0,0,0.08);
-        }}
-        
-        .detail-table {{
-            min-width: 700px;
-        }}
-        
-        .detail-table th {{
-            background: #3498db;
-            color: white;
-            font-size: 10px;
-            padding: 10px 4px;
-        }}
-        
-        .detail-table td {{
-            font-size: 10px;
-            padding: 6px 3px;
-        }}
-        
-        .subtotal-row {{
-            background: #3498db !important;
-            color: white;
-            font-weight: bold;
-        }}
-        
-        .subtotal-row.collapsed {{
-            background: white !important;
-            color: #2c3e50;
-        }}
-        
-        .subtotal-row.collapsed:hover {{
-            background: #f8f9fa !important;
-        }}
-        
-        .subtotal-row:hover {{
-            background: #2980b9 !important;
-        }}
-        
-        /* MEJORA: Nueva clase para fila de totales en tablas detalladas con plomo claro */
-        .total-row-detalle {{
-            background: #bdc3c7 !important;
-            color: #2c3e50 !important;
-            font-weight: bold;
-        }}
-        
-        .total-row-detalle:hover {{
-            background: #a9b2ba !important;
-        }}
-        
-        .clickable-row {{
-            cursor: pointer;
-            transition: background-color 0.2s ease;
-        }}
-        
-        .clickable-row:hover {{
-            background-color: #2980b9 !important;
-        }}
-        
-        .expand-control {{
-            display: flex;
-            align-items: center;
-            gap: 6px;
-        }}
-        
-        .expand-icon {{
-            font-size: 0.7em;
-            transition: transform 0.3s ease;
-            color: #fff;
-            font-weight: bold;
-        }}
-        
-        .expand-icon.collapsed {{
-            transform: rotate(-90deg);
-        }}
-        
-        .detail-indent {{
-            padding-left: 20px !important;
-            border-left: 2px solid #3498db;
-            background-color: #f8f9fa !important;
-        }}
-        
-        .detail-cell {{
-            background-color: #f8f9fa !important;
-            font-size: 9px;
-        }}
-        
-        .detail-row-collapsed {{
-            display: none;
-        }}
-        
-        .mobile-scroll {{
-            overflow-x: auto;
-            -webkit-overflow-scrolling: touch;
-        }}
-        
-        .footer {{
-            background: #2c3e50;
-            color: white;
-            padding: 15px;
-            text-align: center;
-            font-size: 0.8em;
-        }}
-        
-        /* Estilos específicos para móvil */
-        @media (max-width: 768px) {{
-            body {{
-                padding: 10px;
-                font-size: 11px;
-            }}
-            
-            .header {{
-                padding: 15px;
-            }}
-            
-            .header h1 {{
-                font-size: 1.5em;
-            }}
-            
-            .header .subtitle {{
-                font-size: 0.9em;
-            }}
-            
-            .summary-section, .details-section {{
-                padding: 15px;
-            }}
-            
-            .summary-header {{
-                padding: 12px;
-            }}
-            
-            th, td {{
-                padding: 6px 2px;
-                font-size: 9px;
-            }}
-            
-            th {{
-                font-size: 8px;
-                padding: 8px 2px;
-            }}
-            
-            .detail-table th {{
-                font-size: 8px;
-                padding: 8px 2px;
-            }}
-            
-            .detail-table td {{
-                font-size: 8px;
-                padding: 4px 2px;
-            }}
-            
-            .detail-cell {{
-                font-size: 8px;
-            }}
-            
-            .canal-title {{
-                font-size: 0.9em;
-                padding: 10px 12px;
-            }}
-            
-            .expand-control {{
-                font-size: 0.8em;
-                gap: 4px;
-            }}
-            
-            .expand-icon {{
-                font-size: 0.6em;
-            }}
-            
-            .detail-indent {{
-                padding-left: 15px !important;
-            }}
-            
-            table {{
-                min-width: 500px;
-            }}
-            
-            .detail-table {{
-                min-width: 550px;
-            }}
-        }}
-        
-        @media (max-width: 480px) {{
-            body {{
-                padding: 8px;
-                font-size: 10px;
-            }}
-            
-            .header h1 {{
-                font-size: 1.3em;
-            }}
-            
-            .header .subtitle {{
-                font-size: 0.8em;
-            }}
-            
-            th, td {{
-                padding: 4px 1px;
-                font-size: 8px;
-            }}
-            
-            th {{
-                font-size: 7px;
-                padding: 6px 1px;
-            }}
-            
-            .detail-table th {{
-                font-size: 7px;
-                padding: 6px 1px;
-            }}
-            
-            .detail-table td {{
-                font-size: 7px;
-                padding: 3px 1px;
-            }}
-            
-            .detail-cell {{
-                font-size: 7px;
-            }}
-            
-            .canal-title {{
-                font-size: 0.8em;
-                padding: 8px 10px;
-            }}
-            
-            table {{
-                min-width: 450px;
-            }}
-            
-            .detail-table {{
-                min-width: 500px;
-            }}
-        }}
-    </style>
-</head>
-<body>
-    <div class="dashboard-container">
-        <div class="header">
-            <h1>📊 Reporte Comparativo de Ventas</h1>
-            <div class="subtitle">Periodos: {fecha_anterior} vs {fecha_nueva} | Corte: {hora_corte}</div>
-        </div>
-        
-        <div class="summary-section">
-            <div class="summary-container">
-                <div class="summary-header">
-                    <h2>Resumen General por Canal</h2>
-                </div>
-                <div class="table-responsive">
-                    <table>
-                        <thead>
-                            <tr>
-                                <th>Canal</th>
-                                <th>Importe {fecha_anterior}</th>
-                                <th># Trx {fecha_anterior}</th>
-                                <th>Importe {fecha_nueva}</th>
-                                <th># Trx {fecha_nueva}</th>
-                                <th>Variación Importe</th>
-                            </tr>
-                        </thead>
-                        <tbody>"""
-
-    # Agregar filas de la tabla resumen con lógica corregida de colores
-    for canal, row in df_comparativo.iterrows():
-        clase_fila = "total-row" if canal == "TOTAL" else ""
-        
-        # MEJORA: Lógica corregida para determinar variaciones positivas/negativas
-        variacion_str = str(row['Variación Importe'])
-        clase_variacion = ""
-        
-        # Extraer el valor numérico de la variación
-        try:
-            # Eliminar formato "S/ " y "," para obtener el número
-            valor_numerico = variacion_str.replace('S/ ', '').replace(',', '')
-            # Convertir a float para comparación
-            valor_float = float(valor_numerico)
-            
-            if valor_float > 0:
-                clase_variacion = "positive"
-            elif valor_float < 0:
-                clase_variacion = "negative"
-        except (ValueError, AttributeError):
-            # En caso de error en conversión, mantener sin clase
-            clase_variacion = ""
-        
-        html_template += f"""
-                            <tr class="{clase_fila}">
-                                <td><strong>{canal}</strong></td>
-                                <td>{row['Importe_Anterior']}</td>
-                                <td>{row['Transacciones_Anterior']}</td>
-                                <td>{row['Importe_Nuevo']}</td>
-                                <td>{row['Transacciones_Nuevo']}</td>
-                                <td class="{clase_variacion}">{row['Variación Importe']}</td>
-                            </tr>
-        """
-
-    html_template += """
-                        </tbody>
-                    </table>
-                </div>
-            </div>
-        </div>
-        
-        <div class="details-section">
-            <div style="display: flex; justify-content: space-between; align-items: center; margin-bottom: 15px; flex-wrap: wrap;">
-                <h2 style="color: #2c3e50; font-size: 1.5em; margin: 0;">📋 Análisis Detallado por Canal</h2>
-                <div style="display: flex; gap: 8px; margin-top: 8px;">
-                    <button onclick="toggleAllSections(true)" style="background: #27ae60; color: white; border: none; padding: 6px 12px; border-radius: 4px; cursor: pointer; font-size: 0.8em;">
-                        📂 Expandir Todo
-                    </button>
-                    <button onclick="toggleAllSections(false)" style="background: #e74c3c; color: white; border: none; padding: 6px 12px; border-radius: 4px; cursor: pointer; font-size: 0.8em;">
-                        📁 Contraer Todo
-                    </button>
-                </div>
-            </div>
-    """
-
-    # Agregar tablas detalladas en orden específico
-    orden_canales = [
-        'ALO CÁLIDDA',
-        'CSC', 
-        'DIGITAL',
-        'TIENDAS CÁLIDDA',
-        'RETAIL',
-        'MOTOS',
-        'GRANDES SUPERFICIES',
-        'MATERIALES Y ACABADOS DE CONSTRUCCIÓN',
-        'CANAL PROVEEDOR',
-        'FFVV - PUERTA A PUERTA'
-    ]
-    
-    # Mostrar primero los canales en orden específico
-    for canal in orden_canales:
-        if canal in tablas_detalladas:
-            html_template += tablas_detalladas[canal]
-    
-    # Luego mostrar canales adicionales que no están en la lista
-    for canal, tabla_html in tablas_detalladas.items():
-        if canal not in orden_canales:
-            html_template += tabla_html
-
-    html_template += f"""
-        </div>
-        
-        <div class="footer">
-            <p>📅 Generado el {datetime.now().strftime('%d/%m/%Y a las %H:%M:%S')}</p>
-        </div>
-    </div>
-    
-    <script>
-        // Función para expandir/contraer secciones
-        function toggleSection(sectionId) {{
-            const detailRows = document.querySelectorAll('.detail-row-' + sectionId);
-            const icon = document.getElementById('icon_' + sectionId);
-            
-            let isVisible = false;
-            detailRows.forEach(row => {{
-                if (row.style.display === 'none' || row.style.display === '') {{
-                    row.style.display = 'table-row';
-                    isVisible = true;
-                }} else {{
-                    row.style.display = 'none';
-                }}
-            }});
-            
-            // Cambiar ícono
-            if (isVisible) {{
-                icon.textContent = '▼';
-                icon.classList.remove('collapsed');
-            }} else {{
-                icon.textContent = '▶';
-                icon.classList.add('collapsed');
-            }}
-        }}
-        
-        // Inicializar todas las secciones como contraídas
-        document.addEventListener('DOMContentLoaded', function() {{
-            // Encontrar todas las filas de subtotal clickeable
-            const subtotalRows = document.querySelectorAll('.clickable-row');
-            
-            subtotalRows.forEach(row => {{
-                const onclick = row.getAttribute('onclick');
-                if (onclick) {{
-                    const sectionId = onclick.match(/toggleSection\\('([^']+)'\\)/)[1];
-                    const icon = document.getElementById('icon_' + sectionId);
-                    
-                    // Contraer inicialmente
-                    if (icon) {{
-                        icon.textContent = '▶';
-                        icon.classList.add('collapsed');
-                        row.classList.add('collapsed');
-                    }}
-                }}
-            }});
-            
-            // Manejar scroll horizontal en móviles
-            const tables = document.querySelectorAll('.table-responsive');
-            tables.forEach(table => {{
-                table.addEventListener('touchstart', function() {{
-                    this.style.webkitOverflowScrolling = 'touch';
-                }});
-            }});
-        }});
-        
-        // Función para expandir/contraer todas las secciones
-        function toggleAllSections(expand = null) {{
-            const subtotalRows = document.querySelectorAll('.clickable-row');
-            
-            subtotalRows.forEach(row => {{
-                const onclick = row.getAttribute('onclick');
-                if (onclick) {{
-                    const sectionId = onclick.match(/toggleSection\\('([^']+)'\\)/)[1];
-                    const detailRows = document.querySelectorAll('.detail-row-' + sectionId);
-                    const icon = document.getElementById('icon_' + sectionId);
-                    
-                    if (expand === null) {{
-                        // Toggle automático
-                        const isCurrentlyVisible = detailRows[0] && detailRows[0].style.display === 'table-row';
-                        expand = !isCurrentlyVisible;
-                    }}
-                    
-                    detailRows.forEach(detailRow => {{
-                        detailRow.style.display = expand ? 'table-row' : 'none';
-                    }});
-                    
-                    if (icon) {{
-                        icon.textContent = expand ? '▼' : '▶';
-                        if (expand) {{
-                            icon.classList.remove('collapsed');
-                            row.classList.remove('collapsed');
-                        }} else {{
-                            icon.classList.add('collapsed');
-                            row.classList.add('collapsed');
-                        }}
-                    }}
-                }}
-            }});
-        }}
-    </script>
-</body>
-</html>
-    """
-    
-    return html_template
+# Tablas de detalle del dashboard: orden de los canales, columnas de cada tabla
+# (los canales no listados van después, por SEDE) y canales con subtotales
+# que se abren y cierran con un clic
+ORDEN_CANALES = [
+    'ALO CÁLIDDA',
+    'CSC',
+    'DIGITAL',
+    'TIENDAS CÁLIDDA',
+    'RETAIL',
+    'MOTOS',
+    'GRANDES SUPERFICIES',
+    'MATERIALES Y ACABADOS DE CONSTRUCCIÓN',
+    'CANAL PROVEEDOR',
+    'FFVV - PUERTA A PUERTA',
+]
+
+AGRUPACION_CANALES = {
+    'ALO CÁLIDDA': ['ASESOR DE VENTAS'],
+    'CSC': ['SEDE'],
+    'DIGITAL': ['SEDE'],
+    'TIENDAS CÁLIDDA': ['SEDE'],
+    'RETAIL': ['ALIADO COMERCIAL', 'SEDE'],
+    'MOTOS': ['ALIADO COMERCIAL', 'SEDE'],
+    'GRANDES SUPERFICIES': ['ALIADO COMERCIAL', 'SEDE'],
+    'MATERIALES Y ACABADOS DE CONSTRUCCIÓN': ['ALIADO COMERCIAL', 'SEDE'],
+    'CANAL PROVEEDOR': ['ALIADO COMERCIAL', 'SEDE'],
+    'FFVV - PUERTA A PUERTA': ['ALIADO COMERCIAL', 'SEDE'],
+}
+
+CANALES_EXPANDIBLES = ['RETAIL', 'CANAL PROVEEDOR', 'GRANDES SUPERFICIES', 'FFVV - PUERTA A PUERTA',
+                       'MATERIALES Y ACABADOS DE CONSTRUCCIÓN', 'MOTOS']
 
 
 def duplicar_html_como_txt(ruta_html: str) -> str | None:
@@ -1513,42 +629,19 @@ def generar_reporte_dashboard():
         archivo_usado = "anterior" if hora_max_anterior >= hora_max_nueva else "nuevo"
         print(f"⏰ Usando hora mayor ({archivo_usado}): {hora_corte}")
 
-    # FILTRAR DATOS
-    df_anterior_filtrado = df_anterior[df_anterior['HORA VENTA'] <= hora_corte].copy()
-    df_nuevo_filtrado = df_nuevo[df_nuevo['HORA VENTA'] <= hora_corte].copy()
+    # CUBO PREAGREGADO Y CORTE (las tablas se arman sobre el corte, no sobre el detalle)
+    cubo = CuboCortes(df_anterior, df_nuevo, col_importe)
+    corte = cubo.cortar(hora_corte)
+    print(f"🧊 Cubo: {len(cubo.tramos):,} celdas | corte: {len(corte):,} combinaciones")
 
-    # CREAR PIVOTS PARA RESUMEN
-    def crear_pivot(df, sufijo):
-        if df.empty:
-            return pd.DataFrame(columns=[f'Importe_{sufijo}', f'Transacciones_{sufijo}'])
-
-        pivot = df.groupby('CANAL_VENTA').agg(
-            Importe=(col_importe, 'sum'),
-            Transacciones=('codigo_unico', 'nunique')
-        )
-        pivot.columns = [f'Importe_{sufijo}', f'Transacciones_{sufijo}']
-        return pivot
-
-    pivot_anterior = crear_pivot(df_anterior_filtrado, 'Anterior')
-    pivot_nuevo = crear_pivot(df_nuevo_filtrado, 'Nuevo')
-
-    # COMBINAR RESULTADOS
-    if pivot_anterior.empty and pivot_nuevo.empty:
+    # RESUMEN POR CANAL
+    df_comparativo = comparar(corte, ['CANAL_VENTA'])
+    if df_comparativo.empty:
         print("❌ No hay datos para comparar")
         return
-    elif pivot_anterior.empty:
-        df_comparativo = pivot_nuevo.copy()
-        df_comparativo['Importe_Anterior'] = 0
-        df_comparativo['Transacciones_Anterior'] = 0
-    elif pivot_nuevo.empty:
-        df_comparativo = pivot_anterior.copy()
-        df_comparativo['Importe_Nuevo'] = 0
-        df_comparativo['Transacciones_Nuevo'] = 0
-    else:
-        df_comparativo = pd.merge(pivot_anterior, pivot_nuevo, left_index=True, right_index=True, how='outer').fillna(0)
 
     # CALCULAR VARIACIÓN
-    df_comparativo['Variación Importe'] = df_comparativo['Importe_Nuevo'] - df_comparativo['Importe_Anterior']
+    df_comparativo = df_comparativo.rename(columns={'Variacion_Importe': 'Variación Importe'})
 
     # REORDENAR COLUMNAS
     columnas_orden = ['Importe_Anterior', 'Transacciones_Anterior', 'Importe_Nuevo', 'Transacciones_Nuevo',
@@ -1570,16 +663,21 @@ def generar_reporte_dashboard():
     print("\n📊 RESUMEN GENERAL:")
     print(df_comparativo)
 
-    # CREAR TABLAS DETALLADAS
-    print("\n🔍 Generando tablas detalladas por canal...")
-    tablas_detalladas = crear_tablas_detalladas(df_anterior_filtrado, df_nuevo_filtrado, col_importe, fecha_anterior, fecha_nueva)
-    
-    print(f"   ✅ {len(tablas_detalladas)} canales procesados: {', '.join(tablas_detalladas.keys())}")
+    # CANALES CON TABLA DETALLADA (las tablas se arman en el navegador a partir del corte)
+    canales_presentes = set(corte['CANAL_VENTA'].unique())
+    canales_detalle = [canal for canal in ORDEN_CANALES if canal in canales_presentes]
+    canales_detalle += sorted(canal for canal in canales_presentes
+                              if canal not in ORDEN_CANALES and canal not in CANALES_SIN_DETALLE)
+    print(f"\n🔍 Canales con tabla detallada: {', '.join(canales_detalle)}")
 
-    # GENERAR DASHBOARD HTML DETALLADO SIN GRÁFICO
+    # GENERAR DASHBOARD HTML (plantilla + corte embebido comprimido)
     print(f"\n🌐 Generando Dashboard HTML detallado sin gráfico...")
     
-    html_content = generar_dashboard_html_detallado(df_comparativo, fecha_anterior, fecha_nueva, hora_corte, tablas_detalladas)
+    html_content = generar_dashboard_cortes(
+        corte, fecha_anterior, fecha_nueva, hora_corte,
+        orden_canales=ORDEN_CANALES, agrupacion_canales=AGRUPACION_CANALES,
+        canales_expandibles=CANALES_EXPANDIBLES,
+    )
     
     # GUARDAR ARCHIVO HTML EN RUTA ESPECÍFICA
     ruta_dashboards = r"D:\FNB\Reportes\19. Reportes IBR\06. Avance de ventas cortes\Dashboards"
@@ -1595,15 +693,15 @@ def generar_reporte_dashboard():
     with open(ruta_dashboard, 'w', encoding='utf-8') as file:
         file.write(html_content)
     
-    print(f"✅ Dashboard detallado generado: {nombre_archivo}")
+    print(f"✅ Dashboard detallado generado: {nombre_archivo} ({len(html_content.encode('utf-8')) / 1024:,.0f} KB)")
     print(f"📁 Ubicación: {ruta_dashboard}")
     
     # MOSTRAR ESTADÍSTICAS
     print(f"\n📈 ESTADÍSTICAS DEL DASHBOARD:")
-    print(f"   🏪 Canales analizados: {len(tablas_detalladas)}")
-    print(f"   📊 Tablas detalladas: {len(tablas_detalladas)}")
-    print(f"   📋 Registros anteriores (filtrados): {len(df_anterior_filtrado)}")
-    print(f"   📋 Registros nuevos (filtrados): {len(df_nuevo_filtrado)}")
+    print(f"   🏪 Canales analizados: {len(canales_presentes)}")
+    print(f"   📊 Tablas detalladas: {len(canales_detalle)}")
+    print(f"   📋 Registros anteriores (filtrados): {corte['Transacciones_Anterior'].sum():,.0f}")
+    print(f"   📋 Registros nuevos (filtrados): {corte['Transacciones_Nuevo'].sum():,.0f}")
     print(f"   🔍 Filtro ESTADO: PENDIENTE DE ENTREGA, ENTREGADO, PENDIENTE DE APROBACIÓN")
     
     # ABRIR AUTOMÁTICAMENTE EN EL NAVEGADOR
@@ -1625,7 +723,7 @@ def generar_reporte_dashboard():
     print(f"1. El archivo '{nombre_archivo}' incluye análisis detallado por canal")
     print(f"2. Filtro aplicado por ESTADO (solo registros válidos)")
     print(f"3. Tablas dinámicas con agrupaciones específicas:")
-    for canal in tablas_detalladas.keys():
+    for canal in canales_detalle:
         print(f"   • {canal}")
     print(f"4. Colores corregidos para variaciones positivas (verde) y negativas (rojo)")
     print(f"5. Filas de totales en tablas detalladas con fondo plomo claro")
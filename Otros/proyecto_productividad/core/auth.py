@@ -1,6 +1,7 @@
 import re
 import streamlit as st
 from sqlalchemy import text
+from core.cache import invalidar
 from core.queries import get_user_by_username
 from core.engine_connection import get_engine
 
@@ -79,6 +80,7 @@ def register_user(username: str, password: str, nombre_completo: str, rol_id: in
                 """),
                 {"u": username, "p": password, "nc": nombre_completo, "ri": rol_id, "ci": campaña_id}
             )
+        invalidar("usuarios")
         return True
     except Exception as e:
         st.error(f"Error al registrar usuario: {str(e)}")
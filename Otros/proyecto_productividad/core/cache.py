@@ -0,0 +1,145 @@
+# core/cache.py
+"""
+Caché de lecturas compartida por todas las sesiones, con invalidación por tabla.
+
+`conn.query(..., ttl=...)` solo sabe caducar por tiempo, y la única forma de
+refrescar tras una escritura era `st.cache_data.clear()`, que borra la caché de
+todos los usuarios (dashboards incluidos) por cualquier cambio.
+
+Aquí cada resultado se guarda por (SQL, parámetros) junto con las tablas de las
+que depende y, opcionalmente, su alcance dentro de cada tabla (campaña, usuario,
+rango de fechas). Una escritura invalida solo lo que toca:
+
+    df = consultar(conn, sql, params, ttl=60,
+                   tablas={"registro_actividades": {"campaña_id": 3, "desde": hoy, "hasta": hoy},
+                           "usuarios": None})
+
+    invalidar("registro_actividades", campaña_id=3, fecha=hoy)   # solo campaña 3, ese día
+    invalidar("campañas")                                         # todo lo que lee campañas
+
+En el alcance, "desde"/"hasta" delimitan fechas (None = sin límite) y el resto
+de claves son igualdades; una clave ausente (o None) abarca todos los valores.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+
+import streamlit as st
+
+# Resultados guardados como máximo (se descartan los menos usados)
+MAX_ENTRADAS = 500
+
+
+def _como_fecha(valor):
+    """date a partir de date/datetime/Timestamp (None se mantiene)."""
+    if isinstance(valor, datetime):
+        return valor.date()
+    return valor if valor is None or isinstance(valor, date) else date.fromisoformat(str(valor)[:10])
+
+
+def _afecta(alcance, fecha=None, **claves):
+    """True si una escritura con (fecha, claves) cae dentro de `alcance`."""
+    if alcance is None:
+        return True
+    for clave, valor in claves.items():
+        propio = alcance.get(clave)
+        if valor is not None and propio is not None and propio != valor:
+            return False
+    if fecha is not None:
+        fecha = _como_fecha(fecha)
+        desde, hasta = _como_fecha(alcance.get("desde")), _como_fecha(alcance.get("hasta"))
+        if (desde is not None and fecha < desde) or (hasta is not None and fecha > hasta):
+            return False
+    return True
+
+
+class CacheConsultas:
+    """Resultados por clave con caducidad, dependencias por tabla y límite LRU."""
+
+    def __init__(self, max_entradas=MAX_ENTRADAS):
+        self.max_entradas = max_entradas
+        self._entradas = OrderedDict()   # clave → (expira, tablas, DataFrame)
+        self._generaciones = {}          # tabla → escrituras registradas
+        self._candado = threading.Lock()
+
+    def generacion(self, tablas):
+        """Marca de las tablas antes de consultar (ver `guardar`)."""
+        with self._candado:
+            return tuple(self._generaciones.get(tabla, 0) for tabla in tablas)
+
+    def obtener(self, clave):
+        with self._candado:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                return None
+            if entrada[0] < time.monotonic():
+                del self._entradas[clave]
+                return None
+            self._entradas.move_to_end(clave)
+            return entrada[2]
+
+    def guardar(self, clave, df, ttl, tablas, generacion):
+        """
+        Guarda `df` salvo que alguna de sus tablas se haya escrito mientras se
+        consultaba (el resultado podría ser anterior a esa escritura).
+        """
+        with self._candado:
+            if generacion != tuple(self._generaciones.get(tabla, 0) for tabla in tablas):
+                return
+            self._entradas[clave] = (time.monotonic() + ttl, tablas, df)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+
+    def invalidar(self, tabla, fecha=None, **claves):
+        """Descarta los resultados de `tabla` alcanzados por la escritura. Devuelve cuántos."""
+        with self._candado:
+            self._generaciones[tabla] = self._generaciones.get(tabla, 0) + 1
+            afectadas = [clave for clave, (_, tablas, _) in self._entradas.items()
+                         if tabla in tablas and _afecta(tablas[tabla], fecha, **claves)]
+            for clave in afectadas:
+                del self._entradas[clave]
+            return len(afectadas)
+
+    def limpiar(self):
+        with self._candado:
+            self._entradas.clear()
+
+
+@st.cache_resource
+def obtener_cache():
+    """Caché única del proceso (la comparten todas las sesiones de Streamlit)."""
+    return CacheConsultas()
+
+
+def consultar(conn, sql, params=None, ttl=300, tablas=None):
+    """
+    `conn.query` con caché compartida.
+
+    Args:
+        conn: conexión de st.connection (se consulta con ttl=0).
+        sql, params: consulta y parámetros (forman la clave de la caché).
+        ttl: segundos de validez aunque nadie escriba.
+        tablas: dict tabla → alcance (dict, ver arriba) o None si depende de toda la tabla.
+
+    Returns:
+        Copia del DataFrame (quien la modifique no altera la caché).
+    """
+    params = params or {}
+    tablas = tablas or {}
+    cache = obtener_cache()
+    clave = (sql, tuple(sorted(params.items())))
+
+    df = cache.obtener(clave)
+    if df is None:
+        generacion = cache.generacion(tablas)
+        df = conn.query(sql, params=params, ttl=0)
+        cache.guardar(clave, df, ttl, tablas, generacion)
+    return df.copy()
+
+
+def invalidar(tabla, fecha=None, **claves):
+    """Descarta los resultados que dependen de `tabla` (ver `CacheConsultas.invalidar`)."""
+    return obtener_cache().invalidar(tabla, fecha, **claves)
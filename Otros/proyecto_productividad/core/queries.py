@@ -5,18 +5,35 @@ Lecturas: se asume que `conn` es un objeto devuelto por st.connection("neon_db",
           que implementa .query(sql, params=..., ttl=...)
 Escrituras: se usa SQLAlchemy engine obtenido desde core.engine_connection.get_engine()
             para realizar transacciones con begin() y RETURNING cuando aplica.
+Caché: los catálogos y dashboards se leen con core.cache.consultar (compartida entre
+       sesiones); cada escritura invalida solo las tablas/campaña/fecha que toca.
 """
 
 from datetime import datetime, time as dt_time
 import pandas as pd
 from sqlalchemy import text
+from core.cache import consultar, invalidar
 from core.engine_connection import get_engine
+from core.resumen_diario import SQL_ACUMULAR, TABLA_RESUMEN, preparar_resumen_diario
 
 
 # ---------------------------
 # === ASESOR (Operaciones) ===
 # ---------------------------
 
+def _campaña_de_usuario(connection, user_id):
+    """Campaña del usuario, leída dentro de la transacción de escritura."""
+    return connection.execute(
+        text("SELECT campaña_id FROM public.usuarios WHERE id = :uid"),
+        {"uid": int(user_id)}
+    ).scalar()
+
+
+def _invalidar_registro(user_id, campaña_id, fecha):
+    """Tras escribir en registro_actividades: solo los resultados de esa campaña/usuario/fecha."""
+    invalidar("registro_actividades", fecha=fecha, usuario_id=int(user_id), campaña_id=campaña_id)
+
+
 def get_user_by_username(conn, username):
     """
     Devuelve fila con datos del usuario (incluye rol y campaña).
@@ -40,9 +57,11 @@ def get_active_activities(conn):
     """
     Lista de actividades activas ordenadas (id, nombre_actividad, orden, etc.)
     """
-    return conn.query(
+    return consultar(
+        conn,
         "SELECT id, nombre_actividad, orden FROM actividades WHERE activo = TRUE ORDER BY orden, id",
-        ttl=600
+        ttl=600,
+        tablas={"actividades": None}
     )
 
 
@@ -51,7 +70,8 @@ def get_subactivities(conn, activity_id):
     Subactividades activas para una actividad.
     Devuelve DataFrame con columnas: id, nombre_subactividad, orden, activo.
     """
-    df = conn.query(
+    df = consultar(
+        conn,
         """
         SELECT id, nombre_subactividad, orden, activo
         FROM subactividades
@@ -60,7 +80,8 @@ def get_subactivities(conn, activity_id):
         ORDER BY orden, nombre_subactividad
         """,
         params={"activity_id": activity_id},
-        ttl=600
+        ttl=600,
+        tablas={"subactividades": {"actividad_id": activity_id}}
     )
     return df
 
@@ -69,10 +90,12 @@ def get_activity_by_name(conn, activity_name):
     """
     Devuelve id de actividad por nombre (o None).
     """
-    df = conn.query(
+    df = consultar(
+        conn,
         "SELECT id FROM actividades WHERE nombre_actividad = :name LIMIT 1",
         params={"name": activity_name},
-        ttl=600
+        ttl=600,
+        tablas={"actividades": None}
     )
     return int(df['id'].iloc[0]) if not df.empty else None
 
@@ -141,7 +164,7 @@ def start_activity(conn, user_id, actividad_id, hora_inicio, subactividad_id=Non
                     INSERT INTO public.registro_actividades
                     (usuario_id, actividad_id, fecha, hora_inicio, subactividad_id, observaciones, estado)
                     VALUES (:user_id, :actividad_id, CURRENT_DATE, CURRENT_TIMESTAMP, :subactividad_id, :comentario, 'Iniciado')
-                    RETURNING id
+                    RETURNING id, fecha
                 """),
                 {
                     "user_id": int(user_id),
@@ -150,8 +173,10 @@ def start_activity(conn, user_id, actividad_id, hora_inicio, subactividad_id=Non
                     "comentario": comentario if comentario else None
                 }
             )
-            registro_id = result.scalar()
-            return int(registro_id) if registro_id is not None else None
+            registro_id, fecha = result.one()
+            campaña_id = _campaña_de_usuario(connection, user_id)
+        _invalidar_registro(user_id, campaña_id, fecha)
+        return int(registro_id) if registro_id is not None else None
     except Exception as e:
         raise Exception(f"Error en start_activity: {e}")
 
@@ -161,23 +186,34 @@ def stop_activity(conn, registro_id, hora_fin):
     Actualiza registro para asignar hora_fin y calcular duración en segundos y formato hms.
     Usa engine para garantizar transacción.
     CORREGIDO: Usa CURRENT_TIMESTAMP de PostgreSQL en lugar de hora de Python
+    El registro cerrado se suma al resumen diario en la misma sentencia.
     """
+    preparar_resumen_diario()
     engine = get_engine()
     try:
         with engine.begin() as connection:
-            connection.execute(
-                text("""
-                    UPDATE public.registro_actividades
-                    SET 
-                        hora_fin = CURRENT_TIMESTAMP,
-                        estado = 'Finalizado',
-                        duracion_seg = EXTRACT(EPOCH FROM (CURRENT_TIMESTAMP - hora_inicio)),
-                        duracion_hms = (CURRENT_TIMESTAMP - hora_inicio)
-                    WHERE id = :registro_id
-                      AND hora_fin IS NULL
+            cerrado = connection.execute(
+                text(f"""
+                    WITH cerrados AS (
+                        UPDATE public.registro_actividades
+                        SET 
+                            hora_fin = CURRENT_TIMESTAMP,
+                            estado = 'Finalizado',
+                            duracion_seg = EXTRACT(EPOCH FROM (CURRENT_TIMESTAMP - hora_inicio)),
+                            duracion_hms = (CURRENT_TIMESTAMP - hora_inicio)
+                        WHERE id = :registro_id
+                          AND hora_fin IS NULL
+                        RETURNING usuario_id, fecha, actividad_id, subactividad_id,
+                                  hora_inicio, hora_fin, duracion_seg
+                    ),
+                    {SQL_ACUMULAR}
+                    SELECT usuario_id, fecha FROM cerrados
                 """),
                 {"registro_id": registro_id}
-            )
+            ).first()
+            campaña_id = _campaña_de_usuario(connection, cerrado.usuario_id) if cerrado else None
+        if cerrado:
+            _invalidar_registro(cerrado.usuario_id, campaña_id, cerrado.fecha)
     except Exception as e:
         raise Exception(f"Error en stop_activity: {e}")
 
@@ -185,27 +221,38 @@ def stop_activity(conn, registro_id, hora_fin):
 def close_previous_day_activities(conn, user_id, previous_date):
     """
     Cierra todas las actividades abiertas de previous_date estableciendo hora_fin a 23:59:59.
-    Retorna cantidad de filas afectadas.
+    Retorna cantidad de filas afectadas (sumadas también al resumen diario).
     """
+    preparar_resumen_diario()
     engine = get_engine()
     try:
         with engine.begin() as connection:
             end_time = datetime.combine(previous_date, dt_time(23, 59, 59))
             result = connection.execute(
-                text("""
-                    UPDATE public.registro_actividades
-                    SET 
-                        hora_fin = :hora_fin,
-                        estado = 'Cerrado Automático',
-                        duracion_seg = EXTRACT(EPOCH FROM (:hora_fin - hora_inicio)),
-                        duracion_hms = (:hora_fin - hora_inicio)
-                    WHERE usuario_id = :user_id
-                      AND hora_fin IS NULL
-                      AND fecha = :fecha
+                text(f"""
+                    WITH cerrados AS (
+                        UPDATE public.registro_actividades
+                        SET 
+                            hora_fin = :hora_fin,
+                            estado = 'Cerrado Automático',
+                            duracion_seg = EXTRACT(EPOCH FROM (:hora_fin - hora_inicio)),
+                            duracion_hms = (:hora_fin - hora_inicio)
+                        WHERE usuario_id = :user_id
+                          AND hora_fin IS NULL
+                          AND fecha = :fecha
+                        RETURNING usuario_id, fecha, actividad_id, subactividad_id,
+                                  hora_inicio, hora_fin, duracion_seg
+                    ),
+                    {SQL_ACUMULAR}
+                    SELECT COUNT(*) FROM cerrados
                 """),
                 {"user_id": user_id, "fecha": previous_date, "hora_fin": end_time}
             )
-            return result.rowcount
+            cerradas = result.scalar()
+            campaña_id = _campaña_de_usuario(connection, user_id) if cerradas else None
+        if cerradas:
+            _invalidar_registro(user_id, campaña_id, previous_date)
+        return cerradas
     except Exception as e:
         raise Exception(f"Error en close_previous_day_activities: {e}")
 
@@ -359,68 +406,82 @@ def get_user_productivity_summary(conn, user_id, date):
 # === SUPERVISOR (Reportes) ===
 # --------------------------------
 
+# Actividades que no cuentan como tiempo efectivo
+_FILTRO_SIN_BREAK = "a.nombre_actividad NOT IN ('Break Salida', 'Regreso Break')"
+
+# Segundos transcurridos de una actividad en curso
+_SEGUNDOS_EN_CURSO = (
+    "EXTRACT(EPOCH FROM (CURRENT_TIMESTAMP - (r.hora_inicio AT TIME ZONE 'America/Lima')))"
+)
+
+
 def get_supervisor_dashboard(conn, campaña_id, fecha):
     """
     Dashboard de supervisor para una campaña y fecha dada.
     Devuelve: nombre_completo, ingreso, salida, tiempo_total_jornada, tiempo_efectivo, estado_actual
     CORREGIDO: Fuerza timezone en cálculos
+    Lo cerrado sale del resumen diario (una fila por usuario y actividad); solo
+    las actividades en curso se calculan al leer.
     """
-    df = conn.query(
-        """
-        WITH Jornadas AS (
+    preparar_resumen_diario()
+    df = consultar(
+        conn,
+        f"""
+        WITH Cerrado AS (
+            SELECT
+                d.usuario_id,
+                MIN(d.primer_inicio) as hora_ingreso,
+                MAX(d.ultimo_fin) as hora_salida,
+                SUM(d.segundos) FILTER (WHERE {_FILTRO_SIN_BREAK}) as segundos_efectivos
+            FROM {TABLA_RESUMEN} d
+            JOIN actividades a ON a.id = d.actividad_id
+            WHERE d.fecha = :fecha
+            GROUP BY d.usuario_id
+        ),
+        EnCurso AS (
             SELECT
                 r.usuario_id,
                 MIN(r.hora_inicio) as hora_ingreso,
-                MAX(COALESCE(r.hora_fin, CURRENT_TIMESTAMP)) as hora_salida
+                SUM({_SEGUNDOS_EN_CURSO}) FILTER (WHERE {_FILTRO_SIN_BREAK}) as segundos_efectivos
             FROM registro_actividades r
+            JOIN actividades a ON a.id = r.actividad_id
             WHERE r.fecha = :fecha
+              AND r.hora_fin IS NULL
             GROUP BY r.usuario_id
         ),
-        Efectivo AS (
+        Jornadas AS (
             SELECT
-                r.usuario_id,
-                SUM(
-                    CASE 
-                        WHEN r.hora_fin IS NULL THEN 
-                            EXTRACT(EPOCH FROM (
-                                CURRENT_TIMESTAMP - 
-                                (r.hora_inicio AT TIME ZONE 'America/Lima')
-                            ))
-                        ELSE 
-                            COALESCE(r.duracion_seg, 0)
-                    END
-                ) as segundos_efectivos
-            FROM registro_actividades r
-            WHERE r.fecha = :fecha
-            AND r.actividad_id NOT IN (
-                SELECT id FROM actividades WHERE nombre_actividad IN ('Break Salida', 'Regreso Break')
-            )
-            GROUP BY r.usuario_id
+                u.id as usuario_id,
+                LEAST(c.hora_ingreso, o.hora_ingreso) as hora_ingreso,
+                GREATEST(c.hora_salida, CASE WHEN o.usuario_id IS NOT NULL THEN CURRENT_TIMESTAMP END) as hora_salida,
+                CASE
+                    WHEN c.segundos_efectivos IS NULL AND o.segundos_efectivos IS NULL THEN NULL
+                    ELSE COALESCE(c.segundos_efectivos, 0) + COALESCE(o.segundos_efectivos, 0)
+                END as segundos_efectivos,
+                o.usuario_id IS NOT NULL as en_curso
+            FROM usuarios u
+            LEFT JOIN Cerrado c ON c.usuario_id = u.id
+            LEFT JOIN EnCurso o ON o.usuario_id = u.id
+            WHERE u.campaña_id = :campaña_id
+              AND u.rol_id = (SELECT id FROM roles WHERE nombre = 'Asesor')
         )
         SELECT 
             u.nombre_completo,
             to_char(j.hora_ingreso, 'HH24:MI:SS') as ingreso,
             to_char(j.hora_salida, 'HH24:MI:SS') as salida,
             (j.hora_salida - j.hora_ingreso) as tiempo_total_jornada,
-            to_char((e.segundos_efectivos * interval '1 second'), 'HH24:MI:SS') as tiempo_efectivo,
-            CASE 
-                WHEN EXISTS (
-                    SELECT 1 FROM registro_actividades 
-                    WHERE usuario_id = u.id 
-                    AND fecha = :fecha 
-                    AND hora_fin IS NULL
-                ) THEN 'En curso'
-                ELSE 'Finalizado'
-            END as estado_actual
-        FROM usuarios u
-        LEFT JOIN Jornadas j ON u.id = j.usuario_id
-        LEFT JOIN Efectivo e ON u.id = e.usuario_id
-        WHERE u.campaña_id = :campaña_id
-          AND u.rol_id = (SELECT id FROM roles WHERE nombre = 'Asesor')
+            to_char((j.segundos_efectivos * interval '1 second'), 'HH24:MI:SS') as tiempo_efectivo,
+            CASE WHEN j.en_curso THEN 'En curso' ELSE 'Finalizado' END as estado_actual
+        FROM Jornadas j
+        JOIN usuarios u ON u.id = j.usuario_id
         ORDER BY u.nombre_completo;
         """,
         params={"campaña_id": campaña_id, "fecha": fecha},
-        ttl=60
+        ttl=60,
+        tablas={
+            "registro_actividades": {"campaña_id": campaña_id, "desde": fecha, "hasta": fecha},
+            "usuarios": None, "roles": None, "actividades": None,
+        }
     )
     return df
 
@@ -429,36 +490,47 @@ def get_team_activity_breakdown(conn, campaña_id, fecha):
     """
     Desglose de actividades por asesor dentro de una campaña en una fecha.
     CORREGIDO: Fuerza timezone en cálculos
+    Suma el resumen diario (registros cerrados) más las actividades en curso.
     """
-    df = conn.query(
-        """
+    preparar_resumen_diario()
+    df = consultar(
+        conn,
+        f"""
+        WITH Partes AS (
+            SELECT d.usuario_id, d.actividad_id, NULLIF(d.subactividad_id, 0) as subactividad_id,
+                   d.cantidad, d.segundos
+            FROM {TABLA_RESUMEN} d
+            JOIN usuarios u ON u.id = d.usuario_id
+            WHERE d.fecha = :fecha
+              AND u.campaña_id = :campaña_id
+            UNION ALL
+            SELECT r.usuario_id, r.actividad_id, r.subactividad_id,
+                   1, {_SEGUNDOS_EN_CURSO}
+            FROM registro_actividades r
+            JOIN usuarios u ON u.id = r.usuario_id
+            WHERE r.fecha = :fecha
+              AND r.hora_fin IS NULL
+              AND u.campaña_id = :campaña_id
+        )
         SELECT 
             u.nombre_completo,
             a.nombre_actividad,
             s.nombre_subactividad,
-            COUNT(*) as cantidad,
-            SUM(
-                CASE 
-                    WHEN r.hora_fin IS NULL THEN 
-                        EXTRACT(EPOCH FROM (
-                            CURRENT_TIMESTAMP - 
-                            (r.hora_inicio AT TIME ZONE 'America/Lima')
-                        ))
-                    ELSE 
-                        COALESCE(r.duracion_seg, 0)
-                END
-            ) / 3600 as horas_totales
-        FROM registro_actividades r
-        JOIN usuarios u ON r.usuario_id = u.id
-        JOIN actividades a ON r.actividad_id = a.id
-        LEFT JOIN subactividades s ON r.subactividad_id = s.id
-        WHERE u.campaña_id = :campaña_id
-        AND r.fecha = :fecha
+            SUM(p.cantidad)::bigint as cantidad,
+            SUM(p.segundos) / 3600 as horas_totales
+        FROM Partes p
+        JOIN usuarios u ON p.usuario_id = u.id
+        JOIN actividades a ON p.actividad_id = a.id
+        LEFT JOIN subactividades s ON p.subactividad_id = s.id
         GROUP BY u.nombre_completo, a.nombre_actividad, s.nombre_subactividad
         ORDER BY u.nombre_completo, horas_totales DESC
         """,
         params={"campaña_id": campaña_id, "fecha": fecha},
-        ttl=60
+        ttl=60,
+        tablas={
+            "registro_actividades": {"campaña_id": campaña_id, "desde": fecha, "hasta": fecha},
+            "usuarios": None, "actividades": None, "subactividades": None,
+        }
     )
     return df
 
@@ -471,13 +543,13 @@ def get_all_users_admin(conn):
     """
     Lista de usuarios con rol y campaña para la vista admin.
     """
-    return conn.query("""
+    return consultar(conn, """
         SELECT u.id, u.nombre_usuario, u.nombre_completo, r.nombre as rol, c.nombre as campaña, u.estado 
         FROM usuarios u 
         LEFT JOIN roles r ON u.rol_id = r.id 
         LEFT JOIN campañas c ON u.campaña_id = c.id
         ORDER BY u.nombre_completo
-    """, ttl=10)
+    """, ttl=10, tablas={"usuarios": None, "roles": None, "campañas": None})
 
 
 def get_dropdown_data(conn):
@@ -485,8 +557,10 @@ def get_dropdown_data(conn):
     Devuelve listas de roles y campañas para dropdowns.
     CORREGIDO: Removido filtro por 'activo' que no existe en las tablas
     """
-    roles = conn.query("SELECT id, nombre FROM roles ORDER BY nombre", ttl=3600)
-    campañas = conn.query("SELECT id, nombre FROM campañas ORDER BY nombre", ttl=3600)
+    roles = consultar(conn, "SELECT id, nombre FROM roles ORDER BY nombre", ttl=3600,
+                      tablas={"roles": None})
+    campañas = consultar(conn, "SELECT id, nombre FROM campañas ORDER BY nombre", ttl=3600,
+                         tablas={"campañas": None})
     return roles.to_dict('records'), campañas.to_dict('records')
 
 
@@ -514,6 +588,7 @@ def update_user_admin(conn, user_id, nombre_completo, rol_id, campaña_id, estad
                 """),
                 {"nc": nombre_completo, "ri": rol_id, "ci": campaña_id, "e": estado, "uid": user_id}
             )
+        invalidar("usuarios")
     except Exception as e:
         raise Exception(f"Error en update_user_admin: {e}")
 
@@ -533,6 +608,7 @@ def create_user_admin(conn, username, password, nombre_completo, rol_id, campañ
                 """),
                 {"u": username, "p": password, "nc": nombre_completo, "ri": rol_id, "ci": campaña_id}
             )
+        invalidar("usuarios")
     except Exception as e:
         raise Exception(f"Error en create_user_admin: {e}")
 
@@ -541,7 +617,8 @@ def get_all_subactivities(conn):
     """
     Obtiene todas las subactividades con el nombre de su actividad padre.
     """
-    df = conn.query(
+    df = consultar(
+        conn,
         """
         SELECT 
             s.id,
@@ -553,7 +630,8 @@ def get_all_subactivities(conn):
         JOIN actividades a ON s.actividad_id = a.id
         ORDER BY a.nombre_actividad, s.orden
         """,
-        ttl=300
+        ttl=300,
+        tablas={"subactividades": None, "actividades": None}
     )
     return df
 
@@ -573,6 +651,7 @@ def create_subactivity(conn, actividad_id, nombre_subactividad, orden=0):
                 """),
                 {"aid": actividad_id, "nombre": nombre_subactividad, "orden": orden}
             )
+        invalidar("subactividades", actividad_id=actividad_id)
     except Exception as e:
         raise Exception(f"Error en create_subactivity: {e}")
 
@@ -589,6 +668,7 @@ def update_subactivity(conn, subactivity_id, nombre_subactividad, activo, orden)
                 """),
                 {"nombre": nombre_subactividad, "activo": activo, "orden": orden, "sid": subactivity_id}
             )
+        invalidar("subactividades")
     except Exception as e:
         raise Exception(f"Error en update_subactivity: {e}")
 
@@ -601,6 +681,7 @@ def delete_subactivity(conn, subactivity_id):
                 text("UPDATE public.subactividades SET activo = FALSE WHERE id = :sid"),
                 {"sid": subactivity_id}
             )
+        invalidar("subactividades")
     except Exception as e:
         raise Exception(f"Error en delete_subactivity: {e}")
 
@@ -613,7 +694,8 @@ def get_user_log(conn, user_id, start_date, end_date):
     """
     Histórico de actividades de un usuario en un rango.
     """
-    df = conn.query(
+    df = consultar(
+        conn,
         """
         SELECT 
             DATE(r.hora_inicio) AS fecha,
@@ -634,7 +716,11 @@ def get_user_log(conn, user_id, start_date, end_date):
         ORDER BY r.hora_inicio DESC
         """,
         params={"user_id": user_id, "start_date": start_date, "end_date": end_date},
-        ttl=300
+        ttl=300,
+        tablas={
+            "registro_actividades": {"usuario_id": user_id, "desde": start_date, "hasta": end_date},
+            "actividades": None, "subactividades": None,
+        }
     )
     return df
 
@@ -643,7 +729,8 @@ def get_all_activities_admin(conn):
     """
     Lista de actividades (para CRUD admin).
     """
-    return conn.query("SELECT * FROM actividades ORDER BY orden, id", ttl=300)
+    return consultar(conn, "SELECT * FROM actividades ORDER BY orden, id", ttl=300,
+                     tablas={"actividades": None})
 
 
 def validate_connection(conn):
@@ -682,7 +769,8 @@ def get_admin_kpis(conn, start_date=None, end_date=None, campaña_id=None):
     
     where_sql = " AND " + " AND ".join(where_clauses) if where_clauses else ""
     
-    df = conn.query(
+    df = consultar(
+        conn,
         f"""
         SELECT 
             COUNT(DISTINCT u.id) as total_asesores,
@@ -696,7 +784,12 @@ def get_admin_kpis(conn, start_date=None, end_date=None, campaña_id=None):
         {where_sql}
         """,
         params=params,
-        ttl=60
+        ttl=60,
+        tablas={
+            "registro_actividades": {"campaña_id": campaña_id or None,
+                                     "desde": params.get("start_date"), "hasta": params.get("end_date")},
+            "usuarios": None, "roles": None,
+        }
     )
     return df
 
@@ -705,7 +798,8 @@ def get_admin_dashboard_by_campaign(conn, start_date, end_date):
     """
     Resumen de actividades por campaña
     """
-    df = conn.query(
+    df = consultar(
+        conn,
         """
         SELECT 
             c.nombre as campaña,
@@ -722,7 +816,11 @@ def get_admin_dashboard_by_campaign(conn, start_date, end_date):
         ORDER BY horas_totales DESC
         """,
         params={"start_date": start_date, "end_date": end_date},
-        ttl=60
+        ttl=60,
+        tablas={
+            "registro_actividades": {"desde": start_date, "hasta": end_date},
+            "campañas": None, "usuarios": None, "roles": None,
+        }
     )
     return df
 
@@ -738,7 +836,8 @@ def get_admin_dashboard_by_asesor(conn, start_date, end_date, campaña_id=None):
         where_clause = "AND u.campaña_id = :campaña_id"
         params["campaña_id"] = campaña_id
     
-    df = conn.query(
+    df = consultar(
+        conn,
         f"""
         SELECT 
             u.nombre_completo as asesor,
@@ -758,7 +857,11 @@ def get_admin_dashboard_by_asesor(conn, start_date, end_date, campaña_id=None):
         ORDER BY horas_totales DESC
         """,
         params=params,
-        ttl=60
+        ttl=60,
+        tablas={
+            "registro_actividades": {"campaña_id": campaña_id or None, "desde": start_date, "hasta": end_date},
+            "usuarios": None, "campañas": None, "roles": None,
+        }
     )
     return df
 
@@ -774,7 +877,8 @@ def get_admin_activity_breakdown(conn, start_date, end_date, campaña_id=None):
         where_clause = "AND u.campaña_id = :campaña_id"
         params["campaña_id"] = campaña_id
     
-    df = conn.query(
+    df = consultar(
+        conn,
         f"""
         SELECT 
             a.nombre_actividad,
@@ -790,7 +894,11 @@ def get_admin_activity_breakdown(conn, start_date, end_date, campaña_id=None):
         ORDER BY horas_totales DESC
         """,
         params=params,
-        ttl=60
+        ttl=60,
+        tablas={
+            "registro_actividades": {"campaña_id": campaña_id or None, "desde": start_date, "hasta": end_date},
+            "actividades": None, "usuarios": None,
+        }
     )
     return df
 
@@ -801,7 +909,8 @@ def get_admin_activity_breakdown(conn, start_date, end_date, campaña_id=None):
 
 def get_all_campaigns(conn):
     """Lista todas las campañas"""
-    return conn.query("SELECT * FROM campañas ORDER BY nombre", ttl=300)
+    return consultar(conn, "SELECT * FROM campañas ORDER BY nombre", ttl=300,
+                     tablas={"campañas": None})
 
 
 def create_campaign(conn, nombre):
@@ -813,6 +922,7 @@ def create_campaign(conn, nombre):
                 text("INSERT INTO campañas (nombre) VALUES (:nombre)"),
                 {"nombre": nombre}
             )
+        invalidar("campañas")
         return True
     except Exception as e:
         raise Exception(f"Error al crear campaña: {e}")
@@ -827,6 +937,7 @@ def update_campaign(conn, campaign_id, nombre):
                 text("UPDATE campañas SET nombre = :nombre WHERE id = :id"),
                 {"nombre": nombre, "id": campaign_id}
             )
+        invalidar("campañas")
         return True
     except Exception as e:
         raise Exception(f"Error al actualizar campaña: {e}")
@@ -851,6 +962,7 @@ def delete_campaign(conn, campaign_id):
                 text("DELETE FROM campañas WHERE id = :id"),
                 {"id": campaign_id}
             )
+        invalidar("campañas")
         return True
     except Exception as e:
         raise Exception(f"Error al eliminar campaña: {e}")
@@ -872,6 +984,7 @@ def create_activity(conn, nombre_actividad, descripcion, orden):
                 """),
                 {"nombre": nombre_actividad, "desc": descripcion, "orden": orden}
             )
+        invalidar("actividades")
         return True
     except Exception as e:
         raise Exception(f"Error al crear actividad: {e}")
@@ -894,6 +1007,7 @@ def update_activity(conn, activity_id, nombre_actividad, descripcion, orden, act
                 {"nombre": nombre_actividad, "desc": descripcion, "orden": orden, 
                  "activo": activo, "id": activity_id}
             )
+        invalidar("actividades")
         return True
     except Exception as e:
         raise Exception(f"Error al actualizar actividad: {e}")
@@ -908,6 +1022,7 @@ def delete_activity(conn, activity_id):
                 text("UPDATE actividades SET activo = FALSE WHERE id = :id"),
                 {"id": activity_id}
             )
+        invalidar("actividades")
         return True
     except Exception as e:
         raise Exception(f"Error al desactivar actividad: {e}")
@@ -919,7 +1034,8 @@ def delete_activity(conn, activity_id):
 
 def get_all_roles(conn):
     """Lista todos los roles"""
-    return conn.query("SELECT * FROM roles ORDER BY nombre", ttl=300)
+    return consultar(conn, "SELECT * FROM roles ORDER BY nombre", ttl=300,
+                     tablas={"roles": None})
 
 
 def create_role(conn, nombre):
@@ -931,6 +1047,7 @@ def create_role(conn, nombre):
                 text("INSERT INTO roles (nombre) VALUES (:nombre)"),
                 {"nombre": nombre}
             )
+        invalidar("roles")
         return True
     except Exception as e:
         raise Exception(f"Error al crear rol: {e}")
@@ -945,6 +1062,7 @@ def update_role(conn, role_id, nombre):
                 text("UPDATE roles SET nombre = :nombre WHERE id = :id"),
                 {"nombre": nombre, "id": role_id}
             )
+        invalidar("roles")
         return True
     except Exception as e:
         raise Exception(f"Error al actualizar rol: {e}")
@@ -969,6 +1087,7 @@ def delete_role(conn, role_id):
                 text("DELETE FROM roles WHERE id = :id"),
                 {"id": role_id}
             )
+        invalidar("roles")
         return True
     except Exception as e:
         raise Exception(f"Error al eliminar rol: {e}")
\ No newline at end of file
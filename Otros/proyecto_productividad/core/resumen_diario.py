@@ -0,0 +1,92 @@
+# core/resumen_diario.py
+"""
+Resumen diario por usuario y actividad para el dashboard del supervisor.
+
+El dashboard y el desglose por equipo reagregaban en cada refresco todos los
+registros del día. La tabla `resumen_actividad_diaria` guarda, por fecha ×
+usuario × actividad × subactividad, los registros YA CERRADOS (cantidad,
+segundos, primer inicio, último fin). Se actualiza en la misma sentencia que
+cierra el registro (stop_activity / close_previous_day_activities), así que en
+lectura solo se calculan las actividades en curso (hora_fin IS NULL).
+
+La tabla se crea (y se llena con el histórico) la primera vez que la app la
+necesita:
+
+    from core.resumen_diario import preparar_resumen_diario
+    preparar_resumen_diario()
+
+subactividad_id = 0 representa "sin subactividad" (la clave primaria no admite NULL).
+Los registros sin fecha, usuario o actividad no entran al resumen.
+"""
+
+import logging
+
+import streamlit as st
+from sqlalchemy import text
+
+from core.engine_connection import get_engine
+
+log = logging.getLogger(__name__)
+
+TABLA_RESUMEN = "resumen_actividad_diaria"
+
+# Acumula los registros recién cerrados; se antepone a un UPDATE ... RETURNING
+# expuesto como la CTE "cerrados" (ver queries.stop_activity).
+SQL_ACUMULAR = f"""
+    acumulado AS (
+        INSERT INTO public.{TABLA_RESUMEN} AS d
+            (fecha, usuario_id, actividad_id, subactividad_id, cantidad, segundos, primer_inicio, ultimo_fin)
+        SELECT fecha, usuario_id, actividad_id, COALESCE(subactividad_id, 0),
+               COUNT(*), SUM(COALESCE(duracion_seg, 0)), MIN(hora_inicio), MAX(hora_fin)
+        FROM cerrados
+        WHERE fecha IS NOT NULL AND usuario_id IS NOT NULL AND actividad_id IS NOT NULL
+        GROUP BY 1, 2, 3, 4
+        ON CONFLICT (fecha, usuario_id, actividad_id, subactividad_id) DO UPDATE
+        SET cantidad = d.cantidad + EXCLUDED.cantidad,
+            segundos = d.segundos + EXCLUDED.segundos,
+            primer_inicio = LEAST(d.primer_inicio, EXCLUDED.primer_inicio),
+            ultimo_fin = GREATEST(d.ultimo_fin, EXCLUDED.ultimo_fin)
+    )
+"""
+
+
+@st.cache_resource
+def preparar_resumen_diario():
+    """
+    Crea la tabla resumen (con el histórico de registros cerrados) si no existe,
+    y el índice parcial de actividades abiertas. Una vez por proceso.
+    """
+    engine = get_engine()
+    tabla = f"public.{TABLA_RESUMEN}"
+    with engine.begin() as connection:
+        existe = connection.execute(text("SELECT to_regclass(:t)"), {"t": tabla}).scalar()
+        if existe is None:
+            # Bloquea escrituras en registro_actividades mientras se llena el
+            # resumen (y a otra instancia de la app que intente lo mismo)
+            connection.execute(text("LOCK TABLE public.registro_actividades IN SHARE ROW EXCLUSIVE MODE"))
+            existe = connection.execute(text("SELECT to_regclass(:t)"), {"t": tabla}).scalar()
+        if existe is None:
+            # CREATE TABLE AS hereda los tipos de registro_actividades
+            connection.execute(text(f"""
+                CREATE TABLE {tabla} AS
+                SELECT r.fecha, r.usuario_id, r.actividad_id,
+                       COALESCE(r.subactividad_id, 0) AS subactividad_id,
+                       COUNT(*) AS cantidad,
+                       SUM(COALESCE(r.duracion_seg, 0)) AS segundos,
+                       MIN(r.hora_inicio) AS primer_inicio,
+                       MAX(r.hora_fin) AS ultimo_fin
+                FROM public.registro_actividades r
+                WHERE r.hora_fin IS NOT NULL
+                  AND r.fecha IS NOT NULL AND r.usuario_id IS NOT NULL AND r.actividad_id IS NOT NULL
+                GROUP BY 1, 2, 3, 4
+            """))
+            connection.execute(text(
+                f"ALTER TABLE {tabla} ADD PRIMARY KEY (fecha, usuario_id, actividad_id, subactividad_id)"
+            ))
+            log.info("Tabla %s creada a partir de registro_actividades", TABLA_RESUMEN)
+        connection.execute(text("""
+            CREATE INDEX IF NOT EXISTS ix_registro_actividades_abiertas
+            ON public.registro_actividades (fecha, usuario_id)
+            WHERE hora_fin IS NULL
+        """))
+    return True
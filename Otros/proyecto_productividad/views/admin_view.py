@@ -257,7 +257,6 @@ def show_user_management(conn):
                         )
                         if success:
                             st.success(f"✅ Usuario '{username}' creado exitosamente.")
-                            st.cache_data.clear()
                             st.rerun()
                         else:
                             st.error("No se pudo crear el usuario.")
@@ -312,7 +311,6 @@ def show_user_management(conn):
 
                 if cambios_realizados:
                     st.success("✅ ¡Cambios guardados con éxito!")
-                    st.cache_data.clear()
                     st.rerun()
                 else:
                     st.info("ℹ️ No hay cambios para guardar.")
@@ -358,7 +356,6 @@ def manage_campaigns(conn):
                     try:
                         queries.create_campaign(conn, nombre)
                         st.success("✅ Campaña creada")
-                        st.cache_data.clear()
                         st.rerun()
                     except Exception as e:
                         st.error(str(e))
@@ -392,7 +389,6 @@ def manage_campaigns(conn):
                             except Exception as e:
                                 st.error(str(e))
                     st.success("✅ Cambios guardados")
-                    st.cache_data.clear()
                     st.rerun()
         else:
             st.info("No hay campañas registradas")
@@ -415,7 +411,6 @@ def manage_activities(conn):
                     try:
                         queries.create_activity(conn, nombre, descripcion, orden)
                         st.success("✅ Actividad creada")
-                        st.cache_data.clear()
                         st.rerun()
                     except Exception as e:
                         st.error(str(e))
@@ -457,7 +452,6 @@ def manage_activities(conn):
                         except Exception as e:
                             st.error(str(e))
                 st.success("✅ Cambios guardados")
-                st.cache_data.clear()
                 st.rerun()
         else:
             st.info("No hay actividades registradas")
@@ -486,7 +480,6 @@ def manage_subactivities(conn):
                             try:
                                 queries.create_subactivity(conn, activity_options[activity_name], nombre, orden)
                                 st.success("✅ Subactividad creada")
-                                st.cache_data.clear()
                                 st.rerun()
                             except Exception as e:
                                 st.error(str(e))
@@ -531,7 +524,6 @@ def manage_subactivities(conn):
                         except Exception as e:
                             st.error(str(e))
                 st.success("✅ Cambios guardados")
-                st.cache_data.clear()
                 st.rerun()
         else:
             st.info("No hay subactividades registradas")
@@ -552,7 +544,6 @@ def manage_roles(conn):
                     try:
                         queries.create_role(conn, nombre)
                         st.success("✅ Rol creado")
-                        st.cache_data.clear()
                         st.rerun()
                     except Exception as e:
                         st.error(str(e))
@@ -586,7 +577,6 @@ def manage_roles(conn):
                             except Exception as e:
                                 st.error(str(e))
                     st.success("✅ Cambios guardados")
-                    st.cache_data.clear()
                     st.rerun()
             
             with col2:
@@ -204,12 +204,6 @@ def handle_activity_click(conn, user_id, new_activity_id, new_activity_name, sub
             st.session_state['last_error'] = f"Error al iniciar actividad: {str(e)}"
             return
 
-    # Limpiar caches
-    try:
-        st.cache_data.clear()
-    except:
-        pass
-
 
 def get_activity_color(activity_name):
     """Retorna color para visualización de actividades"""
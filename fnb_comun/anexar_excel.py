@@ -0,0 +1,114 @@
+# fnb_comun/anexar_excel.py
+"""
+Anexado de registros nuevos a un Excel de seguimiento que crece cada día.
+
+Los consolidados de 02.14 (ventas anuladas, solicitudes de anulación) se
+abrían dos veces por corrida: una con pandas para saber qué pedidos ya estaban
+y otra con openpyxl para escribir, buscando la última fila celda por celda y
+creando un Font/Alignment por cada celda nueva.
+
+`ArchivoSeguimiento` abre el libro una sola vez (al primer uso), recorre la
+hoja en una pasada para obtener las claves existentes y la última fila con
+datos, y escribe las filas nuevas con un estilo con nombre compartido.
+
+    destino = ArchivoSeguimiento(ruta_destino, 'Ventas anuladas', 'Nro. PEDIDO VENTA')
+    df_nuevos = destino.filtrar_nuevos(df)
+    destino.anexar(df_nuevos, columnas_exportar)
+    destino.guardar()
+"""
+
+from openpyxl import load_workbook
+from openpyxl.styles import Alignment, Font, NamedStyle
+
+# Estilo de las filas anexadas (Aptos 8, alineado a la izquierda)
+ESTILO_ANEXO = "fnb_anexo"
+
+
+def _estilo_anexo():
+    return NamedStyle(
+        name=ESTILO_ANEXO,
+        font=Font(name='Aptos', size=8),
+        alignment=Alignment(horizontal='left', vertical='center'),
+    )
+
+
+def _texto_clave(valor):
+    """Clave como texto: 1234.0 → '1234' (openpyxl devuelve números tal cual)."""
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)
+    return str(valor).strip()
+
+
+class ArchivoSeguimiento:
+    """Hoja de un Excel de seguimiento al que se anexan registros nuevos."""
+
+    def __init__(self, ruta, hoja, columna_clave):
+        self.ruta = ruta
+        self.hoja = hoja
+        self.columna_clave = columna_clave
+        self._wb = None
+
+    def _abrir(self):
+        if self._wb is not None:
+            return
+        self._wb = load_workbook(self.ruta)
+        self._ws = self._wb[self.hoja]
+
+        filas = self._ws.iter_rows(values_only=True)
+        encabezados = [str(valor).strip() for valor in next(filas, ())]
+        self.columnas = {enc: idx + 1 for idx, enc in enumerate(encabezados)}
+        if self.columna_clave not in self.columnas:
+            raise KeyError(f"La hoja '{self.hoja}' no tiene la columna '{self.columna_clave}'")
+        idx_clave = self.columnas[self.columna_clave] - 1
+
+        # Una pasada: claves de todas las filas; se anexa tras la última con la columna A llena
+        self.ultima_fila = 1
+        self.claves = set()
+        for num_fila, fila in enumerate(filas, start=2):
+            if fila and fila[0]:
+                self.ultima_fila = num_fila
+            clave = fila[idx_clave] if idx_clave < len(fila) else None
+            if clave is not None and clave != '':
+                self.claves.add(_texto_clave(clave))
+
+        if ESTILO_ANEXO not in self._wb.named_styles:
+            self._wb.add_named_style(_estilo_anexo())
+
+    @property
+    def registros(self):
+        """Filas de datos existentes (sin encabezado)."""
+        self._abrir()
+        return self.ultima_fila - 1
+
+    def filtrar_nuevos(self, df):
+        """Filas de `df` cuya clave aún no está en el archivo."""
+        self._abrir()
+        return df[~df[self.columna_clave].astype(str).str.strip().isin(self.claves)].copy()
+
+    def anexar(self, df, columnas):
+        """Escribe `df` a continuación de la última fila (solo columnas presentes en la hoja)."""
+        self._abrir()
+        columnas = [col for col in columnas if col in self.columnas]
+        indices = [self.columnas[col] for col in columnas]
+        datos = df.reindex(columns=columnas)
+        valores = datos.astype(object).where(datos.notna(), "")
+
+        ws = self._ws
+        fila = self.ultima_fila
+        for registro in valores.itertuples(index=False, name=None):
+            fila += 1
+            for col_idx, valor in zip(indices, registro):
+                celda = ws.cell(row=fila, column=col_idx, value=valor)
+                celda.style = ESTILO_ANEXO
+
+        self.claves.update(df[self.columna_clave].astype(str).str.strip())
+        self.ultima_fila = fila
+        return len(valores)
+
+    def guardar(self):
+        """Guarda y cierra el libro (la próxima operación lo vuelve a abrir)."""
+        if self._wb is None:
+            return
+        self._wb.save(self.ruta)
+        self._wb.close()
+        self._wb = None
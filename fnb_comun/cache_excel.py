@@ -0,0 +1,142 @@
+# fnb_comun/cache_excel.py
+"""
+Caché en disco de hojas Excel ya parseadas.
+
+El mismo reporte base de ventas lo leen varios scripts en la misma mañana
+(02.1, 02.2, 02.3, 02.14, 01.2). La primera lectura guarda el DataFrame en
+formato columnar (Parquet si hay pyarrow/fastparquet) y las siguientes lo
+cargan en milisegundos en vez de volver a parsear el .xlsx.
+
+La clave incluye ruta, tamaño y fecha de modificación del archivo, la hoja y
+las opciones de lectura (usecols, dtype, ...): si el Excel cambia, la entrada
+deja de coincidir sola. Las entradas se podan por antigüedad de último uso
+(LRU) cuando la carpeta supera PRESUPUESTO_CACHE_MB.
+
+Se usa a través de `fnb_comun.excel.leer_excel(..., cache=True)`.
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+# Carpeta de la caché ("FNB_CACHE_EXCEL" en el entorno la cambia)
+CARPETA_CACHE = Path(os.environ.get(
+    "FNB_CACHE_EXCEL",
+    Path(os.environ.get("LOCALAPPDATA", Path.home() / ".cache")) / "fnb_cache_excel",
+))
+
+# Espacio máximo en disco; al superarlo se borran las entradas usadas hace más tiempo
+PRESUPUESTO_CACHE_MB = 2048
+
+# Cambiar si cambia el formato de las entradas (invalida todo lo anterior)
+VERSION_CACHE = 1
+
+EXT_PARQUET = ".parquet"
+EXT_PICKLE = ".pkl"
+
+
+def clave_cache(ruta, sheet_name, opciones):
+    """Huella de (ruta, tamaño, mtime, hoja, opciones de lectura); None si no es un archivo."""
+    try:
+        info = os.stat(ruta)
+    except (TypeError, OSError):
+        return None
+    partes = (
+        VERSION_CACHE,
+        pd.__version__,
+        os.path.normcase(os.path.abspath(ruta)),
+        info.st_size,
+        info.st_mtime_ns,
+        sheet_name,
+        sorted((k, repr(v)) for k, v in opciones.items()),
+    )
+    return hashlib.sha1(repr(partes).encode("utf-8")).hexdigest()
+
+
+def _entrada(clave):
+    for ext in (EXT_PARQUET, EXT_PICKLE):
+        archivo = CARPETA_CACHE / f"{clave}{ext}"
+        if archivo.exists():
+            return archivo
+    return None
+
+
+def en_cache(clave):
+    """True si hay una entrada guardada para `clave`."""
+    return clave is not None and _entrada(clave) is not None
+
+
+def leer_cache(clave):
+    """DataFrame guardado para `clave`, o None si no hay entrada (o está dañada)."""
+    archivo = _entrada(clave)
+    if archivo is None:
+        return None
+    try:
+        if archivo.suffix == EXT_PARQUET:
+            df = pd.read_parquet(archivo)
+        else:
+            with open(archivo, "rb") as f:
+                df = pickle.load(f)
+    except Exception:
+        archivo.unlink(missing_ok=True)
+        return None
+    # Marca de último uso para la poda LRU
+    os.utime(archivo)
+    return df
+
+
+def _escribir_atomico(destino, escribir):
+    """Escribe en un temporal y lo renombra: otro script nunca lee una entrada a medias."""
+    fd, temporal = tempfile.mkstemp(dir=CARPETA_CACHE, suffix=".tmp")
+    os.close(fd)
+    try:
+        escribir(temporal)
+        os.replace(temporal, destino)
+    except Exception:
+        Path(temporal).unlink(missing_ok=True)
+        raise
+
+
+def guardar_cache(clave, df):
+    """Guarda `df` para `clave` (Parquet; pickle si no hay motor Parquet o hay columnas mixtas)."""
+    try:
+        CARPETA_CACHE.mkdir(parents=True, exist_ok=True)
+        try:
+            _escribir_atomico(CARPETA_CACHE / f"{clave}{EXT_PARQUET}", lambda tmp: df.to_parquet(tmp))
+        except Exception:
+            # Sin pyarrow/fastparquet, o columnas object con tipos mezclados (típico de Excel)
+            def _pickle(tmp):
+                with open(tmp, "wb") as f:
+                    pickle.dump(df, f, protocol=pickle.HIGHEST_PROTOCOL)
+            _escribir_atomico(CARPETA_CACHE / f"{clave}{EXT_PICKLE}", _pickle)
+        podar_cache()
+    except OSError as e:
+        print(f"⚠️  No se pudo guardar la caché de Excel: {e}")
+
+
+def podar_cache(presupuesto_mb=PRESUPUESTO_CACHE_MB):
+    """Borra las entradas usadas hace más tiempo hasta quedar dentro del presupuesto."""
+    entradas = []
+    for archivo in CARPETA_CACHE.glob("*"):
+        if archivo.suffix in (EXT_PARQUET, EXT_PICKLE):
+            info = archivo.stat()
+            entradas.append((info.st_mtime, info.st_size, archivo))
+
+    total = sum(tamano for _, tamano, _ in entradas)
+    limite = presupuesto_mb * 1024 * 1024
+    for _, tamano, archivo in sorted(entradas):
+        if total <= limite:
+            break
+        archivo.unlink(missing_ok=True)
+        total -= tamano
+
+
+def limpiar_cache():
+    """Vacía la caché completa."""
+    for archivo in CARPETA_CACHE.glob("*"):
+        if archivo.suffix in (EXT_PARQUET, EXT_PICKLE, ".tmp"):
+            archivo.unlink(missing_ok=True)
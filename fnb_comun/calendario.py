@@ -0,0 +1,66 @@
+# fnb_comun/calendario.py
+"""
+Días hábiles FNB para columnas completas (lunes a sábado, sin feriados).
+
+Los reportes de pendientes (02.1, 02.2) y la reestructura (01.1) calculan el
+`Tiempo` de cada pedido como días hábiles entre FECHA VENTA y la entrega (u
+hoy). Antes se armaba un `pd.date_range` por fila; aquí el calendario de
+feriados se precalcula una vez (`np.busdaycalendar`) y el conteo de toda la
+columna se hace con `np.busday_count`, sin bucles Python.
+
+    calendario = CalendarioHabil(feriados)
+    base['Tiempo'] = calendario.dias_habiles(base['FECHA VENTA']) + 1
+"""
+
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from .excel import leer_excel
+
+# Semana laboral: lunes a sábado (solo se excluyen domingos)
+SEMANA_LABORAL = "1111110"
+
+
+class CalendarioHabil:
+    """Calendario de días hábiles con los feriados indicados."""
+
+    def __init__(self, feriados=()):
+        fechas = pd.to_datetime(pd.Series(list(feriados), dtype=object), errors='coerce').dropna()
+        self.feriados = np.unique(fechas.to_numpy().astype('datetime64[D]'))
+        self._calendario = np.busdaycalendar(weekmask=SEMANA_LABORAL, holidays=self.feriados)
+
+    @classmethod
+    def desde_excel(cls, ruta):
+        """Calendario con los feriados de la primera columna del Excel de feriados."""
+        df = leer_excel(ruta)
+        return cls(pd.to_datetime(df.iloc[:, 0], errors='coerce').dropna())
+
+    def dias_habiles(self, inicio, fin=None):
+        """
+        Días hábiles transcurridos entre `inicio` y `fin` (sin contar el día inicial).
+
+        Args:
+            inicio: Serie de fechas (FECHA VENTA). Vacías → 0.
+            fin: Serie de fechas de cierre (p. ej. FECHA ENTREGA); vacías o None → hoy.
+
+        Returns:
+            Serie de enteros alineada con `inicio`; 0 si `inicio` es posterior a `fin`.
+        """
+        inicio = pd.Series(inicio)
+        desde = pd.to_datetime(inicio, errors='coerce').to_numpy().astype('datetime64[D]')
+
+        hoy = np.datetime64(date.today(), 'D')
+        if fin is None:
+            hasta = np.full(len(desde), hoy)
+        else:
+            hasta = pd.to_datetime(pd.Series(fin), errors='coerce').to_numpy().astype('datetime64[D]')
+            hasta = np.where(np.isnat(hasta), hoy, hasta)
+
+        validos = ~np.isnat(desde) & (desde <= hasta)
+        conteo = np.zeros(len(desde), dtype='int64')
+        # busday_count cuenta [desde, hasta): +1 día para incluir el día final
+        conteo[validos] = np.busday_count(desde[validos], hasta[validos] + np.timedelta64(1, 'D'),
+                                          busdaycal=self._calendario)
+        return pd.Series(np.maximum(conteo - 1, 0), index=inicio.index)
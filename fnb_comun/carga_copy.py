@@ -0,0 +1,188 @@
+# fnb_comun/carga_copy.py
+"""
+Carga masiva a PostgreSQL con COPY ... FROM STDIN.
+
+El DataFrame limpio se serializa por lotes a CSV en memoria (io.StringIO) y se
+envía al servidor con `cursor.copy_expert`, evitando construir tuplas Python
+fila por fila como hacen `execute_values` o `DataFrame.to_sql`.
+
+Uso típico desde un script de carga:
+
+    from fnb_comun.carga_copy import copiar_dataframe_postgres
+    filas = copiar_dataframe_postgres(conn, df, "bd_colocaciones", tipos=tipos)
+    conn.commit()
+
+La función NO hace commit: el script decide si confirma todo al final
+(una sola transacción) o por etapas.
+"""
+
+import io
+
+import numpy as np
+import pandas as pd
+
+# Marcador de NULL usado en el CSV intermedio (no colisiona con cadenas vacías)
+NULL_COPY = r"\N"
+
+# Tamaño de lote por defecto (filas serializadas por cada llamada a COPY)
+FILAS_POR_LOTE_DEFAULT = 100_000
+
+# Métodos de carga disponibles en los scripts de z_CargaBDPostgreSQL
+METODOS_CARGA = ("copy", "insert")
+
+_TIPOS_ENTEROS = ("SMALLINT", "INT", "INTEGER", "BIGINT")
+
+
+def _es_tipo_entero(tipo_pg):
+    """True si el tipo PostgreSQL declarado es entero (INT, BIGINT, ...)."""
+    return str(tipo_pg).strip().upper() in _TIPOS_ENTEROS
+
+
+def quote_ident(nombre):
+    """Cita un identificador PostgreSQL (tabla o columna) con comillas dobles."""
+    return '"' + str(nombre).replace('"', '""') + '"'
+
+
+def _tabla_sql(tabla):
+    """Cita 'esquema.tabla' o 'tabla' respetando el punto como separador."""
+    partes = str(tabla).split(".")
+    return ".".join(quote_ident(p) for p in partes)
+
+
+def preparar_dataframe_para_copy(df, columnas=None, tipos=None):
+    """
+    Ajusta tipos del DataFrame para que el texto CSV sea aceptado por COPY.
+
+    - Columnas float con inf/-inf → NaN (COPY no acepta 'inf' en NUMERIC antiguos).
+    - Columnas destino enteras (según `tipos`) → Int64 redondeado, para no
+      enviar '123.0' a un BIGINT (INSERT lo castea, COPY no).
+    - Columnas bool se mantienen; PostgreSQL acepta 'True'/'False'.
+
+    Retorna un DataFrame nuevo con solo `columnas` (en ese orden).
+    """
+    columnas = list(columnas) if columnas is not None else list(df.columns)
+    tipos = {str(k).lower(): v for k, v in (tipos or {}).items()}
+
+    df_copy = df[columnas].copy()
+
+    for col in columnas:
+        serie = df_copy[col]
+        tipo_pg = tipos.get(str(col).lower())
+
+        if tipo_pg and _es_tipo_entero(tipo_pg):
+            if not pd.api.types.is_integer_dtype(serie):
+                numerica = pd.to_numeric(serie, errors="coerce")
+                numerica = numerica.replace([np.inf, -np.inf], np.nan)
+                df_copy[col] = numerica.round(0).astype("Int64")
+            continue
+
+        if pd.api.types.is_float_dtype(serie):
+            df_copy[col] = serie.replace([np.inf, -np.inf], np.nan)
+
+    return df_copy
+
+
+def tipos_para_dataframe(df, tipos=None):
+    """
+    Completa el mapeo columna → tipo PostgreSQL para todas las columnas del DataFrame.
+
+    Las columnas declaradas en `tipos` conservan su tipo; el resto se infiere del
+    dtype de pandas con el mismo criterio que usa `DataFrame.to_sql`.
+    """
+    tipos_lower = {str(k).lower(): v for k, v in (tipos or {}).items()}
+    resultado = {}
+    for col in df.columns:
+        tipo = tipos_lower.get(str(col).lower())
+        if tipo is None:
+            serie = df[col]
+            if pd.api.types.is_bool_dtype(serie):
+                tipo = "BOOLEAN"
+            elif pd.api.types.is_integer_dtype(serie):
+                tipo = "BIGINT"
+            elif pd.api.types.is_float_dtype(serie):
+                tipo = "DOUBLE PRECISION"
+            elif pd.api.types.is_datetime64_any_dtype(serie):
+                tipo = "TIMESTAMP"
+            else:
+                tipo = "TEXT"
+        resultado[col] = tipo
+    return resultado
+
+
+def crear_tabla_desde_tipos(cursor, tabla, columnas, tipos, tipo_defecto="TEXT"):
+    """
+    Crea la tabla (IF NOT EXISTS) a partir de un mapeo columna → tipo PostgreSQL.
+
+    Las columnas sin tipo en el mapeo se crean como `tipo_defecto`.
+    """
+    tipos_lower = {str(k).lower(): v for k, v in tipos.items()}
+    definiciones = ",\n        ".join(
+        f"{quote_ident(col)} {tipos_lower.get(str(col).lower(), tipo_defecto)}"
+        for col in columnas
+    )
+    cursor.execute(f"CREATE TABLE IF NOT EXISTS {_tabla_sql(tabla)} (\n        {definiciones}\n    )")
+
+
+def copiar_dataframe_postgres(conn, df, tabla, columnas=None, tipos=None,
+                              filas_por_lote=FILAS_POR_LOTE_DEFAULT, log=print):
+    """
+    Inserta un DataFrame en `tabla` usando COPY FROM STDIN (formato CSV).
+
+    Args:
+        conn: conexión psycopg2 abierta.
+        df: DataFrame ya limpio; los nombres de columnas deben coincidir con la tabla.
+        tabla: nombre de la tabla destino (admite 'esquema.tabla').
+        columnas: columnas a cargar (por defecto todas las del DataFrame).
+        tipos: mapeo opcional columna → tipo PostgreSQL, usado para normalizar enteros.
+        filas_por_lote: filas serializadas por cada COPY; acota la memoria del buffer.
+        log: función de reporte de progreso (print, logging.info, ...). None = silencio.
+
+    Returns:
+        int: total de filas copiadas (suma de los conteos reportados por el servidor).
+    """
+    columnas = list(columnas) if columnas is not None else list(df.columns)
+    df_copy = preparar_dataframe_para_copy(df, columnas, tipos)
+
+    lista_columnas = ", ".join(quote_ident(c) for c in columnas)
+    copy_sql = (
+        f"COPY {_tabla_sql(tabla)} ({lista_columnas}) FROM STDIN "
+        f"WITH (FORMAT csv, NULL '{NULL_COPY}')"
+    )
+
+    total = len(df_copy)
+    copiadas = 0
+    if total == 0:
+        if log:
+            log(f"Sin filas para copiar en {tabla}")
+        return 0
+
+    filas_por_lote = max(int(filas_por_lote), 1)
+    num_lotes = (total + filas_por_lote - 1) // filas_por_lote
+
+    with conn.cursor() as cursor:
+        for n_lote, inicio in enumerate(range(0, total, filas_por_lote), start=1):
+            lote = df_copy.iloc[inicio:inicio + filas_por_lote]
+
+            buffer = io.StringIO()
+            lote.to_csv(buffer, index=False, header=False, na_rep=NULL_COPY,
+                        lineterminator="\n")
+            buffer.seek(0)
+
+            cursor.copy_expert(copy_sql, buffer)
+            filas_lote = cursor.rowcount if cursor.rowcount is not None and cursor.rowcount >= 0 else len(lote)
+            copiadas += filas_lote
+
+            if log:
+                log(f"  Lote {n_lote}/{num_lotes}: {filas_lote:,} filas copiadas "
+                    f"({copiadas:,}/{total:,} - {copiadas / total:.1%})")
+
+    return copiadas
+
+
+def normalizar_metodo_carga(metodo):
+    """Valida el método de carga configurado en un script ('copy' o 'insert')."""
+    metodo = str(metodo or "copy").strip().lower()
+    if metodo not in METODOS_CARGA:
+        raise ValueError(f"Método de carga no soportado: {metodo!r}. Use uno de {METODOS_CARGA}")
+    return metodo
+
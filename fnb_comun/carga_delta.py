@@ -0,0 +1,205 @@
+# fnb_comun/carga_delta.py
+"""
+Carga incremental (delta) a PostgreSQL: solo se escribe lo que cambió.
+
+El DataFrame completo se copia con COPY a una tabla temporal (staging, en
+pg_temp) con la misma estructura que el destino. Con las columnas clave se
+cruzan ambas tablas y con un hash por fila (md5 del ROW) se separan los
+registros nuevos, modificados y sin cambios; luego se aplica solo el delta:
+
+    UPDATE  filas con la misma clave y distinto hash
+    INSERT  claves que no existen en el destino
+    DELETE  (opcional) claves del destino que ya no vienen en el archivo
+
+Cada paso se hace en dos grupos: las claves completas cruzan con `=` (hash
+join o el índice de la clave, que conviene tener en el destino) y las claves
+con algún nulo, que son pocas, con IS NOT DISTINCT FROM (una clave nula cruza
+con otra nula, no con ''). IS NOT DISTINCT FROM sobre toda la tabla obligaría a
+un nested loop de filas del archivo × filas del destino.
+
+Todo ocurre en la transacción de `conn` (la función NO hace commit). A diferencia
+de TRUNCATE, que bloquea la tabla en modo ACCESS EXCLUSIVE, los reportes pueden
+seguir leyendo la versión anterior hasta el commit.
+
+Las claves deben ser únicas en el archivo: si se repiten (también varias filas
+con todas las claves nulas) no hay forma de saber a qué fila del destino
+corresponde cada una y se lanza `ClavesRepetidasError` antes de tocar la
+tabla; el llamador decide si falla o hace una recarga completa.
+
+    resumen = aplicar_delta_postgres(conn, df, "bd_colocaciones",
+                                     claves=["pedido_venta", "nro_contrato"])
+    conn.commit()
+"""
+
+from .carga_copy import _tabla_sql, copiar_dataframe_postgres, quote_ident
+
+
+class ClavesRepetidasError(ValueError):
+    """El DataFrame trae más de una fila con la misma clave."""
+
+    def __init__(self, tabla, claves, repetidas):
+        self.repetidas = repetidas
+        super().__init__(f"{repetidas:,} filas con clave repetida ({', '.join(claves)}) "
+                         f"en la carga delta de {tabla}")
+
+
+def _grupos_cruce(claves):
+    """
+    Cruce destino (t) / staging (s) por `claves`, partido en dos grupos.
+
+    Retorna [(cruce, filtro_t, filtro_s), ...]: claves completas con `=` y
+    claves con algún nulo con IS NOT DISTINCT FROM; cada filtro acota su lado
+    a las filas del grupo.
+    """
+    cols = [quote_ident(c) for c in claves]
+
+    def completas(alias):
+        return "(" + " AND ".join(f"{alias}.{c} IS NOT NULL" for c in cols) + ")"
+
+    def con_nulos(alias):
+        return "(" + " OR ".join(f"{alias}.{c} IS NULL" for c in cols) + ")"
+
+    return [
+        (" AND ".join(f"t.{c} = s.{c}" for c in cols), completas("t"), completas("s")),
+        (" AND ".join(f"t.{c} IS NOT DISTINCT FROM s.{c}" for c in cols), con_nulos("t"), con_nulos("s")),
+    ]
+
+
+def _hash_fila(alias, columnas):
+    campos = ", ".join(f"{alias}.{quote_ident(c)}" for c in columnas)
+    return f"md5(ROW({campos})::text)"
+
+
+def _con_cambios(cursor, dml, expr):
+    """Ejecuta un INSERT/DELETE agregando RETURNING `expr`; retorna (filas, valores distintos)."""
+    cursor.execute(
+        f"WITH cambios AS ({dml} RETURNING {expr} AS valor) "
+        f"SELECT valor, COUNT(*) FROM cambios GROUP BY valor"
+    )
+    filas = cursor.fetchall()
+    return sum(n for _, n in filas), {valor for valor, _ in filas}
+
+
+def aplicar_delta_postgres(conn, df, tabla, claves, columnas=None, tipos=None,
+                           eliminar_ausentes=False, columna_cambios=None, log=print):
+    """
+    Aplica a `tabla` solo las diferencias con `df`, identificando filas por `claves`.
+
+    Args:
+        conn: conexión psycopg2 abierta (no se hace commit).
+        df: DataFrame limpio con los nombres de columnas de la tabla.
+        tabla: tabla destino existente.
+        claves: columnas que identifican una fila (p. ej. ["pedido_venta", "nro_contrato"]).
+        columnas: columnas a cargar (por defecto todas las del DataFrame).
+        tipos: mapeo opcional columna → tipo PostgreSQL (ver copiar_dataframe_postgres).
+        eliminar_ausentes: borra del destino las claves que no vienen en `df`.
+        columna_cambios: columna cuyos valores afectados se informan en
+            resumen['cambios'] (antes y después de actualizar), p. ej. "f_entrega"
+            para refrescar solo los días tocados de una tabla resumen.
+        log: función de reporte. None = silencio.
+
+    Returns:
+        dict con 'insertadas', 'actualizadas', 'sin_cambios' y 'eliminadas'
+        (y 'cambios' si se indicó `columna_cambios`).
+
+    Raises:
+        ClavesRepetidasError: si `df` repite claves (no se modifica nada).
+    """
+    columnas = list(columnas) if columnas is not None else list(df.columns)
+    claves = list(claves)
+    faltantes = [c for c in claves if c not in columnas]
+    if faltantes:
+        raise ValueError(f"Columnas clave no incluidas en la carga: {faltantes}")
+
+    # Una fila por clave (las claves nulas cuentan como iguales entre sí)
+    repetidas = int(df.duplicated(subset=claves, keep=False).sum())
+    if repetidas:
+        raise ClavesRepetidasError(tabla, claves, repetidas)
+    df_stage = df[columnas]
+
+    # Siempre en pg_temp: nunca alcanza una tabla permanente con el mismo nombre
+    nombre_staging = f"tmp_delta_{str(tabla).split('.')[-1]}"
+    staging = f"pg_temp.{nombre_staging}"
+    staging_sql = _tabla_sql(staging)
+    destino = _tabla_sql(tabla)
+    lista_columnas = ", ".join(quote_ident(c) for c in columnas)
+    grupos = _grupos_cruce(claves)
+
+    with conn.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {staging_sql}")
+        cursor.execute(
+            f"CREATE TEMP TABLE {quote_ident(nombre_staging)} "
+            f"(LIKE {destino} INCLUDING DEFAULTS) ON COMMIT DROP"
+        )
+
+    if log:
+        log(f"Copiando {len(df_stage):,} filas a la tabla temporal {nombre_staging}...")
+    copiar_dataframe_postgres(conn, df_stage, staging, columnas=columnas, tipos=tipos, log=None)
+
+    with conn.cursor() as cursor:
+        cursor.execute(f"ANALYZE {staging_sql}")
+
+        asignaciones = ", ".join(
+            f"{quote_ident(c)} = s.{quote_ident(c)}" for c in columnas if c not in claves
+        )
+        cambios = set()
+        distinto = f"{_hash_fila('t', columnas)} <> {_hash_fila('s', columnas)}"
+        if columna_cambios and asignaciones:
+            # Valor anterior y nuevo de las filas que se van a actualizar
+            col = quote_ident(columna_cambios)
+            for cruce, filtro_t, filtro_s in grupos:
+                cursor.execute(
+                    f"SELECT DISTINCT t.{col}, s.{col} FROM {destino} AS t "
+                    f"JOIN {staging_sql} AS s ON {cruce} WHERE {filtro_t} AND {filtro_s} AND {distinto}"
+                )
+                for anterior, nuevo in cursor.fetchall():
+                    cambios.update((anterior, nuevo))
+
+        actualizadas = insertadas = eliminadas = 0
+        for cruce, filtro_t, filtro_s in grupos:
+            if asignaciones:
+                cursor.execute(
+                    f"UPDATE {destino} AS t SET {asignaciones} "
+                    f"FROM {staging_sql} AS s "
+                    f"WHERE {cruce} AND {filtro_t} AND {filtro_s} AND {distinto}"
+                )
+                actualizadas += cursor.rowcount
+
+            insertar = (
+                f"INSERT INTO {destino} AS t ({lista_columnas}) "
+                f"SELECT {', '.join('s.' + quote_ident(c) for c in columnas)} FROM {staging_sql} AS s "
+                f"WHERE {filtro_s} AND NOT EXISTS (SELECT 1 FROM {destino} AS t WHERE {cruce} AND {filtro_t})"
+            )
+            if columna_cambios:
+                filas, valores = _con_cambios(cursor, insertar, f"t.{quote_ident(columna_cambios)}")
+                insertadas += filas
+                cambios |= valores
+            else:
+                cursor.execute(insertar)
+                insertadas += cursor.rowcount
+
+            if eliminar_ausentes:
+                eliminar = (
+                    f"DELETE FROM {destino} AS t "
+                    f"WHERE {filtro_t} AND NOT EXISTS (SELECT 1 FROM {staging_sql} AS s WHERE {cruce} AND {filtro_s})"
+                )
+                if columna_cambios:
+                    filas, valores = _con_cambios(cursor, eliminar, f"t.{quote_ident(columna_cambios)}")
+                    eliminadas += filas
+                    cambios |= valores
+                else:
+                    cursor.execute(eliminar)
+                    eliminadas += cursor.rowcount
+
+    resumen = {
+        "insertadas": insertadas,
+        "actualizadas": actualizadas,
+        "sin_cambios": len(df_stage) - insertadas - actualizadas,
+        "eliminadas": eliminadas,
+    }
+    if columna_cambios:
+        resumen["cambios"] = cambios
+    if log:
+        log(f"Delta {tabla}: {resumen['insertadas']:,} nuevas, {resumen['actualizadas']:,} actualizadas, "
+            f"{resumen['sin_cambios']:,} sin cambios, {resumen['eliminadas']:,} eliminadas")
+    return resumen
@@ -0,0 +1,83 @@
+# fnb_comun/cruce_temporal.py
+"""
+Búsqueda de "venta posterior" para columnas completas.
+
+Varias validaciones preguntan, para cada venta, si existe otro registro con la
+misma clave (cuenta contrato, o la combinación de vendedor/cliente/importe...)
+registrado después (o el mismo día) con un estado exitoso. Hacerlo fila por fila
+filtra todo el DataFrame en cada iteración (O(n·m)).
+
+Aquí las referencias se ordenan una sola vez por (clave, fecha) y cada consulta
+se resuelve con búsqueda binaria (`np.searchsorted`) sobre ese orden: conteo de
+referencias de la misma clave en un rango de fechas, para todas las filas a la vez.
+
+    exitosas = df['ESTADO'].isin(['ENTREGADO', 'PENDIENTE DE ENTREGA'])
+    tiene_posterior = existe_registro_posterior(
+        rechazadas['clave'], rechazadas['FECHA_HORA_VENTA'],
+        df.loc[exitosas, 'clave'], df.loc[exitosas, 'FECHA_HORA_VENTA'],
+    )
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def _a_ns(fechas):
+    return pd.to_datetime(pd.Series(fechas), errors='coerce').to_numpy().astype('datetime64[ns]')
+
+
+def existe_registro_posterior(claves, fechas, claves_ref, fechas_ref, mismo_dia=False):
+    """
+    Indica, para cada (clave, fecha), si hay una referencia con la misma clave y fecha posterior.
+
+    Args:
+        claves: claves de las filas consultadas (Serie o array; valores comparables por igualdad).
+        fechas: fecha/hora de cada fila consultada.
+        claves_ref: claves de los registros de referencia (p. ej. solo ventas exitosas).
+        fechas_ref: fecha/hora de cada referencia; las vacías se ignoran.
+        mismo_dia: cuenta también las referencias del mismo día calendario con
+            hora distinta (anteriores o posteriores), no solo las posteriores.
+
+    Returns:
+        Serie booleana alineada con `claves`. Las filas sin fecha o sin clave quedan en False.
+    """
+    indice = claves.index if isinstance(claves, pd.Series) else None
+    claves = pd.Series(claves).to_numpy()
+    claves_ref = pd.Series(claves_ref).to_numpy()
+    t = _a_ns(fechas)
+    t_ref = _a_ns(fechas_ref)
+
+    # Códigos de clave compartidos entre consultas y referencias (clave vacía = -1, no cruza)
+    codigos, _ = pd.factorize(np.concatenate([claves, claves_ref]))
+    cod_q, cod_ref = codigos[:len(claves)], codigos[len(claves):]
+
+    validas_ref = ~np.isnat(t_ref) & (cod_ref >= 0)
+    cod_ref, t_ref = cod_ref[validas_ref], t_ref[validas_ref]
+    resultado = np.zeros(len(t), dtype=bool)
+    consultar = ~np.isnat(t) & (cod_q >= 0)
+    if not consultar.any() or not len(t_ref):
+        return pd.Series(resultado, index=indice)
+
+    cod_q, t_q = cod_q[consultar], t[consultar]
+    inicio_dia = t_q.astype('datetime64[D]').astype('datetime64[ns]')
+
+    # Rango denso de las fechas: (código, rango) cabe en un único int64 ordenable
+    _, rangos = np.unique(np.concatenate([t_ref, t_q, inicio_dia]), return_inverse=True)
+    n_rangos = int(rangos.max()) + 2
+    r_ref, r_q, r_dia = np.split(rangos, [len(t_ref), len(t_ref) + len(t_q)])
+
+    compuesto_ref = np.sort(cod_ref.astype('int64') * n_rangos + r_ref)
+    base_q = cod_q.astype('int64') * n_rangos
+    fin_clave = np.searchsorted(compuesto_ref, base_q + n_rangos, side='left')
+    despues = np.searchsorted(compuesto_ref, base_q + r_q, side='right')
+
+    if mismo_dia:
+        # Desde el inicio del día de la consulta, descontando las de la misma fecha/hora exacta
+        desde_dia = np.searchsorted(compuesto_ref, base_q + r_dia, side='left')
+        iguales = despues - np.searchsorted(compuesto_ref, base_q + r_q, side='left')
+        encontrados = (fin_clave - desde_dia) - iguales
+    else:
+        encontrados = fin_clave - despues
+
+    resultado[consultar] = encontrados > 0
+    return pd.Series(resultado, index=indice)
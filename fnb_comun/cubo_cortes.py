@@ -0,0 +1,134 @@
+# fnb_comun/cubo_cortes.py
+"""
+Cubo preagregado para los reportes de avance de ventas por cortes (anterior vs nuevo).
+
+11.1 (dashboard HTML) y 02.8 (imágenes) filtraban las transacciones de ambos
+archivos por la hora de corte y luego volvían a agrupar el detalle completo por
+canal, aliado, sede o asesor en cada tabla. Aquí se agrupa una sola vez:
+
+- `CuboCortes` suma importes y cuenta transacciones por
+  periodo × canal × aliado × sede × asesor × tramo de 30 minutos;
+- `cortar(hora_corte)` junta los tramos anteriores al corte y solo las
+  transacciones del tramo del corte (hasta la hora exacta), con lo que el
+  resultado es el mismo que filtrar `HORA VENTA <= hora_corte`;
+- `comparar(corte, por, canal)` arma cada tabla sobre ese corte (unos cientos
+  de filas) con la variación de importe.
+
+    cubo = CuboCortes(df_anterior, df_nuevo, "IMPORTE (S./)")
+    corte = cubo.cortar(hora_corte)
+    resumen = comparar(corte, ["CANAL_VENTA"])
+    retail = comparar(corte, ["ALIADO COMERCIAL", "SEDE"], canal="RETAIL")
+
+Los DataFrames son los de `procesar_archivo` (una fila por transacción), por lo
+que los conteos por tramo se pueden sumar. Las transacciones sin hora válida
+quedan fuera de cualquier corte, igual que con el filtro directo.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Columnas de agrupación del cubo (las que falten en los archivos se omiten)
+DIMENSIONES = ["CANAL_VENTA", "ALIADO COMERCIAL", "SEDE", "ASESOR DE VENTAS"]
+
+# Periodos comparados (sufijo de las columnas: Importe_Anterior, ...)
+PERIODOS = ("Anterior", "Nuevo")
+
+# Duración de cada tramo horario del cubo (igual que RANGO HORA)
+SEGUNDOS_TRAMO = 30 * 60
+
+MEDIDAS = ["Importe", "Transacciones"]
+
+
+def segundos_del_dia(horas):
+    """Segundos desde medianoche de una Serie de datetime.time (NaN si falta la hora)."""
+    return pd.to_timedelta(pd.Series(horas).astype(str), errors="coerce").dt.total_seconds()
+
+
+def columnas_comparacion():
+    """Columnas de un corte/comparación en el orden de los reportes."""
+    return [f"{medida}_{periodo}" for periodo in PERIODOS for medida in MEDIDAS]
+
+
+class CuboCortes:
+    """Importes y transacciones de los dos archivos agregados por dimensiones y tramo horario."""
+
+    def __init__(self, df_anterior, df_nuevo, col_importe, dimensiones=DIMENSIONES):
+        periodos = dict(zip(PERIODOS, (df_anterior, df_nuevo)))
+        self.dimensiones = [col for col in dimensiones
+                            if any(col in df.columns for df in periodos.values())]
+
+        partes = []
+        for periodo, df in periodos.items():
+            if df.empty:
+                continue
+            parte = df.reindex(columns=self.dimensiones + ["codigo_unico"])
+            parte.insert(0, "PERIODO", periodo)
+            parte["Importe"] = df[col_importe]
+            parte["SEGUNDO"] = segundos_del_dia(df["HORA VENTA"]).to_numpy()
+            partes.append(parte)
+
+        columnas = ["PERIODO", *self.dimensiones, "codigo_unico", "Importe", "SEGUNDO"]
+        detalle = pd.concat(partes, ignore_index=True) if partes else pd.DataFrame(columns=columnas)
+        detalle = detalle[detalle["SEGUNDO"].notna()]
+        detalle["TRAMO"] = (detalle["SEGUNDO"] // SEGUNDOS_TRAMO).astype(int)
+
+        # Detalle mínimo ordenado por hora: solo se lee el tramo del corte
+        self._detalle = detalle.sort_values("SEGUNDO", kind="stable").reset_index(drop=True)
+        self._segundos = self._detalle["SEGUNDO"].to_numpy()
+        self.tramos = self._agregar(self._detalle, ["PERIODO", *self.dimensiones, "TRAMO"])
+
+    @staticmethod
+    def _agregar(df, claves):
+        return df.groupby(claves, dropna=False, sort=False).agg(
+            Importe=("Importe", "sum"),
+            Transacciones=("codigo_unico", "nunique"),
+        ).reset_index()
+
+    def cortar(self, hora_corte):
+        """
+        Totales por dimensiones de las ventas hasta `hora_corte` (inclusive).
+
+        Returns:
+            DataFrame con las dimensiones como columnas y Importe_Anterior,
+            Transacciones_Anterior, Importe_Nuevo, Transacciones_Nuevo (0 donde
+            un periodo no tiene ventas).
+        """
+        limite = segundos_del_dia([hora_corte]).iloc[0]
+        claves = ["PERIODO", *self.dimensiones]
+        if pd.isna(limite):
+            return pd.DataFrame(columns=self.dimensiones + columnas_comparacion())
+
+        tramo = int(limite // SEGUNDOS_TRAMO)
+        inicio = np.searchsorted(self._segundos, tramo * SEGUNDOS_TRAMO, side="left")
+        fin = np.searchsorted(self._segundos, limite, side="right")
+
+        completos = self.tramos[self.tramos["TRAMO"] < tramo]
+        parcial = self._agregar(self._detalle.iloc[inicio:fin], claves)
+        juntos = pd.concat([completos.drop(columns="TRAMO"), parcial], ignore_index=True)
+
+        corte = (juntos.groupby(claves, dropna=False, sort=False)[MEDIDAS].sum()
+                 .unstack("PERIODO", fill_value=0))
+        corte.columns = [f"{medida}_{periodo}" for medida, periodo in corte.columns]
+        corte = corte.reindex(columns=columnas_comparacion(), fill_value=0)
+        return corte.reset_index()
+
+
+def comparar(corte, por, canal=None):
+    """
+    Tabla comparativa de `corte` agrupada por las columnas `por`.
+
+    Args:
+        corte: resultado de `CuboCortes.cortar`.
+        por: columnas de agrupación (p. ej. ["SEDE"] o ["ALIADO COMERCIAL", "SEDE"]).
+        canal: si se indica, solo las ventas de ese CANAL_VENTA.
+
+    Returns:
+        DataFrame indexado por `por` (ordenado, sin valores vacíos en la clave)
+        con las columnas del corte y Variacion_Importe (nuevo - anterior).
+    """
+    if canal is not None:
+        corte = corte[corte["CANAL_VENTA"] == canal]
+    por = list(por)
+    tabla = corte.groupby(por if len(por) > 1 else por[0])[columnas_comparacion()].sum()
+    tabla["Variacion_Importe"] = tabla["Importe_Nuevo"] - tabla["Importe_Anterior"]
+    return tabla
@@ -0,0 +1,137 @@
+# fnb_comun/dashboard_cortes.py
+"""
+Dashboard HTML del avance de ventas por cortes (anterior vs nuevo).
+
+El dashboard de 11.1 se armaba concatenando strings: estilos, resumen y cada
+tabla de detalle quedaban escritos fila por fila en el HTML. Aquí la página es
+una plantilla fija (plantillas/dashboard_cortes.html, con `string.Template`) y
+los datos viajan una sola vez: el corte de `CuboCortes` en JSON columnar
+(códigos por dimensión + medidas), que el navegador usa para armar el resumen
+y las tablas por canal. Con `comprimir=True` los datos van además con gzip y
+base64 (el navegador necesita DecompressionStream).
+
+    html = generar_dashboard_cortes(corte, "01/10/2025", "01/11/2025", hora_corte,
+                                    orden_canales=ORDEN, agrupacion_canales=AGRUPACION,
+                                    canales_expandibles=EXPANDIBLES)
+
+Los canales que no estén configurados aparecen después de los ordenados,
+agrupados por SEDE; no hace falta tocar el código para un canal nuevo.
+"""
+
+import base64
+import gzip
+import html
+import json
+from datetime import datetime
+from pathlib import Path
+from string import Template
+
+import pandas as pd
+
+from .cubo_cortes import columnas_comparacion
+
+RUTA_PLANTILLA = Path(__file__).resolve().parent / "plantillas" / "dashboard_cortes.html"
+
+# Datos embebidos como JSON plano (True = gzip + base64, requiere DecompressionStream en el navegador)
+COMPRIMIR_DATOS = False
+
+# Agrupación de los canales no configurados y canales que no llevan tabla de detalle
+AGRUPACION_POR_DEFECTO = ["SEDE"]
+CANALES_SIN_DETALLE = ["NO IDENTIFICADO", ""]
+
+
+def _por_tabla(corte, dimensiones, agrupacion_canales):
+    """
+    Corte reducido a las columnas que usa la tabla de cada canal.
+
+    Las dimensiones que la tabla del canal no usa quedan vacías y se suman
+    (sin descartar claves vacías, para que los totales por canal no cambien).
+    """
+    medidas = columnas_comparacion()
+    partes = []
+    for canal, filas in corte.groupby("CANAL_VENTA", dropna=False, sort=False):
+        columnas = [col for col in agrupacion_canales.get(canal, AGRUPACION_POR_DEFECTO) if col in dimensiones]
+        parte = filas.groupby(["CANAL_VENTA", *columnas], dropna=False, sort=False)[medidas].sum().reset_index()
+        partes.append(parte.reindex(columns=dimensiones + medidas))
+    if not partes:
+        return corte.iloc[0:0]
+    return pd.concat(partes, ignore_index=True)
+
+
+def datos_dashboard(corte, fecha_anterior, fecha_nueva, orden_canales=(), agrupacion_canales=None,
+                    canales_expandibles=()):
+    """
+    Corte en formato columnar compacto para la plantilla.
+
+    Cada canal se reduce a las columnas de su tabla; cada dimensión se codifica
+    con `pd.factorize` (valores únicos una sola vez, -1 = vacío) y cada fila es
+    [códigos..., importe_ant, trx_ant, importe_nue, trx_nue].
+    """
+    agrupacion_canales = dict(agrupacion_canales or {})
+    medidas = columnas_comparacion()
+    dimensiones = [col for col in corte.columns if col not in medidas]
+    corte = _por_tabla(corte, dimensiones, agrupacion_canales)
+
+    codigos, valores = [], []
+    for col in dimensiones:
+        codigo, unicos = pd.factorize(corte[col])
+        codigos.append(codigo.tolist())
+        valores.append([str(valor) for valor in unicos])
+
+    importes = [corte[col].round(2).tolist() for col in medidas[0::2]]
+    transacciones = [corte[col].astype(int).tolist() for col in medidas[1::2]]
+    filas = [
+        [*claves, imp_ant, trx_ant, imp_nue, trx_nue]
+        for *claves, imp_ant, trx_ant, imp_nue, trx_nue
+        in zip(*codigos, importes[0], transacciones[0], importes[1], transacciones[1])
+    ]
+
+    return {
+        "fechas": [fecha_anterior, fecha_nueva],
+        "dimensiones": dimensiones,
+        "valores": valores,
+        "filas": filas,
+        "canales": {
+            "orden": list(orden_canales),
+            "agrupacion": agrupacion_canales,
+            "expandibles": list(canales_expandibles),
+            "por_defecto": AGRUPACION_POR_DEFECTO,
+            "excluidos": CANALES_SIN_DETALLE,
+        },
+    }
+
+
+def _json_embebido(datos, comprimir):
+    texto = json.dumps(datos, ensure_ascii=False, separators=(",", ":"))
+    if comprimir:
+        comprimido = gzip.compress(texto.encode("utf-8"), compresslevel=9, mtime=0)
+        return json.dumps({"gzip": base64.b64encode(comprimido).decode("ascii")})
+    # Dentro de <script> no puede aparecer "</"
+    return texto.replace("</", "<\\/")
+
+
+def generar_dashboard_cortes(corte, fecha_anterior, fecha_nueva, hora_corte, orden_canales=(),
+                             agrupacion_canales=None, canales_expandibles=(), comprimir=COMPRIMIR_DATOS):
+    """
+    HTML completo del dashboard comparativo.
+
+    Args:
+        corte: resultado de `CuboCortes.cortar`.
+        fecha_anterior, fecha_nueva: fechas de los periodos (texto dd/mm/aaaa).
+        hora_corte: hora del corte (se muestra tal cual).
+        orden_canales: canales que van primero en el detalle, en ese orden.
+        agrupacion_canales: {canal: [columnas]} de cada tabla de detalle.
+        canales_expandibles: canales con subtotales por la primera columna que
+            se abren y cierran con un clic.
+        comprimir: embebe los datos con gzip + base64.
+    """
+    datos = datos_dashboard(corte, fecha_anterior, fecha_nueva, orden_canales, agrupacion_canales,
+                            canales_expandibles)
+    plantilla = Template(RUTA_PLANTILLA.read_text(encoding="utf-8"))
+    return plantilla.substitute(
+        fecha_anterior=html.escape(str(fecha_anterior)),
+        fecha_nueva=html.escape(str(fecha_nueva)),
+        hora_corte=html.escape(str(hora_corte)),
+        generado=datetime.now().strftime("%d/%m/%Y a las %H:%M:%S"),
+        datos=_json_embebido(datos, comprimir),
+    )
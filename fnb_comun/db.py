@@ -0,0 +1,194 @@
+# fnb_comun/db.py
+"""
+Acceso compartido a PostgreSQL para los cargadores (z_CargaBDPostgreSQL) y
+reportes (z_Reportes).
+
+Cada script tenía su propio diccionario de conexión y abría una conexión nueva
+para cada paso (verificar espacio, verificar la tabla, cargar, contar...). Aquí:
+
+- la configuración sale de un solo lugar: variables PGHOST, PGPORT,
+  PGDATABASE, PGUSER y PGPASSWORD, o los valores por defecto de PG_CONFIG_DEFAULT;
+- las conexiones vienen de un pool por perfil y se reutilizan durante toda la
+  corrida (el pool se cierra al terminar el proceso);
+- cada perfil fija sus parámetros de sesión al abrir la conexión (memoria de
+  trabajo, synchronous_commit, statement_timeout), igual para todos los scripts.
+  Las cargas no tienen límite de tiempo salvo que se pida con
+  FNB_CARGA_STATEMENT_TIMEOUT / FNB_CARGA_LOCK_TIMEOUT (p. ej. "60min", "5min").
+
+    from fnb_comun.db import conexion
+
+    with conexion("carga") as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(...)
+        conn.commit()
+
+Al salir del bloque lo no confirmado se revierte (igual que un close() sin
+commit) y la conexión vuelve al pool. En código con conexión/cierre explícitos,
+`conn = conectar("carga")` ... `liberar(conn)` hace lo mismo que
+`psycopg2.connect(...)` ... `conn.close()`. Para pandas.to_sql: `motor_sqlalchemy("carga")`.
+"""
+
+import atexit
+import os
+import sys
+import threading
+from contextlib import contextmanager
+
+# Conexión PostgreSQL por defecto (sobrescribible por variables de entorno)
+PG_CONFIG_DEFAULT = {
+    "host": "localhost",
+    "port": 5432,
+    "database": "bd_calidda_fnb",
+    "user": "postgres",
+    "password": "ibr2025",
+}
+
+# Parámetros de sesión por perfil (se aplican al abrir cada conexión del pool).
+# "carga": COPY e índices masivos; synchronous_commit=off no espera el flush del
+# WAL en cada commit (ante una caída se pierden como mucho los últimos commits,
+# y una carga se puede repetir).
+PERFILES_SESION = {
+    "carga": {
+        "work_mem": "256MB",
+        "maintenance_work_mem": "1GB",
+        "synchronous_commit": "off",
+    },
+    "reporte": {
+        "work_mem": "128MB",
+        "statement_timeout": "10min",
+    },
+    "consulta": {
+        "statement_timeout": "2min",
+    },
+}
+
+# Límites de tiempo de las cargas, opcionales: sin límite por defecto, como antes de los
+# perfiles (una recarga completa o el intercambio de tabla esperando un bloqueo pueden tardar)
+for _parametro in ("statement_timeout", "lock_timeout"):
+    if os.environ.get(f"FNB_CARGA_{_parametro.upper()}"):
+        PERFILES_SESION["carga"][_parametro] = os.environ[f"FNB_CARGA_{_parametro.upper()}"]
+
+# Conexiones máximas por pool (los scripts son secuenciales; 02.7 usa a lo sumo 2)
+MAX_CONEXIONES = 4
+
+# Nombre con el que aparecen las sesiones en pg_stat_activity (el del script)
+APLICACION = os.path.splitext(os.path.basename(sys.argv[0] if sys.argv and sys.argv[0] else "python"))[0][:63]
+
+_pools = {}
+_motores = {}
+_prestadas = {}  # id(conexión) → pool del que salió
+_candado = threading.Lock()
+
+
+def obtener_pg_config(**cambios):
+    """Configuración de conexión (variables PG* o valores por defecto) más `cambios`."""
+    config = {
+        "host": os.environ.get("PGHOST", PG_CONFIG_DEFAULT["host"]),
+        "port": int(os.environ.get("PGPORT", PG_CONFIG_DEFAULT["port"])),
+        "database": os.environ.get("PGDATABASE", PG_CONFIG_DEFAULT["database"]),
+        "user": os.environ.get("PGUSER", PG_CONFIG_DEFAULT["user"]),
+        "password": os.environ.get("PGPASSWORD", PG_CONFIG_DEFAULT["password"]),
+    }
+    config.update(cambios)
+    return config
+
+
+def opciones_sesion(perfil):
+    """Cadena `options` de libpq ('-c work_mem=256MB -c ...') del perfil."""
+    if perfil not in PERFILES_SESION:
+        raise ValueError(f"Perfil de sesión desconocido: {perfil} (use {', '.join(PERFILES_SESION)})")
+    return " ".join(f"-c {nombre}={valor}" for nombre, valor in PERFILES_SESION[perfil].items())
+
+
+def obtener_pool(perfil="consulta", config=None):
+    """Pool de conexiones del perfil (se crea la primera vez que se pide)."""
+    from psycopg2.pool import ThreadedConnectionPool
+
+    config = config or obtener_pg_config()
+    clave = (perfil, tuple(sorted(config.items())))
+    with _candado:
+        pool = _pools.get(clave)
+        if pool is None or pool.closed:
+            pool = ThreadedConnectionPool(1, MAX_CONEXIONES, options=opciones_sesion(perfil),
+                                          application_name=APLICACION, **config)
+            _pools[clave] = pool
+    return pool
+
+
+def conectar(perfil="consulta", config=None):
+    """
+    Toma una conexión del pool del perfil; se devuelve con `liberar(conn)`.
+
+    Args:
+        perfil: "carga", "reporte" o "consulta" (ver PERFILES_SESION).
+        config: conexión distinta a la común (por defecto `obtener_pg_config()`).
+    """
+    pool = obtener_pool(perfil, config)
+    conn = pool.getconn()
+    _prestadas[id(conn)] = pool
+    return conn
+
+
+def liberar(conn):
+    """
+    Revierte lo no confirmado y devuelve la conexión a su pool (la descarta si
+    quedó rota). Liberar dos veces la misma conexión no hace nada.
+    """
+    pool = _prestadas.pop(id(conn), None)
+    if pool is None:
+        return
+    descartar = bool(conn.closed)
+    if not descartar:
+        try:
+            conn.rollback()
+            conn.autocommit = False
+        except Exception:
+            descartar = True
+    if not pool.closed:
+        pool.putconn(conn, close=descartar)
+
+
+@contextmanager
+def conexion(perfil="consulta", config=None):
+    """
+    Conexión del pool para usar en un bloque `with` (ver `conectar`).
+
+    Las funciones de fnb_comun no hacen commit: se confirma dentro del bloque.
+    """
+    conn = conectar(perfil, config)
+    try:
+        yield conn
+    finally:
+        liberar(conn)
+
+
+def motor_sqlalchemy(perfil="carga", config=None):
+    """Engine de SQLAlchemy (con su propio pool) con los parámetros de sesión del perfil."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.engine import URL
+
+    config = config or obtener_pg_config()
+    clave = (perfil, tuple(sorted(config.items())))
+    with _candado:
+        motor = _motores.get(clave)
+        if motor is None:
+            url = URL.create("postgresql+psycopg2", username=config["user"], password=config["password"],
+                             host=config["host"], port=config["port"], database=config["database"])
+            motor = create_engine(url, pool_size=1, max_overflow=MAX_CONEXIONES - 1, pool_pre_ping=True,
+                                  connect_args={"options": opciones_sesion(perfil),
+                                                "application_name": APLICACION})
+            _motores[clave] = motor
+    return motor
+
+
+@atexit.register
+def cerrar_conexiones():
+    """Cierra todos los pools y engines abiertos (se llama sola al salir)."""
+    with _candado:
+        for pool in _pools.values():
+            if not pool.closed:
+                pool.closeall()
+        for motor in _motores.values():
+            motor.dispose()
+        _pools.clear()
+        _motores.clear()
@@ -0,0 +1,218 @@
+# fnb_comun/escritura_excel.py
+"""
+Escritura de un DataFrame a Excel con formato en una sola pasada.
+
+Los reportes guardaban con `df.to_excel(...)` y luego reabrían el archivo con
+`load_workbook` para recorrer todas las celdas varias veces (fecha, hora,
+importes, fuente, alto de fila, ancho). Con 100k filas eso es escribir el
+libro una vez y parsearlo/reescribirlo otra.
+
+`escribir_excel` calcula los anchos desde el DataFrame y escribe filas ya con
+su formato de columna (fuente, formato numérico, alineación) y alto fijo:
+
+    from fnb_comun.escritura_excel import escribir_excel
+
+    escribir_excel(df, salida, fuente="Aptos", tamaño=8,
+                   formatos={"FECHA VENTA": "DD/MM/YYYY", "IMPORTE (S./)": "#,##0.00"},
+                   encabezado={"negrita": True, "color": "FFFFFF", "fondo": "000000"})
+
+Usa xlsxwriter en modo constant_memory (cada fila se vuelca a disco al pasar a
+la siguiente y el formato va por columna, no por celda). Si xlsxwriter no está
+instalado se usa openpyxl en modo write_only, con el mismo resultado.
+
+Las fechas y horas de columnas sin entrada en `formatos` salen con el formato
+que ponía `to_excel` ('YYYY-MM-DD HH:MM:SS', 'YYYY-MM-DD' o 'HH:MM:SS'), o con
+`formato_fecha` si se indica (también en columnas object con fechas sueltas).
+
+Instalación del motor rápido (opcional):  pip install xlsxwriter
+"""
+
+import importlib.util
+import os
+from datetime import date, datetime, time
+from functools import lru_cache
+
+import pandas as pd
+
+# Motor preferido; "FNB_MOTOR_ESCRITURA=openpyxl" en el entorno fuerza openpyxl
+MOTOR_ESCRITURA = os.environ.get("FNB_MOTOR_ESCRITURA", "xlsxwriter")
+
+# Formatos de fecha/hora para columnas sin entrada en `formatos` (los de to_excel)
+FORMATO_FECHA_HORA = "YYYY-MM-DD HH:MM:SS"
+FORMATO_FECHA = "YYYY-MM-DD"
+FORMATO_HORA = "HH:MM:SS"
+
+
+@lru_cache(maxsize=None)
+def xlsxwriter_disponible():
+    """True si xlsxwriter está instalado."""
+    return importlib.util.find_spec("xlsxwriter") is not None
+
+
+def anchos_columnas(df, minimo=0, maximo=50, margen=2):
+    """Ancho por columna: texto más largo (encabezado incluido) + margen, acotado."""
+    anchos = []
+    for columna in df.columns:
+        serie = df[columna]
+        largo = serie.astype(str).where(serie.notna(), "").str.len().max() if len(serie) else 0
+        largo = max(int(largo or 0), len(str(columna)))
+        anchos.append(min(max(largo + margen, minimo), maximo))
+    return anchos
+
+
+def _formato_fecha(valor, formato_fecha=None):
+    """Formato por defecto de un valor fecha/hora; None si no lo es."""
+    if isinstance(valor, datetime):
+        return formato_fecha or FORMATO_FECHA_HORA
+    if isinstance(valor, date):
+        return formato_fecha or FORMATO_FECHA
+    if isinstance(valor, time):
+        return FORMATO_HORA
+    return None
+
+
+def _columnas_con_fechas(df, formatos):
+    """Por columna: True si puede traer fechas/horas y no tiene formato propio."""
+    return [
+        columna not in formatos
+        and (pd.api.types.is_datetime64_any_dtype(df[columna]) or df[columna].dtype == object)
+        for columna in df.columns
+    ]
+
+
+def _filas(df):
+    """Filas como tuplas de objetos Python; NaN/NaT → None (celda vacía)."""
+    valores = df.astype(object)
+    valores = valores.where(df.notna(), None)
+    return valores.itertuples(index=False, name=None)
+
+
+def escribir_excel(df, ruta, hoja="Sheet1", fuente="Aptos", tamaño=8, alto_fila=11.25,
+                   formatos=None, alineacion=None, encabezado=None, ancho_min=0, ancho_max=50,
+                   formato_fecha=None):
+    """
+    Escribe `df` en `ruta` con encabezado, formatos por columna, alto y anchos.
+
+    Args:
+        df: datos (se escriben sin índice).
+        ruta: archivo .xlsx de salida (se sobrescribe).
+        hoja: nombre de la hoja.
+        fuente, tamaño: fuente de todas las celdas.
+        alto_fila: alto de todas las filas (None = el de Excel).
+        formatos: columna → formato numérico ('DD/MM/YYYY', '@', '#,##0.00').
+        alineacion: alineación horizontal de los datos ('center', 'left'...), None = la de Excel.
+            Si se indica, también se centran verticalmente.
+        encabezado: estilo del encabezado: {"negrita", "color", "fondo", "alineacion"}.
+            None = misma fuente que los datos.
+        ancho_min, ancho_max: límites del ancho automático de columna.
+        formato_fecha: formato de las fechas (date/datetime) de columnas sin
+            entrada en `formatos`; None = 'YYYY-MM-DD HH:MM:SS' / 'YYYY-MM-DD'.
+    """
+    formatos = formatos or {}
+    anchos = anchos_columnas(df, ancho_min, ancho_max)
+    if MOTOR_ESCRITURA == "xlsxwriter" and xlsxwriter_disponible():
+        _escribir_xlsxwriter(df, ruta, hoja, fuente, tamaño, alto_fila, formatos, alineacion, encabezado, anchos,
+                             formato_fecha)
+    else:
+        _escribir_openpyxl(df, ruta, hoja, fuente, tamaño, alto_fila, formatos, alineacion, encabezado, anchos,
+                           formato_fecha)
+
+
+def _escribir_xlsxwriter(df, ruta, hoja, fuente, tamaño, alto_fila, formatos, alineacion, encabezado, anchos,
+                         formato_fecha):
+    import xlsxwriter
+
+    # Textos tal cual: sin convertir '=...' en fórmula ni 'http...' en hipervínculo
+    libro = xlsxwriter.Workbook(ruta, {"constant_memory": True, "strings_to_formulas": False,
+                                       "strings_to_urls": False})
+    try:
+        ws = libro.add_worksheet(hoja)
+        base = {"font_name": fuente, "font_size": tamaño}
+        if alineacion:
+            base.update(align=alineacion, valign="vcenter")
+
+        formato_defecto = libro.add_format(base)
+        formatos_columna = []
+        for idx, (columna, ancho) in enumerate(zip(df.columns, anchos)):
+            formato = libro.add_format(dict(base, num_format=formatos[columna])) if columna in formatos else formato_defecto
+            ws.set_column(idx, idx, ancho, formato)
+            formatos_columna.append(formato)
+        if alto_fila:
+            ws.set_default_row(alto_fila)
+
+        estilo = dict(base)
+        if encabezado:
+            estilo.update(bold=encabezado.get("negrita", False))
+            if encabezado.get("color"):
+                estilo["font_color"] = "#" + encabezado["color"]
+            if encabezado.get("fondo"):
+                estilo.update(bg_color="#" + encabezado["fondo"], pattern=1)
+            if encabezado.get("alineacion"):
+                estilo.update(align=encabezado["alineacion"], valign="vcenter")
+        ws.write_row(0, 0, [str(c) for c in df.columns], libro.add_format(estilo))
+
+        # Fechas/horas sin formato propio: un formato por tipo, creado al primer uso
+        con_fechas = _columnas_con_fechas(df, formatos)
+        formatos_fecha = {}
+        for fila, valores in enumerate(_filas(df), start=1):
+            for col, valor in enumerate(valores):
+                if valor is None:
+                    continue
+                formato = formatos_columna[col]
+                if con_fechas[col]:
+                    numero = _formato_fecha(valor, formato_fecha)
+                    if numero:
+                        if numero not in formatos_fecha:
+                            formatos_fecha[numero] = libro.add_format(dict(base, num_format=numero))
+                        formato = formatos_fecha[numero]
+                ws.write(fila, col, valor, formato)
+    finally:
+        libro.close()
+
+
+def _escribir_openpyxl(df, ruta, hoja, fuente, tamaño, alto_fila, formatos, alineacion, encabezado, anchos,
+                       formato_fecha):
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Font, PatternFill
+    from openpyxl.utils import get_column_letter
+
+    libro = Workbook(write_only=True)
+    ws = libro.create_sheet(hoja)
+    for idx, ancho in enumerate(anchos, start=1):
+        ws.column_dimensions[get_column_letter(idx)].width = ancho
+    if alto_fila:
+        ws.sheet_format.defaultRowHeight = alto_fila
+        ws.sheet_format.customHeight = True
+
+    def celda(valor, font, numero=None, alignment=None, fill=None):
+        c = WriteOnlyCell(ws, value=valor)
+        c.font = font
+        if numero:
+            c.number_format = numero
+        if alignment:
+            c.alignment = alignment
+        if fill:
+            c.fill = fill
+        return c
+
+    encabezado = encabezado or {}
+    fuente_encabezado = Font(name=fuente, size=tamaño, bold=encabezado.get("negrita", False),
+                             color=encabezado.get("color"))
+    relleno = (PatternFill(start_color=encabezado["fondo"], end_color=encabezado["fondo"], fill_type="solid")
+               if encabezado.get("fondo") else None)
+    alinear = Alignment(horizontal=alineacion, vertical="center") if alineacion else None
+    alinear_encabezado = (Alignment(horizontal=encabezado["alineacion"], vertical="center")
+                          if encabezado.get("alineacion") else alinear)
+    ws.append([celda(str(c), fuente_encabezado, alignment=alinear_encabezado, fill=relleno) for c in df.columns])
+
+    # Fuente y alineación compartidas; formato numérico de la columna o, en fechas/horas sin formato, el de su tipo
+    fuente_datos = Font(name=fuente, size=tamaño)
+    numeros = [formatos.get(columna) for columna in df.columns]
+    con_fechas = _columnas_con_fechas(df, formatos)
+    for valores in _filas(df):
+        ws.append([
+            celda(valor, fuente_datos, _formato_fecha(valor, formato_fecha) if fecha else numero, alinear)
+            for valor, numero, fecha in zip(valores, numeros, con_fechas)
+        ])
+    libro.save(ruta)
@@ -0,0 +1,102 @@
+# fnb_comun/excel.py
+"""
+Lectura rápida de Excel para los reportes y cargas.
+
+`leer_excel` es un reemplazo directo de `pd.read_excel`: mismos argumentos y
+mismo resultado, pero usa el motor calamine (lector en Rust, paquete
+`python-calamine`) cuando está instalado, que lee los .xlsx varias veces más
+rápido que openpyxl. Si calamine no está disponible o falla con un archivo
+concreto, se vuelve al motor por defecto de pandas sin que el script se entere.
+
+    from fnb_comun.excel import leer_excel
+    df = leer_excel(ruta, sheet_name="Hoja1", usecols=["Nro. de pedido", "Estado"], dtype=str)
+
+`usecols` y `dtype` se pasan al lector para descartar columnas y fijar tipos
+durante el parseo (en vez de leer todo y convertir después).
+
+Con `cache=True` el resultado se guarda en disco (ver fnb_comun/cache_excel.py)
+y las lecturas siguientes del mismo archivo sin cambios no vuelven a parsearlo.
+
+Instalación del motor rápido (opcional):  pip install python-calamine
+"""
+
+import importlib.util
+import os
+from functools import lru_cache
+
+import pandas as pd
+
+from . import cache_excel
+
+# Motor preferido; "FNB_MOTOR_EXCEL=openpyxl" en el entorno fuerza el de pandas
+MOTOR_EXCEL = os.environ.get("FNB_MOTOR_EXCEL", "calamine")
+
+# Extensiones que calamine sabe leer
+EXTENSIONES_CALAMINE = (".xlsx", ".xlsm", ".xlsb", ".xls", ".ods")
+
+
+@lru_cache(maxsize=None)
+def calamine_disponible():
+    """True si python-calamine está instalado (y pandas lo soporta, >= 2.2)."""
+    return importlib.util.find_spec("python_calamine") is not None
+
+
+def motor_para(ruta):
+    """Motor a usar para `ruta`: 'calamine' si aplica, None (defecto de pandas) si no."""
+    if MOTOR_EXCEL != "calamine" or not calamine_disponible():
+        return None
+    if isinstance(ruta, (str, os.PathLike)) and not str(ruta).lower().endswith(EXTENSIONES_CALAMINE):
+        return None
+    return "calamine"
+
+
+def en_cache(ruta, sheet_name=0, usecols=None, dtype=None, **kwargs):
+    """True si `leer_excel(..., cache=True)` con estos argumentos se resolvería desde la caché."""
+    clave = cache_excel.clave_cache(ruta, sheet_name, dict(kwargs, usecols=usecols, dtype=dtype))
+    return cache_excel.en_cache(clave)
+
+
+def leer_excel(ruta, sheet_name=0, usecols=None, dtype=None, cache=False, **kwargs):
+    """
+    `pd.read_excel` con motor rápido, respaldo transparente y caché opcional.
+
+    Args:
+        ruta: ruta (o buffer) del archivo Excel.
+        sheet_name: hoja (nombre o índice), lista de hojas o None (todas).
+        usecols: columnas a leer (nombres, letras "A:F" o índices).
+        dtype: tipo global (p. ej. str) o mapeo columna → tipo.
+        cache: reutiliza la copia columnar de una lectura anterior del mismo
+            archivo (misma ruta, tamaño, fecha de modificación, hoja y opciones).
+            Solo aplica a una hoja de un archivo en disco.
+        **kwargs: resto de argumentos de `pd.read_excel` (header, skiprows, ...).
+            Si se indica `engine`, se respeta y no hay respaldo.
+    """
+    clave = None
+    if cache and isinstance(sheet_name, (str, int)):
+        clave = cache_excel.clave_cache(ruta, sheet_name, dict(kwargs, usecols=usecols, dtype=dtype))
+    if clave is not None:
+        df = cache_excel.leer_cache(clave)
+        if df is not None:
+            return df
+
+    df = _leer_excel(ruta, sheet_name, usecols, dtype, **kwargs)
+    if clave is not None:
+        cache_excel.guardar_cache(clave, df)
+    return df
+
+
+def _leer_excel(ruta, sheet_name, usecols, dtype, **kwargs):
+    if "engine" in kwargs:
+        return pd.read_excel(ruta, sheet_name=sheet_name, usecols=usecols, dtype=dtype, **kwargs)
+
+    motor = motor_para(ruta)
+    if motor is not None:
+        try:
+            return pd.read_excel(ruta, sheet_name=sheet_name, usecols=usecols, dtype=dtype,
+                                 engine=motor, **kwargs)
+        except Exception as e:
+            print(f"⚠️  {motor} no pudo leer {os.path.basename(str(ruta))} ({e}); se usa el lector por defecto")
+            if hasattr(ruta, "seek"):
+                ruta.seek(0)
+
+    return pd.read_excel(ruta, sheet_name=sheet_name, usecols=usecols, dtype=dtype, **kwargs)
@@ -0,0 +1,269 @@
+# fnb_comun/historico.py
+"""
+Tablas históricas mensuales particionadas (PostgreSQL).
+
+Antes cada carga creaba su propia tabla fechada (bd_potenciales_20251201,
+bd_morosidad_202512, ...) y cualquier análisis entre meses tenía que volver a
+leer los TXT/Excel de origen. Aquí cada fuente tiene una tabla padre
+particionada por rango sobre `periodo_carga` (primer día del mes) con una
+partición por mes (`<tabla>_pYYYYMM`):
+
+    bd_scoring_mensual
+      ├─ bd_scoring_mensual_p202511   FOR VALUES FROM ('2025-11-01') TO ('2025-12-01')
+      └─ bd_scoring_mensual_p202512   FOR VALUES FROM ('2025-12-01') TO ('2026-01-01')
+
+La carga de un mes va a una tabla suelta (`<tabla>_pYYYYMM__carga`), se indexa,
+se analiza y recién entonces se anexa con ATTACH PARTITION (una restricción
+CHECK con el rango evita que PostgreSQL vuelva a recorrerla). Si el mes ya
+estaba cargado, la partición anterior se desanexa y se elimina en la misma
+transacción: recargar un mes no toca los demás.
+
+    filas = cargar_mes_historico(conn, df, "bd_scoring_mensual", "202512",
+                                 tipos=esquemas.SCORING.tipos,
+                                 indices=[("interlocutor",), ("cta_contr",)])
+    conn.commit()
+
+Las consultas con filtro por periodo leen solo las particiones del rango:
+
+    SELECT periodo_carga, segmento_riesgo, COUNT(*)
+    FROM bd_scoring_mensual
+    WHERE periodo_carga >= '2025-07-01' AND interlocutor = %s
+    GROUP BY 1, 2
+
+y un mes viejo se saca con `desanexar_mes` (queda como tabla suelta o se elimina).
+
+Igual que en carga_copy, las funciones NO hacen commit.
+"""
+
+import re
+from datetime import date, datetime
+
+import pandas as pd
+
+from .carga_copy import _tabla_sql, copiar_dataframe_postgres, crear_tabla_desde_tipos, quote_ident, tipos_para_dataframe
+from .tabla_sombra import SUFIJO_SOMBRA, _existe, _partes
+
+# Columna de partición (DATE, primer día del mes cargado)
+COLUMNA_PERIODO = "periodo_carga"
+
+_SUFIJO_MES = re.compile(r"_p(\d{6})$")
+
+
+def inicio_mes(periodo):
+    """Primer día del mes de `periodo` ('YYYYMM', 'YYYY-MM', fecha o timestamp)."""
+    if isinstance(periodo, str) and re.fullmatch(r"\d{6}", periodo.strip()):
+        periodo = datetime.strptime(periodo.strip(), "%Y%m")
+    elif not isinstance(periodo, (date, datetime)):
+        periodo = pd.Timestamp(periodo)
+    return date(periodo.year, periodo.month, 1)
+
+
+def _rango_mes(periodo):
+    inicio = inicio_mes(periodo)
+    fin = date(inicio.year + inicio.month // 12, inicio.month % 12 + 1, 1)
+    return inicio, fin
+
+
+def nombre_particion(tabla, periodo):
+    """'<tabla>_pYYYYMM' (con el esquema de `tabla`, si lo tiene)."""
+    esquema, nombre = _partes(tabla)
+    return f"{esquema}{nombre}_p{inicio_mes(periodo):%Y%m}"
+
+
+def _nombre_indice(tabla, cols):
+    return f"ix_{_partes(tabla)[1]}_{'_'.join(cols)}"[:63 - len(SUFIJO_SOMBRA)]
+
+
+def _columnas_de(cursor, tabla):
+    """[(columna, tipo)] de `tabla` en orden físico."""
+    cursor.execute(
+        """
+        SELECT a.attname, format_type(a.atttypid, a.atttypmod)
+        FROM pg_attribute a
+        WHERE a.attrelid = to_regclass(%s) AND a.attnum > 0 AND NOT a.attisdropped
+        ORDER BY a.attnum
+        """,
+        (_tabla_sql(tabla),),
+    )
+    return cursor.fetchall()
+
+
+def _es_particion(cursor, tabla, particion):
+    cursor.execute(
+        "SELECT 1 FROM pg_inherits WHERE inhrelid = to_regclass(%s) AND inhparent = to_regclass(%s)",
+        (_tabla_sql(particion), _tabla_sql(tabla)),
+    )
+    return cursor.fetchone() is not None
+
+
+def preparar_tabla_carga(cursor, tabla, periodo):
+    """
+    Nombre de la tabla suelta donde se carga el mes (`<tabla>_pYYYYMM__carga`).
+
+    Elimina una carga previa interrumpida; la tabla la crea el cargador
+    (`crear_tabla_desde_tipos`, `cargar_txt_por_lotes`, ...).
+    """
+    carga = nombre_particion(tabla, periodo) + SUFIJO_SOMBRA
+    cursor.execute(f"DROP TABLE IF EXISTS {_tabla_sql(carga)}")
+    return carga
+
+
+def _sincronizar_columnas(cursor, tabla, carga):
+    """
+    Crea la tabla padre con la estructura de la carga (si no existe) y agrega
+    a cada una las columnas que solo tiene la otra: ATTACH exige las mismas.
+
+    Raises:
+        ValueError: si una columna común tiene otro tipo en la carga (ATTACH
+            fallaría; hay que alinear el tipo en el esquema o en la tabla padre).
+    """
+    columnas_carga = [(c, t) for c, t in _columnas_de(cursor, carga) if c != COLUMNA_PERIODO]
+    if not _existe(cursor, tabla):
+        definiciones = ",\n        ".join(f"{quote_ident(c)} {t}" for c, t in columnas_carga)
+        cursor.execute(
+            f"CREATE TABLE {_tabla_sql(tabla)} (\n        {definiciones},\n"
+            f"        {quote_ident(COLUMNA_PERIODO)} DATE NOT NULL\n    ) "
+            f"PARTITION BY RANGE ({quote_ident(COLUMNA_PERIODO)})"
+        )
+        return
+
+    columnas_padre = [(c, t) for c, t in _columnas_de(cursor, tabla) if c != COLUMNA_PERIODO]
+    en_padre = dict(columnas_padre)
+    en_carga = dict(columnas_carga)
+    distintos = [f"{c} ({en_padre[c]} en {tabla}, {t} en la carga)"
+                 for c, t in columnas_carga if c in en_padre and en_padre[c] != t]
+    if distintos:
+        raise ValueError(f"Tipos distintos entre {tabla} y {carga}: {'; '.join(distintos)}")
+    for columna, tipo in columnas_carga:
+        if columna not in en_padre:
+            cursor.execute(f"ALTER TABLE {_tabla_sql(tabla)} ADD COLUMN {quote_ident(columna)} {tipo}")
+    for columna, tipo in columnas_padre:
+        if columna not in en_carga:
+            cursor.execute(f"ALTER TABLE {_tabla_sql(carga)} ADD COLUMN {quote_ident(columna)} {tipo}")
+
+
+def anexar_mes(cursor, tabla, periodo, carga=None, indices=(), log=print):
+    """
+    Indexa y analiza la tabla del mes ya cargada y la anexa como partición de `tabla`.
+
+    Args:
+        cursor: cursor de la transacción de carga.
+        tabla: tabla padre particionada (se crea con la estructura de la carga si no existe).
+        periodo: mes cargado ('YYYYMM', fecha, ...).
+        carga: tabla suelta con los datos del mes (por defecto `<tabla>_pYYYYMM__carga`).
+        indices: columnas indexadas en la tabla padre (y por tanto en cada partición),
+            p. ej. [("interlocutor",), ("cta_contr",)].
+        log: función de reporte. None = silencio.
+    """
+    inicio, fin = _rango_mes(periodo)
+    particion = nombre_particion(tabla, periodo)
+    carga = carga or particion + SUFIJO_SOMBRA
+    if not _existe(cursor, carga):
+        # Nada cargado (p. ej. archivo vacío): el mes anterior no se toca
+        raise ValueError(f"La tabla de carga {carga} no existe; no se reemplaza {particion}")
+
+    _sincronizar_columnas(cursor, tabla, carga)
+    padre, tabla_carga = _tabla_sql(tabla), _tabla_sql(carga)
+    periodo_sql = quote_ident(COLUMNA_PERIODO)
+
+    # 1. Columna de partición con el mes y CHECK del rango (ATTACH no recorre la tabla)
+    if COLUMNA_PERIODO not in {c for c, _ in _columnas_de(cursor, carga)}:
+        cursor.execute(f"ALTER TABLE {tabla_carga} ADD COLUMN {periodo_sql} DATE NOT NULL DEFAULT %s", (inicio,))
+        cursor.execute(f"ALTER TABLE {tabla_carga} ALTER COLUMN {periodo_sql} DROP DEFAULT")
+    restriccion = quote_ident(f"ck_{_partes(particion)[1]}_rango")
+    cursor.execute(
+        f"ALTER TABLE {tabla_carga} ADD CONSTRAINT {restriccion} "
+        f"CHECK ({periodo_sql} IS NOT NULL AND {periodo_sql} >= %s AND {periodo_sql} < %s)",
+        (inicio, fin),
+    )
+
+    # 2. Índices: en la tabla del mes (ATTACH los reconoce) y en la padre
+    renombrar = []
+    for cols in indices:
+        cols = (cols,) if isinstance(cols, str) else tuple(cols)
+        lista = ", ".join(quote_ident(c) for c in cols)
+        temporal = _nombre_indice(particion, cols) + SUFIJO_SOMBRA
+        cursor.execute(f"CREATE INDEX {quote_ident(temporal)} ON {tabla_carga} ({lista})")
+        renombrar.append((temporal, _nombre_indice(particion, cols)))
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {quote_ident(_nombre_indice(tabla, cols))} ON {padre} ({lista})")
+    cursor.execute(f"ANALYZE {tabla_carga}")
+
+    # 3. Reemplazo del mes: la partición anterior (si había) sale y entra la nueva
+    if _existe(cursor, particion):
+        if not _es_particion(cursor, tabla, particion):
+            # p. ej. un mes desanexado para archivo: no se elimina sin pedirlo
+            raise ValueError(f"{particion} existe pero no es partición de {tabla}; renómbrela o elimínela")
+        cursor.execute(f"ALTER TABLE {padre} DETACH PARTITION {_tabla_sql(particion)}")
+        cursor.execute(f"DROP TABLE {_tabla_sql(particion)}")
+        if log:
+            log(f"🗑️  Mes {inicio:%Y-%m} anterior eliminado de {tabla}")
+
+    esquema = _partes(tabla)[0]
+    cursor.execute(f"ALTER TABLE {tabla_carga} RENAME TO {quote_ident(_partes(particion)[1])}")
+    for temporal, definitivo in renombrar:
+        cursor.execute(f"ALTER INDEX {_tabla_sql(esquema + temporal)} RENAME TO {quote_ident(definitivo)}")
+    cursor.execute(
+        f"ALTER TABLE {padre} ATTACH PARTITION {_tabla_sql(particion)} FOR VALUES FROM (%s) TO (%s)",
+        (inicio, fin),
+    )
+    cursor.execute(f"ALTER TABLE {_tabla_sql(particion)} DROP CONSTRAINT {restriccion}")
+
+    if log:
+        log(f"📅 Mes {inicio:%Y-%m} anexado a {tabla} ({particion})")
+
+
+def cargar_mes_historico(conn, df, tabla, periodo, columnas=None, tipos=None, indices=(), log=print):
+    """
+    Carga `df` como el mes `periodo` de la tabla histórica `tabla` (reemplaza el mes si existía).
+
+    Retorna las filas copiadas. No hace commit.
+    """
+    columnas = list(columnas) if columnas is not None else list(df.columns)
+    with conn.cursor() as cursor:
+        carga = preparar_tabla_carga(cursor, tabla, periodo)
+        crear_tabla_desde_tipos(cursor, carga, columnas, tipos_para_dataframe(df[columnas], tipos))
+
+    if log:
+        log(f"Copiando {len(df):,} registros a {carga}...")
+    copiadas = copiar_dataframe_postgres(conn, df, carga, columnas=columnas, tipos=tipos, log=log)
+
+    with conn.cursor() as cursor:
+        anexar_mes(cursor, tabla, periodo, carga, indices=indices, log=log)
+    return copiadas
+
+
+def meses_cargados(cursor, tabla):
+    """Primer día de cada mes con partición en `tabla`, en orden."""
+    cursor.execute(
+        """
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(%s)
+        """,
+        (_tabla_sql(tabla),),
+    )
+    meses = []
+    for (nombre,) in cursor.fetchall():
+        m = _SUFIJO_MES.search(nombre)
+        if m:
+            meses.append(inicio_mes(m.group(1)))
+    return sorted(meses)
+
+
+def desanexar_mes(cursor, tabla, periodo, eliminar=False, log=print):
+    """
+    Saca el mes `periodo` de `tabla`: queda como tabla suelta `<tabla>_pYYYYMM`
+    (para archivarla o consultarla aparte) o se elimina con `eliminar=True`.
+
+    Retorna False si el mes no estaba cargado.
+    """
+    particion = nombre_particion(tabla, periodo)
+    if not _es_particion(cursor, tabla, particion):
+        return False
+    cursor.execute(f"ALTER TABLE {_tabla_sql(tabla)} DETACH PARTITION {_tabla_sql(particion)}")
+    if eliminar:
+        cursor.execute(f"DROP TABLE {_tabla_sql(particion)}")
+    if log:
+        log(f"📤 Mes {inicio_mes(periodo):%Y-%m} {'eliminado' if eliminar else 'desanexado'} de {tabla}")
+    return True
@@ -0,0 +1,94 @@
+# fnb_comun/imagenes.py
+"""
+Dibujo y guardado de las imágenes (tablas) que se envían por WhatsApp.
+
+`renderizar_imagenes` dibuja las tareas y devuelve las rutas en el mismo orden;
+una imagen que falla se reporta y queda como None, sin cortar las demás.
+
+Una tabla de fnb_comun.tabla_imagen tarda ~40 ms (z_Utilitarios/medir_tablas_imagen.py)
+y arrancar un proceso hijo que vuelve a importar pandas/PIL cuesta ~0.6 s (más en
+Windows, donde se usa spawn), así que por defecto se dibuja en serie y el pool de
+procesos solo se usa a partir de MIN_TAREAS_POOL tareas.
+
+Las tareas llevan datos ya preparados (listas, textos, números) y una función
+de dibujo definida a nivel de módulo, para que puedan viajar a los procesos
+hijos. La función devuelve una imagen PIL ya terminada:
+
+    def dibujar_tabla(spec):
+        return renderizar_tabla(spec["datos"], spec["encabezados"], ...)
+
+    tareas = [(dibujar_tabla, spec, ruta) for spec, ruta in ...]
+    rutas = renderizar_imagenes(tareas)   # None donde falló una imagen
+
+Si se usa el pool, el script debe tener `if __name__ == "__main__":` (en Windows
+cada proceso hijo vuelve a importar el script principal).
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from PIL import Image
+
+# Procesos de render cuando se usa el pool (se deja un núcleo libre)
+PROCESOS_RENDER = max(1, min(8, (os.cpu_count() or 2) - 1))
+
+# Tareas a partir de las cuales compensa arrancar el pool (~2 s de dibujo en serie)
+MIN_TAREAS_POOL = 50
+
+
+def _renderizar(tarea):
+    """Dibuja y guarda una tarea. Retorna (ruta, None) o (None, mensaje de error)."""
+    dibujar, datos, ruta = tarea[:3]
+    try:
+        imagen = dibujar(datos)
+        if imagen is None:
+            return None, None
+        if not isinstance(imagen, Image.Image):
+            raise TypeError(f"se esperaba una imagen PIL, no {type(imagen).__name__}")
+        # dpi de la tarea si lo trae; si no, el que dejó el estilo en la imagen
+        dpi = tarea[3] if len(tarea) > 3 else imagen.info.get("dpi")
+        if isinstance(dpi, (int, float)):
+            dpi = (dpi, dpi)
+        if dpi:
+            imagen.save(ruta, "PNG", dpi=dpi)
+        else:
+            imagen.save(ruta, "PNG")
+        return ruta, None
+    except Exception as e:
+        return None, f"{os.path.basename(ruta)}: {e}"
+
+
+def renderizar_imagenes(tareas, procesos=PROCESOS_RENDER, min_tareas_pool=MIN_TAREAS_POOL):
+    """
+    Dibuja y guarda las imágenes de `tareas`.
+
+    Args:
+        tareas: lista de (funcion_dibujo, datos, ruta[, dpi]); la función recibe
+            `datos` y devuelve una imagen PIL (None si no hay nada que dibujar).
+            Sin dpi se conserva el de la imagen (`imagen.info["dpi"]`).
+        procesos: procesos simultáneos si se usa el pool (1 = siempre en serie).
+        min_tareas_pool: con menos tareas se dibuja en este mismo proceso.
+
+    Returns:
+        Rutas en el orden de `tareas` (None donde no se generó la imagen).
+    """
+    tareas = list(tareas)
+    procesos = max(1, min(procesos, len(tareas)))
+
+    resultados = None
+    if procesos > 1 and len(tareas) >= min_tareas_pool:
+        try:
+            with ProcessPoolExecutor(max_workers=procesos) as pool:
+                resultados = list(pool.map(_renderizar, tareas))
+        except (BrokenProcessPool, OSError) as e:
+            print(f"⚠️  Pool de render no disponible ({e}); se dibuja en serie")
+    if resultados is None:
+        resultados = [_renderizar(tarea) for tarea in tareas]
+
+    rutas = []
+    for ruta, error in resultados:
+        if error:
+            print(f"⚠️  Error generando imagen {error}")
+        rutas.append(ruta)
+    return rutas
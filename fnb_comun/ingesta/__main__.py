@@ -0,0 +1,8 @@
+# fnb_comun/ingesta/__main__.py
+"""Permite `python -m fnb_comun.ingesta ...` (ver cli.py)."""
+
+import sys
+
+from .cli import main
+
+sys.exit(main())
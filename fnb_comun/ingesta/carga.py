@@ -0,0 +1,98 @@
+# fnb_comun/ingesta/carga.py
+"""
+Carga por lotes: TXT → lotes tipados → COPY FROM STDIN.
+
+`cargar_txt_por_lotes` encadena `leer_txt_por_lotes` con la preparación de
+tipos y `copiar_dataframe_postgres`, lote a lote, sin armar el DataFrame
+completo. La memoria queda acotada por el tamaño de bloque de lectura.
+
+    conn = conectar("carga")
+    try:
+        with conn.cursor() as cursor:
+            preparar_tabla_destino(cursor, tabla, "truncate")
+        filas = cargar_txt_por_lotes(conn, archivo, esquemas.SCORING, tabla)
+        conn.commit()
+    finally:
+        liberar(conn)
+
+Igual que en carga_copy, las funciones NO hacen commit.
+"""
+
+from ..carga_copy import copiar_dataframe_postgres, crear_tabla_desde_tipos, quote_ident, tipos_para_dataframe
+from .limpieza import TAMANO_BLOQUE, leer_txt_por_lotes
+from .tipos import convertir_tipos_datos, limpiar_datos, limpiar_nombres_columnas, preparar_dataframe
+
+
+def preparar_para_carga(df, esquema, verbose=True):
+    """Nombres, tipos y limpieza final: DataFrame listo para COPY."""
+    df_carga = limpiar_nombres_columnas(df.copy(), esquema, verbose=verbose)
+    df_carga = convertir_tipos_datos(df_carga, esquema, verbose=verbose)
+    df_carga = limpiar_datos(df_carga)
+    return preparar_dataframe(df_carga)
+
+
+def iterar_lotes_tipados(archivo, esquema, tamano_bloque=TAMANO_BLOQUE):
+    """
+    Genera tuplas (lote_limpio, lote_tipado) a partir del TXT.
+
+    `lote_limpio` conserva los nombres del archivo (para el CSV limpio) y
+    `lote_tipado` ya tiene nombres y tipos destino. Solo el primer lote
+    reporta el detalle de nombres/tipos.
+    """
+    for n_lote, lote in enumerate(leer_txt_por_lotes(archivo, esquema, tamano_bloque)):
+        yield lote, preparar_para_carga(lote, esquema, verbose=n_lote == 0)
+
+
+def preparar_tabla_destino(cursor, tabla, modo):
+    """
+    Aplica el modo de carga antes de copiar: 'replace' elimina la tabla y
+    'truncate' la vacía si existe. 'create' y 'append' no hacen nada aquí.
+    """
+    if modo == "replace":
+        print(f"🗑️  Reemplazando tabla {tabla}...")
+        cursor.execute(f"DROP TABLE IF EXISTS {quote_ident(tabla)}")
+    elif modo == "truncate":
+        cursor.execute("SELECT to_regclass(%s)", (quote_ident(tabla),))
+        if cursor.fetchone()[0] is not None:
+            print(f"🗑️  Truncando tabla {tabla}...")
+            cursor.execute(f"TRUNCATE TABLE {quote_ident(tabla)}")
+
+
+def cargar_txt_por_lotes(conn, archivo, esquema, tabla, tamano_bloque=TAMANO_BLOQUE,
+                         csv_path=None, log=print):
+    """
+    Lee, tipa y copia el TXT a `tabla` lote a lote.
+
+    Args:
+        conn: conexión psycopg2 abierta (no se hace commit).
+        archivo: ruta del TXT de origen.
+        esquema: EsquemaFuente de la fuente.
+        tabla: tabla destino; se crea (IF NOT EXISTS) con los tipos del primer lote.
+        tamano_bloque: caracteres leídos por bloque; acota la memoria.
+        csv_path: si se indica, escribe también el CSV limpio de forma incremental.
+        log: función de reporte de progreso. None = silencio.
+
+    Returns:
+        int: total de filas copiadas.
+    """
+    copiadas = 0
+    for n_lote, (lote, lote_carga) in enumerate(iterar_lotes_tipados(archivo, esquema, tamano_bloque), start=1):
+        if n_lote == 1:
+            with conn.cursor() as cursor:
+                tipos = tipos_para_dataframe(lote_carga, esquema.tipos)
+                crear_tabla_desde_tipos(cursor, tabla, list(lote_carga.columns), tipos)
+            if log:
+                log(f"\n📊 Copiando a {tabla} con COPY FROM STDIN por lotes...")
+
+        if csv_path:
+            lote.to_csv(csv_path, sep=',', index=False,
+                        mode='w' if n_lote == 1 else 'a', header=n_lote == 1,
+                        encoding='utf-8-sig' if n_lote == 1 else 'utf-8')
+
+        copiadas += copiar_dataframe_postgres(conn, lote_carga, tabla, tipos=esquema.tipos, log=None)
+        if log:
+            log(f"  Lote {n_lote}: {len(lote_carga):,} filas (acumulado {copiadas:,})")
+
+    if csv_path and copiadas and log:
+        log(f"✅ CSV generado: {csv_path}")
+    return copiadas
@@ -0,0 +1,168 @@
+# fnb_comun/ingesta/cli.py
+"""
+CLI común de ingesta de TXT a PostgreSQL.
+
+    python -m fnb_comun.ingesta potenciales "D:/.../BD01122025.txt"
+    python -m fnb_comun.ingesta scoring archivo.txt --modo truncate --sin-csv
+    python -m fnb_comun.ingesta segmentacion archivo.txt --sin-carga
+    python -m fnb_comun.ingesta scoring archivo.txt --modo historico --periodo 202512
+
+Ejecuta el mismo flujo que los scripts de z_CargaBDPostgreSQL:
+TXT → limpieza → CSV (opcional) → tipos → COPY FROM STDIN.
+Con --por-lotes el TXT se lee, tipa y copia por bloques (memoria acotada).
+Con --modo historico el archivo se carga como el mes de la tabla histórica
+particionada de la fuente (fnb_comun/historico.py) en lugar de una tabla fechada.
+La conexión se toma de fnb_comun/db.py (variables PGHOST, PGPORT, PGDATABASE, PGUSER y PGPASSWORD).
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime
+
+from ..carga_copy import copiar_dataframe_postgres, crear_tabla_desde_tipos, tipos_para_dataframe
+from ..db import conexion
+from ..historico import anexar_mes, cargar_mes_historico, preparar_tabla_carga
+from ..tabla_sombra import cargar_con_intercambio, crear_tabla_sombra, intercambiar_tabla
+from .carga import cargar_txt_por_lotes, preparar_para_carga, preparar_tabla_destino
+from .esquemas import ESQUEMAS, generar_nombre_tabla, periodo_archivo
+from .limpieza import analizar_archivo_txt, limpiar_archivo_txt
+
+MODOS_CARGA = ("create", "replace", "truncate", "append", "intercambio", "historico")
+
+
+def tabla_destino(archivo, esquema, modo, tabla=None):
+    """Tabla destino: la indicada, la histórica de la fuente (modo historico) o '<prefijo>_YYYYMMDD'."""
+    if tabla:
+        return tabla
+    if modo == "historico":
+        if not esquema.tabla_historica:
+            raise ValueError(f"La fuente {esquema.nombre} no tiene tabla histórica; indique --tabla")
+        return esquema.tabla_historica
+    return generar_nombre_tabla(archivo, esquema)
+
+
+def cargar_postgres(df, esquema, table_name, modo="create", pg_config=None, periodo=None):
+    """
+    Carga el DataFrame preparado con COPY en una sola transacción. Retorna filas copiadas.
+
+    En modo 'historico' `table_name` es la tabla padre particionada y `periodo`
+    el mes que se carga (o reemplaza).
+    """
+    with conexion("carga", pg_config) as conn:
+        if modo == "historico":
+            filas = cargar_mes_historico(conn, df, table_name, periodo, tipos=esquema.tipos,
+                                         indices=esquema.indices_historico)
+        elif modo == "intercambio":
+            filas = cargar_con_intercambio(conn, df, table_name, tipos=esquema.tipos)
+        else:
+            with conn.cursor() as cursor:
+                preparar_tabla_destino(cursor, table_name, modo)
+                tipos = tipos_para_dataframe(df, esquema.tipos)
+                crear_tabla_desde_tipos(cursor, table_name, list(df.columns), tipos)
+
+            print(f"\n📊 Copiando {len(df):,} registros con COPY FROM STDIN...")
+            filas = copiar_dataframe_postgres(conn, df, table_name, tipos=esquema.tipos)
+        conn.commit()
+        return filas
+
+
+def cargar_postgres_por_lotes(archivo, esquema, table_name, modo="create", csv_path=None, pg_config=None,
+                              periodo=None):
+    """Limpia, tipa y copia el TXT lote a lote en una sola transacción. Retorna filas copiadas."""
+    with conexion("carga", pg_config) as conn:
+        destino = table_name
+        with conn.cursor() as cursor:
+            if modo == "intercambio":
+                destino = crear_tabla_sombra(cursor, table_name)
+            elif modo == "historico":
+                destino = preparar_tabla_carga(cursor, table_name, periodo)
+            else:
+                preparar_tabla_destino(cursor, table_name, modo)
+        filas = cargar_txt_por_lotes(conn, archivo, esquema, destino, csv_path=csv_path)
+        if modo == "intercambio":
+            with conn.cursor() as cursor:
+                intercambiar_tabla(cursor, table_name, destino)
+        elif modo == "historico":
+            with conn.cursor() as cursor:
+                anexar_mes(cursor, table_name, periodo, destino, indices=esquema.indices_historico)
+        conn.commit()
+        return filas
+
+
+def construir_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m fnb_comun.ingesta",
+        description="Limpia un TXT de origen y lo carga a PostgreSQL con COPY FROM STDIN.",
+    )
+    parser.add_argument("fuente", choices=sorted(ESQUEMAS), help="Esquema de la fuente")
+    parser.add_argument("archivo", help="Ruta del archivo TXT")
+    parser.add_argument("--tabla", help="Tabla destino (por defecto <prefijo>_YYYYMMDD según el archivo, "
+                                        "o la tabla histórica de la fuente con --modo historico)")
+    parser.add_argument("--modo", choices=MODOS_CARGA, default="create",
+                        help="create (crea si no existe), replace, truncate, append, intercambio "
+                             "(carga en tabla sombra y la intercambia al final) o historico "
+                             "(reemplaza el mes en la tabla particionada)")
+    parser.add_argument("--periodo", help="Mes YYYYMM para --modo historico (por defecto el de la fecha del archivo)")
+    parser.add_argument("--csv", help="Ruta del CSV limpio (por defecto <archivo>_limpio.csv)")
+    parser.add_argument("--sin-csv", action="store_true", help="No generar CSV limpio")
+    parser.add_argument("--sin-carga", action="store_true", help="Solo limpiar (sin cargar a PostgreSQL)")
+    parser.add_argument("--por-lotes", action="store_true",
+                        help="Leer y cargar por bloques sin armar el DataFrame completo (memoria acotada)")
+    parser.add_argument("--sin-analisis", action="store_true", help="Omitir el análisis previo del archivo")
+    return parser
+
+
+def main(argv=None):
+    args = construir_parser().parse_args(argv)
+    esquema = ESQUEMAS[args.fuente]
+    inicio = datetime.now()
+
+    if not os.path.exists(args.archivo):
+        print(f"❌ Error: El archivo no existe: {args.archivo}")
+        return 1
+
+    if not args.sin_analisis:
+        analizar_archivo_txt(args.archivo, esquema)
+
+    csv_path = None if args.sin_csv else (args.csv or f"{os.path.splitext(args.archivo)[0]}_limpio.csv")
+    periodo = None
+    if args.modo == "historico":
+        # Sin --periodo el mes sale del nombre; sin fecha en el nombre no se adivina
+        try:
+            periodo = args.periodo or periodo_archivo(args.archivo, esquema).strftime("%Y%m")
+        except ValueError as e:
+            print(f"❌ Error: {e} (--periodo YYYYMM)")
+            return 1
+
+    if args.por_lotes and not args.sin_carga:
+        table_name = tabla_destino(args.archivo, esquema, args.modo, args.tabla)
+        print(f"📋 Tabla destino: {table_name}" + (f" (mes {periodo})" if args.modo == "historico" else ""))
+        filas = cargar_postgres_por_lotes(args.archivo, esquema, table_name, modo=args.modo, csv_path=csv_path,
+                                          periodo=periodo)
+        print(f"✅ Carga completada: {filas:,} registros en {table_name}")
+        print(f"\n⏱ Tiempo total: {datetime.now() - inicio}")
+        return 0
+
+    df = limpiar_archivo_txt(args.archivo, esquema)
+    if df is None or df.shape[1] == 0:
+        print("❌ Error: No se pudo limpiar el archivo")
+        return 1
+
+    if csv_path:
+        df.to_csv(csv_path, sep=',', index=False, encoding='utf-8-sig')
+        print(f"✅ CSV generado: {csv_path}")
+
+    if not args.sin_carga:
+        table_name = tabla_destino(args.archivo, esquema, args.modo, args.tabla)
+        print(f"📋 Tabla destino: {table_name}" + (f" (mes {periodo})" if args.modo == "historico" else ""))
+        df_carga = preparar_para_carga(df, esquema)
+        filas = cargar_postgres(df_carga, esquema, table_name, modo=args.modo, periodo=periodo)
+        print(f"✅ Carga completada: {filas:,} registros en {table_name}")
+
+    print(f"\n⏱ Tiempo total: {datetime.now() - inicio}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,217 @@
+# fnb_comun/ingesta/deteccion.py
+"""
+Detección de la estructura de un TXT: codificación, BOM, separador y fila de cabecera.
+
+Todas las funciones trabajan sobre una muestra acotada del archivo (bytes o
+primeras líneas), nunca sobre el archivo completo. `detectar_formato` reúne
+todo en un `FormatoArchivo`.
+
+Como la codificación se decide con una muestra, la lectura real debe abrir el
+archivo con `errors=ERRORES_DECODIFICACION`: cada byte se decodifica en modo
+estricto con la codificación detectada y solo los que fallan se toman como
+cp1252 (respaldo verificado), en lugar de abortar o insertar '�'.
+"""
+
+import codecs
+import re
+import unicodedata
+from dataclasses import dataclass
+from itertools import islice
+
+# Codificaciones probadas en orden (latin-1 decodifica cualquier byte: es el último recurso)
+CODIFICACIONES_COMUNES = ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1', 'utf-16']
+
+# Separadores candidatos en orden de preferencia
+SEPARADORES = ['\t', ';', ',', '|']
+
+# Bytes leídos para detectar la codificación
+TAMANO_MUESTRA_BYTES = 64 * 1024
+
+# Líneas iniciales leídas para ubicar separador y cabecera
+MAX_LINEAS_MUESTRA = 50
+
+# Marcas de orden de bytes → codificación que las consume al decodificar
+BOMS = (
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+# Manejador de errores de decodificación con respaldo cp1252 (ver docstring del módulo)
+ERRORES_DECODIFICACION = 'fnb_respaldo'
+
+_conteo_respaldo = {'bytes': 0}
+
+
+def _decodificar_con_respaldo(error):
+    """Decodifica como cp1252 (latin-1 si el byte no existe en cp1252) los bytes inválidos."""
+    if not isinstance(error, UnicodeDecodeError):
+        raise error
+    fragmento = error.object[error.start:error.end]
+    _conteo_respaldo['bytes'] += len(fragmento)
+    try:
+        texto = fragmento.decode('cp1252')
+    except UnicodeDecodeError:
+        texto = fragmento.decode('latin-1')
+    return texto, error.end
+
+
+codecs.register_error(ERRORES_DECODIFICACION, _decodificar_con_respaldo)
+
+
+def tomar_conteo_respaldo():
+    """Bytes decodificados con el respaldo desde la última llamada (reinicia el conteo)."""
+    total = _conteo_respaldo['bytes']
+    _conteo_respaldo['bytes'] = 0
+    return total
+
+
+@dataclass(frozen=True)
+class FormatoArchivo:
+    """Estructura detectada de un TXT a partir de una muestra acotada."""
+
+    codificacion: str
+    # True si el archivo empieza con BOM (la codificación ya lo descarta al leer)
+    bom: bool
+    separador: str
+    # Fila (base 0) de la cabecera y sus columnas tal como vienen en el archivo
+    fila_cabecera: int
+    columnas: tuple
+    # False si se usó la fila por defecto porque la detección no encontró coincidencias
+    cabecera_detectada: bool = True
+
+
+def detectar_bom(muestra):
+    """Codificación indicada por el BOM al inicio de la muestra de bytes, o None."""
+    for bom, encoding in BOMS:
+        if muestra.startswith(bom):
+            return encoding
+    return None
+
+
+def _codificacion_de_muestra(muestra):
+    bom = detectar_bom(muestra)
+    if bom:
+        return bom
+
+    for encoding in CODIFICACIONES_COMUNES:
+        try:
+            # Decodificador incremental: un carácter multibyte cortado al final
+            # de la muestra no se toma como error
+            codecs.getincrementaldecoder(encoding)().decode(muestra, final=False)
+            return encoding
+        except (UnicodeDecodeError, UnicodeError):
+            continue
+
+    return 'latin-1'
+
+
+def detectar_codificacion(archivo, tamano_muestra=TAMANO_MUESTRA_BYTES):
+    """Detecta la codificación del archivo (BOM o prueba de candidatas) con una muestra de bytes."""
+    with open(archivo, 'rb') as f:
+        muestra = f.read(tamano_muestra)
+    return _codificacion_de_muestra(muestra)
+
+
+def leer_lineas_muestra(archivo, codificacion, max_lineas=MAX_LINEAS_MUESTRA):
+    """Primeras `max_lineas` líneas del archivo (con salto de línea), decodificadas con respaldo."""
+    with open(archivo, 'r', encoding=codificacion, errors=ERRORES_DECODIFICACION) as f:
+        return list(islice(f, max_lineas))
+
+
+def detectar_separador(linea_cabecera, min_separadores=2):
+    """Detecta el separador: el primero que aparece más de `min_separadores` veces."""
+    for sep in SEPARADORES:
+        if linea_cabecera.count(sep) > min_separadores:
+            return sep
+    return '\t'
+
+
+def normalizar_texto(s):
+    """Normaliza texto: minúsculas, sin acentos, sin puntuación extra, colapsa espacios."""
+    if s is None:
+        return ''
+    s = str(s).strip()
+    # Quitar acentos
+    s = unicodedata.normalize('NFKD', s)
+    s = ''.join(c for c in s if not unicodedata.combining(c))
+    s = s.lower()
+    # Reemplazar separadores/puntuación por espacio
+    s = re.sub(r"[\.:;\/\\-]+", " ", s)
+    # Colapsar espacios
+    s = re.sub(r"\s+", " ", s).strip()
+    return s
+
+
+def detectar_fila_cabecera(lineas, nombres_esperados, max_busqueda=50, min_columnas=3):
+    """
+    Detecta la fila de cabecera escaneando las primeras líneas.
+
+    Para cada línea y separador candidato cuenta cuántas partes coinciden (normalizadas)
+    con `nombres_esperados`; gana la línea con más coincidencias y, a igualdad,
+    la que aporta más columnas. Corta en cuanto la mitad de los nombres destino
+    distintos ya coincide.
+
+    Returns:
+        (idx_cabecera, separador, columnas_cabecera) o (None, None, None)
+    """
+    nombres_esperados_norm = {normalizar_texto(k) for k in nombres_esperados}
+    score_corte = max(3, len(nombres_esperados_norm) // 2)
+    mejor = {'idx': None, 'sep': None, 'cols': None, 'score': 0, 'total_cols': 0}
+
+    for i, linea in enumerate(lineas[:max_busqueda]):
+        linea = linea.rstrip('\r\n')
+        if not linea.strip():
+            continue
+
+        for sep in SEPARADORES:
+            partes = linea.split(sep)
+            if len(partes) < min_columnas:
+                continue
+            score = sum(1 for p in partes if normalizar_texto(p) in nombres_esperados_norm)
+            if score > mejor['score'] or (score == mejor['score'] and score > 0 and len(partes) > mejor['total_cols']):
+                mejor.update({'idx': i, 'sep': sep, 'cols': partes, 'score': score, 'total_cols': len(partes)})
+
+        # Criterio de corte: cabecera con coincidencia alta
+        if mejor['score'] >= score_corte:
+            break
+
+    if mejor['idx'] is not None:
+        return mejor['idx'], mejor['sep'], mejor['cols']
+    return None, None, None
+
+
+def detectar_formato(archivo, nombres_esperados=None, fila_cabecera_defecto=0,
+                     min_separadores=2, max_lineas=MAX_LINEAS_MUESTRA,
+                     tamano_muestra=TAMANO_MUESTRA_BYTES):
+    """
+    Detecta codificación, BOM, separador y cabecera leyendo solo una muestra.
+
+    Con `nombres_esperados` la cabecera se busca con `detectar_fila_cabecera`; si
+    no hay coincidencias (o no se indican nombres) se usa `fila_cabecera_defecto`
+    y el separador se elige con `detectar_separador`.
+
+    Returns:
+        FormatoArchivo, o None si el archivo está vacío.
+    """
+    with open(archivo, 'rb') as f:
+        muestra = f.read(tamano_muestra)
+    if not muestra:
+        return None
+
+    codificacion = _codificacion_de_muestra(muestra)
+    bom = detectar_bom(muestra) is not None
+    lineas = leer_lineas_muestra(archivo, codificacion, max_lineas)
+    if not lineas:
+        return None
+
+    if nombres_esperados:
+        idx, separador, columnas = detectar_fila_cabecera(lineas, nombres_esperados, max_busqueda=max_lineas)
+        if idx is not None:
+            return FormatoArchivo(codificacion, bom, separador, idx, tuple(columnas))
+
+    idx = fila_cabecera_defecto if len(lineas) > fila_cabecera_defecto else 0
+    linea = lineas[idx].rstrip('\r\n')
+    separador = detectar_separador(linea, min_separadores)
+    return FormatoArchivo(codificacion, bom, separador, idx, tuple(linea.split(separador)),
+                          cabecera_detectada=not nombres_esperados)
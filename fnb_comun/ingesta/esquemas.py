@@ -0,0 +1,287 @@
+# fnb_comun/ingesta/esquemas.py
+"""
+Esquemas declarativos de las fuentes TXT que se cargan a base de datos.
+
+Cada fuente (potenciales, rechazados, segmentación, scoring) se describe con un
+`EsquemaFuente`: mapeo de nombres de columnas, tipos destino y las pocas reglas
+propias del archivo (cómo ubicar la cabecera, qué hacer con filas irregulares,
+reemplazos de valores, columnas PERIODO). El resto del proceso es común y vive
+en `limpieza.py` y `tipos.py`.
+
+Las variantes SQL Server (Otros/10.x) reutilizan estos esquemas con
+`dataclasses.replace`, cambiando tipos, prefijo de tabla y `minusculas`.
+"""
+
+import os
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Optional
+
+
+@dataclass(frozen=True)
+class EsquemaFuente:
+    """Descripción declarativa de una fuente TXT."""
+
+    nombre: str
+    # Nombre original en el TXT → nombre destino (varios originales pueden ser sinónimos)
+    mapeo_columnas: dict
+    # Nombre destino → tipo SQL (PostgreSQL o SQL Server)
+    tipos: dict
+    # Prefijo de la tabla destino; el sufijo es la fecha YYYYMMDD del archivo
+    prefijo_tabla: str
+    # "detectar": busca la cabecera en las primeras líneas; "primera_linea": línea 1
+    cabecera: str = "primera_linea"
+    # Fila (base 0) usada como cabecera si la detección falla
+    fila_cabecera_defecto: int = 0
+    # Mínimo de separadores (exclusivo) para aceptar un separador candidato
+    min_separadores: int = 2
+    # "reparar": completa/recorta filas irregulares; "omitir": las descarta
+    filas_irregulares: str = "reparar"
+    # Hook opcional (campos, cabecera) → campos para filas con una columna extra
+    reparar_fila: Optional[Callable] = None
+    # {texto contenido en el nombre de columna: {valor exacto: reemplazo}}
+    reemplazos: dict = field(default_factory=dict)
+    # Columnas originales en formato YYYYMM que se convierten a fecha
+    columnas_periodo: tuple = ()
+    # PostgreSQL usa nombres en minúsculas; SQL Server conserva el mapeo tal cual
+    minusculas: bool = True
+    # Formato de la fecha de 8 dígitos en el nombre del archivo
+    formato_fecha_archivo: str = "%d%m%Y"
+    # Tabla histórica particionada por mes (fnb_comun/historico.py) e índices de sus particiones
+    tabla_historica: Optional[str] = None
+    indices_historico: tuple = ()
+
+
+# ======================
+# REGLAS PROPIAS DE CADA FUENTE
+# ======================
+
+# Cuentas cuya Dirección viene partida en dos campos en el TXT de potenciales
+CUENTAS_DIRECCION_PARTIDA = ('5199463', '5320440')
+
+
+def reparar_direccion_partida(campos, cabecera):
+    """Une la Dirección partida en dos campos para las cuentas conocidas."""
+    cta_contr_index = next((j for j, col in enumerate(cabecera) if 'Cta.Contr' in col), None)
+    direccion_index = next((j for j, col in enumerate(cabecera) if 'Dirección' in col), None)
+    if cta_contr_index is None or direccion_index is None or cta_contr_index >= len(campos):
+        return campos
+    if campos[cta_contr_index] in CUENTAS_DIRECCION_PARTIDA and direccion_index < len(campos) - 1:
+        direccion_completa = f"{campos[direccion_index]} {campos[direccion_index + 1]}"
+        return campos[:direccion_index] + [direccion_completa] + campos[direccion_index + 2:]
+    return campos
+
+
+# ======================
+# ESQUEMAS POSTGRESQL
+# ======================
+
+POTENCIALES = EsquemaFuente(
+    nombre="potenciales",
+    mapeo_columnas={
+        "Fecha Eval": "Fecha_Eval",
+        "Tipo Docum": "Tipo_Docum",
+        "N.I.F.1": "N_I_F_1",
+        "Int.cial.": "Int_cial",
+        "Soc.cial.": "Int_cial",
+        "Nombre": "Nombre",
+        "Saldo Créd": "Saldo_Cred",
+        "LC Mod": "LC_Mod",
+        "Cta.Contr.": "Cta_Contr",
+        "Distrito": "Distrito",
+        "Dirección": "Direccion",
+        "NSE 1": "NSE_1",
+        "Fecha Alta": "Fecha_Alta",
+        "Cta.Ctto 2": "Cta_Ctto_2",
+        "Distrito 2": "Distrito_2",
+        "Dirección 2": "Direccion_2",
+        "NSE 2": "NSE_2",
+        "FechaAlta2": "FechaAlta2",
+        "Cta.Ctto 3": "Cta_Ctto_3",
+        "Distrito 3": "Distrito_3",
+        "Dirección 3": "Direccion_3",
+        "Dirección3": "Direccion_3",
+        "NSE 3": "NSE_3",
+        "FechaAlta3": "FechaAlta3",
+        "Cta.Ctto 4": "Cta_Ctto_4",
+        "Distrito 4": "Distrito_4",
+        "Dirección 4": "Direccion_4",
+        "Dirección4": "Direccion_4",
+        "NSE 4": "NSE_4",
+        "FechaAlta4": "FechaAlta4",
+        "Cta.Ctto 5": "Cta_Ctto_5",
+        "Distrito 5": "Distrito_5",
+        "Dirección 5": "Direccion_5",
+        "Dirección5": "Direccion_5",
+        "NSE 5": "NSE_5",
+        "FechaAlta5": "FechaAlta5",
+        "CaCta": "CaCta",
+        "Texto categ.cuenta": "Texto_categ_cuenta",
+    },
+    tipos={
+        "Fecha_Eval": "TIMESTAMP",
+        "Tipo_Docum": "VARCHAR(500)",
+        "N_I_F_1": "VARCHAR(20)",  # Texto para soportar letras
+        "Int_cial": "BIGINT",
+        "Nombre": "VARCHAR(500)",
+        "Saldo_Cred": "NUMERIC(18,2)",  # 2 decimales
+        "LC_Mod": "VARCHAR(500)",
+        "Cta_Contr": "BIGINT",
+        "Distrito": "VARCHAR(500)",
+        "Direccion": "VARCHAR(500)",
+        "NSE_1": "INTEGER",
+        "Fecha_Alta": "TIMESTAMP",
+        "Cta_Ctto_2": "BIGINT",
+        "Distrito_2": "VARCHAR(500)",
+        "Direccion_2": "VARCHAR(500)",
+        "NSE_2": "INTEGER",
+        "FechaAlta2": "TIMESTAMP",
+        "Cta_Ctto_3": "BIGINT",
+        "Distrito_3": "VARCHAR(500)",
+        "Direccion_3": "VARCHAR(500)",
+        "NSE_3": "INTEGER",
+        "FechaAlta3": "TIMESTAMP",
+        "Cta_Ctto_4": "BIGINT",
+        "Distrito_4": "VARCHAR(500)",
+        "Direccion_4": "VARCHAR(500)",
+        "NSE_4": "INTEGER",
+        "FechaAlta4": "TIMESTAMP",
+        "Cta_Ctto_5": "BIGINT",
+        "Distrito_5": "VARCHAR(500)",
+        "Direccion_5": "VARCHAR(500)",
+        "NSE_5": "INTEGER",
+        "FechaAlta5": "TIMESTAMP",
+        "CaCta": "VARCHAR(500)",
+        "Texto_categ_cuenta": "VARCHAR(500)",
+    },
+    prefijo_tabla="bd_potenciales",
+    cabecera="detectar",
+    fila_cabecera_defecto=8,  # Heurística histórica: cabecera en la fila 9
+    min_separadores=10,
+    reparar_fila=reparar_direccion_partida,
+    reemplazos={"Distrito": {"LA ALBORADA": "COMAS"}},
+    tabla_historica="bd_potenciales_mensual",
+    indices_historico=(("int_cial",), ("cta_contr",)),
+)
+
+RECHAZADOS = EsquemaFuente(
+    nombre="rechazados",
+    mapeo_columnas={
+        "Fecha Eval": "fecha_eval",
+        "Tipo Docum": "tipo_docum",
+        "N.I.F.1": "n_i_f_1",
+        "Int.cial.": "int_cial",
+        "Soc.cial.": "int_cial",
+        "Nombre": "nombre",
+        "Mensaje": "mensaje",
+    },
+    tipos={
+        "fecha_eval": "TIMESTAMP",
+        "tipo_docum": "VARCHAR(500)",
+        "n_i_f_1": "VARCHAR(20)",
+        "int_cial": "BIGINT",
+        "nombre": "VARCHAR(500)",
+        "mensaje": "VARCHAR(500)",
+    },
+    prefijo_tabla="bd_potenciales_rechazado",
+    cabecera="detectar",
+    tabla_historica="bd_potenciales_rechazado_mensual",
+    indices_historico=(("int_cial",),),
+)
+
+SEGMENTACION = EsquemaFuente(
+    nombre="segmentacion",
+    mapeo_columnas={
+        "INTERLOCUTOR": "interlocutor",
+        "FLAG_SEGMENTACION": "flag_segmentacion",
+        "FECHA_CORTE": "fecha_corte",
+        "CTA_CONTR": "cta_contr",
+    },
+    tipos={
+        "interlocutor": "BIGINT",
+        "flag_segmentacion": "VARCHAR(500)",
+        "fecha_corte": "TIMESTAMP",
+        "cta_contr": "BIGINT",
+    },
+    prefijo_tabla="bd_segmentacion_historica",
+    filas_irregulares="omitir",
+    tabla_historica="bd_segmentacion_mensual",
+    indices_historico=(("interlocutor",), ("cta_contr",)),
+)
+
+SCORING = EsquemaFuente(
+    nombre="scoring",
+    mapeo_columnas={
+        "PERIODO": "periodo",
+        "CTA_CONTR": "cta_contr",
+        "DNI": "dni",
+        "SEGMENTO_RIESGO": "segmento_riesgo",
+        "INTERLOCUTOR": "interlocutor",
+        "FLAG_SEGMENTO_CORREGIDO": "flag_segmento_corregido",
+    },
+    tipos={
+        "periodo": "TIMESTAMP",
+        "cta_contr": "BIGINT",
+        "dni": "VARCHAR(20)",
+        "segmento_riesgo": "VARCHAR(500)",
+        "interlocutor": "BIGINT",
+        "flag_segmento_corregido": "VARCHAR(500)",
+    },
+    prefijo_tabla="bd_scoring_historico",
+    filas_irregulares="omitir",
+    columnas_periodo=("PERIODO",),
+    tabla_historica="bd_scoring_mensual",
+    indices_historico=(("interlocutor",), ("cta_contr",)),
+)
+
+# Registro usado por la CLI (python -m fnb_comun.ingesta <fuente> ...)
+ESQUEMAS = {
+    esquema.nombre: esquema
+    for esquema in (POTENCIALES, RECHAZADOS, SEGMENTACION, SCORING)
+}
+
+
+def _fecha_del_nombre(archivo_path, esquema):
+    """Fecha de los 8 dígitos del nombre (por defecto DDMMYYYY); None si no hay una válida."""
+    nombre_archivo = os.path.basename(archivo_path)
+    fecha_match = re.search(r'(\d{8})', nombre_archivo)
+    if fecha_match:
+        try:
+            return datetime.strptime(fecha_match.group(1), esquema.formato_fecha_archivo)
+        except ValueError:
+            pass
+    return None
+
+
+def fecha_archivo(archivo_path, esquema):
+    """
+    Fecha del archivo según su nombre: 8 dígitos (por defecto DDMMYYYY); si no
+    hay fecha válida, la fecha actual.
+    """
+    return _fecha_del_nombre(archivo_path, esquema) or datetime.now()
+
+
+def periodo_archivo(archivo_path, esquema):
+    """
+    Fecha del archivo para la carga histórica (su mes reemplaza la partición).
+
+    A diferencia de `fecha_archivo` no se usa la fecha actual: un archivo sin
+    fecha en el nombre reemplazaría el mes en curso con datos de otro mes.
+
+    Raises:
+        ValueError: si el nombre no trae una fecha válida.
+    """
+    fecha = _fecha_del_nombre(archivo_path, esquema)
+    if fecha is None:
+        raise ValueError(
+            f"No se pudo obtener el mes de '{os.path.basename(archivo_path)}' "
+            f"(se esperaba una fecha {esquema.formato_fecha_archivo} en el nombre); "
+            f"indique el periodo explícitamente"
+        )
+    return fecha
+
+
+def generar_nombre_tabla(archivo_path, esquema):
+    """Genera el nombre de tabla '<prefijo>_YYYYMMDD' a partir de la fecha del archivo."""
+    return f"{esquema.prefijo_tabla}_{fecha_archivo(archivo_path, esquema).strftime('%Y%m%d')}"
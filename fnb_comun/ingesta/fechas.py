@@ -0,0 +1,222 @@
+# fnb_comun/ingesta/fechas.py
+"""
+Parseo vectorizado de fechas de los TXT de origen y de los Excel de ventas.
+
+Formatos reconocidos: ISO (con o sin hora), dd/mm/yyyy, dd-mm-yyyy, dd.mm.yyyy
+(con o sin hora), años de dos dígitos, periodos YYYYMM, seriales de Excel y
+valores que ya vienen como fecha. El formato se infiere por columna con una
+muestra y se aplica a toda la columna de una vez; los valores que no calzan
+pasan al siguiente formato y, al final, a la inferencia genérica con dayfirst.
+
+Con `clave` (p. ej. (fuente, columna)) la decisión de formatos se guarda en
+`_CACHE_FORMATOS`: los lotes siguientes de la misma columna no vuelven a inferir.
+"""
+
+import warnings
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+# Formato especial: serial de Excel (días desde 1899-12-30)
+SERIAL_EXCEL = 'serial_excel'
+
+# (patrón, formato) candidatos; el orden desempata cuando la muestra calza igual
+PATRONES_FECHA = [
+    (r'\d{4}-\d{1,2}-\d{1,2}(?:[ T]\d{1,2}:\d{2}(?::\d{2}(?:\.\d+)?)?)?', 'ISO8601'),
+    (r'\d{1,2}/\d{1,2}/\d{4}', '%d/%m/%Y'),
+    (r'\d{1,2}/\d{1,2}/\d{4} \d{1,2}:\d{2}:\d{2}', '%d/%m/%Y %H:%M:%S'),
+    (r'\d{1,2}/\d{1,2}/\d{4} \d{1,2}:\d{2}', '%d/%m/%Y %H:%M'),
+    (r'\d{1,2}-\d{1,2}-\d{4}', '%d-%m-%Y'),
+    (r'\d{1,2}\.\d{1,2}\.\d{4}', '%d.%m.%Y'),
+    (r'\d{1,2}/\d{1,2}/\d{2}', '%d/%m/%y'),
+    (r'\d{1,2}-\d{1,2}-\d{2}', '%d-%m-%y'),
+    (r'(?:19|20)\d{2}(?:0[1-9]|1[0-2])', '%Y%m'),
+    (r'\d{5}(?:\.\d+)?', SERIAL_EXCEL),
+]
+
+# Valores revisados para inferir el formato de una columna
+MUESTRA_FORMATO = 200
+
+# Rango de seriales de Excel aceptados (1954-10-05 a 2119-01-08)
+RANGO_SERIAL_EXCEL = (20000, 80000)
+
+_CACHE_FORMATOS = {}
+
+
+def _a_datetime_ns(serie):
+    """Lleva a datetime64[ns]; fechas fuera de rango (p. ej. 31.12.9999 de SAP) quedan NaT."""
+    if not pd.api.types.is_datetime64_any_dtype(serie):
+        serie = pd.to_datetime(serie, errors='coerce')
+    if getattr(serie.dt, 'tz', None) is not None:
+        serie = serie.dt.tz_localize(None)
+    serie = serie.where(serie.dt.year.between(1678, 2261))
+    return serie.astype('datetime64[ns]')
+
+
+def _desde_serial_excel(numeros):
+    """Convierte seriales de Excel (días desde 1899-12-30) a fecha; fuera de rango → NaT."""
+    numeros = pd.to_numeric(numeros, errors='coerce')
+    minimo, maximo = RANGO_SERIAL_EXCEL
+    numeros = numeros.where(numeros.between(minimo, maximo))
+    return pd.to_datetime(numeros, unit='D', origin='1899-12-30')
+
+
+def _parsear_con_formato(texto, formato):
+    if formato == SERIAL_EXCEL:
+        return _desde_serial_excel(texto)
+    return pd.to_datetime(texto, format=formato, errors='coerce')
+
+
+def inferir_formatos(texto, tamano_muestra=MUESTRA_FORMATO):
+    """Formatos de PATRONES_FECHA presentes en una muestra de texto, del más al menos frecuente."""
+    muestra = texto.dropna()
+    muestra = muestra[muestra != ''].head(tamano_muestra)
+    if muestra.empty:
+        return []
+
+    proporciones = [
+        (muestra.str.fullmatch(patron).mean(), orden, formato)
+        for orden, (patron, formato) in enumerate(PATRONES_FECHA)
+    ]
+    return [formato for prop, _, formato in sorted(proporciones, key=lambda p: (-p[0], p[1])) if prop > 0]
+
+
+def _parsear_texto(texto, clave=None):
+    """Parsea una serie de texto probando los formatos inferidos (o cacheados) en orden."""
+    resultado = pd.Series(pd.NaT, index=texto.index, dtype='datetime64[ns]')
+    pendientes = (texto != '').fillna(False).astype(bool)
+    if not pendientes.any():
+        return resultado
+
+    formatos = _CACHE_FORMATOS.get(clave) if clave is not None else None
+    if formatos is None:
+        formatos = inferir_formatos(texto[pendientes])
+
+    usados = []
+    for formato in formatos:
+        convertidas = _a_datetime_ns(_parsear_con_formato(texto[pendientes], formato)).dropna()
+        if not convertidas.empty:
+            resultado[convertidas.index] = convertidas
+            pendientes[convertidas.index] = False
+        usados.append(formato)
+        if not pendientes.any():
+            break
+
+    # Formatos nuevos en los pendientes (otro lote de la misma fuente, columna mixta)
+    if pendientes.any() and clave is not None:
+        for formato in inferir_formatos(texto[pendientes]):
+            if formato in usados:
+                continue
+            convertidas = _a_datetime_ns(_parsear_con_formato(texto[pendientes], formato)).dropna()
+            if not convertidas.empty:
+                resultado[convertidas.index] = convertidas
+                pendientes[convertidas.index] = False
+                usados.append(formato)
+
+    if clave is not None:
+        _CACHE_FORMATOS[clave] = list(dict.fromkeys((_CACHE_FORMATOS.get(clave) or []) + usados))
+
+    if pendientes.any():
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=UserWarning)
+            genericas = pd.to_datetime(texto[pendientes], errors='coerce', dayfirst=True)
+        resultado[pendientes] = _a_datetime_ns(genericas)
+
+    return resultado
+
+
+def parsear_fechas(serie, clave=None):
+    """
+    Convierte una columna a datetime64[ns] sin recorrer celda por celda.
+
+    - Columnas datetime: se devuelven tal cual.
+    - Numéricas: seriales de Excel y periodos YYYYMM (190001-299912).
+    - Texto: formato inferido por columna (ver PATRONES_FECHA) y luego dayfirst.
+    - object mixto (típico de Excel): cada tipo de valor por su camino.
+
+    Args:
+        serie: columna a convertir.
+        clave: identificador de la columna en su fuente, p. ej. ('potenciales',
+            'FechaAlta1'); guarda los formatos detectados para los siguientes lotes.
+    """
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie
+
+    # Las conversiones se alinean por posición (el índice original puede repetirse)
+    indice = serie.index
+    resultado = _parsear_columna(serie.reset_index(drop=True), clave)
+    resultado.index = indice
+    return resultado
+
+
+def _parsear_columna(serie, clave):
+    if pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie):
+        return _desde_numeros(serie)
+
+    tipo = pd.api.types.infer_dtype(serie, skipna=True)
+    if tipo in ('datetime', 'datetime64', 'date'):
+        return _a_datetime_ns(serie)
+    if tipo in ('string', 'empty'):
+        return _parsear_texto(serie.astype('string').str.strip(), clave)
+
+    # Mezcla de fechas, números y texto (celdas de Excel con formatos distintos)
+    resultado = pd.Series(pd.NaT, index=serie.index, dtype='datetime64[ns]')
+    es_fecha = serie.map(lambda v: isinstance(v, (datetime, date, np.datetime64)))
+    es_numero = serie.map(lambda v: isinstance(v, (int, float, np.number)) and not isinstance(v, bool))
+    es_texto = serie.notna() & ~es_fecha & ~es_numero
+
+    if es_fecha.any():
+        resultado[es_fecha] = _a_datetime_ns(pd.to_datetime(serie[es_fecha], errors='coerce'))
+    if es_numero.any():
+        resultado[es_numero] = _desde_numeros(serie[es_numero].astype(float))
+    if es_texto.any():
+        resultado[es_texto] = _parsear_texto(serie[es_texto].astype('string').str.strip(), clave)
+    return resultado
+
+
+def _desde_numeros(numeros):
+    """Seriales de Excel y periodos YYYYMM almacenados como número."""
+    numeros = pd.to_numeric(numeros, errors='coerce').astype(float)
+    resultado = _a_datetime_ns(_desde_serial_excel(numeros))
+
+    es_periodo = numeros.between(190001, 299912) & (numeros % 1 == 0)
+    if es_periodo.any():
+        periodos = numeros[es_periodo].astype('int64').astype(str)
+        resultado[es_periodo] = _a_datetime_ns(pd.to_datetime(periodos, format='%Y%m', errors='coerce'))
+    return resultado
+
+
+def proporcion_no_convertida(original, fechas):
+    """Proporción (0-1) de valores no vacíos de `original` que quedaron NaT en `fechas`."""
+    if pd.api.types.is_numeric_dtype(original) or pd.api.types.is_datetime64_any_dtype(original):
+        con_valor = original.notna()
+    else:
+        texto = original.astype('string').str.strip()
+        con_valor = texto.notna() & (texto != '')
+    total = int(con_valor.sum())
+    if not total:
+        return 0.0
+    return float((con_valor & fechas.isna()).sum()) / total
+
+
+def convertir_periodo_a_fecha(serie):
+    """
+    Convierte una columna PERIODO en formato YYYYMM a fecha (primer día del mes).
+
+    Ejemplo: '202510' -> 2025-10-01. Los valores que ya vienen como fecha
+    (con '/' o '-') se parsean tal cual; el resto queda NaT.
+    """
+    if pd.api.types.is_numeric_dtype(serie):
+        return _desde_numeros(serie)
+
+    indice = serie.index
+    texto = serie.reset_index(drop=True).astype('string').str.strip()
+    es_periodo = texto.str.fullmatch(r'\d{6}').fillna(False).astype(bool)
+    resultado = _a_datetime_ns(pd.to_datetime(texto.where(es_periodo), format='%Y%m', errors='coerce'))
+
+    es_fecha = texto.str.contains(r'[/-]', regex=True).fillna(False).astype(bool)
+    if es_fecha.any():
+        resultado[es_fecha] = parsear_fechas(texto[es_fecha])
+    resultado.index = indice
+    return resultado
@@ -0,0 +1,375 @@
+# fnb_comun/ingesta/limpieza.py
+"""
+Fase 1 del ETL de archivos TXT: lectura, reparación de filas y limpieza general.
+
+`limpiar_archivo_txt(archivo, esquema)` reemplaza las copias que tenía cada
+script de carga (03.6, 03.8, 03.9, 03.10 y las variantes SQL Server de Otros/10.x).
+Las diferencias entre fuentes se declaran en el `EsquemaFuente`.
+
+El archivo se lee en bloques de tamaño fijo (`leer_txt_por_lotes`): las líneas
+regulares se parsean con el lector C de pandas y solo las irregulares pasan por
+la reparación fila a fila, sin `readlines()` ni listas con el archivo completo.
+"""
+
+import csv
+import io
+import re
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+
+from .deteccion import ERRORES_DECODIFICACION, detectar_formato, tomar_conteo_respaldo
+from .fechas import convertir_periodo_a_fecha, parsear_fechas
+from .tipos import VALORES_NULOS, familia_tipo
+
+# Líneas iniciales donde se busca la cabecera
+MAX_LINEAS_CABECERA = 50
+
+# Caracteres leídos por bloque en la lectura por lotes (acota la memoria)
+TAMANO_BLOQUE = 8 * 1024 * 1024
+
+# Filas de datos revisadas por analizar_archivo_txt
+MUESTRA_ANALISIS = 1000
+
+
+def _nombre_separador(sep):
+    return 'TAB' if sep == '\t' else sep
+
+
+def _es_texto(serie):
+    """True si la serie guarda texto (object o string de pandas)."""
+    return pd.api.types.is_object_dtype(serie) or pd.api.types.is_string_dtype(serie)
+
+
+def _contar_lineas(archivo):
+    """Cuenta líneas leyendo el archivo en bloques binarios (sin decodificar)."""
+    total = 0
+    with open(archivo, 'rb') as f:
+        for bloque in iter(lambda: f.read(1 << 20), b''):
+            total += bloque.count(b'\n')
+    return total
+
+
+def _detectar_formato(archivo, esquema):
+    """FormatoArchivo según la regla de cabecera del esquema (muestra acotada del archivo)."""
+    detectar = esquema.cabecera == "detectar"
+    formato = detectar_formato(
+        archivo,
+        nombres_esperados=esquema.mapeo_columnas.keys() if detectar else None,
+        fila_cabecera_defecto=esquema.fila_cabecera_defecto if detectar else 0,
+        min_separadores=esquema.min_separadores,
+        max_lineas=MAX_LINEAS_CABECERA,
+    )
+    if formato is None or not detectar:
+        return formato
+
+    if formato.cabecera_detectada:
+        print(f"✅ Cabecera localizada en fila {formato.fila_cabecera + 1} con separador {_nombre_separador(formato.separador)}")
+    else:
+        print(f"⚠️  No se detectó cabecera dinámicamente; se usará fila {formato.fila_cabecera + 1} como cabecera.")
+    return formato
+
+
+def _reportar_respaldo():
+    """Informa los bytes que no correspondían a la codificación detectada en la muestra."""
+    bytes_respaldo = tomar_conteo_respaldo()
+    if bytes_respaldo:
+        print(f"⚠️  {bytes_respaldo:,} bytes fuera de la codificación detectada se leyeron como cp1252")
+
+
+def _seleccionar_columnas(cabecera, esquema):
+    """
+    Índices de las columnas mapeadas, agrupando sinónimos por columna destino.
+
+    Para cada destino se toma la primera variante del mapeo presente en el archivo
+    (comparando con espacios normalizados). Retorna (indices, faltantes).
+    """
+    posiciones = {}
+    for i, col in enumerate(cabecera):
+        posiciones.setdefault(' '.join(col.split()), i)
+
+    grupos_por_destino = {}
+    for original, destino in esquema.mapeo_columnas.items():
+        grupos_por_destino.setdefault(destino, []).append(' '.join(original.split()))
+
+    indices = []
+    faltantes = []
+    for originales in grupos_por_destino.values():
+        encontrada = next((posiciones[o] for o in originales if o in posiciones), None)
+        if encontrada is not None:
+            indices.append(encontrada)
+        else:
+            faltantes.append(originales[0])
+    return indices, faltantes
+
+
+def analizar_archivo_txt(archivo_entrada, esquema):
+    """Analiza la estructura del archivo (cabecera y una muestra de filas) antes de la limpieza"""
+    print(f"=== ANÁLISIS DEL ARCHIVO TXT ({esquema.nombre.upper()}) ===")
+
+    formato = _detectar_formato(archivo_entrada, esquema)
+    print(f"Total de líneas: {_contar_lineas(archivo_entrada):,}")
+    if formato is None:
+        print("❌ El archivo está vacío")
+        print("=" * 50)
+        return
+
+    print(f"Codificación detectada: {formato.codificacion}" + (" (con BOM)" if formato.bom else ""))
+    print(f"Separador detectado: {_nombre_separador(formato.separador)}")
+    print(f"Cabecera: {len(formato.columnas)} columnas")
+
+    with open(archivo_entrada, 'r', encoding=formato.codificacion, errors=ERRORES_DECODIFICACION) as file:
+        muestra = list(islice(file, formato.fila_cabecera + 1, formato.fila_cabecera + 1 + MUESTRA_ANALISIS))
+    problemas = sum(
+        1 for linea in muestra
+        if linea.strip() and len(linea.rstrip('\r\n').split(formato.separador)) != len(formato.columnas)
+    )
+    tomar_conteo_respaldo()
+
+    if problemas:
+        print(f"⚠️  Filas con estructura diferente (muestra de {MUESTRA_ANALISIS:,}): {problemas}")
+    else:
+        print("✅ No se detectaron problemas de estructura en la muestra")
+    print("=" * 50)
+
+
+def _columnas_texto(df, esquema):
+    """Columnas cuyo destino es texto: no se infieren números (conserva ceros a la izquierda)."""
+    tipos_lower = {k.lower(): v for k, v in esquema.tipos.items()}
+    return [
+        col for col in df.columns
+        if familia_tipo(tipos_lower.get(esquema.mapeo_columnas.get(col, col).lower())) == "texto"
+    ]
+
+
+def _bloques_de_lineas(file, tamano_bloque):
+    """
+    Genera listas de líneas (sin salto de línea) leyendo el archivo en bloques
+    de `tamano_bloque` caracteres. La línea cortada al final de un bloque se
+    arrastra al siguiente.
+    """
+    resto = ''
+    while True:
+        bloque = file.read(tamano_bloque)
+        if not bloque:
+            break
+        lineas = (resto + bloque).split('\n')
+        resto = lineas.pop()
+        if lineas:
+            yield lineas
+    if resto:
+        yield [resto]
+
+
+def _parsear_bloque(lineas, separador, cabecera, indices, esquema, contadores):
+    """
+    Convierte un bloque de líneas en DataFrame de texto con las columnas `indices`.
+
+    Las líneas con el número exacto de separadores (caso normal) se parsean con
+    el lector C de pandas; solo las irregulares pasan por la reparación en Python.
+    """
+    num_columnas = len(cabecera)
+    serie = pd.Series(lineas, dtype=object)
+    serie = serie[serie.str.strip().astype(bool)]
+    if serie.empty:
+        return None
+
+    regulares = serie.str.count(re.escape(separador)) == num_columnas - 1
+    partes = []
+
+    if regulares.any():
+        df_reg = pd.read_csv(
+            io.StringIO('\n'.join(serie[regulares])),
+            sep=separador, header=None, usecols=indices, dtype=str,
+            na_filter=False, quoting=csv.QUOTE_NONE, engine='c',
+        )[indices]
+        df_reg.index = serie.index[regulares]
+        partes.append(df_reg)
+
+    irregulares = serie[~regulares]
+    if not irregulares.empty:
+        reparar = esquema.filas_irregulares == "reparar"
+        relleno = [''] * num_columnas
+        filas, posiciones = [], []
+        for pos, linea in irregulares.items():
+            campos = linea.split(separador)
+            if len(campos) == num_columnas + 1 and esquema.reparar_fila is not None:
+                campos = esquema.reparar_fila(campos, cabecera)
+            # Separadores sobrantes al final de la línea (campos vacíos)
+            if len(campos) > num_columnas and not any(c.strip() for c in campos[num_columnas:]):
+                campos = campos[:num_columnas]
+            if len(campos) != num_columnas:
+                if not reparar:
+                    contadores['omitidas'] += 1
+                    continue
+                contadores['corregidas'] += 1
+                campos = (campos + relleno)[:num_columnas]
+            filas.append([campos[i] for i in indices])
+            posiciones.append(pos)
+        if filas:
+            partes.append(pd.DataFrame(filas, columns=indices, index=posiciones, dtype=object))
+
+    if not partes:
+        return None
+    lote = pd.concat(partes).sort_index() if len(partes) > 1 else partes[0]
+    lote.columns = [cabecera[i] for i in indices]
+    return lote.reset_index(drop=True)
+
+
+def leer_txt_por_lotes(archivo_entrada, esquema, tamano_bloque=TAMANO_BLOQUE):
+    """
+    Lee el TXT en bloques de tamaño fijo y genera DataFrames limpios (texto) por lote.
+
+    - Detecta codificación, separador y cabecera con una muestra (`detectar_formato`);
+      los bytes que no cumplan la codificación detectada se leen con respaldo cp1252.
+    - Descarta columnas con cabecera en blanco y conserva solo las mapeadas.
+    - Filas irregulares: se reparan (completar/recortar) u omiten según el esquema.
+    - Aplica reemplazos de valores, columnas PERIODO y la limpieza de texto.
+
+    La memoria usada depende de `tamano_bloque`, no del tamaño del archivo.
+    """
+    print(f"=== INICIANDO LIMPIEZA DE ARCHIVO TXT ({esquema.nombre.upper()}) ===")
+
+    formato = _detectar_formato(archivo_entrada, esquema)
+    if formato is None:
+        print("❌ Error: El archivo no tiene suficientes líneas para procesar")
+        return
+
+    separador = formato.separador
+    cabecera = [col.strip() for col in formato.columnas]
+    print(f"Cabecera extraída: {len(cabecera)} columnas")
+
+    vacias = sum(1 for col in cabecera if not col)
+    if vacias:
+        print(f"🧹 Columnas vacías en cabecera detectadas: {vacias}. Serán removidas del esquema.")
+
+    indices, faltantes = _seleccionar_columnas(cabecera, esquema)
+    if indices:
+        print(f"✅ Columnas seleccionadas (mapeadas): {', '.join(cabecera[i] for i in indices)}")
+    else:
+        print("❌ No se encontraron coincidencias con el mapeo de columnas. Se conservarán todas las columnas originales.")
+        print("   Revisa si la línea usada como cabecera es realmente la correcta o si hay desplazamiento.")
+        indices = [i for i, col in enumerate(cabecera) if col]
+    if faltantes:
+        print(f"⚠️  Columnas esperadas pero no encontradas: {', '.join(faltantes)}")
+
+    contadores = {'corregidas': 0, 'omitidas': 0, 'filas': 0, 'lotes': 0}
+    cambios = {}
+    periodos_nulos = {}
+    tomar_conteo_respaldo()
+
+    with open(archivo_entrada, 'r', encoding=formato.codificacion, errors=ERRORES_DECODIFICACION) as file:
+        # Saltar hasta la cabecera (inclusive)
+        for _ in islice(file, formato.fila_cabecera + 1):
+            pass
+
+        for lineas in _bloques_de_lineas(file, tamano_bloque):
+            lote = _parsear_bloque(lineas, separador, cabecera, indices, esquema, contadores)
+            if lote is None:
+                continue
+
+            aplicar_reemplazos(lote, esquema, cambios)
+            for col in esquema.columnas_periodo:
+                if col in lote.columns:
+                    lote[col] = convertir_periodo_a_fecha(lote[col])
+                    periodos_nulos[col] = periodos_nulos.get(col, 0) + int(lote[col].isna().sum())
+            limpiar_texto(lote)
+
+            contadores['filas'] += len(lote)
+            contadores['lotes'] += 1
+            yield lote
+
+    _reportar_respaldo()
+    for (subcadena, valor, nuevo), total in cambios.items():
+        print(f"{subcadena}: {total:,} registros '{valor}' → '{nuevo}'")
+    for col, nulos in periodos_nulos.items():
+        print(f"🔄 Columna {col} (YYYYMM) convertida a fecha" + (f" - ⚠️  {nulos:,} valores no convertidos (NULL)" if nulos else ""))
+    if contadores['corregidas']:
+        print(f"Filas corregidas (completadas/recortadas): {contadores['corregidas']:,}")
+    if contadores['omitidas']:
+        print(f"⚠️  Filas omitidas por estructura incorrecta: {contadores['omitidas']:,}")
+    print(f"Total de filas procesadas: {contadores['filas']:,} ({contadores['lotes']} lotes)")
+
+
+def limpiar_archivo_txt(archivo_entrada, esquema, tamano_bloque=TAMANO_BLOQUE):
+    """
+    Limpia un archivo TXT con problemas de estructura y retorna un DataFrame.
+
+    Une los lotes de `leer_txt_por_lotes` y aplica la inferencia de tipos básicos
+    sobre el total. Retorna None si el archivo no tiene datos válidos.
+    """
+    lotes = list(leer_txt_por_lotes(archivo_entrada, esquema, tamano_bloque))
+    if not lotes:
+        print("❌ No se procesaron datos válidos")
+        return None
+
+    df = pd.concat(lotes, ignore_index=True) if len(lotes) > 1 else lotes[0]
+    del lotes
+
+    df = convertir_tipos_datos_basicos(df, columnas_texto=_columnas_texto(df, esquema))
+
+    print(f"✅ DataFrame creado: {len(df):,} filas x {len(df.columns)} columnas")
+    return df
+
+
+def aplicar_reemplazos(df, esquema, cambios=None):
+    """
+    Reemplaza valores exactos (no substrings) en las columnas indicadas por el esquema.
+
+    Si se pasa `cambios` (dict), acumula ahí los conteos en vez de imprimirlos.
+    """
+    for subcadena, reemplazos in esquema.reemplazos.items():
+        columnas = [col for col in df.columns if subcadena in col]
+        for valor, nuevo in reemplazos.items():
+            total_cambios = 0
+            for col in columnas:
+                mask_eq = df[col].astype(str).str.strip().str.upper() == valor.upper()
+                n = int(mask_eq.sum())
+                if n:
+                    df.loc[mask_eq, col] = nuevo
+                    total_cambios += n
+            if cambios is not None:
+                if total_cambios:
+                    clave = (subcadena, valor, nuevo)
+                    cambios[clave] = cambios.get(clave, 0) + total_cambios
+            elif total_cambios:
+                print(f"{subcadena}: {total_cambios:,} registros '{valor}' → '{nuevo}'")
+    return df
+
+
+def limpiar_texto(df):
+    """Limpia columnas de texto: saltos de línea/tabulaciones, espacios y nulos"""
+    for col in df.columns:
+        if _es_texto(df[col]):
+            serie = df[col].str.replace(r'[\r\n\t]', ' ', regex=True).str.strip()
+            df[col] = serie.where(~serie.isin(VALORES_NULOS), np.nan)
+    return df
+
+
+def aplicar_limpieza_general(df, columnas_texto=()):
+    """Aplica limpieza general (saltos de línea, espacios, nulos) y tipos básicos"""
+    limpiar_texto(df)
+    return convertir_tipos_datos_basicos(df, columnas_texto=columnas_texto)
+
+
+def convertir_tipos_datos_basicos(df, columnas_texto=()):
+    """
+    Convierte tipos de datos básicos: fechas si la muestra parece fecha y números
+    si más del 80% de los valores son numéricos. `columnas_texto` se dejan como texto.
+    """
+    for col in df.columns:
+        if col in columnas_texto or not _es_texto(df[col]):
+            continue
+
+        muestra = df[col].dropna().head(10).astype(str)
+        if muestra.str.match(r'\d{1,2}[/-]\d{1,2}[/-]\d{2,4}').any():
+            df[col] = parsear_fechas(df[col])
+            continue
+
+        col_limpia = df[col].str.replace(',', '', regex=False).str.replace(' ', '', regex=False)
+        numerica = pd.to_numeric(col_limpia, errors='coerce')
+        if len(df) and numerica.notna().sum() / len(df) > 0.8:
+            df[col] = numerica
+
+    return df
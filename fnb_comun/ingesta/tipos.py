@@ -0,0 +1,208 @@
+# fnb_comun/ingesta/tipos.py
+"""
+Fase de carga: nombres de columnas, conversión a los tipos destino y
+preparación final del DataFrame.
+
+Los tipos se agrupan por familia ('texto', 'entero', 'decimal', 'fecha') para
+atender igual a PostgreSQL (VARCHAR/INTEGER/NUMERIC/TIMESTAMP) y a SQL Server
+(VARCHAR/INT/DECIMAL/DATETIME).
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+from .fechas import parsear_fechas, proporcion_no_convertida
+
+# Textos que representan nulos en columnas de texto
+VALORES_NULOS = ['', 'nan', 'NaN', 'NULL', 'null', 'None', '<NA>', 'NaT']
+
+_FAMILIAS = (
+    ('texto', ('VARCHAR', 'NVARCHAR', 'CHAR', 'NCHAR', 'TEXT')),
+    ('entero', ('SMALLINT', 'TINYINT', 'INTEGER', 'INT', 'BIGINT')),
+    ('decimal', ('NUMERIC', 'DECIMAL', 'FLOAT', 'REAL', 'DOUBLE', 'MONEY')),
+    ('fecha', ('TIMESTAMP', 'DATETIME', 'SMALLDATETIME', 'DATE')),
+)
+
+
+def familia_tipo(tipo_sql):
+    """Familia del tipo SQL declarado: 'texto', 'entero', 'decimal', 'fecha' o None."""
+    if not tipo_sql:
+        return None
+    base = re.match(r'[A-Z]+', str(tipo_sql).strip().upper())
+    if not base:
+        return None
+    base = base.group(0)
+    for familia, nombres in _FAMILIAS:
+        if base in nombres:
+            return familia
+    return None
+
+
+def _escala_decimal(tipo_sql):
+    """Escala declarada en NUMERIC(p,s)/DECIMAL(p,s), o None."""
+    m = re.search(r'\(\s*\d+\s*,\s*(\d+)\s*\)', str(tipo_sql))
+    return int(m.group(1)) if m else None
+
+
+def _es_texto(serie):
+    return pd.api.types.is_object_dtype(serie) or pd.api.types.is_string_dtype(serie)
+
+
+def _a_texto(serie):
+    """Convierte a texto; los números enteros guardados como float pierden el '.0'."""
+    validos = serie.notna()
+    resultado = pd.Series(None, index=serie.index, dtype=object)
+
+    if pd.api.types.is_float_dtype(serie):
+        valores = serie.to_numpy(dtype=float, na_value=np.nan)
+        enteros = validos & np.isfinite(valores) & (np.mod(valores, 1) == 0)
+        resultado[enteros] = serie[enteros].astype('int64').astype(str)
+        resto = validos & ~enteros
+        resultado[resto] = serie[resto].astype(str)
+        return resultado
+
+    texto = serie[validos].astype(str).str.strip()
+    texto = texto[~texto.isin(VALORES_NULOS)]
+    resultado[texto.index] = texto
+    return resultado
+
+
+def _a_numero(serie):
+    """Convierte a número; en texto quita separadores de miles (',') y espacios."""
+    if _es_texto(serie):
+        serie = serie.str.replace(',', '', regex=False).str.replace(' ', '', regex=False)
+    numerica = pd.to_numeric(serie, errors='coerce')
+    return numerica.replace([np.inf, -np.inf], np.nan)
+
+
+def limpiar_nombres_columnas(df, esquema, verbose=True):
+    """
+    Renombra columnas según el mapeo del esquema: coincidencia exacta, luego con
+    espacios normalizados ('Dirección4' vs 'Dirección 4') y, si no existe en el
+    mapeo, limpieza automática. En PostgreSQL los nombres quedan en minúsculas.
+    """
+    if verbose:
+        print("\n=== Limpiando nombres de columnas ===")
+
+    mapeo = esquema.mapeo_columnas
+    mapeo_normalizado = {' '.join(k.split()): v for k, v in mapeo.items()}
+
+    nuevos_nombres = []
+    cambios = []
+    for col in df.columns:
+        col_limpio = str(col).strip()
+        if col_limpio in mapeo:
+            nuevo_nombre = mapeo[col_limpio]
+        elif ' '.join(col_limpio.split()) in mapeo_normalizado:
+            nuevo_nombre = mapeo_normalizado[' '.join(col_limpio.split())]
+        else:
+            nuevo_nombre = re.sub(r'[^\w\s]', '_', col_limpio)
+            nuevo_nombre = re.sub(r'\s+', '_', nuevo_nombre)
+            nuevo_nombre = re.sub(r'_+', '_', nuevo_nombre).strip('_')
+
+        if esquema.minusculas:
+            nuevo_nombre = nuevo_nombre.lower()
+
+        if col != nuevo_nombre:
+            cambios.append((col, nuevo_nombre))
+        nuevos_nombres.append(nuevo_nombre)
+
+    if verbose and cambios:
+        print(f"Columnas renombradas: {len(cambios)}")
+        for orig, nuevo in cambios[:5]:
+            print(f"  {orig} → {nuevo}")
+        if len(cambios) > 5:
+            print(f"  ... y {len(cambios) - 5} más")
+    elif verbose:
+        print("✅ No se requirieron cambios en nombres de columnas")
+
+    df.columns = nuevos_nombres
+    return df
+
+
+def convertir_tipos_datos(df, esquema, verbose=True):
+    """Convierte cada columna mapeada al tipo destino declarado en el esquema"""
+    if verbose:
+        print("\n=== Conversión de tipos ===")
+
+    tipos_lower = {k.lower(): v for k, v in esquema.tipos.items()}
+
+    for col in df.columns:
+        # IGNORAR COLUMNAS NO MAPEADAS
+        tipo_sql = tipos_lower.get(str(col).lower())
+        familia = familia_tipo(tipo_sql)
+        if familia is None:
+            continue
+
+        try:
+            if familia == 'texto':
+                df[col] = _a_texto(df[col])
+
+            elif familia == 'entero':
+                df[col] = _a_numero(df[col]).round(0).astype('Int64')
+
+            elif familia == 'decimal':
+                numerica = _a_numero(df[col])
+                escala = _escala_decimal(tipo_sql)
+                df[col] = numerica.round(escala) if escala is not None else numerica
+
+            elif familia == 'fecha':
+                original = df[col]
+                df[col] = parsear_fechas(original, clave=(esquema.nombre, str(col).lower()))
+                no_convertidas = proporcion_no_convertida(original, df[col])
+                if no_convertidas:
+                    print(f"⚠️  {col}: {no_convertidas:.1%} de valores no reconocidos como fecha (NULL)")
+
+            if verbose:
+                print(f"✓ {col}: {tipo_sql}")
+
+        except Exception as e:
+            print(f"❌ Error convirtiendo {col}: {str(e)}")
+
+    return df
+
+
+def limpiar_datos(df):
+    """
+    Limpia el texto antes de la carga: '¬' (separador de los CSV temporales),
+    saltos de línea, tabulaciones y bytes nulos. No escapa comillas: COPY y los
+    drivers ya citan los valores.
+    """
+    for col in df.columns:
+        if not _es_texto(df[col]):
+            continue
+        validos = df[col].notna()
+        texto = (
+            df.loc[validos, col].astype(str)
+            .str.replace('¬', '-', regex=False)
+            .str.replace(r'[\r\n\t]', ' ', regex=True)
+            .str.replace('\x00', '', regex=False)
+        )
+        resultado = pd.Series(None, index=df.index, dtype=object)
+        texto = texto[~texto.isin(VALORES_NULOS)]
+        resultado[texto.index] = texto
+        df[col] = resultado
+
+    return df
+
+
+def preparar_dataframe(df, para_insert=False):
+    """
+    Prepara el DataFrame para la carga.
+
+    - float con inf/-inf → NaN.
+    - `para_insert=True`: todas las columnas pasan a object con None en los nulos,
+      que es lo que esperan execute_values / to_sql (pd.NA y NaT no se adaptan).
+    """
+    df_prep = df.copy()
+
+    for col in df_prep.columns:
+        if pd.api.types.is_float_dtype(df_prep[col]):
+            df_prep[col] = df_prep[col].replace([np.inf, -np.inf], np.nan)
+
+    if para_insert:
+        df_prep = df_prep.astype(object).where(df_prep.notna(), None)
+
+    return df_prep
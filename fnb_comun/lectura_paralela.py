@@ -0,0 +1,77 @@
+# fnb_comun/lectura_paralela.py
+"""
+Parseo de varios Excel en paralelo, cada uno en un proceso aparte.
+
+Cada archivo pendiente se parsea con `python -m fnb_comun.lectura_paralela`,
+que deja el resultado en la caché columnar (fnb_comun/cache_excel.py); después
+el script lo carga desde ahí con `leer_excel(..., cache=True)` en milisegundos.
+Los archivos que ya están en la caché (misma ruta, tamaño y fecha de
+modificación) no se vuelven a parsear: solo se procesan los nuevos.
+
+    nuevos, errores = precargar_excels(rutas, dtype=str)
+    dfs = [leer_excel(ruta, dtype=str, cache=True) for ruta in rutas]
+
+Se lanzan intérpretes independientes en lugar de multiprocessing porque los
+reportes son scripts sin `if __name__ == "__main__"`: en Windows
+multiprocessing vuelve a ejecutar el script principal en cada proceso hijo.
+"""
+
+import os
+import pickle
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from .excel import en_cache, leer_excel
+
+# Procesos simultáneos por defecto (se deja un núcleo libre)
+PROCESOS_LECTURA = max(1, min(4, (os.cpu_count() or 2) - 1))
+
+_RAIZ_REPO = str(Path(__file__).resolve().parents[1])
+
+
+def _parsear_en_proceso(ruta, opciones):
+    """Parsea `ruta` en un intérprete aparte. Retorna None o el mensaje de error."""
+    entorno = dict(os.environ)
+    entorno["PYTHONPATH"] = os.pathsep.join(p for p in (_RAIZ_REPO, entorno.get("PYTHONPATH")) if p)
+    proceso = subprocess.run(
+        [sys.executable, "-m", "fnb_comun.lectura_paralela"],
+        input=pickle.dumps((ruta, opciones)),
+        capture_output=True,
+        env=entorno,
+        creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0,
+    )
+    if proceso.returncode == 0:
+        return None
+    lineas = proceso.stderr.decode("utf-8", errors="replace").strip().splitlines()
+    return lineas[-1] if lineas else f"código de salida {proceso.returncode}"
+
+
+def precargar_excels(rutas, procesos=PROCESOS_LECTURA, **opciones):
+    """
+    Parsea en paralelo los archivos de `rutas` que aún no están en la caché.
+
+    Args:
+        rutas: archivos Excel.
+        procesos: intérpretes simultáneos.
+        **opciones: argumentos de lectura (sheet_name, dtype, usecols...), los mismos
+            que se usarán luego en `leer_excel(..., cache=True)`.
+
+    Returns:
+        (nuevos, errores): rutas parseadas en esta llamada y {ruta: error} de las que fallaron.
+    """
+    nuevos = [ruta for ruta in rutas if not en_cache(ruta, **opciones)]
+    if not nuevos:
+        return [], {}
+
+    with ThreadPoolExecutor(max_workers=max(1, min(procesos, len(nuevos)))) as pool:
+        resultados = list(pool.map(lambda ruta: _parsear_en_proceso(ruta, opciones), nuevos))
+    errores = {ruta: error for ruta, error in zip(nuevos, resultados) if error}
+    return nuevos, errores
+
+
+if __name__ == "__main__":
+    # Proceso trabajador: recibe (ruta, opciones) por stdin y deja el resultado en la caché
+    ruta_archivo, opciones_lectura = pickle.load(sys.stdin.buffer)
+    leer_excel(ruta_archivo, cache=True, **opciones_lectura)
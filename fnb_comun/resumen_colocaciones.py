@@ -0,0 +1,233 @@
+# fnb_comun/resumen_colocaciones.py
+"""
+Resumen diario de colocaciones mantenido por el cargador (03.3).
+
+Los reportes que solo necesitan totales (por canal, sede, proveedor/aliado,
+responsable o estado) no tienen por qué recorrer todo el detalle del mes de
+bd_colocaciones. La tabla `resumen_colocaciones_diario` guarda una fila por
+día de entrega × canal × sede × proveedor × responsable × estado con
+registros, transacciones e importes; son unos miles de filas.
+
+El cargador la refresca en la misma transacción de la carga: completa tras una
+recarga, o solo los días afectados tras una carga delta
+(`aplicar_delta_postgres(..., columna_cambios="f_entrega")`). Los pedidos aún
+sin entrega quedan en el día NULL.
+
+Un refresco parcial solo sirve si el resto del resumen ya estaba al día: la
+tabla `resumen_colocaciones_control` guarda una marca por resumen que pone el
+recálculo completo y quita `invalidar_resumen` (cargas que no lo mantienen).
+Sin marca, `refrescar_resumen(dias=...)` recalcula todo y los reportes deben
+leer el detalle (`resumen_completo(conn)` es False).
+
+    totales = consultar_resumen(conn, desde, hasta, por=("canal", "estado_entrega"),
+                                proveedor="SALESLAND")
+"""
+
+from datetime import date, datetime
+
+import pandas as pd
+
+from .carga_copy import _tabla_sql, quote_ident
+
+TABLA_RESUMEN = "resumen_colocaciones_diario"
+TABLA_DETALLE = "bd_colocaciones"
+TABLA_CONTROL = "resumen_colocaciones_control"
+
+# Columnas de agrupación (además del día) y medidas del resumen
+DIMENSIONES = ["canal", "sede", "proveedor", "responsable_de_venta", "estado_entrega"]
+MEDIDAS = ["registros", "transacciones", "importe", "financiamiento"]
+
+_SELECT_AGREGADO = f"""
+    SELECT f_entrega::date AS dia, {', '.join(DIMENSIONES)},
+           COUNT(*) AS registros,
+           COALESCE(SUM(nro_transacciones), 0) AS transacciones,
+           COALESCE(SUM(colocacion_sol), 0) AS importe,
+           COALESCE(SUM(financiamiento_sol), 0) AS financiamiento
+    FROM {{detalle}} AS d
+    {{filtro}}
+    GROUP BY 1, {', '.join(str(i) for i in range(2, len(DIMENSIONES) + 2))}
+"""
+
+
+def crear_tabla_resumen(cursor, tabla=TABLA_RESUMEN):
+    """Crea la tabla resumen (y su índice por día) y la de control si no existen."""
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {_tabla_sql(TABLA_CONTROL)} (
+            tabla VARCHAR(100) PRIMARY KEY,
+            completo_en TIMESTAMP NOT NULL DEFAULT now()
+        )
+    """)
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {_tabla_sql(tabla)} (
+            dia DATE,
+            canal VARCHAR(100),
+            sede VARCHAR(100),
+            proveedor VARCHAR(255),
+            responsable_de_venta VARCHAR(255),
+            estado_entrega VARCHAR(100),
+            registros INT,
+            transacciones BIGINT,
+            importe NUMERIC(18, 2),
+            financiamiento NUMERIC(18, 2),
+            actualizado TIMESTAMP DEFAULT now()
+        )
+    """)
+    nombre = str(tabla).split(".")[-1]
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS {quote_ident('ix_' + nombre + '_dia')} ON {_tabla_sql(tabla)} (dia)")
+
+
+def _existe(cursor, tabla):
+    cursor.execute("SELECT to_regclass(%s)", (_tabla_sql(tabla),))
+    return cursor.fetchone()[0] is not None
+
+
+def _marcado_completo(cursor, tabla):
+    if not _existe(cursor, TABLA_CONTROL):
+        return False
+    cursor.execute(f"SELECT 1 FROM {_tabla_sql(TABLA_CONTROL)} WHERE tabla = %s", (str(tabla),))
+    return cursor.fetchone() is not None
+
+
+def invalidar_resumen(cursor, tabla=TABLA_RESUMEN):
+    """
+    Quita la marca de resumen completo (carga que no refresca el resumen). No hace commit.
+
+    Los reportes vuelven al detalle y el próximo `refrescar_resumen` recalcula todo.
+    """
+    if _existe(cursor, TABLA_CONTROL):
+        cursor.execute(f"DELETE FROM {_tabla_sql(TABLA_CONTROL)} WHERE tabla = %s", (str(tabla),))
+
+
+def _dias(valores):
+    """(fechas, incluye_sin_entrega) a partir de fechas/timestamps (None = sin entrega)."""
+    fechas, sin_entrega = set(), False
+    for valor in valores:
+        if valor is None or pd.isna(valor):
+            sin_entrega = True
+        elif isinstance(valor, datetime):
+            fechas.add(valor.date())
+        elif isinstance(valor, date):
+            fechas.add(valor)
+        else:
+            fechas.add(pd.Timestamp(valor).date())
+    return sorted(fechas), sin_entrega
+
+
+def refrescar_resumen(cursor, dias=None, tabla=TABLA_RESUMEN, detalle=TABLA_DETALLE, log=print):
+    """
+    Recalcula el resumen desde el detalle. No hace commit.
+
+    Args:
+        cursor: cursor de la transacción de carga.
+        dias: fechas (o timestamps) de entrega afectadas; None recalcula todo.
+            Un None/NaT dentro de `dias` refresca los pedidos sin f_entrega.
+            Si el resumen no está marcado como completo (recién creado o
+            invalidado) se recalcula todo igualmente.
+        tabla: tabla resumen.
+        detalle: tabla de detalle (bd_colocaciones).
+        log: función de reporte. None = silencio.
+
+    Returns:
+        Filas escritas en el resumen.
+    """
+    resumen, origen = _tabla_sql(tabla), _tabla_sql(detalle)
+    columnas = ", ".join(["dia"] + DIMENSIONES + MEDIDAS)
+
+    if dias is not None and not _marcado_completo(cursor, tabla):
+        if log:
+            log(f"⚠️  Resumen {tabla} sin marca de completo: se recalcula todo")
+        dias = None
+
+    if dias is None:
+        cursor.execute(f"DELETE FROM {resumen}")
+        cursor.execute(f"INSERT INTO {resumen} ({columnas}) " + _SELECT_AGREGADO.format(detalle=origen, filtro=""))
+        filas = cursor.rowcount
+        cursor.execute(
+            f"INSERT INTO {_tabla_sql(TABLA_CONTROL)} (tabla, completo_en) VALUES (%s, now()) "
+            f"ON CONFLICT (tabla) DO UPDATE SET completo_en = EXCLUDED.completo_en",
+            (str(tabla),),
+        )
+        if log:
+            log(f"📊 Resumen {tabla} recalculado: {filas:,} filas")
+        return filas
+
+    fechas, sin_entrega = _dias(dias)
+    filas = 0
+    if fechas:
+        cursor.execute(f"DELETE FROM {resumen} WHERE dia = ANY(%s::date[])", (fechas,))
+        # Rango por día para aprovechar el índice de f_entrega del detalle
+        filtro = ("JOIN unnest(%s::date[]) AS x(dia) "
+                  "ON d.f_entrega >= x.dia AND d.f_entrega < x.dia + 1")
+        cursor.execute(f"INSERT INTO {resumen} ({columnas}) "
+                       + _SELECT_AGREGADO.format(detalle=origen, filtro=filtro), (fechas,))
+        filas += cursor.rowcount
+    if sin_entrega:
+        cursor.execute(f"DELETE FROM {resumen} WHERE dia IS NULL")
+        cursor.execute(f"INSERT INTO {resumen} ({columnas}) "
+                       + _SELECT_AGREGADO.format(detalle=origen, filtro="WHERE d.f_entrega IS NULL"))
+        filas += cursor.rowcount
+
+    if log:
+        log(f"📊 Resumen {tabla}: {len(fechas)} días refrescados"
+            f"{' + pedidos sin entrega' if sin_entrega else ''} ({filas:,} filas)")
+    return filas
+
+
+def resumen_completo(conn, tabla=TABLA_RESUMEN):
+    """True si la tabla resumen existe y su último refresco completo sigue vigente."""
+    with conn.cursor() as cursor:
+        return _existe(cursor, tabla) and _marcado_completo(cursor, tabla)
+
+
+def consultar_resumen(conn, desde=None, hasta=None, por=("canal",), incluir_sin_entrega=False,
+                      tabla=TABLA_RESUMEN, **filtros):
+    """
+    Totales del resumen agrupados por `por`.
+
+    Args:
+        conn: conexión psycopg2.
+        desde, hasta: rango de días de entrega (inclusive); None = sin límite.
+        por: columnas de agrupación ("dia" y/o las de DIMENSIONES); vacío = total.
+        incluir_sin_entrega: suma también los pedidos sin f_entrega.
+        tabla: tabla resumen.
+        **filtros: igualdad por dimensión, p. ej. proveedor="SALESLAND".
+
+    Returns:
+        DataFrame con las columnas de `por` más las de MEDIDAS (importes como float).
+    """
+    por = list(por)
+    validas = ["dia"] + DIMENSIONES
+    desconocidas = [c for c in por + list(filtros) if c not in validas]
+    if desconocidas:
+        raise ValueError(f"Columnas no disponibles en el resumen: {desconocidas}")
+
+    rango, params = [], []
+    if desde is not None:
+        rango.append("dia >= %s")
+        params.append(pd.Timestamp(desde).date())
+    if hasta is not None:
+        rango.append("dia <= %s")
+        params.append(pd.Timestamp(hasta).date())
+    condiciones = []
+    if rango:
+        ventana = " AND ".join(rango)
+        condiciones.append(f"(({ventana}) OR dia IS NULL)" if incluir_sin_entrega else ventana)
+    elif not incluir_sin_entrega:
+        condiciones.append("dia IS NOT NULL")
+    for columna, valor in filtros.items():
+        condiciones.append(f"{quote_ident(columna)} = %s")
+        params.append(valor)
+
+    where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+    grupo = ", ".join(quote_ident(c) for c in por)
+    sql = (f"SELECT {grupo + ', ' if grupo else ''}"
+           f"SUM(registros) AS registros, SUM(transacciones) AS transacciones, "
+           f"SUM(importe) AS importe, SUM(financiamiento) AS financiamiento "
+           f"FROM {_tabla_sql(tabla)} {where}"
+           f"{' GROUP BY ' + grupo + ' ORDER BY ' + grupo if grupo else ''}")
+
+    with conn.cursor() as cursor:
+        cursor.execute(sql, params)
+        df = pd.DataFrame(cursor.fetchall(), columns=por + MEDIDAS)
+    df[MEDIDAS] = df[MEDIDAS].astype(float)
+    return df
@@ -0,0 +1,262 @@
+# fnb_comun/tabla_imagen.py
+"""
+Tablas como imagen PNG (las que van en los correos y por WhatsApp).
+
+Los reportes armaban cada tabla con `plt.subplots` + `ax.table`, coloreaban
+celda por celda, guardaban a 300 dpi y luego reabrían el PNG para recortar los
+bordes y reducirlo con LANCZOS al ancho del correo. Aquí la tabla se dibuja
+directamente con PIL:
+
+- las fuentes (y el ancho de cada texto) se cargan una vez por proceso;
+- el ancho de cada columna se mide una sola vez, a partir de su texto más largo;
+- si se pide un ancho final (`ancho=927` para el correo), se escala la fuente
+  y se dibuja ya a ese tamaño, sin remuestrear;
+- los colores condicionales llegan como arreglos (uno por fila o por celda),
+  armados de forma vectorizada con `colores_por_condicion`.
+
+    from fnb_comun.tabla_imagen import ESTILO_NEGRO, colores_por_condicion, guardar_tabla
+
+    total = df["CANAL"].eq("TOTAL").to_numpy()
+    guardar_tabla(df, ruta, estilo=ESTILO_NEGRO, ancho=927,
+                  fondo=colores_por_condicion([(total, ESTILO_NEGRO.fondo_total)]),
+                  negrita=total)
+
+`fondo`, `color_texto` y `negrita` aceptan None, un valor por fila (n) o uno
+por celda (n × columnas); None en una posición deja el valor del estilo.
+"""
+
+import importlib.util
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+
+@dataclass(frozen=True)
+class EstiloTabla:
+    """Plantilla de estilo de una tabla (tamaños en puntos)."""
+
+    familia: str = "DejaVu Sans"
+    tamaño: float = 8
+    fondo_encabezado: str = "#000000"
+    texto_encabezado: str = "#FFFFFF"
+    negrita_encabezado: bool = True
+    fondo: str = "#FFFFFF"
+    texto: str = "#000000"
+    # Filas de total / subtotal (el reporte decide cuáles son)
+    fondo_total: str = "#D9D9D9"
+    borde: str = "#000000"
+    grosor_borde: float = 0.75
+    # Relleno de cada celda: horizontal y vertical (en múltiplos del tamaño de letra)
+    relleno_x: float = 0.6
+    relleno_y: float = 0.45
+    dpi: int = 96
+
+
+# Encabezado negro y subtotales grises (correos de PQRS y colocaciones)
+ESTILO_NEGRO = EstiloTabla()
+
+# Como la tabla por defecto de matplotlib: todo blanco, encabezado sin negrita
+ESTILO_SIMPLE = EstiloTabla(fondo_encabezado="#FFFFFF", texto_encabezado="#000000", negrita_encabezado=False)
+
+# Encabezado azul y total gris (imágenes de avance por WhatsApp)
+ESTILO_AZUL = EstiloTabla(fondo_encabezado="#3498db", fondo_total="#bdc3c7", borde="#000000", dpi=300)
+
+# Formato condicional de variaciones / alcances (fondo, texto)
+NEGATIVO = ("#ffcccc", "#cc0000")
+POSITIVO = ("#ccffcc", "#006600")
+
+
+@lru_cache(maxsize=None)
+def _ruta_fuente(familia, negrita):
+    """Archivo .ttf de la familia (vía matplotlib si está instalado); None = fuente de PIL."""
+    if importlib.util.find_spec("matplotlib") is None:
+        return None
+    from matplotlib import font_manager
+    propiedades = font_manager.FontProperties(family=familia, weight="bold" if negrita else "normal")
+    return font_manager.findfont(propiedades, fallback_to_default=True)
+
+
+@lru_cache(maxsize=None)
+def fuente(familia, tamaño_px, negrita=False):
+    """ImageFont cacheada por (familia, tamaño en píxeles, negrita)."""
+    ruta = _ruta_fuente(familia, negrita)
+    if ruta is None:
+        return ImageFont.load_default(tamaño_px)
+    return ImageFont.truetype(ruta, tamaño_px)
+
+
+@lru_cache(maxsize=65536)
+def _ancho_texto(familia, tamaño_px, negrita, texto):
+    return max((fuente(familia, tamaño_px, negrita).getlength(linea) for linea in texto.split("\n")), default=0)
+
+
+@lru_cache(maxsize=None)
+def _alto_linea(familia, tamaño_px, negrita):
+    ascenso, descenso = fuente(familia, tamaño_px, negrita).getmetrics()
+    return ascenso + descenso
+
+
+def colores_por_condicion(reglas, defecto=None):
+    """
+    Arreglo de colores a partir de máscaras booleanas (gana la primera regla
+    que se cumple; `defecto` donde no se cumple ninguna).
+
+        fondo = colores_por_condicion([(variacion < 0, "#ffcccc"), (variacion > 0, "#ccffcc")])
+    """
+    reglas = list(reglas)
+    mascaras = [np.asarray(mascara, dtype=bool) for mascara, _ in reglas]
+    forma = np.broadcast_shapes(*(m.shape for m in mascaras)) if mascaras else ()
+    colores = np.full(forma, defecto, dtype=object)
+    for mascara, (_, color) in zip(reversed(mascaras), reversed(reglas)):
+        colores[np.broadcast_to(mascara, forma)] = color
+    return colores
+
+
+# True donde el valor es None (elemento a elemento, en arreglos de objetos)
+_es_none = np.frompyfunc(lambda valor: valor is None, 1, 1)
+
+
+def _por_celda(valor, filas, columnas, defecto):
+    """None / valor por fila / valor por celda → matriz filas × columnas (None → defecto)."""
+    if valor is None:
+        return np.full((filas, columnas), defecto, dtype=object)
+    matriz = np.asarray(valor, dtype=object)
+    if matriz.ndim == 1:
+        matriz = matriz.reshape(-1, 1)
+    matriz = np.array(np.broadcast_to(matriz, (filas, columnas)), dtype=object)
+    matriz[_es_none(matriz).astype(bool)] = defecto
+    return matriz
+
+
+def combinar_columna(base, col, valores, columnas):
+    """
+    Matriz por celda igual a `base` (None, por fila o por celda) salvo en la
+    columna `col`, que toma `valores` donde no son None. Sirve para juntar el
+    fondo de las filas de total con el formato condicional de una columna.
+    """
+    valores = np.asarray(valores, dtype=object)
+    matriz = _por_celda(base, len(valores), columnas, None)
+    usar = ~_es_none(valores).astype(bool)
+    matriz[usar, col] = valores[usar]
+    return matriz
+
+
+class _Medidas:
+    """Anchos de columna y altos de fila de una tabla a un tamaño de letra dado."""
+
+    def __init__(self, estilo, tamaño_px, textos, encabezados, negritas):
+        self.tamaño_px = tamaño_px
+        familia = estilo.familia
+        self.relleno_x = max(1, round(tamaño_px * estilo.relleno_x))
+        self.relleno_y = max(1, round(tamaño_px * estilo.relleno_y))
+        self.linea = _alto_linea(familia, tamaño_px, False)
+        self.linea_negrita = _alto_linea(familia, tamaño_px, True)
+
+        negrita_encabezado = estilo.negrita_encabezado
+        anchos = [_ancho_texto(familia, tamaño_px, negrita_encabezado, texto) for texto in encabezados]
+        for fila, negrita_fila in zip(textos, negritas):
+            for j, (texto, negrita) in enumerate(zip(fila, negrita_fila)):
+                if texto:
+                    anchos[j] = max(anchos[j], _ancho_texto(familia, tamaño_px, bool(negrita), texto))
+        self.anchos = [int(np.ceil(a)) + 2 * self.relleno_x for a in anchos]
+
+        lineas_encabezado = max((t.count("\n") + 1 for t in encabezados), default=1)
+        self.alto_encabezado = lineas_encabezado * self.linea_negrita + 2 * self.relleno_y
+        self.altos = [max((t.count("\n") + 1 for t in fila), default=1) * self.linea_negrita + 2 * self.relleno_y
+                      for fila in textos]
+
+    @property
+    def ancho_total(self):
+        return sum(self.anchos)
+
+
+def renderizar_tabla(datos, encabezados=None, estilo=ESTILO_NEGRO, ancho=None, fondo=None, color_texto=None,
+                     negrita=None, alineacion=None, ancho_min=None):
+    """
+    Dibuja la tabla y la devuelve como imagen PIL (RGB).
+
+    Args:
+        datos: DataFrame o filas (listas) con los textos ya formateados.
+        encabezados: títulos de columna (por defecto, las columnas del DataFrame).
+            Un '\\n' parte el título en dos líneas.
+        estilo: EstiloTabla (fuente, colores, dpi).
+        ancho: ancho final en píxeles (None = el natural del estilo).
+        fondo, color_texto, negrita: por fila o por celda (ver el docstring del módulo).
+        alineacion: 'center' / 'left' / 'right' por columna (por defecto todo centrado).
+        ancho_min: ancho mínimo por columna, en múltiplos del tamaño de letra.
+    """
+    if encabezados is None:
+        encabezados = list(datos.columns)
+    filas = datos.values.tolist() if hasattr(datos, "values") else list(datos)
+    encabezados = ["" if e is None else str(e) for e in encabezados]
+    textos = [["" if v is None else str(v) for v in fila] for fila in filas]
+    n_filas, n_cols = len(textos), len(encabezados)
+
+    fondos = _por_celda(fondo, n_filas, n_cols, estilo.fondo)
+    colores = _por_celda(color_texto, n_filas, n_cols, estilo.texto)
+    negritas = _por_celda(negrita, n_filas, n_cols, False).astype(bool)
+    alineacion = list(alineacion or ["center"] * n_cols)
+
+    tamaño_px = max(1, round(estilo.tamaño * estilo.dpi / 72))
+    medidas = _Medidas(estilo, tamaño_px, textos, encabezados, negritas)
+    if ancho:
+        # Una segunda medición al tamaño de letra que llega al ancho pedido
+        tamaño_px = max(1, int(tamaño_px * ancho / medidas.ancho_total))
+        medidas = _Medidas(estilo, tamaño_px, textos, encabezados, negritas)
+    if ancho_min:
+        medidas.anchos = [max(a, int(m * tamaño_px)) if m else a for a, m in zip(medidas.anchos, ancho_min)]
+    grosor = max(1, round(estilo.grosor_borde * tamaño_px / estilo.tamaño))
+    if ancho:
+        # El redondeo de la fuente deja unos píxeles: se reparten entre las columnas
+        resto = ancho - grosor - medidas.ancho_total
+        total = medidas.ancho_total
+        acumulado = 0
+        for j, a in enumerate(medidas.anchos):
+            extra = round(resto * (acumulado + a) / total) - round(resto * acumulado / total)
+            acumulado += a
+            medidas.anchos[j] = a + extra
+
+    x_cols = np.concatenate([[0], np.cumsum(medidas.anchos)]).astype(int)
+    y_filas = np.concatenate([[0], np.cumsum([medidas.alto_encabezado] + medidas.altos)]).astype(int)
+    img = Image.new("RGB", (int(x_cols[-1]) + grosor, int(y_filas[-1]) + grosor), estilo.fondo)
+    draw = ImageDraw.Draw(img)
+
+    def celda(i, j, texto, relleno, color, bold, alinear, alto_linea):
+        x0, x1 = int(x_cols[j]), int(x_cols[j + 1])
+        y0, y1 = int(y_filas[i]), int(y_filas[i + 1])
+        draw.rectangle((x0, y0, x1, y1), fill=relleno, outline=estilo.borde, width=grosor)
+        if not texto:
+            return
+        letra = fuente(estilo.familia, tamaño_px, bold)
+        lineas = texto.split("\n")
+        y = (y0 + y1) / 2 - alto_linea * (len(lineas) - 1) / 2
+        if alinear == "left":
+            x, anchor = x0 + medidas.relleno_x, "lm"
+        elif alinear == "right":
+            x, anchor = x1 - medidas.relleno_x, "rm"
+        else:
+            x, anchor = (x0 + x1) / 2, "mm"
+        for linea in lineas:
+            draw.text((x, y), linea, font=letra, fill=color, anchor=anchor)
+            y += alto_linea
+
+    for j, texto in enumerate(encabezados):
+        celda(0, j, texto, estilo.fondo_encabezado, estilo.texto_encabezado, estilo.negrita_encabezado, "center",
+              medidas.linea_negrita)
+    for i, fila in enumerate(textos, start=1):
+        for j, texto in enumerate(fila):
+            bold = negritas[i - 1, j]
+            celda(i, j, texto, fondos[i - 1, j], colores[i - 1, j], bold, alineacion[j],
+                  medidas.linea_negrita if bold else medidas.linea)
+    # El dpi viaja con la imagen (lo usa fnb_comun.imagenes al guardarla)
+    img.info["dpi"] = (estilo.dpi, estilo.dpi)
+    return img
+
+
+def guardar_tabla(datos, ruta, encabezados=None, estilo=ESTILO_NEGRO, **opciones):
+    """`renderizar_tabla` y guarda el PNG en `ruta` (con el dpi del estilo). Devuelve la ruta."""
+    img = renderizar_tabla(datos, encabezados, estilo, **opciones)
+    img.save(ruta, "PNG", dpi=(estilo.dpi, estilo.dpi))
+    return ruta
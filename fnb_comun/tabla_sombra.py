@@ -0,0 +1,225 @@
+# fnb_comun/tabla_sombra.py
+"""
+Recarga completa de una tabla sin que los reportes lean datos a medias.
+
+En vez de TRUNCATE + inserts sobre la tabla viva, los datos se cargan en una
+tabla sombra (`<tabla>__carga`) sin índices; después se crean los índices de la
+tabla original sobre la sombra (más rápido que mantenerlos fila a fila), se
+ejecuta ANALYZE y se intercambian los nombres. Mientras tanto la tabla viva
+sigue intacta; el intercambio solo la bloquea un instante al final.
+
+    with conn.cursor() as cursor:
+        sombra = crear_tabla_sombra(cursor, "bd_colocaciones")
+    copiar_dataframe_postgres(conn, df, sombra)
+    with conn.cursor() as cursor:
+        intercambiar_tabla(cursor, "bd_colocaciones", sombra)
+    conn.commit()
+
+o en un paso: `cargar_con_intercambio(conn, df, "bd_colocaciones")`.
+
+Las funciones NO hacen commit: todo debe ir en una sola transacción para que
+el intercambio sea atómico. Las vistas que dependan de la tabla impiden borrar
+la versión anterior (la transacción se revierte y la tabla queda como estaba).
+
+La tabla nueva es otro objeto: la sombra copia de la viva los defaults, las
+restricciones CHECK y los comentarios de columnas (LIKE ... INCLUDING), y antes
+del intercambio recibe los GRANT y el comentario de la tabla. Su dueño pasa a
+ser el usuario que carga, y las llaves foráneas de otras tablas que apunten a
+la viva impiden el intercambio (igual que las vistas).
+"""
+
+import hashlib
+import re
+
+from .carga_copy import _tabla_sql, copiar_dataframe_postgres, crear_tabla_desde_tipos, quote_ident, tipos_para_dataframe
+
+# Sufijos de la tabla en carga y de la versión reemplazada
+SUFIJO_SOMBRA = "__carga"
+SUFIJO_ANTERIOR = "__anterior"
+
+_DEF_INDICE = re.compile(r'^CREATE (UNIQUE )?INDEX (\S+) ON (ONLY )?(\S+) (USING .*)$', re.IGNORECASE)
+
+
+def _partes(tabla):
+    """('esquema.', 'tabla') o ('', 'tabla'), sin comillas."""
+    if "." in str(tabla):
+        esquema, nombre = str(tabla).rsplit(".", 1)
+        return f"{esquema}.", nombre
+    return "", str(tabla)
+
+
+def _nombre_temporal(nombre_indice):
+    """Nombre con SUFIJO_SOMBRA que entra en los 63 bytes de PostgreSQL y no choca con el original."""
+    temporal = nombre_indice + SUFIJO_SOMBRA
+    if len(temporal.encode("utf-8")) <= 63:
+        return temporal
+    # Recortado + hash del nombre completo: dos índices largos con el mismo prefijo no chocan
+    resumen = hashlib.md5(nombre_indice.encode("utf-8")).hexdigest()[:8]
+    base = nombre_indice.encode("utf-8")[:63 - len(SUFIJO_SOMBRA) - 9].decode("utf-8", "ignore")
+    return f"{base}_{resumen}{SUFIJO_SOMBRA}"
+
+
+def _existe(cursor, tabla):
+    cursor.execute("SELECT to_regclass(%s)", (_tabla_sql(tabla),))
+    return cursor.fetchone()[0] is not None
+
+
+def crear_tabla_sombra(cursor, tabla, columnas=None, tipos=None, recrear=False):
+    """
+    Crea (vacía y sin índices) la tabla sombra de `tabla` y retorna su nombre.
+
+    Si la tabla viva existe y no se pide `recrear`, se copia su estructura
+    (LIKE ... INCLUDING DEFAULTS, CONSTRAINTS y COMMENTS; sin índices); si no,
+    se crea con `columnas`/`tipos` como `crear_tabla_desde_tipos`. Sin columnas
+    solo se limpia una sombra previa y la crea el cargador (p. ej.
+    `cargar_txt_por_lotes` con el primer lote).
+    """
+    esquema, nombre = _partes(tabla)
+    sombra = f"{esquema}{nombre}{SUFIJO_SOMBRA}"
+    cursor.execute(f"DROP TABLE IF EXISTS {_tabla_sql(sombra)}")
+
+    if not recrear and _existe(cursor, tabla):
+        cursor.execute(
+            f"CREATE TABLE {_tabla_sql(sombra)} (LIKE {_tabla_sql(tabla)} "
+            f"INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING COMMENTS)"
+        )
+    elif columnas is not None:
+        crear_tabla_desde_tipos(cursor, sombra, columnas, tipos or {})
+    return sombra
+
+
+def _indices_de(cursor, tabla):
+    """[(nombre, definición, tipo_constraint)] de los índices de `tabla` ('p', 'u' o None)."""
+    cursor.execute(
+        """
+        SELECT i.relname, pg_get_indexdef(i.oid), c.contype
+        FROM pg_index x
+        JOIN pg_class i ON i.oid = x.indexrelid
+        LEFT JOIN pg_constraint c ON c.conindid = x.indexrelid AND c.conrelid = x.indrelid
+        WHERE x.indrelid = to_regclass(%s)
+        ORDER BY i.relname
+        """,
+        (_tabla_sql(tabla),),
+    )
+    return cursor.fetchall()
+
+
+def _copiar_permisos(cursor, origen, destino):
+    """Repite sobre `destino` los GRANT y el comentario de tabla de `origen`."""
+    cursor.execute(
+        """
+        SELECT CASE WHEN a.grantee = 0 THEN 'PUBLIC' ELSE quote_ident(r.rolname) END,
+               a.privilege_type, a.is_grantable
+        FROM pg_class c
+        CROSS JOIN LATERAL aclexplode(c.relacl) AS a
+        LEFT JOIN pg_roles r ON r.oid = a.grantee
+        WHERE c.oid = to_regclass(%s)
+        """,
+        (_tabla_sql(origen),),
+    )
+    for rol, privilegio, con_opcion in cursor.fetchall():
+        opcion = " WITH GRANT OPTION" if con_opcion else ""
+        cursor.execute(f"GRANT {privilegio} ON {_tabla_sql(destino)} TO {rol}{opcion}")
+
+    cursor.execute("SELECT obj_description(to_regclass(%s), 'pg_class')", (_tabla_sql(origen),))
+    comentario = cursor.fetchone()[0]
+    if comentario is not None:
+        cursor.execute(f"COMMENT ON TABLE {_tabla_sql(destino)} IS %s", (comentario,))
+
+
+def intercambiar_tabla(cursor, tabla, sombra=None, indices=(), replicar_indices=True, log=print):
+    """
+    Indexa y analiza la sombra ya cargada y la pone en lugar de `tabla`.
+
+    Args:
+        cursor: cursor de la transacción de carga.
+        tabla: tabla viva (puede no existir aún).
+        sombra: tabla sombra cargada (por defecto `<tabla>__carga`).
+        indices: columnas a indexar además de los índices existentes,
+            p. ej. [("pedido_venta",), ("f_entrega", "canal")].
+        replicar_indices: recrea sobre la sombra los índices de la tabla viva
+            (False cuando la estructura cambió, p. ej. con `recrear=True`).
+        log: función de reporte. None = silencio.
+    """
+    esquema, nombre = _partes(tabla)
+    viva = _tabla_sql(tabla)
+    sombra = sombra or f"{esquema}{nombre}{SUFIJO_SOMBRA}"
+    if not _existe(cursor, sombra):
+        # Nada cargado (p. ej. archivo vacío): la tabla viva no se toca
+        raise ValueError(f"La tabla sombra {sombra} no existe; no se reemplaza {tabla}")
+    sombra_sin_comillas, sombra = sombra, _tabla_sql(sombra)
+    existe = _existe(cursor, tabla)
+
+    # 1. Índices: los de la tabla viva más los solicitados, con nombre temporal
+    renombrar = []
+    existentes = _indices_de(cursor, tabla) if existe and replicar_indices else []
+    for nombre_indice, definicion, contype in existentes:
+        m = _DEF_INDICE.match(definicion)
+        if not m:
+            if log:
+                log(f"⚠️  Índice {nombre_indice} no replicado (definición no reconocida)")
+            continue
+        temporal = _nombre_temporal(nombre_indice)
+        cursor.execute(f"CREATE {m.group(1) or ''}INDEX {quote_ident(temporal)} ON {sombra} {m.group(5)}")
+        if contype in ("p", "u"):
+            restriccion = "PRIMARY KEY" if contype == "p" else "UNIQUE"
+            cursor.execute(
+                f"ALTER TABLE {sombra} ADD CONSTRAINT {quote_ident(temporal)} {restriccion} USING INDEX {quote_ident(temporal)}"
+            )
+        renombrar.append((temporal, nombre_indice))
+
+    nombres_existentes = {n for n, _, _ in existentes}
+    for cols in indices:
+        cols = (cols,) if isinstance(cols, str) else tuple(cols)
+        nombre_indice = f"ix_{nombre}_{'_'.join(cols)}"[:63 - len(SUFIJO_SOMBRA)]
+        if nombre_indice in nombres_existentes:
+            continue
+        temporal = nombre_indice + SUFIJO_SOMBRA
+        cursor.execute(f"CREATE INDEX {quote_ident(temporal)} ON {sombra} ({', '.join(quote_ident(c) for c in cols)})")
+        renombrar.append((temporal, nombre_indice))
+
+    if log and renombrar:
+        log(f"Índices creados sobre la tabla cargada: {len(renombrar)}")
+
+    # 2. Estadísticas para el planificador antes de exponer la tabla
+    cursor.execute(f"ANALYZE {sombra}")
+
+    # 3. Intercambio de nombres (bloqueo exclusivo solo durante esta parte)
+    if existe:
+        _copiar_permisos(cursor, tabla, sombra_sin_comillas)
+        anterior = nombre + SUFIJO_ANTERIOR
+        cursor.execute(f"LOCK TABLE {viva} IN ACCESS EXCLUSIVE MODE")
+        cursor.execute(f"DROP TABLE IF EXISTS {_tabla_sql(esquema + anterior)}")
+        cursor.execute(f"ALTER TABLE {viva} RENAME TO {quote_ident(anterior)}")
+        cursor.execute(f"ALTER TABLE {sombra} RENAME TO {quote_ident(nombre)}")
+        cursor.execute(f"DROP TABLE {_tabla_sql(esquema + anterior)}")
+    else:
+        cursor.execute(f"ALTER TABLE {sombra} RENAME TO {quote_ident(nombre)}")
+
+    for temporal, definitivo in renombrar:
+        cursor.execute(f"ALTER INDEX {_tabla_sql(esquema + temporal)} RENAME TO {quote_ident(definitivo)}")
+
+    if log:
+        log(f"🔁 Tabla {tabla} reemplazada por la versión recién cargada")
+
+
+def cargar_con_intercambio(conn, df, tabla, columnas=None, tipos=None, indices=(), recrear=False, log=print):
+    """
+    Recarga completa de `tabla` con `df` vía tabla sombra + intercambio atómico.
+
+    Con `recrear=True` la tabla nueva toma la estructura de `tipos` (equivale a
+    DROP + CREATE) en lugar de la de la tabla viva. Retorna las filas copiadas.
+    No hace commit.
+    """
+    columnas = list(columnas) if columnas is not None else list(df.columns)
+    with conn.cursor() as cursor:
+        sombra = crear_tabla_sombra(cursor, tabla, columnas, tipos_para_dataframe(df[columnas], tipos),
+                                    recrear=recrear)
+
+    if log:
+        log(f"Copiando {len(df):,} registros a la tabla sombra {sombra}...")
+    copiadas = copiar_dataframe_postgres(conn, df, sombra, columnas=columnas, tipos=tipos, log=log)
+
+    with conn.cursor() as cursor:
+        intercambiar_tabla(cursor, tabla, sombra, indices=indices, replicar_indices=not recrear, log=log)
+    return copiadas
@@ -6,6 +6,13 @@ from datetime import datetime
 import logging
 import tkinter as tk
 from tkinter import filedialog
+import sys
+from pathlib import Path
+
+# Librería compartida del repositorio (fnb_comun)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from fnb_comun.db import conectar, liberar
+from fnb_comun.excel import leer_excel
 
 # Configuración de logging
 logging.basicConfig(
@@ -212,15 +219,6 @@ def limpiar_datos(df):
     return df
 
 def cargar_excel_a_postgresql():
-    # Parámetros de conexión PostgreSQL
-    db_config = {
-        "host": "localhost",
-        "port": 5432,
-        "database": "bd_calidda_fnb",
-        "user": "postgres",
-        "password": "ibr2025"
-    }
-
     table_name = "bd_anulaciones"
 
     try:
@@ -237,7 +235,7 @@ def cargar_excel_a_postgresql():
         
         # Leer el archivo Excel
         logging.info("📖 Leyendo archivo Excel...")
-        df = pd.read_excel(excel_file)
+        df = leer_excel(excel_file)
         logging.info(f"✅ Archivo Excel leído correctamente. Filas: {len(df)}, Columnas: {len(df.columns)}")
         
         # Limpiar y preparar datos
@@ -245,7 +243,7 @@ def cargar_excel_a_postgresql():
         
         # Conectar a PostgreSQL
         logging.info("🔌 Conectando a PostgreSQL...")
-        conn = psycopg2.connect(**db_config)
+        conn = conectar("carga")
         cursor = conn.cursor()
         logging.info("✅ Conexión a PostgreSQL establecida")
         
@@ -307,7 +305,7 @@ def cargar_excel_a_postgresql():
         
         # Cerrar conexiones
         cursor.close()
-        conn.close()
+        liberar(conn)
         logging.info("🔒 Conexión cerrada")
         
         logging.info("=== PROCESO COMPLETADO EXITOSAMENTE ===")
@@ -329,7 +327,7 @@ def cargar_excel_a_postgresql():
         if 'cursor' in locals() and cursor:
             cursor.close()
         if 'conn' in locals() and conn:
-            conn.close()
+            liberar(conn)
         logging.info("🔒 Recursos liberados")
 
 if __name__ == "__main__":
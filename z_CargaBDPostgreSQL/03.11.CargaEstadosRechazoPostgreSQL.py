@@ -1,15 +1,15 @@
 import pandas as pd
-import psycopg2
 from psycopg2 import extras
+import sys
+from pathlib import Path
 
-# Configuración de conexión PostgreSQL
-db_config = {
-    "host": "localhost",
-    "port": 5432,
-    "database": "bd_calidda_fnb",
-    "user": "postgres",
-    "password": "ibr2025"
-}
+# Librería compartida del repositorio (fnb_comun)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from fnb_comun.db import conectar, liberar
+from fnb_comun.excel import leer_excel as leer_excel_rapido
+
+# Conexión PostgreSQL: configuración común (variables PG* o valores por defecto) y
+# conexiones reutilizadas con parámetros de sesión de carga (fnb_comun/db.py)
 
 # Ruta del archivo Excel
 excel_path = r"D:\FNB\Reportes\04 Reporte Clientes Potenciales\Estado Rechazo.xlsx"
@@ -51,7 +51,7 @@ def asegurar_indice_unico(conn):
 def crear_conexion():
     """Crea y retorna la conexión a PostgreSQL"""
     try:
-        conn = psycopg2.connect(**db_config)
+        conn = conectar("carga")
         print("✓ Conexión establecida exitosamente")
         return conn
     except Exception as e:
@@ -61,7 +61,7 @@ def crear_conexion():
 def leer_excel():
     """Lee el archivo Excel y retorna un DataFrame"""
     try:
-        df = pd.read_excel(excel_path, sheet_name=sheet_name)
+        df = leer_excel_rapido(excel_path, sheet_name=sheet_name)
         
         # Verificar que existan las columnas necesarias
         columnas_requeridas = ['Motivo', 'Motivo agrupado']
@@ -221,7 +221,7 @@ def main():
         print(f"→ La tabla '{table_name}' no existe. Creando...")
         if not crear_tabla(conn):
             print("\n✗ Proceso finalizado con errores")
-            conn.close()
+            liberar(conn)
             return
     else:
         print(f"✓ La tabla '{table_name}' ya existe")
@@ -229,7 +229,7 @@ def main():
     # Asegurar índice único requerido por ON CONFLICT
     if not asegurar_indice_unico(conn):
         print("\n✗ Proceso finalizado con errores (índice único)")
-        conn.close()
+        liberar(conn)
         return
     
     # Paso 4: Carga incremental
@@ -237,7 +237,7 @@ def main():
     registros_insertados = cargar_datos_incrementales(conn, df)
     
     # Cerrar conexión
-    conn.close()
+    liberar(conn)
     
     # Resumen final
     print("\n" + "="*60)
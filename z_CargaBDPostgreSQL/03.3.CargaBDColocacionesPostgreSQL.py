@@ -1,9 +1,49 @@
 import pandas as pd
-import psycopg2
 from psycopg2 import extras
 import numpy as np
 from datetime import datetime
 import logging
+import sys
+from pathlib import Path
+
+# Librería compartida del repositorio (fnb_comun)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from fnb_comun.carga_copy import copiar_dataframe_postgres, normalizar_metodo_carga
+from fnb_comun.carga_delta import ClavesRepetidasError, aplicar_delta_postgres
+from fnb_comun.db import conectar, liberar
+from fnb_comun.excel import leer_excel
+from fnb_comun.resumen_colocaciones import crear_tabla_resumen, invalidar_resumen, refrescar_resumen
+from fnb_comun.tabla_sombra import cargar_con_intercambio
+
+# Método de carga: "copy" (COPY FROM STDIN, recomendado) o "insert" (execute_values)
+METODO_CARGA = "copy"
+
+# Modo de actualización de la tabla:
+#   "delta":    copia el Excel a una tabla temporal y aplica solo nuevas/modificadas
+#               (y elimina las que ya no vienen), en una transacción; la tabla sigue
+#               disponible para los reportes durante la carga. Si el Excel repite
+#               claves (CLAVES_DELTA) se hace la recarga completa de "intercambio"
+#   "intercambio": recarga todo el Excel en una tabla sombra (bd_colocaciones__carga),
+#               crea sus índices, ANALYZE y la intercambia con la viva en una
+#               transacción; los reportes nunca ven la tabla a medio cargar
+#   "completa": TRUNCATE opcional + recarga de todo el Excel
+MODO_CARGA_TABLA = "delta"
+
+# Columnas que identifican una colocación (modo delta)
+CLAVES_DELTA = ["pedido_venta", "nro_contrato"]
+
+# Modo delta: eliminar de la tabla las claves que ya no están en el Excel
+DELTA_ELIMINAR_AUSENTES = True
+
+# Índices de la tabla: la clave del modo delta (cruce con la tabla temporal) y los de
+# los reportes (02.7 filtra por f_entrega y por canal/proveedor/responsable)
+INDICES_REPORTES = [tuple(CLAVES_DELTA), ("f_entrega",), ("canal",), ("proveedor",), ("responsable_de_venta",)]
+
+# Mantener resumen_colocaciones_diario (día × canal × sede × proveedor × responsable × estado)
+# en la misma transacción de la carga: solo los días tocados en modo delta, todo en recargas
+# (o si el resumen no estaba completo). Con False el resumen se marca como desactualizado
+# y los reportes leen el detalle hasta el próximo refresco completo
+ACTUALIZAR_RESUMEN = True
 
 # Configuración de logging
 logging.basicConfig(
@@ -81,16 +121,14 @@ def crear_tabla_bd_colocaciones(cursor):
     cursor.execute(create_table_sql)
     logging.info("✅ Tabla bd_colocaciones verificada/creada")
 
-def cargar_excel_a_postgresql():
-    # Parámetros de conexión PostgreSQL
-    db_config = {
-        "host": "localhost",
-        "port": 5432,
-        "database": "bd_calidda_fnb",
-        "user": "postgres",
-        "password": "ibr2025"
-    }
+def crear_indices_bd_colocaciones(cursor):
+    """Crea los índices de INDICES_REPORTES si no existen (mismos nombres que usa el intercambio)"""
+    for columnas in INDICES_REPORTES:
+        nombre = f"ix_bd_colocaciones_{'_'.join(columnas)}"
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {nombre} ON bd_colocaciones ({', '.join(columnas)})")
+    logging.info(f"✅ Índices de reportes verificados: {len(INDICES_REPORTES)}")
 
+def cargar_excel_a_postgresql():
     excel_file = r"D:\FNB\Reportes\01. Reporte Diario\Reporte Diario FNB.xlsx"
     sheet_name = "Acumulado"
     table_name = "bd_colocaciones"  # PostgreSQL usa minúsculas por convención
@@ -148,7 +186,7 @@ def cargar_excel_a_postgresql():
 
         # Leer Excel
         logging.info("Leyendo archivo Excel...")
-        df = pd.read_excel(excel_file, sheet_name=sheet_name)
+        df = leer_excel(excel_file, sheet_name=sheet_name)
 
         # Renombrar columnas específicas
         df.rename(columns={'AÑO FE': 'AÑO_FE', 'B.ENERO': 'B_ENERO'}, inplace=True)
@@ -220,11 +258,67 @@ def cargar_excel_a_postgresql():
 
         # Conectar a PostgreSQL
         logging.info("Conectando a PostgreSQL...")
-        conn = psycopg2.connect(**db_config)
+        conn = conectar("carga")
         cursor = conn.cursor()
 
         # Crear tabla si no existe
         crear_tabla_bd_colocaciones(cursor)
+        crear_indices_bd_colocaciones(cursor)
+        if ACTUALIZAR_RESUMEN:
+            crear_tabla_resumen(cursor)
+        else:
+            invalidar_resumen(cursor)
+        conn.commit()
+
+        modo_carga = MODO_CARGA_TABLA
+        if modo_carga == "delta":
+            # Staging con COPY + hash por fila: solo se escriben los cambios
+            logging.info(f"Carga delta por {', '.join(CLAVES_DELTA)}...")
+            try:
+                resumen = aplicar_delta_postgres(conn, df, table_name, claves=CLAVES_DELTA, columnas=sql_columns,
+                                                 eliminar_ausentes=DELTA_ELIMINAR_AUSENTES,
+                                                 columna_cambios="f_entrega" if ACTUALIZAR_RESUMEN else None,
+                                                 log=logging.info)
+                if ACTUALIZAR_RESUMEN:
+                    refrescar_resumen(cursor, dias=resumen["cambios"], log=logging.info)
+                conn.commit()
+            except ClavesRepetidasError as e:
+                # Sin clave única el delta no es confiable: recarga completa
+                conn.rollback()
+                logging.warning(f"{e}; se hace la recarga completa por intercambio")
+                modo_carga = "intercambio"
+            except Exception:
+                conn.rollback()
+                cursor.close()
+                liberar(conn)
+                raise
+            if modo_carga == "delta":
+                cursor.close()
+                liberar(conn)
+                logging.info("=== PROCESO COMPLETADO ===")
+                return
+
+        if modo_carga == "intercambio":
+            # Tabla sombra + índices + ANALYZE + rename, todo en una transacción
+            logging.info("Recarga completa con intercambio de tabla...")
+            try:
+                copiadas = cargar_con_intercambio(conn, df, table_name, columnas=sql_columns,
+                                                  indices=INDICES_REPORTES, log=logging.info)
+                if ACTUALIZAR_RESUMEN:
+                    refrescar_resumen(cursor, log=logging.info)
+                conn.commit()
+                logging.info(f"Intercambio completado: {copiadas:,} filas")
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cursor.close()
+                liberar(conn)
+            logging.info("=== PROCESO COMPLETADO ===")
+            return
+
+        # Carga con commits por lote: el resumen queda desactualizado hasta el refresco final
+        invalidar_resumen(cursor)
         conn.commit()
 
         # Preguntar si truncar
@@ -234,25 +328,37 @@ def cargar_excel_a_postgresql():
             conn.commit()
             logging.info("Tabla truncada")
 
-        # Insertar en lotes usando execute_values (más rápido en PostgreSQL)
-        placeholders = ", ".join([f"%s" for _ in sql_columns])
-        insert_sql = f"INSERT INTO {table_name} ({', '.join(sql_columns)}) VALUES %s"
-
-        batch_size = 5000
         total = len(df)
-        logging.info(f"Insertando {total:,} filas en lotes de {batch_size}...")
-
-        for i in range(0, total, batch_size):
-            batch_df = df.iloc[i:i+batch_size].copy()
-            batch = [tuple(row) for row in batch_df.values]
-            
-            # execute_values es mucho más rápido que executemany en PostgreSQL
-            extras.execute_values(cursor, insert_sql, batch, page_size=batch_size)
+
+        if normalizar_metodo_carga(METODO_CARGA) == "copy":
+            # COPY FROM STDIN: una sola transacción, el CSV se arma en memoria por lotes
+            logging.info(f"Copiando {total:,} filas con COPY FROM STDIN...")
+            copiadas = copiar_dataframe_postgres(conn, df, table_name, columnas=sql_columns,
+                                                 log=logging.info)
+            conn.commit()
+            logging.info(f"COPY completado: {copiadas:,} filas")
+        else:
+            # Insertar en lotes usando execute_values (más rápido en PostgreSQL)
+            insert_sql = f"INSERT INTO {table_name} ({', '.join(sql_columns)}) VALUES %s"
+
+            batch_size = 5000
+            logging.info(f"Insertando {total:,} filas en lotes de {batch_size}...")
+
+            for i in range(0, total, batch_size):
+                batch_df = df.iloc[i:i+batch_size].copy()
+                batch = [tuple(row) for row in batch_df.values]
+
+                # execute_values es mucho más rápido que executemany en PostgreSQL
+                extras.execute_values(cursor, insert_sql, batch, page_size=batch_size)
+                conn.commit()
+                logging.info(f"Lote {i//batch_size+1}: {len(batch)} filas insertadas ({(i+len(batch))/total:.1%})")
+
+        if ACTUALIZAR_RESUMEN:
+            refrescar_resumen(cursor, log=logging.info)
             conn.commit()
-            logging.info(f"Lote {i//batch_size+1}: {len(batch)} filas insertadas ({(i+len(batch))/total:.1%})")
 
         cursor.close()
-        conn.close()
+        liberar(conn)
         logging.info("=== PROCESO COMPLETADO ===")
 
     except Exception as e:
@@ -1,9 +1,19 @@
 import pandas as pd
-import psycopg2
 from psycopg2 import extras
 import numpy as np
 from datetime import datetime
 import logging
+import sys
+from pathlib import Path
+
+# Librería compartida del repositorio (fnb_comun)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from fnb_comun.carga_copy import copiar_dataframe_postgres, normalizar_metodo_carga
+from fnb_comun.db import conectar, liberar
+from fnb_comun.excel import leer_excel
+
+# Método de carga: "copy" (COPY FROM STDIN, recomendado) o "insert" (execute_values)
+METODO_CARGA = "copy"
 
 # Configuración de logging
 logging.basicConfig(
@@ -46,15 +56,6 @@ def crear_tabla_bd_categorias(cursor):
     logging.info("✅ Tabla bd_categorias verificada/creada")
 
 def cargar_excel_a_postgresql():
-    # Parámetros de conexión PostgreSQL
-    db_config = {
-        "host": "localhost",
-        "port": 5432,
-        "database": "bd_calidda_fnb",
-        "user": "postgres",
-        "password": "ibr2025"
-    }
-
     excel_file = r"D:\FNB\Reportes\01. Reporte Diario\Reporte Diario FNB.xlsx"
     sheet_name = "AcumuladoCat"
     table_name = "bd_categorias"
@@ -86,7 +87,7 @@ def cargar_excel_a_postgresql():
 
         # Leer Excel
         logging.info("Leyendo archivo Excel...")
-        df = pd.read_excel(excel_file, sheet_name=sheet_name)
+        df = leer_excel(excel_file, sheet_name=sheet_name)
 
         # Verificar columnas
         excel_columns = list(column_mapping.keys())
@@ -138,7 +139,7 @@ def cargar_excel_a_postgresql():
 
         # Conectar a PostgreSQL
         logging.info("Conectando a PostgreSQL...")
-        conn = psycopg2.connect(**db_config)
+        conn = conectar("carga")
         cursor = conn.cursor()
 
         # Crear tabla si no existe
@@ -152,23 +153,32 @@ def cargar_excel_a_postgresql():
             conn.commit()
             logging.info("Tabla truncada")
 
-        # Insertar en lotes usando execute_values
-        insert_sql = f"INSERT INTO {table_name} ({', '.join(sql_columns)}) VALUES %s"
-
-        batch_size = 5000
         total = len(df)
-        logging.info(f"Insertando {total:,} filas en lotes de {batch_size}...")
 
-        for i in range(0, total, batch_size):
-            batch_df = df.iloc[i:i+batch_size].copy()
-            batch = [tuple(row) for row in batch_df.values]
-            
-            extras.execute_values(cursor, insert_sql, batch, page_size=batch_size)
+        if normalizar_metodo_carga(METODO_CARGA) == "copy":
+            # COPY FROM STDIN: una sola transacción, el CSV se arma en memoria por lotes
+            logging.info(f"Copiando {total:,} filas con COPY FROM STDIN...")
+            copiadas = copiar_dataframe_postgres(conn, df, table_name, columnas=sql_columns,
+                                                 log=logging.info)
             conn.commit()
-            logging.info(f"Lote {i//batch_size+1}: {len(batch)} filas insertadas ({(i+len(batch))/total:.1%})")
+            logging.info(f"COPY completado: {copiadas:,} filas")
+        else:
+            # Insertar en lotes usando execute_values
+            insert_sql = f"INSERT INTO {table_name} ({', '.join(sql_columns)}) VALUES %s"
+
+            batch_size = 5000
+            logging.info(f"Insertando {total:,} filas en lotes de {batch_size}...")
+
+            for i in range(0, total, batch_size):
+                batch_df = df.iloc[i:i+batch_size].copy()
+                batch = [tuple(row) for row in batch_df.values]
+
+                extras.execute_values(cursor, insert_sql, batch, page_size=batch_size)
+                conn.commit()
+                logging.info(f"Lote {i//batch_size+1}: {len(batch)} filas insertadas ({(i+len(batch))/total:.1%})")
 
         cursor.close()
-        conn.close()
+        liberar(conn)
         logging.info("=== PROCESO COMPLETADO ===")
 
     except Exception as e:
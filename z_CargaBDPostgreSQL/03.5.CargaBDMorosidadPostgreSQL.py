@@ -1,11 +1,18 @@
 import pandas as pd
-import psycopg2
 from psycopg2 import extras
 from sqlalchemy import create_engine
 import numpy as np
 import os
 import re
 import sys
+from pathlib import Path
+
+# Librería compartida del repositorio (fnb_comun)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from fnb_comun.carga_copy import copiar_dataframe_postgres, normalizar_metodo_carga
+from fnb_comun.db import conectar, liberar
+from fnb_comun.excel import leer_excel
+from fnb_comun.historico import cargar_mes_historico
 
 # ======================
 # Parámetros dinámicos
@@ -22,14 +29,18 @@ csv_path = r"D:\FNB\Reportes\06 Reporte de Morosidad\Reporte_Cartera.csv"
 # Nombre de tabla se genera automáticamente
 table_name = None
 
-# Configuración PostgreSQL
-db_config = {
-    "host": "localhost",
-    "port": 5432,
-    "database": "bd_calidda_fnb",
-    "user": "postgres",
-    "password": "ibr2025"
-}
+# Método de carga: "copy" (COPY FROM STDIN, recomendado) o "insert" (execute_values)
+METODO_CARGA = "copy"
+
+# Destino: "historico" carga el archivo como su mes (YYYY-MM del nombre) en la tabla
+# particionada por mes TABLA_HISTORICA (reemplaza el mes si ya estaba; siempre con COPY);
+# "tabla_mes" mantiene la tabla suelta bd_morosidad_YYYYMM
+DESTINO_CARGA = "historico"
+TABLA_HISTORICA = "bd_morosidad_mensual"
+INDICES_HISTORICO = [("cta_contr",)]
+
+# Conexión PostgreSQL: configuración común (variables PG* o valores por defecto) y
+# conexiones reutilizadas con parámetros de sesión de carga (fnb_comun/db.py)
 
 # Mapeo esperado PostgreSQL (tipos de datos ajustados)
 column_types_postgresql = {
@@ -106,20 +117,22 @@ def crear_tabla_bd_morosidad(cursor, table_name):
     else:
         print(f"✅ Tabla {table_name} lista para usar")
 
-def extraer_nombre_tabla(ruta_archivo):
-    """Extrae el nombre de la tabla del nombre del archivo"""
+def extraer_periodo(ruta_archivo):
+    """Extrae el periodo YYYYMM (año-mes) del nombre del archivo"""
     nombre_archivo = os.path.basename(ruta_archivo)
     match = re.search(r'(\d{4})-(\d{2})', nombre_archivo)
     if match:
-        año = match.group(1)
-        mes = match.group(2)
-        tabla = f"bd_morosidad_{año}{mes}"
         print(f"\n📋 Archivo detectado: {nombre_archivo}")
-        print(f"📊 Tabla generada automáticamente: {tabla}")
-        return tabla
+        return f"{match.group(1)}{match.group(2)}"
     else:
         raise ValueError(f"❌ No se pudo extraer año-mes del archivo: {nombre_archivo}")
 
+def extraer_nombre_tabla(ruta_archivo):
+    """Extrae el nombre de la tabla del nombre del archivo"""
+    tabla = f"bd_morosidad_{extraer_periodo(ruta_archivo)}"
+    print(f"📊 Tabla generada automáticamente: {tabla}")
+    return tabla
+
 # ======================
 # Verificar que el archivo existe
 # ======================
@@ -130,13 +143,18 @@ if not os.path.exists(excel_path):
 # ======================
 # Extraer nombre de tabla
 # ======================
-table_name = extraer_nombre_tabla(excel_path)
+if DESTINO_CARGA == "historico":
+    periodo = extraer_periodo(excel_path)
+    table_name = TABLA_HISTORICA
+    print(f"📊 Mes {periodo[:4]}-{periodo[4:]} en la tabla histórica {table_name}")
+else:
+    table_name = extraer_nombre_tabla(excel_path)
 
 # ======================
 # Leer Excel
 # ======================
 print("\n📖 Leyendo Excel...")
-df = pd.read_excel(excel_path, sheet_name=sheet_name, usecols=list(column_mapping.keys()), dtype=str)
+df = leer_excel(excel_path, sheet_name=sheet_name, usecols=list(column_mapping.keys()), dtype=str)
 
 # Renombrar columnas a formato PostgreSQL
 df.rename(columns=column_mapping, inplace=True)
@@ -175,44 +193,70 @@ print("\n💾 Exportando a CSV intermedio...")
 df.to_csv(csv_path, index=False, sep="|", encoding="utf-8")
 
 # ======================
-# Conexión a PostgreSQL
+# Carga: mes de la tabla histórica (se arma aparte y se anexa como partición) o tabla suelta
 # ======================
-print("\n🔌 Conectando a PostgreSQL...")
-conn = psycopg2.connect(**db_config)
-cursor = conn.cursor()
+sql_columns = list(column_types_postgresql.keys())
 
-# Crear tabla si no existe
-crear_tabla_bd_morosidad(cursor, table_name)
-conn.commit()
+if DESTINO_CARGA == "historico":
+    print("\n🔌 Conectando a PostgreSQL...")
+    conn = conectar("carga")
+    try:
+        copiadas = cargar_mes_historico(conn, df, table_name, periodo, columnas=sql_columns,
+                                        tipos=column_types_postgresql, indices=INDICES_HISTORICO)
+        conn.commit()
+        print(f"COPY completado: {copiadas:,} filas")
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        liberar(conn)
+else:
+    # ======================
+    # Conexión a PostgreSQL
+    # ======================
+    print("\n🔌 Conectando a PostgreSQL...")
+    conn = conectar("carga")
+    cursor = conn.cursor()
 
-# Preguntar si truncar
-truncate = input("\n¿Desea truncar la tabla antes de cargar los datos? (s/n): ").lower() == "s"
-if truncate:
-    cursor.execute(f"TRUNCATE TABLE {table_name} RESTART IDENTITY CASCADE")
+    # Crear tabla si no existe
+    crear_tabla_bd_morosidad(cursor, table_name)
     conn.commit()
-    print("✓ Tabla truncada")
 
-# ======================
-# Cargar datos en lotes usando execute_values
-# ======================
-print("\n⬆️  Cargando datos a PostgreSQL...")
-sql_columns = list(column_types_postgresql.keys())
-insert_sql = f"INSERT INTO {table_name} ({', '.join(sql_columns)}) VALUES %s"
+    # Preguntar si truncar
+    truncate = input("\n¿Desea truncar la tabla antes de cargar los datos? (s/n): ").lower() == "s"
+    if truncate:
+        cursor.execute(f"TRUNCATE TABLE {table_name} RESTART IDENTITY CASCADE")
+        conn.commit()
+        print("✓ Tabla truncada")
 
-batch_size = 5000
-total = len(df)
-print(f"Insertando {total:,} filas en lotes de {batch_size}...")
+    # ======================
+    # Cargar datos (COPY FROM STDIN o execute_values según METODO_CARGA)
+    # ======================
+    print("\n⬆️  Cargando datos a PostgreSQL...")
+    total = len(df)
 
-for i in range(0, total, batch_size):
-    batch_df = df.iloc[i:i+batch_size].copy()
-    batch = [tuple(row) for row in batch_df.values]
-    
-    extras.execute_values(cursor, insert_sql, batch, page_size=batch_size)
-    conn.commit()
-    print(f"Lote {i//batch_size+1}: {len(batch)} filas insertadas ({(i+len(batch))/total:.1%})")
+    if normalizar_metodo_carga(METODO_CARGA) == "copy":
+        print(f"Copiando {total:,} filas con COPY FROM STDIN...")
+        copiadas = copiar_dataframe_postgres(conn, df, table_name, columnas=sql_columns,
+                                             tipos=column_types_postgresql)
+        conn.commit()
+        print(f"COPY completado: {copiadas:,} filas")
+    else:
+        insert_sql = f"INSERT INTO {table_name} ({', '.join(sql_columns)}) VALUES %s"
+
+        batch_size = 5000
+        print(f"Insertando {total:,} filas en lotes de {batch_size}...")
+
+        for i in range(0, total, batch_size):
+            batch_df = df.iloc[i:i+batch_size].copy()
+            batch = [tuple(row) for row in batch_df.values]
+
+            extras.execute_values(cursor, insert_sql, batch, page_size=batch_size)
+            conn.commit()
+            print(f"Lote {i//batch_size+1}: {len(batch)} filas insertadas ({(i+len(batch))/total:.1%})")
 
-cursor.close()
-conn.close()
+    cursor.close()
+    liberar(conn)
 
 print("\n✅ Proceso completado con éxito")
 print(f"📊 Tabla cargada: {table_name}")
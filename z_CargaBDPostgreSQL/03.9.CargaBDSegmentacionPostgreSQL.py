@@ -1,11 +1,16 @@
-import pandas as pd
-import numpy as np
-import re
-import psycopg2
 from psycopg2 import extras
 import os
-from datetime import datetime
 import warnings
+import sys
+from pathlib import Path
+
+# Librería compartida del repositorio (fnb_comun)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from fnb_comun.carga_copy import copiar_dataframe_postgres, crear_tabla_desde_tipos, normalizar_metodo_carga
+from fnb_comun.db import conectar, liberar
+from fnb_comun.historico import cargar_mes_historico
+from fnb_comun.ingesta import esquemas, limpieza as limpieza_txt, tipos as tipos_sql
+from fnb_comun.tabla_sombra import cargar_con_intercambio
 
 # Suprimir warnings específicos
 warnings.filterwarnings('ignore', category=UserWarning, message='.*dayfirst.*')
@@ -17,334 +22,68 @@ warnings.filterwarnings('ignore', category=UserWarning, message='.*dayfirst.*')
 # Archivo por defecto para SEGMENTACIÓN
 ARCHIVO_TXT_DEFAULT = r"D:\FNB\Reportes\25. Segmentación\SEGMENTACION_FNB_ACUMULADA_01122025.txt"
 
-# Conexión PostgreSQL
-PG_CONFIG = {
-    "host": "localhost",
-    "port": 5432,
-    "database": "bd_calidda_fnb",
-    "user": "postgres",
-    "password": "ibr2025"
-}
-
-# Mapeo de tipos de datos PostgreSQL - SEGMENTACIÓN
-COLUMN_TYPES_PG = {
-    "interlocutor": "BIGINT",
-    "flag_segmentacion": "VARCHAR(500)",
-    "fecha_corte": "TIMESTAMP",
-    "cta_contr": "BIGINT"
-}
-
-# Mapeo de nombres originales a nombres PostgreSQL - SEGMENTACIÓN
-MAPEO_NOMBRES_COLUMNAS = {
-    "INTERLOCUTOR": "interlocutor",
-    "FLAG_SEGMENTACION": "flag_segmentacion",
-    "FECHA_CORTE": "fecha_corte",
-    "CTA_CONTR": "cta_contr"
-}
+# Conexión PostgreSQL: configuración común (variables PG* o valores por defecto) y
+# conexiones reutilizadas con parámetros de sesión de carga (fnb_comun/db.py)
+
+# Método de carga: "copy" (COPY FROM STDIN, recomendado) o "insert" (execute_values)
+METODO_CARGA = "copy"
+
+# Reemplazar/truncar vía tabla sombra: se carga en <tabla>__carga, se indexa,
+# ANALYZE y se intercambia con la tabla viva en una transacción (solo con "copy")
+CARGA_CON_INTERCAMBIO = True
+
+# Destino: "historico" carga el archivo como su mes en la tabla particionada por mes
+# (ESQUEMA.tabla_historica, reemplaza el mes si ya estaba; siempre con COPY);
+# "tabla_fecha" mantiene la tabla suelta <prefijo>_YYYYMMDD
+DESTINO_CARGA = "historico"
+
+# Esquema declarativo de la fuente: mapeo de columnas, tipos PostgreSQL y reglas del TXT
+# (fnb_comun/ingesta/esquemas.py)
+ESQUEMA = esquemas.SEGMENTACION
+COLUMN_TYPES_PG = ESQUEMA.tipos
+MAPEO_NOMBRES_COLUMNAS = ESQUEMA.mapeo_columnas
 
 def crear_tabla_bd_segmentacion(cursor, table_name):
     """Crea la tabla bd_segmentacion_historica si no existe"""
-    create_table_sql = f"""
-    CREATE TABLE IF NOT EXISTS {table_name} (
-        interlocutor BIGINT,
-        flag_segmentacion VARCHAR(500),
-        fecha_corte TIMESTAMP,
-        cta_contr BIGINT
-    )
-    """
-    cursor.execute(create_table_sql)
+    crear_tabla_desde_tipos(cursor, table_name, list(COLUMN_TYPES_PG), COLUMN_TYPES_PG)
     print(f"✅ Tabla {table_name} verificada/creada")
 
 # ======================
-# FUNCIONES DE LIMPIEZA DE ARCHIVOS TXT
+# FUNCIONES DE LIMPIEZA DE ARCHIVOS TXT (fnb_comun.ingesta)
 # ======================
 
-def detectar_codificacion(archivo):
-    """Detecta la codificación del archivo"""
-    codificaciones_comunes = ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1', 'utf-16']
-    
-    for encoding in codificaciones_comunes:
-        try:
-            with open(archivo, 'r', encoding=encoding) as file:
-                sample = file.read(5000)
-                if len(sample) > 0 and not any(ord(char) > 65535 for char in sample[:100]):
-                    return encoding
-        except (UnicodeDecodeError, UnicodeError):
-            continue
-    
-    return 'latin-1'
-
-def detectar_separador(linea_cabecera):
-    """Detecta el separador utilizado en el archivo"""
-    separadores = ['\t', ';', ',', '|']
-    for sep in separadores:
-        if linea_cabecera.count(sep) > 2:  # Al menos 3 columnas
-            return sep
-    return '\t'
-
 def analizar_archivo_txt(archivo_entrada):
     """Analiza la estructura del archivo antes de la limpieza"""
-    print("=== ANÁLISIS DEL ARCHIVO TXT SEGMENTACIÓN ===")
-    
-    codificacion = detectar_codificacion(archivo_entrada)
-    
-    with open(archivo_entrada, 'r', encoding=codificacion) as file:
-        lineas = file.readlines()
-    
-    print(f"Total de líneas: {len(lineas)}")
-    
-    if len(lineas) > 0:
-        # Asumir que la primera línea es la cabecera
-        separador = detectar_separador(lineas[0])
-        cabecera = lineas[0].strip().split(separador)
-        print(f"Cabecera detectada: {len(cabecera)} columnas")
-        print(f"Columnas: {', '.join(cabecera)}")
-        
-        # Verificar algunas filas de datos
-        problemas = 0
-        for i, linea in enumerate(lineas[1:min(100, len(lineas))], start=2):
-            if linea.strip() == '':
-                continue
-            campos = linea.strip().split(separador)
-            if len(campos) != len(cabecera):
-                problemas += 1
-        
-        if problemas > 0:
-            print(f"⚠️  Filas con estructura diferente (muestra): {problemas}")
-        else:
-            print("✅ Estructura consistente detectada")
-    
-    print("=" * 50)
+    limpieza_txt.analizar_archivo_txt(archivo_entrada, ESQUEMA)
 
 def limpiar_archivo_txt(archivo_entrada):
-    """Limpia un archivo TXT de SEGMENTACIÓN y retorna DataFrame"""
-    print("=== INICIANDO LIMPIEZA DE ARCHIVO TXT SEGMENTACIÓN ===")
-    
-    codificacion = detectar_codificacion(archivo_entrada)
-    
-    with open(archivo_entrada, 'r', encoding=codificacion) as file:
-        lineas = file.readlines()
-    
-    print(f"Total de líneas leídas: {len(lineas)}")
-    
-    if len(lineas) <= 1:
-        print("❌ Error: El archivo no tiene suficientes líneas para procesar")
-        return None
-    
-    # Primera línea es la cabecera
-    separador = detectar_separador(lineas[0])
-    cabecera_raw = lineas[0].strip().split(separador)
-    
-    # Limpiar cabecera
-    cabecera = [col.strip() for col in cabecera_raw]
-    
-    num_columnas_esperadas = len(cabecera)
-    print(f"Cabecera extraída: {num_columnas_esperadas} columnas")
-    print(f"Columnas detectadas: {', '.join(cabecera)}")
-    
-    # Procesar datos desde la línea 2 (índice 1)
-    datos_raw = lineas[1:]
-    datos_limpios = []
-    filas_omitidas = 0
-    
-    for i, linea in enumerate(datos_raw, start=2):
-        if linea.strip() == '':
-            continue
-            
-        campos = linea.strip().split(separador)
-        
-        if len(campos) == num_columnas_esperadas:
-            datos_limpios.append(campos)
-        else:
-            filas_omitidas += 1
-    
-    if filas_omitidas > 0:
-        print(f"⚠️  Filas omitidas por estructura incorrecta: {filas_omitidas}")
-    print(f"Total de filas procesadas: {len(datos_limpios)}")
-    
-    if len(datos_limpios) == 0:
-        print("❌ No se procesaron datos válidos")
-        return None
-    
-    # Crear DataFrame
-    df = pd.DataFrame(datos_limpios, columns=cabecera)
-    
-    # FILTRAR SOLO COLUMNAS MAPEADAS
-    columnas_originales_mapeadas = list(MAPEO_NOMBRES_COLUMNAS.keys())
-    columnas_existentes = [col for col in df.columns if col in columnas_originales_mapeadas]
-    
-    if len(columnas_existentes) < len(columnas_originales_mapeadas):
-        columnas_faltantes = set(columnas_originales_mapeadas) - set(columnas_existentes)
-        print(f"⚠️  Columnas esperadas pero no encontradas: {', '.join(columnas_faltantes)}")
-    
-    if len(columnas_existentes) == 0:
-        print("❌ No se encontraron columnas mapeadas en el archivo")
-        return None
-    
-    # Mantener solo las columnas mapeadas
-    df = df[columnas_existentes]
-    print(f"✅ Columnas seleccionadas (mapeadas): {len(columnas_existentes)} columnas")
-    
-    # Limpieza general
-    df = aplicar_limpieza_general(df)
-    
-    print(f"✅ DataFrame creado: {len(df)} filas x {len(df.columns)} columnas")
-    
-    return df
-
-def aplicar_limpieza_general(df):
-    """Aplica limpieza general a los datos del DataFrame"""
-    for col in df.columns:
-        if df[col].dtype == 'object':
-            df[col] = df[col].astype(str).str.replace('\n', ' ', regex=False)
-            df[col] = df[col].str.replace('\r', ' ', regex=False)
-            df[col] = df[col].str.replace('\t', ' ', regex=False)
-            df[col] = df[col].str.strip()
-            df[col] = df[col].replace(['nan', 'NaN', 'NULL', ''], np.nan)
-    
-    df = convertir_tipos_datos_basicos(df)
-    
-    return df
-
-def convertir_tipos_datos_basicos(df):
-    """Convierte tipos de datos básicos"""
-    for col in df.columns:
-        if df[col].dtype == 'object':
-            # Verificar si parece fecha
-            muestra = df[col].dropna().head(10)
-            if any(re.match(r'\d{1,2}[/-]\d{1,2}[/-]\d{2,4}', str(val)) for val in muestra):
-                try:
-                    df[col] = pd.to_datetime(df[col], errors='coerce', dayfirst=True)
-                    continue
-                except:
-                    pass
-            
-            # Verificar si parece numérico
-            try:
-                col_limpia = df[col].astype(str).str.replace(',', '').str.replace(' ', '')
-                numeric_df = pd.to_numeric(col_limpia, errors='coerce')
-                
-                if numeric_df.notna().sum() / len(df) > 0.8:
-                    df[col] = numeric_df
-            except:
-                pass
-    
-    return df
+    """Limpia un archivo TXT y retorna DataFrame (None si no hay datos válidos)"""
+    return limpieza_txt.limpiar_archivo_txt(archivo_entrada, ESQUEMA)
 
 # ======================
 # FUNCIONES OPTIMIZADAS PARA POSTGRESQL
 # ======================
 
 def generar_nombre_tabla(archivo_path):
-    """Genera nombre de tabla basado en el archivo - SEGMENTACIÓN"""
-    nombre_archivo = os.path.basename(archivo_path)
-    
-    # Buscar patrón de fecha en el nombre del archivo (DDMMYYYY)
-    fecha_match = re.search(r'(\d{8})', nombre_archivo)
-    if fecha_match:
-        fecha = fecha_match.group(1)
-        # Convertir de DDMMYYYY a YYYYMMDD
-        dia = fecha[0:2]
-        mes = fecha[2:4]
-        anio = fecha[4:8]
-        fecha_postgresql = f"{anio}{mes}{dia}"
-        return f"bd_segmentacion_historica_{fecha_postgresql}"
-    
-    # Fallback: usar fecha actual
-    timestamp = datetime.now().strftime("%Y%m%d")
-    return f"bd_segmentacion_historica_{timestamp}"
+    """Genera nombre de tabla basado en el archivo"""
+    return esquemas.generar_nombre_tabla(archivo_path, ESQUEMA)
 
 def limpiar_nombres_columnas_postgresql(df):
     """Limpia nombres de columnas para PostgreSQL"""
-    print("\n=== Limpiando nombres de columnas para PostgreSQL ===")
-    
-    nuevos_nombres = []
-    cambios = []
-    
-    for col in df.columns:
-        # PRIMERO: Verificar mapeo directo
-        col_limpio = col.strip()
-        
-        if col_limpio in MAPEO_NOMBRES_COLUMNAS:
-            nuevo_nombre = MAPEO_NOMBRES_COLUMNAS[col_limpio]
-        else:
-            # SEGUNDO: Limpieza automática si no está en el mapeo
-            nuevo_nombre = col_limpio
-            nuevo_nombre = re.sub(r'[^\w\s]', '_', nuevo_nombre)
-            nuevo_nombre = re.sub(r'\s+', '_', nuevo_nombre)
-            nuevo_nombre = re.sub(r'_+', '_', nuevo_nombre)
-            nuevo_nombre = nuevo_nombre.strip('_').lower()
-        
-        if col != nuevo_nombre:
-            cambios.append((col, nuevo_nombre))
-        
-        nuevos_nombres.append(nuevo_nombre)
-    
-    if cambios:
-        print(f"Columnas renombradas: {len(cambios)}")
-        for orig, nuevo in cambios:
-            print(f"  {orig} → {nuevo}")
-    else:
-        print("✅ No se requirieron cambios en nombres de columnas")
-    
-    df.columns = nuevos_nombres
-    return df
+    return tipos_sql.limpiar_nombres_columnas(df, ESQUEMA)
 
 def convertir_tipos_datos_postgresql(df):
-    """Convierte tipos de datos según mapeo PostgreSQL - SEGMENTACIÓN"""
-    print("\n=== Conversión de tipos para PostgreSQL ===")
-    
-    for col in df.columns:
-        # IGNORAR COLUMNAS NO MAPEADAS
-        if col not in COLUMN_TYPES_PG:
-            continue
-            
-        pg_type = COLUMN_TYPES_PG[col]
-        
-        try:
-            if pg_type.startswith("VARCHAR"):
-                df[col] = df[col].astype(str)
-                # Aplicar trim (strip) para eliminar espacios
-                df[col] = df[col].str.strip()
-                # Limpiar valores nulos
-                df[col] = df[col].replace(['nan', 'NaN', 'None', 'null'], pd.NA)
-                
-            elif pg_type in ("INT", "BIGINT"):
-                df[col] = pd.to_numeric(df[col], errors="coerce")
-                df[col] = df[col].round(0).astype("Int64")
-                
-            elif "NUMERIC" in pg_type:
-                df[col] = pd.to_numeric(df[col], errors="coerce")
-                df[col] = df[col].round(2)
-                
-            elif pg_type == "TIMESTAMP":
-                df[col] = pd.to_datetime(df[col], errors="coerce", dayfirst=True)
-            
-            print(f"✓ {col}: {pg_type}")
-            
-        except Exception as e:
-            print(f"❌ Error convirtiendo {col}: {str(e)}")
-    
-    return df
+    """Convierte tipos de datos según mapeo PostgreSQL"""
+    return tipos_sql.convertir_tipos_datos(df, ESQUEMA)
 
 def limpiar_datos_postgresql(df):
     """Limpia datos para PostgreSQL"""
-    for col in df.select_dtypes(include=["object"]).columns:
-        if df[col].dtype == "object":
-            df[col] = df[col].astype(str)
-            df[col] = df[col].str.replace("¬", "-", regex=False)
-            df[col] = df[col].str.replace("\n", " ", regex=False)
-            df[col] = df[col].str.replace("\r", " ", regex=False)
-            df[col] = df[col].str.replace("\t", " ", regex=False)
-            df[col] = df[col].str.replace('"', '""', regex=False)
-            df[col] = df[col].replace(['nan', 'NaN', 'None'], None)
-    
-    return df
+    return tipos_sql.limpiar_datos(df)
 
 def verificar_tabla_existente(table_name):
     """Verifica si la tabla existe y consulta acción"""
     try:
-        conn = psycopg2.connect(**PG_CONFIG)
+        conn = conectar("carga")
         cursor = conn.cursor()
         
         cursor.execute("""
@@ -379,16 +118,16 @@ def verificar_tabla_existente(table_name):
                 except KeyboardInterrupt:
                     print("\nOperación cancelada")
                     cursor.close()
-                    conn.close()
+                    liberar(conn)
                     return 'cancel'
             
             cursor.close()
-            conn.close()
+            liberar(conn)
             
             return ['replace', 'truncate', 'append', 'cancel'][int(opcion) - 1]
         
         cursor.close()
-        conn.close()
+        liberar(conn)
         return 'create'
         
     except Exception as e:
@@ -396,27 +135,11 @@ def verificar_tabla_existente(table_name):
         return 'create'
 
 def preparar_dataframe_para_postgresql(df):
-    """Prepara el DataFrame optimizado para PostgreSQL"""
-    df_prep = df.copy()
-    
-    for col in df_prep.columns:
-        if df_prep[col].dtype == 'object':
-            df_prep[col] = df_prep[col].astype(str)
-            df_prep[col] = df_prep[col].replace(['<NA>', 'nan', 'NaN', 'None', 'NULL'], None)
-            df_prep[col] = df_prep[col].str.replace('\x00', '', regex=False)
-        elif pd.api.types.is_datetime64_any_dtype(df_prep[col]):
-            df_prep[col] = df_prep[col].where(pd.notnull(df_prep[col]), None)
-        elif pd.api.types.is_numeric_dtype(df_prep[col]):
-            if df_prep[col].dtype == 'Int64':
-                df_prep[col] = df_prep[col].where(pd.notnull(df_prep[col]), None)
-            else:
-                df_prep[col] = df_prep[col].replace([np.inf, -np.inf], None)
-                df_prep[col] = df_prep[col].where(pd.notnull(df_prep[col]), None)
-    
-    return df_prep
+    """Prepara el DataFrame optimizado para PostgreSQL (None en nulos para execute_values)"""
+    return tipos_sql.preparar_dataframe(df, para_insert=normalizar_metodo_carga(METODO_CARGA) != "copy")
 
 def cargar_dataframe_a_postgresql_optimizado(df, table_name):
-    """Carga optimizada a PostgreSQL usando execute_values"""
+    """Carga optimizada a PostgreSQL usando COPY FROM STDIN (o execute_values)"""
     print(f"\n🚀 Carga OPTIMIZADA a PostgreSQL...")
     print(f"   Tabla: {table_name}")
     print(f"   Registros: {len(df):,}")
@@ -433,49 +156,64 @@ def cargar_dataframe_a_postgresql_optimizado(df, table_name):
             return False
         
         # 3. Conectar a PostgreSQL
-        conn = psycopg2.connect(**PG_CONFIG)
+        conn = conectar("carga")
         cursor = conn.cursor()
         
-        # Crear tabla si no existe
-        crear_tabla_bd_segmentacion(cursor, table_name)
-        conn.commit()
-        
         # 4. MANEJAR TABLA SEGÚN ACCIÓN
-        if accion == 'replace':
+        columnas = df_prep.columns.tolist()
+        intercambio = (CARGA_CON_INTERCAMBIO and accion in ('replace', 'truncate')
+                       and normalizar_metodo_carga(METODO_CARGA) == "copy")
+
+        # Con intercambio no hay DROP/TRUNCATE: la tabla viva sigue disponible hasta el final
+        if accion == 'replace' and not intercambio:
             print(f"🗑️  Reemplazando tabla {table_name}...")
             cursor.execute(f"DROP TABLE IF EXISTS {table_name}")
             conn.commit()
-        elif accion == 'truncate':
+        elif accion == 'truncate' and not intercambio:
             print(f"🗑️  Truncando tabla {table_name}...")
             cursor.execute(f"TRUNCATE TABLE {table_name} RESTART IDENTITY CASCADE")
             conn.commit()
         
-        # 5. CARGAR EN CHUNKS OPTIMIZADO
-        columnas = df_prep.columns.tolist()
-        insert_sql = f"INSERT INTO {table_name} ({', '.join(columnas)}) VALUES %s"
-        
-        chunksize = 5000
-        total_chunks_loaded = 0
-        
-        print(f"\n📊 Cargando en chunks de {chunksize:,}...")
+        # Crear tabla si no existe (después del DROP en modo reemplazo)
+        crear_tabla_bd_segmentacion(cursor, table_name)
+        conn.commit()
         
-        for i in range(0, len(df_prep), chunksize):
-            chunk_df = df_prep.iloc[i:i+chunksize].copy()
-            batch = [tuple(row) for row in chunk_df.values]
-            
-            extras.execute_values(cursor, insert_sql, batch, page_size=chunksize)
+        # 5. CARGAR (COPY FROM STDIN o execute_values en chunks)
+        if intercambio:
+            print(f"\n📊 Copiando {len(df_prep):,} registros a tabla sombra con COPY FROM STDIN...")
+            cargar_con_intercambio(conn, df_prep, table_name, columnas=columnas,
+                                   tipos=COLUMN_TYPES_PG, recrear=accion == 'replace')
+            conn.commit()
+        elif normalizar_metodo_carga(METODO_CARGA) == "copy":
+            print(f"\n📊 Copiando {len(df_prep):,} registros con COPY FROM STDIN...")
+            copiar_dataframe_postgres(conn, df_prep, table_name, columnas=columnas,
+                                      tipos=COLUMN_TYPES_PG)
             conn.commit()
+        else:
+            insert_sql = f"INSERT INTO {table_name} ({', '.join(columnas)}) VALUES %s"
+            
+            chunksize = 5000
+            total_chunks_loaded = 0
+            
+            print(f"\n📊 Cargando en chunks de {chunksize:,}...")
             
-            total_chunks_loaded += 1
-            registros_cargados = min(total_chunks_loaded * chunksize, len(df_prep))
-            print(f"  Chunk {total_chunks_loaded}: {registros_cargados:,} de {len(df_prep):,} registros")
+            for i in range(0, len(df_prep), chunksize):
+                chunk_df = df_prep.iloc[i:i+chunksize].copy()
+                batch = [tuple(row) for row in chunk_df.values]
+                
+                extras.execute_values(cursor, insert_sql, batch, page_size=chunksize)
+                conn.commit()
+                
+                total_chunks_loaded += 1
+                registros_cargados = min(total_chunks_loaded * chunksize, len(df_prep))
+                print(f"  Chunk {total_chunks_loaded}: {registros_cargados:,} de {len(df_prep):,} registros")
         
         # 6. VERIFICAR CARGA
         cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
         count_final = cursor.fetchone()[0]
         
         cursor.close()
-        conn.close()
+        liberar(conn)
         
         print(f"\n✅ Carga OPTIMIZADA completada!")
         print(f"   📊 Registros en tabla: {count_final:,}")
@@ -489,6 +227,34 @@ def cargar_dataframe_a_postgresql_optimizado(df, table_name):
         traceback.print_exc()
         return False
 
+def cargar_dataframe_a_historico(df, archivo_txt):
+    """Carga el DataFrame como el mes del archivo en la tabla histórica particionada"""
+    tabla = ESQUEMA.tabla_historica
+    periodo = esquemas.periodo_archivo(archivo_txt, ESQUEMA)
+    print(f"\n🚀 Carga a tabla histórica {tabla} (mes {periodo:%Y-%m})...")
+    print(f"   Registros: {len(df):,}")
+
+    try:
+        df_prep = tipos_sql.preparar_dataframe(df)
+
+        conn = conectar("carga")
+        try:
+            total = cargar_mes_historico(conn, df_prep, tabla, periodo, tipos=COLUMN_TYPES_PG,
+                                         indices=ESQUEMA.indices_historico)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            liberar(conn)
+
+        print(f"✅ Carga completada: {total:,} registros")
+        return True
+
+    except Exception as e:
+        print(f"❌ Error durante la carga: {e}")
+        return False
+
 def mostrar_resumen_proceso(df, archivo_original, csv_generado=None):
     """Muestra resumen completo del proceso"""
     if df is None:
@@ -559,9 +325,11 @@ def procesar_archivo_completo(archivo_txt, generar_csv=True, cargar_postgresql=T
             df_postgresql = convertir_tipos_datos_postgresql(df_postgresql)
             df_postgresql = limpiar_datos_postgresql(df_postgresql)
             
-            table_name = generar_nombre_tabla(archivo_txt)
-            
-            exito_postgresql = cargar_dataframe_a_postgresql_optimizado(df_postgresql, table_name)
+            if DESTINO_CARGA == "historico":
+                exito_postgresql = cargar_dataframe_a_historico(df_postgresql, archivo_txt)
+            else:
+                table_name = generar_nombre_tabla(archivo_txt)
+                exito_postgresql = cargar_dataframe_a_postgresql_optimizado(df_postgresql, table_name)
             
             if not exito_postgresql:
                 print("⚠️  La carga a PostgreSQL falló")
@@ -2,10 +2,22 @@ import pandas as pd
 import numpy as np
 import os
 import glob
-import matplotlib.pyplot as plt
 import win32com.client as win32
-from PIL import Image, ImageOps
+from PIL import Image
+from dataclasses import replace
 from datetime import datetime
+import sys
+from pathlib import Path
+
+# Librería compartida del repositorio (fnb_comun)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from fnb_comun.calendario import CalendarioHabil
+from fnb_comun.excel import leer_excel
+from fnb_comun.tabla_imagen import ESTILO_SIMPLE, guardar_tabla
+
+# Ancho de las imágenes de tabla en el correo (24.5 cm a 96 dpi)
+ANCHO_IMAGEN_CORREO = 927
+ESTILO_PENDIENTES = replace(ESTILO_SIMPLE, tamaño=8.5)
 
 
 class SistemaReportesAutomaticos:
@@ -47,23 +59,9 @@ class SistemaReportesAutomaticos:
 
     def cargar_y_limpiar(self, ruta):
         """Carga y limpia un archivo Excel"""
-        df = pd.read_excel(ruta)
+        df = leer_excel(ruta, cache=True)
         return self.limpiar(df)
 
-    def calcular_dias_habiles(self, fecha_venta, feriados):
-        """Calcula días hábiles desde fecha de venta hasta hoy"""
-        if pd.isna(fecha_venta):
-            return 0
-        hoy = datetime.now().date()
-        if isinstance(fecha_venta, pd.Timestamp):
-            fecha_venta = fecha_venta.date()
-        if fecha_venta > hoy:
-            return 0
-        dias_totales = pd.date_range(fecha_venta, hoy, freq='D')
-        # Se excluyen solo domingos (weekday=6) y feriados, los sábados sí se cuentan
-        dias_habiles = [d for d in dias_totales if d.weekday() != 6 and d.date() not in feriados]
-        return max(len(dias_habiles) - 1, 0)
-
     def _cargar_mapeo_canales(self, ruta_archivo):
         """
         Carga el mapeo de SEDE → CANAL desde el archivo Excel.
@@ -71,7 +69,7 @@ class SistemaReportesAutomaticos:
         Normaliza ambas columnas a mayúsculas para matching confiable.
         """
         try:
-            df_canal = pd.read_excel(ruta_archivo, sheet_name='Hoja1')
+            df_canal = leer_excel(ruta_archivo, sheet_name='Hoja1')
             if len(df_canal.columns) >= 2:
                 # Normalizar SEDE (columna A) a mayúsculas
                 sedes_normalizadas = df_canal.iloc[:, 0].astype(str).str.strip().str.upper()
@@ -153,8 +151,8 @@ class SistemaReportesAutomaticos:
             ruta_feriados = self.buscar_excel_en_carpeta(self.carpeta_feriados)
 
             base = self.cargar_y_limpiar(ruta_base)
-            feriados_df = pd.read_excel(ruta_feriados)
-            feriados = set(pd.to_datetime(feriados_df.iloc[:, 0]).dt.date)
+            # Calendario hábil (lunes a sábado sin feriados) precalculado una sola vez
+            calendario = CalendarioHabil.desde_excel(ruta_feriados)
 
 
             # === AJUSTE SOLICITADO ===
@@ -197,7 +195,7 @@ class SistemaReportesAutomaticos:
             )
 
             # Calcular tiempo
-            base['Tiempo'] = base['FECHA VENTA'].apply(lambda x: self.calcular_dias_habiles(x, feriados) + 1)
+            base['Tiempo'] = calendario.dias_habiles(base['FECHA VENTA']) + 1
 
             # Evaluar rango
             def evaluar_rango(row):
@@ -327,7 +325,7 @@ class SistemaReportesAutomaticos:
 
             for file in files:
                 file_path = os.path.join(self.carpeta_archivos, file)
-                df = pd.read_excel(file_path)
+                df = leer_excel(file_path)
 
                 required_cols = {'prexcant', 'Nro. PEDIDO VENTA', 'FECHA VENTA', 'RESPONSABLE DE VENTA', 'Rango'}
                 if not required_cols.issubset(df.columns):
@@ -395,38 +393,11 @@ class SistemaReportesAutomaticos:
                     for col in pivot.columns
                 ]
 
-                # Crear tabla como imagen
-                fig, ax = plt.subplots(figsize=(12, max(6, len(pivot) * 0.5)))
-                ax.axis('off')
-
-                tabla = ax.table(
-                    cellText=pivot.values,
-                    colLabels=pivot.columns,
-                    cellLoc='center',
-                    loc='center'
-                )
-
-                tabla.auto_set_font_size(False)
-                tabla.set_fontsize(8.5)
-                tabla.scale(1.2, 1.4)
-
-                # Guardar imagen temporal
+                # Tabla como imagen, ya al ancho del correo
                 temp_path = os.path.join(self.carpeta_imagenes, f'tabla_dinamica_{file.replace(".xlsx", "")}.png')
-                plt.tight_layout()
-                plt.savefig(temp_path, dpi=300, bbox_inches='tight')
-                plt.close()
-
-                # Recortar bordes blancos
-                img = Image.open(temp_path).convert("RGB")
-                gray = ImageOps.grayscale(img)
-                inverted = ImageOps.invert(gray)
-
-                bbox = inverted.getbbox()
-                if bbox:
-                    img_cropped = img.crop(bbox)
-                    img_cropped.save(temp_path)
-                    imagenes_generadas.append(temp_path)
-                    print(f"✅ Imagen generada: {os.path.basename(temp_path)}")
+                guardar_tabla(pivot, temp_path, estilo=ESTILO_PENDIENTES, ancho=ANCHO_IMAGEN_CORREO)
+                imagenes_generadas.append(temp_path)
+                print(f"✅ Imagen generada: {os.path.basename(temp_path)}")
 
             print(f"✅ PASO 2 COMPLETADO: {len(imagenes_generadas)} imágenes generadas")
             return imagenes_generadas
@@ -452,7 +423,7 @@ class SistemaReportesAutomaticos:
                 return []
 
             # Leer listado de correos
-            df_proveedores = pd.read_excel(listado_correos_path)
+            df_proveedores = leer_excel(listado_correos_path)
             df_proveedores.set_index('Proveedor', inplace=True)
 
             # Iniciar Outlook
@@ -472,21 +443,21 @@ class SistemaReportesAutomaticos:
                     print(f"❌ Imagen no encontrada para {file}")
                     continue
 
-                # Redimensionar imagen de tabla
+                # Redimensionar imagen de tabla (las del PASO 2 ya vienen al ancho final)
                 try:
                     with Image.open(image_path) as img:
-                        new_width = 927  # 24.5 cm a 96 dpi
-                        w_percent = new_width / float(img.size[0])
-                        new_height = int(float(img.size[1]) * w_percent)
-                        img_resized = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                        img_resized.save(image_path)
+                        if img.size[0] != ANCHO_IMAGEN_CORREO:
+                            w_percent = ANCHO_IMAGEN_CORREO / float(img.size[0])
+                            new_height = int(float(img.size[1]) * w_percent)
+                            img_resized = img.resize((ANCHO_IMAGEN_CORREO, new_height), Image.Resampling.LANCZOS)
+                            img_resized.save(image_path)
                 except Exception as e:
                     print(f"❌ Error al redimensionar imagen de tabla: {e}")
                     continue
 
                 # Leer Excel
                 try:
-                    df = pd.read_excel(excel_path)
+                    df = leer_excel(excel_path)
                 except:
                     print(f"❌ No se pudo leer: {file}")
                     continue
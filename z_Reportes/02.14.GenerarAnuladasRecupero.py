@@ -5,10 +5,16 @@
 import pandas as pd
 import os
 import win32com.client as win32
-from openpyxl import load_workbook
-from openpyxl.styles import Font, Alignment
 from datetime import datetime
 import traceback
+import sys
+from pathlib import Path
+
+# Librería compartida del repositorio (fnb_comun)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from fnb_comun.cruce_temporal import existe_registro_posterior
+from fnb_comun.anexar_excel import ArchivoSeguimiento
+from fnb_comun.excel import leer_excel
 
 # === CONFIGURACIONES ===
 print("🚀 Iniciando proceso simplificado de actualización...")
@@ -34,6 +40,9 @@ columnas_exportar = [
     'PRODUCTO_1', 'CANAL_VENTA'
 ]
 
+# Archivo destino: se abre una sola vez para detectar nuevos y anexarlos
+destino = ArchivoSeguimiento(ruta_destino, 'Ventas anuladas', 'Nro. PEDIDO VENTA')
+
 def verificar_archivos():
     """Verifica que los archivos necesarios existan"""
     print("🔍 Verificando archivos...")
@@ -53,7 +62,7 @@ def procesar_datos_fuente():
     print("📂 Cargando y procesando datos fuente...")
     
     # Cargar datos
-    df = pd.read_excel(ruta_fuente, dtype=str)
+    df = leer_excel(ruta_fuente, dtype=str, cache=True)
     print(f"📊 Registros cargados: {len(df)}")
     
     # Limpiar espacios en blanco
@@ -128,40 +137,36 @@ def aplicar_filtros_anulaciones(df):
     
     # Validar compras posteriores - CORREGIDO
     print("🔍 Validando compras posteriores con fecha y hora...")
-    df_final = []
-    excluidos_por_compras_posteriores = 0
-    
-    for idx, fila in df_anuladas.iterrows():
+
+    # Registros sin fecha de venta no se pueden validar
+    sin_fecha_venta = df_anuladas['FECHA VENTA'].isna()
+    for cuenta in df_anuladas.loc[sin_fecha_venta, 'CUENTA CONTRATO']:
+        print(f"⚠️ Saltando registro sin fecha de venta: cuenta {cuenta}")
+    df_anuladas = df_anuladas[~sin_fecha_venta]
+
+    # CLAVE: Comparar con fecha/hora de VENTA (no de anulación), misma cuenta,
+    # excluyendo estados ANULADO y PENDIENTE DE ANULACIÓN (una sola pasada ordenada)
+    validas = ~df_completo['ESTADO'].isin(estados_excluir)
+    con_posterior = existe_registro_posterior(
+        df_anuladas['CUENTA CONTRATO'], df_anuladas['FECHA VENTA'],
+        df_completo.loc[validas, 'CUENTA CONTRATO'], df_completo.loc[validas, 'FECHA VENTA'],
+    ).to_numpy()
+    excluidos_por_compras_posteriores = int(con_posterior.sum())
+
+    # Debug: mostrar información para las primeras cuentas
+    for _, fila in df_anuladas[con_posterior].head(5).iterrows():
         cuenta = fila['CUENTA CONTRATO']
-        fecha_hora_venta_anulada = fila['FECHA VENTA']  # Fecha/hora de la venta que fue anulada
-        
-        # Verificar que la fecha de venta no sea NaT
-        if pd.isna(fecha_hora_venta_anulada):
-            print(f"⚠️ Saltando registro sin fecha de venta: cuenta {cuenta}")
-            continue
-        
-        # Buscar compras posteriores en la misma cuenta
-        # CLAVE: Comparar con fecha/hora de VENTA (no de anulación)
-        # y excluir estados ANULADO y PENDIENTE DE ANULACIÓN
         posteriores = df_completo[
+            validas &
             (df_completo['CUENTA CONTRATO'] == cuenta) &
-            (df_completo['FECHA VENTA'] > fecha_hora_venta_anulada) &  # Posterior a la venta anulada
-            (~df_completo['ESTADO'].isin(estados_excluir))  # NO anuladas ni pendientes de anulación
+            (df_completo['FECHA VENTA'] > fila['FECHA VENTA'])
         ]
-        
-        # Debug: mostrar información para las primeras cuentas
-        if not posteriores.empty and excluidos_por_compras_posteriores < 5:
-            print(f"🔍 Cuenta {cuenta}: Encontradas {len(posteriores)} compras válidas posteriores a {fecha_hora_venta_anulada}")
-            for _, post in posteriores.head(2).iterrows():  # Mostrar máximo 2 ejemplos
-                print(f"    - Fecha: {post['FECHA VENTA']} | Estado: {post['ESTADO']} | Pedido: {post.get('Nro. PEDIDO VENTA', 'N/A')}")
-        
-        # Solo incluir si NO hay compras posteriores válidas
-        if posteriores.empty:
-            df_final.append(fila)
-        else:
-            excluidos_por_compras_posteriores += 1
-    
-    df_resultado = pd.DataFrame(df_final)
+        print(f"🔍 Cuenta {cuenta}: Encontradas {len(posteriores)} compras válidas posteriores a {fila['FECHA VENTA']}")
+        for _, post in posteriores.head(2).iterrows():  # Mostrar máximo 2 ejemplos
+            print(f"    - Fecha: {post['FECHA VENTA']} | Estado: {post['ESTADO']} | Pedido: {post.get('Nro. PEDIDO VENTA', 'N/A')}")
+
+    # Solo incluir si NO hay compras posteriores válidas
+    df_resultado = df_anuladas[~con_posterior]
     print(f"✅ Anulaciones SIN compras posteriores: {len(df_resultado)}")
     print(f"❌ Excluidas por compras posteriores: {excluidos_por_compras_posteriores}")
     
@@ -247,24 +252,20 @@ def obtener_registros_nuevos(df_procesados):
     print("🔍 Identificando registros nuevos...")
     
     try:
-        # Cargar archivo destino
-        df_existente = pd.read_excel(ruta_destino, sheet_name='Ventas anuladas')
-        pedidos_existentes = set(df_existente['Nro. PEDIDO VENTA'].dropna().astype(str))
+        registros_existentes = destino.registros
         
-        print(f"📊 Registros en archivo destino: {len(df_existente)}")
-        print(f"📊 Pedidos únicos existentes: {len(pedidos_existentes)}")
+        print(f"📊 Registros en archivo destino: {registros_existentes}")
+        print(f"📊 Pedidos únicos existentes: {len(destino.claves)}")
         
         # Filtrar solo nuevos
-        df_nuevos = df_procesados[
-            ~df_procesados['Nro. PEDIDO VENTA'].astype(str).isin(pedidos_existentes)
-        ].copy()
+        df_nuevos = destino.filtrar_nuevos(df_procesados)
         
         duplicados = len(df_procesados) - len(df_nuevos)
         print(f"📈 Total procesados: {len(df_procesados)}")
         print(f"🔄 Ya existentes: {duplicados}")
         print(f"✨ Nuevos a agregar: {len(df_nuevos)}")
         
-        return df_nuevos, len(df_existente)
+        return df_nuevos, registros_existentes
         
     except Exception as e:
         print(f"❌ Error al identificar registros nuevos: {e}")
@@ -279,45 +280,8 @@ def agregar_al_archivo_destino(df_nuevos):
     print(f"💾 Agregando {len(df_nuevos)} registros al archivo destino...")
     
     try:
-        # Cargar workbook
-        wb = load_workbook(ruta_destino)
-        ws = wb['Ventas anuladas']
-        
-        # Encontrar última fila con datos
-        ultima_fila = 1
-        for fila in range(2, ws.max_row + 1):
-            if ws.cell(row=fila, column=1).value:
-                ultima_fila = fila
-            else:
-                break
-        
-        # Mapear columnas
-        encabezados = [str(ws.cell(row=1, column=col).value).strip() 
-                      for col in range(1, ws.max_column + 1)]
-        mapeo_columnas = {enc: idx + 1 for idx, enc in enumerate(encabezados)}
-        
-        # Configurar formato
-        font_aptos = Font(name='Aptos', size=8)
-        alignment_left = Alignment(horizontal='left', vertical='center')
-        
-        # Agregar datos
-        fila_actual = ultima_fila + 1
-        for _, row in df_nuevos.iterrows():
-            for columna in columnas_exportar:
-                if columna in mapeo_columnas:
-                    col_idx = mapeo_columnas[columna]
-                    valor = row[columna] if columna in row else ""
-                    valor = "" if pd.isna(valor) else valor
-                    
-                    cell = ws.cell(row=fila_actual, column=col_idx, value=valor)
-                    cell.font = font_aptos
-                    cell.alignment = alignment_left
-            
-            fila_actual += 1
-        
-        # Guardar
-        wb.save(ruta_destino)
-        wb.close()
+        destino.anexar(df_nuevos, columnas_exportar)
+        destino.guardar()
         
         print(f"✅ {len(df_nuevos)} registros agregados exitosamente")
         return True
@@ -334,7 +298,7 @@ def enviar_correo_resumen(exito, total_procesados=0, total_nuevos=0, error_msg="
             print("❌ Archivo de destinatarios no encontrado")
             return
         
-        df_dest = pd.read_excel(ruta_destinatarios)
+        df_dest = leer_excel(ruta_destinatarios)
         destinatarios = df_dest.iloc[:, 0].dropna().tolist()
         copia = df_dest.iloc[:, 1].dropna().tolist() if len(df_dest.columns) > 1 else []
         
@@ -5,10 +5,15 @@
 import pandas as pd
 import os
 import win32com.client as win32
-from openpyxl import load_workbook
-from openpyxl.styles import Font, Alignment
 from datetime import datetime
 import traceback
+import sys
+from pathlib import Path
+
+# Librería compartida del repositorio (fnb_comun)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from fnb_comun.anexar_excel import ArchivoSeguimiento
+from fnb_comun.excel import leer_excel
 
 # === CONFIGURACIONES - SOLICITUDES DE ANULACIÓN ===
 print("🚀 Iniciando proceso simplificado de solicitudes de anulación...")
@@ -40,6 +45,9 @@ columnas_exportar = [
     'PRODUCTO_1', 'CANAL_VENTA'
 ]
 
+# Archivo destino: se abre una sola vez para detectar nuevos y anexarlos
+destino = ArchivoSeguimiento(ruta_destino, 'Solicitudes de Anulación', 'Nro. PEDIDO VENTA')
+
 def verificar_archivos():
     """Verifica que los archivos necesarios existan"""
     print("🔍 Verificando archivos...")
@@ -62,7 +70,7 @@ def cargar_datos_principal():
     """Carga y procesa los datos del archivo principal"""
     print("📂 Cargando datos principales (Base Solicitudes Anulacion)...")
     
-    df = pd.read_excel(ruta_fuente_principal, sheet_name='Bandeja Anulacion', dtype=str)
+    df = leer_excel(ruta_fuente_principal, sheet_name='Bandeja Anulacion', dtype=str, cache=True)
     print(f"📊 Registros cargados: {len(df)}")
     
     # Limpiar espacios
@@ -93,7 +101,7 @@ def cargar_datos_complementarios():
     """Carga y procesa los datos complementarios"""
     print("📂 Cargando datos complementarios...")
     
-    df = pd.read_excel(ruta_fuente_complementaria, dtype=str)
+    df = leer_excel(ruta_fuente_complementaria, dtype=str, cache=True)
     print(f"📊 Registros complementarios: {len(df)}")
     
     # Limpiar espacios
@@ -277,23 +285,20 @@ def obtener_registros_nuevos(df_procesados):
     print("🔍 Identificando registros nuevos...")
     
     try:
-        df_existente = pd.read_excel(ruta_destino, sheet_name='Solicitudes de Anulación')
-        pedidos_existentes = set(df_existente['Nro. PEDIDO VENTA'].dropna().astype(str))
+        registros_existentes = destino.registros
         
-        print(f"📊 Registros existentes: {len(df_existente)}")
-        print(f"📊 Pedidos únicos existentes: {len(pedidos_existentes)}")
+        print(f"📊 Registros existentes: {registros_existentes}")
+        print(f"📊 Pedidos únicos existentes: {len(destino.claves)}")
         
         # Filtrar nuevos
-        df_nuevos = df_procesados[
-            ~df_procesados['Nro. PEDIDO VENTA'].astype(str).isin(pedidos_existentes)
-        ].copy()
+        df_nuevos = destino.filtrar_nuevos(df_procesados)
         
         duplicados = len(df_procesados) - len(df_nuevos)
         print(f"📈 Total procesados: {len(df_procesados)}")
         print(f"🔄 Ya existentes: {duplicados}")
         print(f"✨ Nuevos a agregar: {len(df_nuevos)}")
         
-        return df_nuevos, len(df_existente)
+        return df_nuevos, registros_existentes
         
     except Exception as e:
         print(f"❌ Error al identificar nuevos: {e}")
@@ -308,43 +313,8 @@ def agregar_al_archivo_destino(df_nuevos):
     print(f"💾 Agregando {len(df_nuevos)} registros...")
     
     try:
-        wb = load_workbook(ruta_destino)
-        ws = wb['Solicitudes de Anulación']
-        
-        # Encontrar última fila con datos
-        ultima_fila = 1
-        for fila in range(2, ws.max_row + 1):
-            if ws.cell(row=fila, column=1).value:
-                ultima_fila = fila
-            else:
-                break
-        
-        # Mapear columnas
-        encabezados = [str(ws.cell(row=1, column=col).value).strip() 
-                      for col in range(1, ws.max_column + 1)]
-        mapeo_columnas = {enc: idx + 1 for idx, enc in enumerate(encabezados)}
-        
-        # Formato
-        font_aptos = Font(name='Aptos', size=8)
-        alignment_left = Alignment(horizontal='left', vertical='center')
-        
-        # Agregar datos
-        fila_actual = ultima_fila + 1
-        for _, row in df_nuevos.iterrows():
-            for columna in columnas_exportar:
-                if columna in mapeo_columnas:
-                    col_idx = mapeo_columnas[columna]
-                    valor = row[columna] if columna in row else ""
-                    valor = "" if pd.isna(valor) else valor
-                    
-                    cell = ws.cell(row=fila_actual, column=col_idx, value=valor)
-                    cell.font = font_aptos
-                    cell.alignment = alignment_left
-            
-            fila_actual += 1
-        
-        wb.save(ruta_destino)
-        wb.close()
+        destino.anexar(df_nuevos, columnas_exportar)
+        destino.guardar()
         
         print(f"✅ {len(df_nuevos)} registros agregados exitosamente")
         return True
@@ -361,7 +331,7 @@ def enviar_correo_resumen(exito, total_procesados=0, total_nuevos=0, error_msg="
             print("❌ Archivo de destinatarios no encontrado")
             return
         
-        df_dest = pd.read_excel(ruta_destinatarios)
+        df_dest = leer_excel(ruta_destinatarios)
         destinatarios = df_dest.iloc[:, 0].dropna().tolist()
         copia = df_dest.iloc[:, 1].dropna().tolist() if len(df_dest.columns) > 1 else []
         
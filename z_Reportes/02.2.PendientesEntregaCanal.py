@@ -3,10 +3,21 @@ import numpy as np
 import os
 import re
 import glob
-import matplotlib.pyplot as plt
 import win32com.client as win32
-from PIL import Image, ImageOps
+from dataclasses import replace
 from datetime import datetime, timedelta
+import sys
+from pathlib import Path
+
+# Librería compartida del repositorio (fnb_comun)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from fnb_comun.calendario import CalendarioHabil
+from fnb_comun.excel import leer_excel
+from fnb_comun.tabla_imagen import ESTILO_SIMPLE, guardar_tabla
+
+# Ancho de las imágenes de tabla en el correo (24.5 cm a 96 dpi)
+ANCHO_IMAGEN_CORREO = 927
+ESTILO_PENDIENTES = replace(ESTILO_SIMPLE, tamaño=9)
 
 
 class SistemaReportesPorCanal:
@@ -69,7 +80,7 @@ class SistemaReportesPorCanal:
         return df
 
     def cargar_y_limpiar(self, ruta):
-        df = pd.read_excel(ruta)
+        df = leer_excel(ruta, cache=True)
         return self.limpiar(df)
 
     def _formatear_excel(self, writer, sheet_name, df):
@@ -118,20 +129,6 @@ class SistemaReportesPorCanal:
             column_len = max(df[col].astype(str).map(len).max(), len(str(col)))
             worksheet.set_column(i, i, min(column_len + 2, 50))
 
-    def calcular_dias_habiles(self, fecha_venta, feriados):
-        """Calcula días hábiles desde fecha de venta hasta hoy"""
-        if pd.isna(fecha_venta):
-            return 0
-        hoy = datetime.now().date()
-        if isinstance(fecha_venta, pd.Timestamp):
-            fecha_venta = fecha_venta.date()
-        if fecha_venta > hoy:
-            return 0
-        dias_totales = pd.date_range(fecha_venta, hoy, freq='D')
-        # Se excluyen solo domingos (weekday=6) y feriados, los sábados sí se cuentan
-        dias_habiles = [d for d in dias_totales if d.weekday() != 6 and d.date() not in feriados]
-        return max(len(dias_habiles) - 1, 0)
-
     def _cargar_mapeo_canales(self, ruta_archivo):
         """
         Carga el mapeo de SEDE → CANAL desde el archivo Excel.
@@ -139,7 +136,7 @@ class SistemaReportesPorCanal:
         Normaliza ambas columnas a mayúsculas para matching confiable.
         """
         try:
-            df_canal = pd.read_excel(ruta_archivo, sheet_name='Hoja1')
+            df_canal = leer_excel(ruta_archivo, sheet_name='Hoja1')
             if len(df_canal.columns) >= 2:
                 # Normalizar SEDE (columna A) a mayúsculas
                 sedes_normalizadas = df_canal.iloc[:, 0].astype(str).str.strip().str.upper()
@@ -243,8 +240,8 @@ class SistemaReportesPorCanal:
             ruta_feriados = self.buscar_excel_en_carpeta(self.carpeta_feriados)
 
             base = self.cargar_y_limpiar(ruta_base)
-            feriados_df = pd.read_excel(ruta_feriados)
-            feriados = set(pd.to_datetime(feriados_df.iloc[:, 0]).dt.date)
+            # Calendario hábil (lunes a sábado sin feriados) precalculado una sola vez
+            calendario = CalendarioHabil.desde_excel(ruta_feriados)
 
 
             # === AJUSTE SOLICITADO ===
@@ -286,7 +283,7 @@ class SistemaReportesPorCanal:
                 "PRODUCTO SOLO"
             )
 
-            base['Tiempo'] = base['FECHA VENTA'].apply(lambda x: self.calcular_dias_habiles(x, feriados) + 1)
+            base['Tiempo'] = calendario.dias_habiles(base['FECHA VENTA']) + 1
 
             def evaluar_rango(row):
                 if row['ALIADO COMERCIAL'] == 'MALL HOGAR':
@@ -426,66 +423,10 @@ class SistemaReportesPorCanal:
                     for col in pivot.columns
                 ]
 
-                # Crear figura y tabla con mejor ajuste
-                fig, ax = plt.subplots(figsize=(14, max(4.5, len(pivot) * 0.5)))
-                ax.axis('off')
-
-                tabla = ax.table(
-                    cellText=pivot.values,
-                    colLabels=pivot.columns,
-                    cellLoc='center',
-                    loc='center'
-                )
-
-                tabla.auto_set_font_size(False)
-                tabla.set_fontsize(9)
-                tabla.scale(1.3, 1.6)
-
-                # Ajustar ancho de columnas - ALIADO COMERCIAL más estrecha
-                for i in range(len(pivot) + 1):  # +1 para incluir header
-                    tabla[(i, 0)].set_width(0.25)  # Columna ALIADO COMERCIAL más estrecha
-
-                # Ajustar otras columnas
-                for col in range(1, len(pivot.columns)):
-                    for row in range(len(pivot) + 1):
-                        tabla[(row, col)].set_width(0.12)
-
-                # Guardar imagen
+                # Tabla como imagen, dibujada directamente al ancho del correo
                 nombre_archivo = canal.replace("/", "-").replace("\\", "-")
                 ruta_imagen = os.path.join(self.carpeta_imagenes, f"canal_{nombre_archivo}.png")
-
-                # Configurar figura sin fondo y sin márgenes
-                plt.subplots_adjust(left=0, right=1, top=1, bottom=0)
-                ax.set_xlim(0, 1)
-                ax.set_ylim(0, 1)
-
-                # Guardar imagen con dimensiones exactas
-                plt.savefig(ruta_imagen, dpi=300, bbox_inches='tight', pad_inches=0,
-                            facecolor='white', edgecolor='none', transparent=False)
-                plt.close()
-
-                # Recortar imagen usando threshold de color
-                img = Image.open(ruta_imagen).convert("RGB")
-
-                # Convertir a array numpy para procesamiento
-                import numpy as np
-                img_array = np.array(img)
-
-                # Encontrar límites donde NO es completamente blanco
-                mask = np.any(img_array < 250, axis=2)  # Pixels que no son blancos puros
-                coords = np.argwhere(mask)
-
-                if len(coords) > 0:
-                    y0, x0 = coords.min(axis=0)
-                    y1, x1 = coords.max(axis=0) + 1
-                    img = img.crop((x0, y0, x1, y1))
-
-                # Redimensionar a ancho específico
-                new_width = 927
-                w_percent = new_width / float(img.size[0])
-                new_height = int(float(img.size[1]) * w_percent)
-                img_resized = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                img_resized.save(ruta_imagen)
+                guardar_tabla(pivot, ruta_imagen, estilo=ESTILO_PENDIENTES, ancho=ANCHO_IMAGEN_CORREO)
 
                 imagenes_generadas[canal] = ruta_imagen
                 print(f"✅ Imagen generada: canal_{nombre_archivo}.png")
@@ -516,7 +457,7 @@ class SistemaReportesPorCanal:
                 print(f"❌ No se encontró la imagen de firma: {self.firma_path}")
                 return []
 
-            df_destinatarios = pd.read_excel(ruta_listado)
+            df_destinatarios = leer_excel(ruta_listado)
             if 'Canal' not in df_destinatarios.columns:
                 raise ValueError("El archivo de destinatarios debe tener la columna 'Canal'.")
             df_destinatarios.set_index('Canal', inplace=True)
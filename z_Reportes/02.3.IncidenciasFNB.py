@@ -3,6 +3,13 @@ import os
 from datetime import datetime
 import win32com.client as win32
 from xlsxwriter import Workbook
+import sys
+from pathlib import Path
+
+# Librería compartida del repositorio (fnb_comun)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from fnb_comun.cruce_temporal import existe_registro_posterior
+from fnb_comun.excel import leer_excel
 
 ruta_base = r"D:\FNB\Reportes\19. Reportes IBR"
 ruta_procesado = os.path.join(ruta_base, r"00. Estructura Reporte\Procesado\Archivo_Procesado.xlsx")
@@ -59,7 +66,7 @@ def aplicar_exoneracion_global(df):
     
     try:
         if os.path.exists(ruta_exonerados):
-            df_exonerados = pd.read_excel(ruta_exonerados)
+            df_exonerados = leer_excel(ruta_exonerados)
             if 'Nro. DE CONTRATO' in df_exonerados.columns:
                 # Obtener lista de contratos exonerados, limpiando espacios y valores nulos
                 contratos_exonerados = set(
@@ -98,7 +105,7 @@ def aplicar_exoneracion_global(df):
 
 os.makedirs(ruta_salida, exist_ok=True)
 
-df = pd.read_excel(ruta_procesado, dtype=str)
+df = leer_excel(ruta_procesado, dtype=str, cache=True)
 df = df.apply(lambda col: col.map(lambda x: x.strip() if isinstance(x, str) else x) if col.dtype == 'object' else col)
 
 # Debug: Análisis de estados presentes en los datos
@@ -301,30 +308,15 @@ def filtro_ventas_rechazadas_sin_venta_posterior(df):
         'CUENTA CONTRATO', 'CLIENTE', 'IMPORTE (S./)', 'Nro. DE CUOTAS'
     ]].astype(str).agg('|'.join, axis=1)
 
-    # Buscar ventas posteriores exitosas
-    ids_excluir = set()
-
-    for idx, row in df_validos.iterrows():
-        clave = row['clave']
-        fecha_hora = row['FECHA_HORA_VENTA']
-
-        # Buscar ventas posteriores con mismas características
-        posteriores = claves_fecha[
-            (claves_fecha['clave'] == clave) &
-            (claves_fecha['FECHA_HORA_VENTA'] > fecha_hora) &
-            (claves_fecha['ESTADO'].isin(['ENTREGADO', 'PENDIENTE DE ENTREGA']))
-            ]
-
-        # También buscar ventas del mismo día (por si hay error en horas)
-        ventas_mismo_dia = claves_fecha[
-            (claves_fecha['clave'] == clave) &
-            (claves_fecha['FECHA_HORA_VENTA'].dt.date == fecha_hora.date()) &
-            (claves_fecha['FECHA_HORA_VENTA'] != fecha_hora) &
-            (claves_fecha['ESTADO'].isin(['ENTREGADO', 'PENDIENTE DE ENTREGA']))
-            ]
-
-        if not posteriores.empty or not ventas_mismo_dia.empty:
-            ids_excluir.add(row['id'])
+    # Buscar ventas posteriores exitosas (posteriores o del mismo día con otra hora,
+    # por si hay error en horas) en una sola pasada ordenada por clave y fecha
+    exitosas = claves_fecha['ESTADO'].isin(['ENTREGADO', 'PENDIENTE DE ENTREGA'])
+    con_posterior = existe_registro_posterior(
+        df_validos['clave'], df_validos['FECHA_HORA_VENTA'],
+        claves_fecha.loc[exitosas, 'clave'], claves_fecha.loc[exitosas, 'FECHA_HORA_VENTA'],
+        mismo_dia=True,
+    )
+    ids_excluir = set(df_validos.loc[con_posterior.to_numpy(), 'id'])
 
     resultado = df_validos[~df_validos['id'].isin(ids_excluir)]
 
@@ -468,7 +460,7 @@ if not archivos:
 
 # Leer destinatarios y enviar correos
 try:
-    correos = pd.read_excel(ruta_destinatarios)
+    correos = leer_excel(ruta_destinatarios)
     correos = correos.dropna(subset=['Destinatarios directos'])
 
     asunto = f"Reporte de transacciones observadas de la plataforma FNB al {fecha_nombre}"
@@ -5,6 +5,13 @@ from datetime import datetime, timedelta
 import win32com.client as win32
 from xlsxwriter import Workbook
 import re
+import sys
+from pathlib import Path
+
+# Librería compartida del repositorio (fnb_comun)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from fnb_comun.excel import leer_excel
+from fnb_comun.lectura_paralela import PROCESOS_LECTURA, precargar_excels
 
 # -------------------------
 # Configuración de rutas
@@ -124,6 +131,15 @@ def consolidar_archivos_sap(carpeta):
         print(f"   💾 Tamaño: {info['tamano_kb']:.2f} KB")
         print()
 
+    # Solo se parsean los archivos nuevos o modificados (en paralelo); el resto ya
+    # está en la caché columnar, indexada por ruta, tamaño y fecha de modificación
+    nuevos, errores = precargar_excels([info['ruta'] for info in info_archivos],
+                                       procesos=PROCESOS_LECTURA, dtype=str)
+    print(f"♻️  Archivos ya consolidados antes: {len(info_archivos) - len(nuevos)}")
+    print(f"⚡ Archivos nuevos parseados en paralelo: {len(nuevos) - len(errores)}")
+    for ruta, error in errores.items():
+        print(f"   ⚠️  {os.path.basename(ruta)}: {error} (se reintenta al consolidar)")
+
     print("🔄 Iniciando consolidación...")
     dfs = []
     registro_consolidacion = []
@@ -131,7 +147,7 @@ def consolidar_archivos_sap(carpeta):
     for i, info in enumerate(info_archivos, 1):
         try:
             print(f"📖 Leyendo archivo {i}/{len(info_archivos)}: {info['nombre']}")
-            df_temp = pd.read_excel(info['ruta'], dtype=str)
+            df_temp = leer_excel(info['ruta'], dtype=str, cache=True)
             df_temp['_ARCHIVO_ORIGEN'] = info['nombre']
             df_temp['_FECHA_ARCHIVO'] = info['fecha_orden'].strftime('%d/%m/%Y %H:%M:%S')
             registros = len(df_temp)
@@ -296,28 +312,34 @@ def aplicar_exoneraciones(df, ids_exonerados):
     return df_filtrado, registros_exonerados, df_exonerados_df
 
 
-def verificar_estados_equivalentes(estado_sap, estado_fnb):
-    sap_vacio = pd.isna(estado_sap) or estado_sap == '' or (isinstance(estado_sap, str) and estado_sap.strip() == '')
-    fnb_vacio = pd.isna(estado_fnb) or estado_fnb == '' or (isinstance(estado_fnb, str) and estado_fnb.strip() == '')
-    if sap_vacio and fnb_vacio:
-        return True
-    if sap_vacio or fnb_vacio:
-        return False
-    estado_sap = str(estado_sap).upper().strip()
-    estado_fnb = str(estado_fnb).upper().strip()
-    equivalencias = {
-        'CONCLUIDO': ['ENTREGADO', 'PENDIENTE DE ANULACIÓN'],
-        'EN TRATAMIENTO': ['PENDIENTE DE ENTREGA', 'ERROR DE INTEGRACIÓN', 'PENDIENTE DE ANULACIÓN', 'PENDIENTE DE APROBACIÓN'],
-        'RECHAZADO': ['ANULADO', 'ANULADO POR CRÉDITO']
-    }
-    for sap_estado, fnb_estados in equivalencias.items():
-        if estado_sap == sap_estado and estado_fnb in fnb_estados:
-            return True
-    return False
+# Estado SAP → estados FNB considerados equivalentes
+EQUIVALENCIAS_ESTADOS = {
+    'CONCLUIDO': ['ENTREGADO', 'PENDIENTE DE ANULACIÓN'],
+    'EN TRATAMIENTO': ['PENDIENTE DE ENTREGA', 'ERROR DE INTEGRACIÓN', 'PENDIENTE DE ANULACIÓN', 'PENDIENTE DE APROBACIÓN'],
+    'RECHAZADO': ['ANULADO', 'ANULADO POR CRÉDITO']
+}
+
+# Tabla de búsqueda (SAP, FNB) precalculada: un solo isin para toda la columna
+PARES_ESTADOS_EQUIVALENTES = pd.MultiIndex.from_tuples(
+    [(sap, fnb) for sap, fnbs in EQUIVALENCIAS_ESTADOS.items() for fnb in fnbs]
+)
+
 
+def _normalizar_texto(serie):
+    """Mayúsculas sin espacios; vacíos y nulos quedan como ''."""
+    return serie.where(serie.notna(), '').astype(str).str.upper().str.strip()
 
-def tiene_datos(valor):
-    return pd.notna(valor) and str(valor).strip() != ''
+
+def estados_equivalentes(estado_sap, estado_fnb):
+    """Serie booleana: ambos estados vacíos, o el par (SAP, FNB) está en EQUIVALENCIAS_ESTADOS."""
+    sap = _normalizar_texto(estado_sap)
+    fnb = _normalizar_texto(estado_fnb)
+    ambos_vacios = (sap == '') & (fnb == '')
+    return ambos_vacios | pd.MultiIndex.from_arrays([sap, fnb]).isin(PARES_ESTADOS_EQUIVALENTES)
+
+
+def tiene_datos(serie):
+    return serie.notna() & (serie.astype(str).str.strip() != '')
 
 
 def formatear_df_sap(df_filtrado):
@@ -386,7 +408,7 @@ df_exonerados = None
 registros_exonerados = set()
 if os.path.exists(ruta_exonerados):
     try:
-        df_exonerados = pd.read_excel(ruta_exonerados, dtype=str)
+        df_exonerados = leer_excel(ruta_exonerados, dtype=str)
         if 'Id FNB' in df_exonerados.columns:
             ids_exonerados = df_exonerados['Id FNB'].dropna()
             ids_exonerados = ids_exonerados[ids_exonerados.astype(str).str.strip() != '']
@@ -407,7 +429,7 @@ else:
 # Leer archivo procesado
 print("📂 Cargando archivo procesado...")
 try:
-    df_procesado = pd.read_excel(ruta_procesado, dtype=str)
+    df_procesado = leer_excel(ruta_procesado, dtype=str)
     print(f"✅ Archivo procesado cargado: {len(df_procesado)} registros")
 except Exception as e:
     print(f"❌ Error cargando archivo procesado: {str(e)}")
@@ -533,102 +555,90 @@ print(f"📅 Fecha del reporte: {fecha_actual} ({fecha_actual_texto})")
 # -------------------------
 # Definir escenarios con segmentación
 # -------------------------
-def crear_escenarios(df):
-    todos_los_escenarios = []
-    
-    # Escenario 1: Fecha de Venta diferente
-    df_fecha_venta = df[df['Mensaje comparativa F Venta'].notna() & (df['Mensaje comparativa F Venta'] != '')].copy()
-    todos_los_escenarios.append(("Fecha de Venta diferente entre SAP y FNB", df_fecha_venta))
-    
-    # Escenario 2: Fecha de Entrega diferente (con columna TIPO DESPACHO)
-    df_fecha_entrega = df[df['Mensaje comparativa F Entega'].notna() & (df['Mensaje comparativa F Entega'] != '')].copy()
-    todos_los_escenarios.append(("Fecha de Entrega diferente entre SAP y FNB", df_fecha_entrega))
-    
-    # Escenario 3: Responsable de Venta diferente
-    df_responsable = df[df['Mensaje comparativa Responsable'].notna() & (df['Mensaje comparativa Responsable'] != '')].copy()
-    todos_los_escenarios.append(("Responsable de Venta diferente entre SAP y FNB", df_responsable))
-    
-    # Escenario 4: Aliado Comercial diferente
-    df_aliado = df[df['Mensaje comparativa Aliado'].notna() & (df['Mensaje comparativa Aliado'] != '')].copy()
-    todos_los_escenarios.append(("Aliado Comercial (Proveedor) diferente entre SAP y FNB", df_aliado))
-    
-    # Escenario 5: Sede diferente - SEGMENTADO POR COMERCIAL Y PROYECTOS
-    df_sede_base = df[df['Mensaje comparativa Sede'].notna() & (df['Mensaje comparativa Sede'] != '')].copy()
-    
-    # Sede - Comercial: Codigo sede SAP está en blanco
-    condicion_sede_comercial = (
-        df_sede_base['Codigo sede SAP'].isna() | 
-        (df_sede_base['Codigo sede SAP'].astype(str).str.strip() == '') |
-        (df_sede_base['Codigo sede SAP'].astype(str).str.strip() == 'nan')
-    )
-    df_sede_comercial = df_sede_base[condicion_sede_comercial].copy()
-    todos_los_escenarios.append(("Sede diferente entre SAP y FNB - Comercial", df_sede_comercial))
-    
-    # Sede - Proyectos: Codigo sede SAP tiene valor
-    df_sede_proyectos = df_sede_base[~condicion_sede_comercial].copy()
-    todos_los_escenarios.append(("Sede diferente entre SAP y FNB - Proyectos", df_sede_proyectos))
-    
-    # Escenario 6: Importe Financiado diferente
-    df_importe = df[df['Mensaje comparativa Importe'].notna() & (df['Mensaje comparativa Importe'] != '')].copy()
-    todos_los_escenarios.append(("Importe Financiado diferente entre SAP y FNB", df_importe))
-    
-    # Escenario 7: Nro. de Cuotas diferentes
-    df_cuotas = df[df['Mensaje comparativa Cuotas'].notna() & (df['Mensaje comparativa Cuotas'] != '')].copy()
-    todos_los_escenarios.append(("Nro. de Cuotas diferentes entre SAP y FNB", df_cuotas))
-    
-    # Escenario 8: Estados de Entrega diferentes - SEGMENTADO POR COMERCIAL Y PROYECTOS
-    df_estados_diferentes = df[
-        ~df.apply(lambda row: verificar_estados_equivalentes(row['Estado SAP'], row['Estado FNB']), axis=1)
-    ].copy()
-    
-    # Estados - Comercial: 
-    # 1) Estado SAP es RECHAZADO y Estado FNB es ENTREGADO o PENDIENTE DE ENTREGA
-    # 2) Estado FNB contiene "Validación" (case insensitive)
-    condicion_estados_comercial = (
-        (
-            (df_estados_diferentes['Estado SAP'].astype(str).str.upper().str.strip() == 'RECHAZADO') &
-            (df_estados_diferentes['Estado FNB'].astype(str).str.upper().str.strip().isin(['ENTREGADO', 'PENDIENTE DE ENTREGA']))
-        ) |
-        (
-            df_estados_diferentes['Estado FNB'].astype(str).str.upper().str.contains('VALIDACIÓN', na=False)
-        )
-    )
-    df_estados_comercial = df_estados_diferentes[condicion_estados_comercial].copy()
-    todos_los_escenarios.append(("Estados de Entrega diferentes entre SAP y FNB - Comercial", df_estados_comercial))
-    
-    # Estados - Proyectos: el resto
-    df_estados_proyectos = df_estados_diferentes[~condicion_estados_comercial].copy()
-    todos_los_escenarios.append(("Estados de Entrega diferentes entre SAP y FNB - Proyectos", df_estados_proyectos))
-    
-    # Escenario 9 y 10: Contrato
-    df_contrato_general = df[df['Mensaje comparativa Contrato'].notna() & (df['Mensaje comparativa Contrato'] != '')].copy()
-    condicion_tienda_virtual = (
-            df_contrato_general['Contrato SAP'].notna() &
-            (df_contrato_general['Contrato SAP'] != '') &
-            (df_contrato_general['Contrato'].isna() | (df_contrato_general['Contrato'] == '')) &
-            (df_contrato_general['Nombre Responsable SAP'].str.upper() == 'TIENDA VIRTUAL WEB')
+def _con_mensaje(df, columna):
+    return df[columna].notna() & (df[columna] != '')
+
+
+def _condiciones_base(df):
+    """Condiciones compartidas por varias reglas; se evalúan una sola vez por corrida."""
+    codigo_sede = df['Codigo sede SAP'].astype(str).str.strip()
+    estado_sap = df['Estado SAP'].astype(str).str.upper().str.strip()
+    estado_fnb = df['Estado FNB'].astype(str).str.upper()
+    return {
+        'sede': _con_mensaje(df, 'Mensaje comparativa Sede'),
+        # Sede - Comercial: Codigo sede SAP está en blanco (Proyectos: tiene valor)
+        'sede_comercial': df['Codigo sede SAP'].isna() | codigo_sede.isin(['', 'nan']),
+        'estados_diferentes': ~estados_equivalentes(df['Estado SAP'], df['Estado FNB']),
+        # Estados - Comercial:
+        # 1) Estado SAP es RECHAZADO y Estado FNB es ENTREGADO o PENDIENTE DE ENTREGA
+        # 2) Estado FNB contiene "Validación" (case insensitive)
+        'estados_comercial': (
+            ((estado_sap == 'RECHAZADO') & estado_fnb.str.strip().isin(['ENTREGADO', 'PENDIENTE DE ENTREGA'])) |
+            estado_fnb.str.contains('VALIDACIÓN', na=False)
+        ),
+        'contrato': _con_mensaje(df, 'Mensaje comparativa Contrato'),
+        'tienda_virtual': (
+            df['Contrato SAP'].notna() &
+            (df['Contrato SAP'] != '') &
+            (df['Contrato'].isna() | (df['Contrato'] == '')) &
+            (df['Nombre Responsable SAP'].str.upper() == 'TIENDA VIRTUAL WEB').fillna(False).astype(bool)
+        ),
+        'id_fnb': tiene_datos(df['Id FNB']),
+        'pedido_sap': tiene_datos(df['Numero pedido SAP']),
+    }
+
+
+# Escenarios: (nombre, regla). Cada regla recibe el DataFrame y las condiciones base
+# y devuelve la máscara de filas del escenario. Para agregar uno basta una línea aquí.
+REGLAS_ESCENARIOS = [
+    ("Fecha de Venta diferente entre SAP y FNB",
+     lambda df, c: _con_mensaje(df, 'Mensaje comparativa F Venta')),
+    ("Fecha de Entrega diferente entre SAP y FNB",
+     lambda df, c: _con_mensaje(df, 'Mensaje comparativa F Entega')),
+    ("Responsable de Venta diferente entre SAP y FNB",
+     lambda df, c: _con_mensaje(df, 'Mensaje comparativa Responsable')),
+    ("Aliado Comercial (Proveedor) diferente entre SAP y FNB",
+     lambda df, c: _con_mensaje(df, 'Mensaje comparativa Aliado')),
+    ("Sede diferente entre SAP y FNB - Comercial",
+     lambda df, c: c['sede'] & c['sede_comercial']),
+    ("Sede diferente entre SAP y FNB - Proyectos",
+     lambda df, c: c['sede'] & ~c['sede_comercial']),
+    ("Importe Financiado diferente entre SAP y FNB",
+     lambda df, c: _con_mensaje(df, 'Mensaje comparativa Importe')),
+    ("Nro. de Cuotas diferentes entre SAP y FNB",
+     lambda df, c: _con_mensaje(df, 'Mensaje comparativa Cuotas')),
+    ("Estados de Entrega diferentes entre SAP y FNB - Comercial",
+     lambda df, c: c['estados_diferentes'] & c['estados_comercial']),
+    ("Estados de Entrega diferentes entre SAP y FNB - Proyectos",
+     lambda df, c: c['estados_diferentes'] & ~c['estados_comercial']),
+    ("Nro de Contrato CD - Casos por regularizar el Nro. Contrato CD de la tienda virtual en el reporte de la plataforma FNB",
+     lambda df, c: c['contrato'] & c['tienda_virtual']),
+    ("Nro de Contrato CD - Casos regulares detectados",
+     lambda df, c: c['contrato'] & ~c['tienda_virtual']),
+    ("Transacciones FNB que no figuran en SAP",
+     lambda df, c: c['id_fnb'] & ~c['pedido_sap']),
+    ("Transacciones SAP que no figuran en FNB",
+     lambda df, c: c['pedido_sap'] & ~c['id_fnb']),
+]
+
+
+def evaluar_escenarios(df):
+    """
+    Evalúa todas las reglas en una pasada: DataFrame booleano con una columna por escenario.
+
+    Un registro puede caer en varios escenarios a la vez (p. ej. fecha e importe distintos).
+    """
+    condiciones = _condiciones_base(df)
+    return pd.DataFrame(
+        {nombre: regla(df, condiciones).to_numpy(dtype=bool) for nombre, regla in REGLAS_ESCENARIOS},
+        index=df.index,
     )
-    df_contrato_tienda_virtual = df_contrato_general[condicion_tienda_virtual].copy()
-    todos_los_escenarios.append((
-        "Nro de Contrato CD - Casos por regularizar el Nro. Contrato CD de la tienda virtual en el reporte de la plataforma FNB",
-        df_contrato_tienda_virtual
-    ))
-    df_contrato_regulares = df_contrato_general[~condicion_tienda_virtual].copy()
-    todos_los_escenarios.append(("Nro de Contrato CD - Casos regulares detectados", df_contrato_regulares))
-    
-    # Escenario 11: Transacciones FNB que no figuran en SAP
-    df_fnb_no_sap = df[
-        df['Id FNB'].apply(tiene_datos) & ~df['Numero pedido SAP'].apply(tiene_datos)
-    ].copy()
-    todos_los_escenarios.append(("Transacciones FNB que no figuran en SAP", df_fnb_no_sap))
-    
-    # Escenario 12: Transacciones SAP que no figuran en FNB
-    df_sap_no_fnb = df[
-        df['Numero pedido SAP'].apply(tiene_datos) & ~df['Id FNB'].apply(tiene_datos)
-    ].copy()
-    todos_los_escenarios.append(("Transacciones SAP que no figuran en FNB", df_sap_no_fnb))
-    
-    return todos_los_escenarios
+
+
+def crear_escenarios(df):
+    mascaras = evaluar_escenarios(df)
+    return [(nombre, df[mascaras[nombre].to_numpy()].copy()) for nombre in mascaras.columns]
+
 
 print("🔄 Procesando escenarios...")
 todos_los_escenarios = crear_escenarios(df_sap_con_canal)
@@ -713,7 +723,7 @@ else:
     print("\n📧 Preparando envío de correos principales...")
 
     try:
-        correos = pd.read_excel(ruta_destinatarios)
+        correos = leer_excel(ruta_destinatarios)
         correos = correos.dropna(subset=['Destinatarios directos'])
 
         asunto = f"Reporte de diferencias entre SAP y la plataforma FNB al {fecha_actual}"
@@ -796,7 +806,7 @@ if enviar_segundo_correo:
 
     try:
         if os.path.exists(ruta_destinatarios_exonerados):
-            correos_exonerados = pd.read_excel(ruta_destinatarios_exonerados)
+            correos_exonerados = leer_excel(ruta_destinatarios_exonerados)
             correos_exonerados = correos_exonerados.dropna(subset=['Destinatarios directos'])
 
             outlook = win32.Dispatch("Outlook.Application")
@@ -1,6 +1,8 @@
 import pandas as pd
+import numpy as np
 import os
 import psycopg2
+from dataclasses import replace
 from datetime import datetime, timedelta
 import win32com.client as win32
 import time
@@ -9,14 +11,80 @@ from pathlib import Path
 import logging
 from typing import List, Tuple, Optional
 from openpyxl import load_workbook
-from openpyxl.styles import Font, PatternFill, Alignment
 from openpyxl.utils.dataframe import dataframe_to_rows
 import psutil
 
+# Librería compartida del repositorio (fnb_comun)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from fnb_comun.db import conexion, obtener_pg_config
+from fnb_comun.escritura_excel import escribir_excel
+from fnb_comun.resumen_colocaciones import TABLA_RESUMEN, resumen_completo
+from fnb_comun.tabla_imagen import ESTILO_NEGRO, guardar_tabla
+
 # Configuración de logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Tablas de las imágenes del correo: Verdana 8 pt, cabecera negra, subtotales grises
+ESTILO_TABLA = replace(ESTILO_NEGRO, familia='Verdana', tamaño=8, fondo_total='#D9D9D9')
+
+# Tipo de tabla → (columna del detalle, cabecera de la imagen)
+COLUMNAS_TABLA = {
+    'canal': ('Canal', 'Canal de Venta'),
+    'sede': ('Nombre Tienda de Venta', 'Sede'),
+    'proveedor': ('Nombre de Proveedor', 'Proveedor')
+}
+
+ESTADOS_ENTREGA = ['Producto Entregado', 'Pendiente de Entrega']
+
+# Ventana del reporte por f_entrega (incluye pedidos aún sin entrega)
+FILTRO_VENTANA = "((f_entrega >= %s AND f_entrega <= %s) OR f_entrega IS NULL)"
+FILTRO_VENTANA_RESUMEN = "((dia >= %s::date AND dia <= %s::date) OR dia IS NULL)"
+
+# Filas de origen de los totales: el detalle o el resumen diario que mantiene el cargador 03.3
+ORIGEN_DETALLE = """
+    SELECT estado_entrega, canal, sede, proveedor,
+           COALESCE(colocacion_sol, 0) AS importe, COALESCE(nro_transacciones, 0) AS transacciones,
+           1 AS registros
+    FROM bd_colocaciones
+"""
+ORIGEN_RESUMEN = f"""
+    SELECT estado_entrega, canal, sede, proveedor, importe, transacciones, registros
+    FROM {TABLA_RESUMEN}
+"""
+
+
+def etiqueta_sql(columna):
+    """Etiqueta limpia como en `_preparar_detalle`: strip, saltos de línea → espacio y 'nan'/'None'/NULL → ''"""
+    limpio = f"replace(btrim(COALESCE({columna}, ''), E' \\t\\n\\r'), E'\\n', ' ')"
+    return f"CASE WHEN {limpio} IN ('nan', 'None') THEN '' ELSE {limpio} END"
+
+
+# Totales de todas las tablas de un destinatario en una sola consulta (modo "servidor").
+# Las etiquetas se limpian y los vacíos se agrupan como '' igual que en el detalle limpiado con pandas.
+CONSULTA_AGREGADOS = f"""
+WITH base AS (
+    SELECT
+        {etiqueta_sql('estado_entrega')} AS estado,
+        {etiqueta_sql('canal')} AS canal,
+        {etiqueta_sql('sede')} AS sede,
+        {etiqueta_sql('proveedor')} AS proveedor,
+        importe, transacciones, registros
+    FROM ({{origen}}) AS o
+)
+SELECT
+    GROUPING(estado) AS g_estado, GROUPING(canal) AS g_canal,
+    GROUPING(sede) AS g_sede, GROUPING(proveedor) AS g_proveedor,
+    estado, canal, sede, proveedor,
+    SUM(importe) AS importe, SUM(transacciones) AS transacciones, SUM(registros) AS registros
+FROM base
+GROUP BY GROUPING SETS (
+    (), (estado), (canal),
+    (estado, canal), (estado, sede), (estado, proveedor),
+    (estado, canal, proveedor)
+)
+"""
+
 class ReporteFNBPostgreSQL:
     def __init__(self):
         # NOTA: La fecha se ajustará después de seleccionar la actividad
@@ -35,19 +103,23 @@ class ReporteFNBPostgreSQL:
         self.exonerados = []  # Lista de pedidos exonerados
         self.solo_canales_propios = False
 
-        # Configuración de PostgreSQL
-        self.db_config = {
-            "host": "localhost",
-            "port": 5432,
-            "database": "bd_calidda_fnb",
-            "user": "postgres",
-            "password": "ibr2025"
-        }
+        # Configuración de PostgreSQL: común a cargadores y reportes (fnb_comun/db.py,
+        # variables PG* o valores por defecto); conexiones con parámetros de sesión de reporte
+        self.db_config = obtener_pg_config()
 
         # NUEVOS PARÁMETROS
-        self.modo_render = "chrome"
         self.formatear_excel = True
 
+        # Dónde se calculan las tablas de las imágenes:
+        #   "servidor": PostgreSQL agrega por canal/sede/proveedor/estado (GROUPING SETS) y
+        #               solo se trae el detalle de cada adjunto, por lotes (cursor del servidor)
+        #   "pandas":   se trae todo el mes a memoria y se agrupa en Python
+        self.modo_agregacion = "servidor"
+        self.filas_por_lote = 20000
+        # Modo "servidor": leer los totales del resumen diario del cargador 03.3 cuando esté completo
+        # (no aplica a SALESLAND con exonerados, que filtra por pedido)
+        self.usar_resumen = True
+
         # Crear carpetas si no existen (incluyendo padres)
         self.ruta_salida.mkdir(parents=True, exist_ok=True)
         self.ruta_imagenes.mkdir(parents=True, exist_ok=True)
@@ -110,6 +182,7 @@ class ReporteFNBPostgreSQL:
             'Rangos', 'Zona de Venta', 'Marca', 'Modelo', 'Canal', 'Tipo de Producto',
             'Tipo Instalación', '# Transacciones'
         ]
+        self.columnas_bd = {excel: bd for bd, excel in self.mapeo_columnas.items()}
 
     def seleccionar_actividad(self) -> str:
         """Selecciona el tipo de actividad y configura la fecha según el tipo"""
@@ -157,7 +230,6 @@ class ReporteFNBPostgreSQL:
         """Carga y procesa los datos desde PostgreSQL"""
         try:
             logger.info(f"Conectando a PostgreSQL ({self.db_config['database']})...")
-            conn = psycopg2.connect(**self.db_config)
 
             # Construir query con filtro de fecha por f_entrega (incluyendo NULL)
             query = """
@@ -180,34 +252,12 @@ class ReporteFNBPostgreSQL:
 
             logger.info(f"Filtrando por f_entrega: {self.fecha_filtro_inicio.strftime('%Y-%m-%d %H:%M:%S')} a {self.fecha_filtro_fin.strftime('%Y-%m-%d %H:%M:%S')} (incluyendo NULL)")
             
-            df = pd.read_sql(query, conn, params=(self.fecha_filtro_inicio, self.fecha_filtro_fin))
-            conn.close()
+            with conexion("reporte", self.db_config) as conn:
+                df = pd.read_sql(query, conn, params=(self.fecha_filtro_inicio, self.fecha_filtro_fin))
 
             logger.info(f"Registros obtenidos de PostgreSQL: {len(df):,}")
 
-            # Renombrar columnas según mapeo
-            df.rename(columns=self.mapeo_columnas, inplace=True)
-
-            # Filtrar solo columnas necesarias
-            columnas_existentes = [col for col in self.columnas_deseadas if col in df.columns]
-            df = df[columnas_existentes]
-
-            # Asegurar tipos de datos correctos
-            if 'F. Entrega' in df.columns:
-                df['F. Entrega'] = pd.to_datetime(df['F. Entrega'], errors='coerce')
-            if 'F. Registro' in df.columns:
-                df['F. Registro'] = pd.to_datetime(df['F. Registro'], errors='coerce')
-
-            # Convertir columnas numéricas
-            if 'Importe Colocación  S/' in df.columns:
-                df['Importe Colocación  S/'] = pd.to_numeric(df['Importe Colocación  S/'], errors='coerce').fillna(0)
-            if '# Transacciones' in df.columns:
-                df['# Transacciones'] = pd.to_numeric(df['# Transacciones'], errors='coerce').fillna(0)
-
-            # Limpiar strings: quitar saltos de línea y espacios extras
-            for col in df.select_dtypes(include=['object']).columns:
-                df[col] = df[col].astype(str).str.strip().str.replace('\n', ' ', regex=True)
-                df[col] = df[col].replace('nan', '').replace('None', '')
+            df = self._preparar_detalle(df)
 
             # Determinar fecha real a mostrar: fecha más reciente de f_entrega válida
             df_con_fecha = df[df['F. Entrega'].notna()].copy()
@@ -231,6 +281,108 @@ class ReporteFNBPostgreSQL:
             logger.error(f"Error cargando datos desde PostgreSQL: {e}")
             raise
 
+    def _preparar_detalle(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Renombra, tipa y limpia el detalle leído de bd_colocaciones"""
+        # Renombrar columnas según mapeo
+        df.rename(columns=self.mapeo_columnas, inplace=True)
+
+        # Filtrar solo columnas necesarias
+        columnas_existentes = [col for col in self.columnas_deseadas if col in df.columns]
+        df = df[columnas_existentes]
+
+        # Asegurar tipos de datos correctos
+        if 'F. Entrega' in df.columns:
+            df['F. Entrega'] = pd.to_datetime(df['F. Entrega'], errors='coerce')
+        if 'F. Registro' in df.columns:
+            df['F. Registro'] = pd.to_datetime(df['F. Registro'], errors='coerce')
+
+        # Convertir columnas numéricas
+        if 'Importe Colocación  S/' in df.columns:
+            df['Importe Colocación  S/'] = pd.to_numeric(df['Importe Colocación  S/'], errors='coerce').fillna(0)
+        if '# Transacciones' in df.columns:
+            df['# Transacciones'] = pd.to_numeric(df['# Transacciones'], errors='coerce').fillna(0)
+
+        # Limpiar strings: quitar saltos de línea y espacios extras
+        for col in df.select_dtypes(include=['object']).columns:
+            df[col] = df[col].astype(str).str.strip().str.replace('\n', ' ', regex=True)
+            df[col] = df[col].replace('nan', '').replace('None', '')
+        return df
+
+    def definir_fecha_reporte(self, conn):
+        """Fecha a mostrar: la f_entrega más reciente de la ventana (o el fin del filtro)"""
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT MAX(f_entrega) FROM bd_colocaciones WHERE f_entrega >= %s AND f_entrega <= %s",
+                           (self.fecha_filtro_inicio, self.fecha_filtro_fin))
+            fecha_maxima = cursor.fetchone()[0] or self.fecha_filtro_fin
+        conn.commit()
+        self.fecha_str = fecha_maxima.strftime('%Y-%m-%d')
+        self.fecha_mostrar = fecha_maxima.strftime('%d/%m/%Y')
+        logger.info(f"Fecha para reportes: {self.fecha_mostrar} ({self.fecha_str})")
+
+    def condicion_destinatario(self, nombre: str, condiciones: dict, resumen: bool = False) -> Tuple[str, list]:
+        """WHERE (y parámetros) de la ventana del reporte para un destinatario, sobre el detalle o el resumen"""
+        partes = [FILTRO_VENTANA_RESUMEN if resumen else FILTRO_VENTANA]
+        params = [self.fecha_filtro_inicio, self.fecha_filtro_fin]
+        for columna, valor in condiciones.items():
+            partes.append(f"{self.columnas_bd[columna]} = %s")
+            params.append(valor)
+        if not resumen and nombre == 'SALESLAND' and self.exonerados:
+            partes.append("(pedido_venta IS NULL OR pedido_venta::text <> ALL(%s))")
+            params.append(self.exonerados)
+        return " AND ".join(partes), params
+
+    def consultar_agregados(self, conn, condicion: str, params: list, resumen: bool = False) -> pd.DataFrame:
+        """Totales por estado/canal/sede/proveedor calculados en PostgreSQL (desde el detalle o el resumen)"""
+        origen = ORIGEN_RESUMEN if resumen else ORIGEN_DETALLE
+        with conn.cursor() as cursor:
+            cursor.execute(CONSULTA_AGREGADOS.format(origen=f"{origen} WHERE {condicion}"), params)
+            columnas = [d[0] for d in cursor.description]
+            agregados = pd.DataFrame(cursor.fetchall(), columns=columnas)
+        agregados[['importe', 'transacciones']] = agregados[['importe', 'transacciones']].astype(float)
+        return agregados
+
+    def leer_detalle_servidor(self, conn, condicion: str, params: list) -> pd.DataFrame:
+        """Detalle de un destinatario leído por lotes con un cursor del servidor"""
+        columnas = [self.columnas_bd[col] for col in self.columnas_deseadas]
+        lotes = []
+        with conn.cursor(name='detalle_colocaciones') as cursor:
+            cursor.itersize = self.filas_por_lote
+            cursor.execute(
+                f"SELECT {', '.join(columnas)} FROM bd_colocaciones WHERE {condicion} ORDER BY f_entrega, pedido_venta",
+                params
+            )
+            while True:
+                filas = cursor.fetchmany(self.filas_por_lote)
+                if not filas:
+                    break
+                lotes.append(pd.DataFrame.from_records(filas, columns=columnas, coerce_float=True))
+
+        df = pd.concat(lotes, ignore_index=True) if lotes else pd.DataFrame(columns=columnas)
+        return self._preparar_detalle(df)
+
+    def cargar_destinatario_servidor(self, conn, nombre: str, condiciones: dict) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """(agregados, detalle) de un destinatario; detalle vacío si no tiene registros"""
+        condicion, params = self.condicion_destinatario(nombre, condiciones)
+        resumen = self.resumen_disponible and not (nombre == 'SALESLAND' and self.exonerados)
+        try:
+            if resumen:
+                agregados = self.consultar_agregados(conn, *self.condicion_destinatario(nombre, condiciones, True),
+                                                     resumen=True)
+            else:
+                agregados = self.consultar_agregados(conn, condicion, params)
+            total = agregados[(agregados[['g_estado', 'g_canal', 'g_sede', 'g_proveedor']] == 1).all(axis=1)]
+            if total.empty or not total['registros'].iloc[0]:
+                conn.commit()
+                return agregados, pd.DataFrame()
+            data = self.leer_detalle_servidor(conn, condicion, params)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        origen = TABLA_RESUMEN if resumen else "detalle"
+        logger.info(f"Registros de {nombre}: {len(data):,} (totales calculados en PostgreSQL desde {origen})")
+        return agregados, data
+
     def cargar_destinatarios(self):
         """Carga los archivos de destinatarios"""
         try:
@@ -290,13 +442,7 @@ class ReporteFNBPostgreSQL:
             if data_filtrada.empty:
                 return pd.DataFrame()
 
-            columna_mapping = {
-                'canal': ('Canal', 'Canal de Venta'),
-                'sede': ('Nombre Tienda de Venta', 'Sede'),
-                'proveedor': ('Nombre de Proveedor', 'Proveedor')
-            }
-
-            col_secundaria, nombre_cabecera = columna_mapping.get(tipo_tabla, ('Nombre de Proveedor', 'Proveedor'))
+            col_secundaria, nombre_cabecera = COLUMNAS_TABLA.get(tipo_tabla, COLUMNAS_TABLA['proveedor'])
 
             if col_secundaria not in data_filtrada.columns:
                 return pd.DataFrame()
@@ -318,8 +464,7 @@ class ReporteFNBPostgreSQL:
                     })
 
             else:
-                estados_entrega = ['Producto Entregado', 'Pendiente de Entrega']
-                for estado in estados_entrega:
+                for estado in ESTADOS_ENTREGA:
                     if estado in data_filtrada['Estado de Entrega'].values:
                         estado_data = data_filtrada[data_filtrada['Estado de Entrega'] == estado]
                         subtotal_importe = estado_data['Importe Colocación  S/'].sum()
@@ -347,7 +492,79 @@ class ReporteFNBPostgreSQL:
 
             total_importe = data_filtrada['Importe Colocación  S/'].sum()
             total_transacciones = data_filtrada['# Transacciones'].sum()
+            return self._formatear_tabla(filas_tabla, nombre_cabecera, total_importe, total_transacciones)
+
+        except Exception as e:
+            logger.error(f"Error creando tabla dinámica: {e}")
+            return pd.DataFrame()
+
+    def crear_tabla_agregada(
+            self,
+            agregados: pd.DataFrame,
+            tipo_tabla: str = 'general',
+            canal: str = None,
+            estado: str = None,
+            omitir_subtotales: bool = False
+    ) -> pd.DataFrame:
+        """Misma tabla que crear_tabla_dinamica, armada con los totales de consultar_agregados"""
+        try:
+            dimension = tipo_tabla if tipo_tabla in COLUMNAS_TABLA else 'proveedor'
+            nombre_cabecera = COLUMNAS_TABLA[dimension][1]
+            filtros = {'canal': canal, 'estado': estado}
+
+            def nivel(*dimensiones):
+                """Filas del grouping set exacto `dimensiones`, con los filtros de canal/estado"""
+                agrupadas = set(dimensiones) | {d for d, v in filtros.items() if v is not None}
+                mascara = pd.Series(True, index=agregados.index)
+                for d in ('estado', 'canal', 'sede', 'proveedor'):
+                    mascara &= agregados[f'g_{d}'] == (0 if d in agrupadas else 1)
+                for d, valor in filtros.items():
+                    if valor is not None:
+                        mascara &= agregados[d] == valor
+                return agregados[mascara]
+
+            total = nivel()
+            if total.empty or total['registros'].sum() == 0:
+                return pd.DataFrame()
+
+            def filas_detalle(grupo):
+                grupo = grupo.sort_values('importe', ascending=False)
+                return [{
+                    nombre_cabecera: valor,
+                    'Importe S/': importe,
+                    '# Transacciones': transacciones,
+                    'Es_Subtotal': False
+                } for valor, importe, transacciones in zip(grupo[dimension], grupo['importe'], grupo['transacciones'])]
+
+            filas_tabla = []
+            if omitir_subtotales:
+                filas_tabla.extend(filas_detalle(nivel(dimension)))
+            else:
+                subtotales = nivel('estado')
+                detalle = nivel('estado', dimension)
+                for est in ESTADOS_ENTREGA:
+                    subtotal = subtotales[subtotales['estado'] == est]
+                    if subtotal.empty:
+                        continue
+                    filas_tabla.append({
+                        nombre_cabecera: est,
+                        'Importe S/': subtotal['importe'].iloc[0],
+                        '# Transacciones': subtotal['transacciones'].iloc[0],
+                        'Es_Subtotal': True
+                    })
+                    filas_tabla.extend(filas_detalle(detalle[detalle['estado'] == est]))
+
+            return self._formatear_tabla(filas_tabla, nombre_cabecera,
+                                         total['importe'].iloc[0], total['transacciones'].iloc[0])
 
+        except Exception as e:
+            logger.error(f"Error creando tabla desde agregados: {e}")
+            return pd.DataFrame()
+
+    def _formatear_tabla(self, filas_tabla: list, nombre_cabecera: str,
+                         total_importe: float, total_transacciones: float) -> pd.DataFrame:
+        """Agrega el Total General, el % de participación y el formato de texto de la tabla"""
+        try:
             filas_tabla.append({
                 nombre_cabecera: "Total General",
                 'Importe S/': total_importe,
@@ -370,90 +587,37 @@ class ReporteFNBPostgreSQL:
             return df_final
 
         except Exception as e:
-            logger.error(f"Error creando tabla dinámica: {e}")
+            logger.error(f"Error formateando tabla: {e}")
             return pd.DataFrame()
 
     def crear_imagen_tabla(self, df_tabla: pd.DataFrame, nombre_archivo: str) -> Optional[str]:
-        """Crea imagen de tabla completa usando dataframe_image y chrome sin recortes"""
+        """Crea la imagen de la tabla completa (subtotales en gris y negrita)"""
         try:
-            # Lazy import para evitar retrasos en el inicio si no se requiere
-            try:
-                import dataframe_image as dfi
-            except Exception as ie:
-                logger.error(f"dataframe_image no disponible: {ie}")
-                return None
-
             if df_tabla.empty:
                 return None
 
             df_imagen = df_tabla.drop(columns=['Es_Subtotal'], errors='ignore').reset_index(drop=True)
-
-            def aplicar_estilo(row):
-                if row.name < len(df_tabla) and 'Es_Subtotal' in df_tabla.columns:
-                    if df_tabla.iloc[row.name]['Es_Subtotal']:
-                        return ['background-color: #D9D9D9; font-weight: bold'] * len(row)
-                return ['background-color: white'] * len(row)
-
-            df_styled = df_imagen.style.apply(aplicar_estilo, axis=1)
-
-            df_styled = df_styled.set_table_styles([
-                {'selector': 'th', 'props': [
-                    ('background-color', '#000000'),
-                    ('color', 'white'),
-                    ('font-weight', 'bold'),
-                    ('text-align', 'center'),
-                    ('border', '1px solid #000'),
-                    ('padding', '6px'),
-                    ('font-family', 'Verdana'),
-                    ('font-size', '8pt')
-                ]},
-                {'selector': 'tbody td:first-child', 'props': [
-                    ('text-align', 'left'),
-                    ('border', '1px solid #000'),
-                    ('padding', '6px'),
-                    ('font-family', 'Verdana'),
-                    ('font-size', '8pt')
-                ]},
-                {'selector': 'tbody td:not(:first-child)', 'props': [
-                    ('text-align', 'center'),
-                    ('border', '1px solid #000'),
-                    ('padding', '6px'),
-                    ('font-family', 'Verdana'),
-                    ('font-size', '8pt')
-                ]},
-                {'selector': 'table', 'props': [
-                    ('border-collapse', 'collapse'),
-                    ('border', '2px solid #000'),
-                    ('width', '100%'),
-                    ('max-height', 'none'),
-                    ('overflow', 'visible')
-                ]}
-            ])
-
-            df_styled = df_styled.hide(axis='index')
+            subtotal = (df_tabla['Es_Subtotal'].fillna(False).astype(bool).to_numpy()
+                        if 'Es_Subtotal' in df_tabla.columns else None)
 
             ruta_imagen = self.ruta_imagenes / f"{nombre_archivo}.png"
-
-            # Exportar tabla sin límites de scroll ni altura
-            dfi.export(
-                df_styled,
-                str(ruta_imagen),
-                fontsize=8,
-                max_rows=-1,
-                max_cols=-1,
-                table_conversion="chrome",
-                chrome_path=None
+            guardar_tabla(
+                df_imagen, ruta_imagen, estilo=ESTILO_TABLA,
+                fondo=None if subtotal is None else np.where(subtotal, ESTILO_TABLA.fondo_total, None),
+                negrita=subtotal,
+                alineacion=['left'] + ['center'] * (len(df_imagen.columns) - 1)
             )
 
             logger.info(f"Imagen creada completa: {ruta_imagen}")
             return str(ruta_imagen)
 
         except Exception as e:
-            logger.error(f"Error creando imagen sin recorte: {e}")
+            logger.error(f"Error creando imagen de tabla: {e}")
             return None
 
-    def generar_imagenes_proveedor(self, data: pd.DataFrame, proveedor: str) -> List[Tuple[str, str]]:
-        """Genera las imágenes específicas según el proveedor"""
+    def generar_imagenes_proveedor(self, data: pd.DataFrame, proveedor: str,
+                                   agregados: Optional[pd.DataFrame] = None) -> List[Tuple[str, str]]:
+        """Genera las imágenes específicas según el proveedor (desde `agregados` si se calcularon en el servidor)"""
         imagenes = []
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
 
@@ -473,7 +637,10 @@ class ReporteFNBPostgreSQL:
         config = configuraciones.get(proveedor, [('general', None, None, 'canal')])
 
         for tipo, filtro_col, filtro_val, tipo_tabla in config:
-            tabla = self.crear_tabla_dinamica(data, filtro_col, filtro_val, tipo_tabla)
+            if agregados is not None:
+                tabla = self.crear_tabla_agregada(agregados, tipo_tabla, canal=filtro_val)
+            else:
+                tabla = self.crear_tabla_dinamica(data, filtro_col, filtro_val, tipo_tabla)
             if not tabla.empty:
                 nombre_archivo = f"{tipo}_{proveedor}_{timestamp}"
                 ruta_imagen = self.crear_imagen_tabla(tabla, nombre_archivo)
@@ -482,27 +649,29 @@ class ReporteFNBPostgreSQL:
 
         # Inserta las 2 imágenes específicas para 'ALO CÁLIDDA' si es IBR PERU
         if proveedor == "IBR PERU":
-            canal_data = data[data['Canal'] == 'ALO CÁLIDDA'].copy()
-
-            if not canal_data.empty:
-                for estado, tipo_suffix in [
-                    ('Producto Entregado', 'alo_calidda_entregados'),
-                    ('Pendiente de Entrega', 'alo_calidda_pendientes')
-                ]:
+            canal_data = data[data['Canal'] == 'ALO CÁLIDDA'] if agregados is None else None
+
+            for estado, tipo_suffix in [
+                ('Producto Entregado', 'alo_calidda_entregados'),
+                ('Pendiente de Entrega', 'alo_calidda_pendientes')
+            ]:
+                if agregados is not None:
+                    tabla_estado = self.crear_tabla_agregada(agregados, 'proveedor', canal='ALO CÁLIDDA',
+                                                             estado=estado, omitir_subtotales=True)
+                else:
                     df_estado = canal_data[canal_data['Estado de Entrega'] == estado]
-                    if not df_estado.empty:
-                        tabla_estado = self.crear_tabla_dinamica(df_estado, tipo_tabla='proveedor',
-                                                                 omitir_subtotales=True)
-                        if not tabla_estado.empty:
-                            nombre_archivo = f"{tipo_suffix}_{proveedor}_{timestamp}"
-                            ruta_imagen = self.crear_imagen_tabla(tabla_estado, nombre_archivo)
-                            if ruta_imagen:
-                                imagenes.append((tipo_suffix, ruta_imagen))
+                    tabla_estado = self.crear_tabla_dinamica(df_estado, tipo_tabla='proveedor',
+                                                             omitir_subtotales=True)
+                if not tabla_estado.empty:
+                    nombre_archivo = f"{tipo_suffix}_{proveedor}_{timestamp}"
+                    ruta_imagen = self.crear_imagen_tabla(tabla_estado, nombre_archivo)
+                    if ruta_imagen:
+                        imagenes.append((tipo_suffix, ruta_imagen))
 
         return imagenes
 
-    def guardar_excel_openpyxl(self, data: pd.DataFrame, ruta_archivo: str) -> bool:
-        """Guarda el archivo Excel usando openpyxl con formato opcional"""
+    def guardar_excel(self, data: pd.DataFrame, ruta_archivo: str) -> bool:
+        """Guarda el archivo Excel (con formato opcional) en una sola escritura"""
         try:
             data_clean = data.replace(['nan', 'NaN', pd.NA], '').fillna('')
 
@@ -514,43 +683,15 @@ class ReporteFNBPostgreSQL:
             if os.path.exists(ruta_archivo):
                 self._cerrar_excel_procesos()
 
-            with pd.ExcelWriter(ruta_archivo, engine='openpyxl') as writer:
-                data_clean.to_excel(writer, index=False, sheet_name='Datos')
-
-                if not self.formatear_excel:
-                    return True  # Salta formato si se desactiva
-
-                workbook = writer.book
-                worksheet = workbook['Datos']
-
-                header_font = Font(name='Aptos', size=8, bold=True, color='FFFFFF')
-                header_fill = PatternFill(start_color='000000', end_color='000000', fill_type='solid')
-                data_font = Font(name='Aptos', size=8)
-
-                for col in range(1, len(data_clean.columns) + 1):
-                    cell = worksheet.cell(row=1, column=col)
-                    cell.font = header_font
-                    cell.fill = header_fill
-                    cell.alignment = Alignment(horizontal='center')
-
-                for row in range(2, len(data_clean) + 2):
-                    worksheet.row_dimensions[row].height = 11.25
-                    for col in range(1, len(data_clean.columns) + 1):
-                        cell = worksheet.cell(row=row, column=col)
-                        cell.font = data_font
-                        if col <= 2:
-                            cell.number_format = 'dd/mm/yyyy'
-
-                for column in worksheet.columns:
-                    max_length = 0
-                    column_letter = column[0].column_letter
-                    for cell in column:
-                        try:
-                            max_length = max(max_length, len(str(cell.value)))
-                        except:
-                            pass
-                    adjusted_width = min(max_length + 2, 50)
-                    worksheet.column_dimensions[column_letter].width = adjusted_width
+            if not self.formatear_excel:
+                data_clean.to_excel(ruta_archivo, index=False, sheet_name='Datos')
+            else:
+                # Las dos primeras columnas son fechas (F. Registro, F. Entrega)
+                escribir_excel(
+                    data_clean, ruta_archivo, hoja='Datos', fuente='Aptos', tamaño=8, alto_fila=11.25,
+                    formatos={col: 'dd/mm/yyyy' for col in data_clean.columns[:2]},
+                    encabezado={'negrita': True, 'color': 'FFFFFF', 'fondo': '000000', 'alineacion': 'center'},
+                )
 
             logger.info(f"Archivo Excel guardado: {ruta_archivo}")
             return True
@@ -691,29 +832,17 @@ class ReporteFNBPostgreSQL:
             except:
                 pass
 
-    def obtener_filtros_aplicados(self) -> List[Tuple[pd.DataFrame, str]]:
-        """Ordena proveedores a procesar: IBR, SALESLAND, luego el resto (según opción)"""
-        filtros_aplicados = []
+    def criterios_destinatarios(self) -> List[Tuple[str, dict]]:
+        """Destinatarios a procesar con sus filtros: IBR, SALESLAND, luego el resto (según opción)"""
+        criterios = []
         orden_prioridad = ["IBR PERU", "SALESLAND"]
 
         # Agregar canales propios
         for nombre in orden_prioridad:
             if nombre in self.responsables['Nombre Responsable de Venta'].values:
-                filtro = self.df[self.df['Nombre Responsable de Venta'] == nombre]
+                criterios.append((nombre, {'Nombre Responsable de Venta': nombre}))
             elif nombre in self.proveedores['Nombre de Proveedor'].values:
-                filtro = self.df[self.df['Nombre de Proveedor'] == nombre]
-            else:
-                continue
-            
-            # Aplicar filtro de exonerados para SALESLAND
-            if nombre == 'SALESLAND' and self.exonerados:
-                registros_antes = len(filtro)
-                filtro = filtro[~filtro['Pedido Venta'].astype(str).str.strip().isin(self.exonerados)]
-                registros_despues = len(filtro)
-                logger.info(f"Exonerados aplicados a SALESLAND (canales propios): {registros_antes - registros_despues} registros eliminados")
-            
-            if not filtro.empty:
-                filtros_aplicados.append((filtro, nombre))
+                criterios.append((nombre, {'Nombre de Proveedor': nombre}))
 
         # Agregar el resto solo si aplica
         if not self.solo_canales_propios:
@@ -722,30 +851,37 @@ class ReporteFNBPostgreSQL:
                 if nombre in orden_prioridad:
                     continue
                 if nombre == 'INTEGRA RETAIL S.A.C.':
-                    filtro = self.df[
-                        (self.df['Nombre de Proveedor'] == nombre) &
-                        (self.df['Nombre Responsable de Venta'] == 'IBR PERU')
-                    ]
+                    criterios.append((nombre, {'Nombre de Proveedor': nombre,
+                                               'Nombre Responsable de Venta': 'IBR PERU'}))
                 else:
-                    filtro = self.df[self.df['Nombre de Proveedor'] == nombre]
-                
-                # Aplicar filtro de exonerados para SALESLAND
-                if nombre == 'SALESLAND' and self.exonerados:
-                    registros_antes = len(filtro)
-                    filtro = filtro[~filtro['Pedido Venta'].astype(str).str.strip().isin(self.exonerados)]
-                    registros_despues = len(filtro)
-                    logger.info(f"Exonerados aplicados a SALESLAND: {registros_antes - registros_despues} registros eliminados")
-                
-                if not filtro.empty:
-                    filtros_aplicados.append((filtro, nombre))
+                    criterios.append((nombre, {'Nombre de Proveedor': nombre}))
 
             for _, row in self.responsables.iterrows():
                 nombre = row['Nombre Responsable de Venta']
                 if nombre in orden_prioridad:
                     continue
-                filtro = self.df[self.df['Nombre Responsable de Venta'] == nombre]
-                if not filtro.empty:
-                    filtros_aplicados.append((filtro, nombre))
+                criterios.append((nombre, {'Nombre Responsable de Venta': nombre}))
+
+        return criterios
+
+    def obtener_filtros_aplicados(self) -> List[Tuple[pd.DataFrame, str]]:
+        """Filtra self.df para cada destinatario de criterios_destinatarios (modo "pandas")"""
+        filtros_aplicados = []
+        for nombre, condiciones in self.criterios_destinatarios():
+            mascara = pd.Series(True, index=self.df.index)
+            for columna, valor in condiciones.items():
+                mascara &= self.df[columna] == valor
+            filtro = self.df[mascara]
+
+            # Aplicar filtro de exonerados para SALESLAND
+            if nombre == 'SALESLAND' and self.exonerados:
+                registros_antes = len(filtro)
+                filtro = filtro[~filtro['Pedido Venta'].astype(str).str.strip().isin(self.exonerados)]
+                registros_despues = len(filtro)
+                logger.info(f"Exonerados aplicados a SALESLAND: {registros_antes - registros_despues} registros eliminados")
+
+            if not filtro.empty:
+                filtros_aplicados.append((filtro, nombre))
 
         return filtros_aplicados
 
@@ -753,37 +889,63 @@ class ReporteFNBPostgreSQL:
         """Ejecución completa del proceso de reportes y correos"""
         try:
             self.tipo_actividad = self.seleccionar_actividad()
-            self.df = self.cargar_datos_postgresql()
-            self.cargar_destinatarios()
-            self.cargar_exonerados()  # Cargar transacciones exoneradas
-            filtros_aplicados = self.obtener_filtros_aplicados()
+            servidor = self.modo_agregacion == "servidor"
+            if servidor:
+                logger.info(f"Conectando a PostgreSQL ({self.db_config['database']}) - totales en el servidor...")
+                with conexion("reporte", self.db_config) as conn:
+                    self._procesar_destinatarios(conn)
+            else:
+                self._procesar_destinatarios()
+
+        except Exception as e:
+            logger.error(f"Error en proceso principal: {e}")
+            raise
 
-            inicio_total = time.time()
-            for data, proveedor in filtros_aplicados:
-                try:
-                    logger.info(f"Procesando: {proveedor}")
-                    inicio = time.time()
+    def _procesar_destinatarios(self, conn=None):
+        """Reportes y correos de cada destinatario (con `conn`: totales y detalle desde el servidor)"""
+        servidor = conn is not None
+        if servidor:
+            self.resumen_disponible = self.usar_resumen and resumen_completo(conn)
+            if self.usar_resumen and not self.resumen_disponible:
+                logger.warning(f"Tabla {TABLA_RESUMEN} no encontrada o desactualizada: "
+                               f"los totales se calculan desde el detalle")
+            self.definir_fecha_reporte(conn)
+        else:
+            self.df = self.cargar_datos_postgresql()
+        self.cargar_destinatarios()
+        self.cargar_exonerados()  # Cargar transacciones exoneradas
+        if servidor:
+            pendientes = [(None, nombre, condiciones) for nombre, condiciones in self.criterios_destinatarios()]
+        else:
+            pendientes = [(data, nombre, None) for data, nombre in self.obtener_filtros_aplicados()]
 
-                    imagenes = self.generar_imagenes_proveedor(data, proveedor)
-                    nombre_archivo = f"{self.tipo_actividad} - {proveedor} - {self.fecha_str}.xlsx"
-                    ruta_archivo = self.ruta_salida / nombre_archivo
+        inicio_total = time.time()
+        for data, proveedor, condiciones in pendientes:
+            try:
+                inicio = time.time()
+                agregados = None
+                if servidor:
+                    agregados, data = self.cargar_destinatario_servidor(conn, proveedor, condiciones)
+                    if data.empty:
+                        continue
+                logger.info(f"Procesando: {proveedor}")
 
-                    if self.guardar_excel_openpyxl(data, str(ruta_archivo)):
-                        self.enviar_correo(proveedor, str(ruta_archivo), imagenes)
+                imagenes = self.generar_imagenes_proveedor(data, proveedor, agregados)
+                nombre_archivo = f"{self.tipo_actividad} - {proveedor} - {self.fecha_str}.xlsx"
+                ruta_archivo = self.ruta_salida / nombre_archivo
 
-                    duracion = round(time.time() - inicio, 2)
-                    logger.info(f"✓ Terminado {proveedor} en {duracion} segundos\n")
+                if self.guardar_excel(data, str(ruta_archivo)):
+                    self.enviar_correo(proveedor, str(ruta_archivo), imagenes)
 
-                except Exception as e:
-                    logger.error(f"Error procesando {proveedor}: {e}")
-                    continue
+                duracion = round(time.time() - inicio, 2)
+                logger.info(f"✓ Terminado {proveedor} en {duracion} segundos\n")
 
-            total = round(time.time() - inicio_total, 2)
-            logger.info(f"✅ Proceso finalizado en {total} segundos")
+            except Exception as e:
+                logger.error(f"Error procesando {proveedor}: {e}")
+                continue
 
-        except Exception as e:
-            logger.error(f"Error en proceso principal: {e}")
-            raise
+        total = round(time.time() - inicio_total, 2)
+        logger.info(f"✅ Proceso finalizado en {total} segundos")
 
 def main():
     try:
@@ -1,21 +1,25 @@
 import asyncio
 import io
 import os
+import sys
 import time
 import tkinter as tk
+from dataclasses import replace
 from datetime import datetime, time as dt_time
+from pathlib import Path
 from tkinter import filedialog
 
-import matplotlib
-import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
-import seaborn as sns
 import win32clipboard
 from PIL import Image
 from playwright.async_api import async_playwright
 
-matplotlib.use("Agg")
+# Librería compartida del repositorio (fnb_comun)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from fnb_comun.imagenes import renderizar_imagenes
+from fnb_comun.tabla_imagen import (ESTILO_AZUL, NEGATIVO, POSITIVO, colores_por_condicion, combinar_columna,
+                                    renderizar_tabla)
 
 
 class CanalMapper:
@@ -565,6 +569,38 @@ class WhatsAppSender:
             print(f"⚠️ Error al cerrar WhatsApp Web: {e}")
 
 
+def dibujar_tabla(spec):
+    """
+    Imagen de una tabla armada por SalesImageGenerator.tabla_* (corre en los
+    procesos de render, por eso está a nivel de módulo).
+
+    spec: datos, encabezados, fuente (puntos), y opcionales fila_total (última
+    fila gris en negrita) y col_alcance (rojo si < 100 %, verde si > 100 %).
+    """
+    data = spec["datos"]
+    num_filas = len(data)
+    num_columnas = len(spec["encabezados"])
+
+    total = np.zeros(num_filas, dtype=bool)
+    if spec.get("fila_total"):
+        total[-1] = True
+    fondo = np.where(total, ESTILO_AZUL.fondo_total, None)
+    color_texto = None
+
+    col = spec.get("col_alcance")
+    if col is not None:
+        alcance = pd.to_numeric(pd.Series([fila[col] for fila in data]).str.replace("%", ""),
+                                errors="coerce").to_numpy() / 100
+        reglas = [alcance < 1, alcance > 1]
+        fondo = combinar_columna(fondo, col, colores_por_condicion(zip(reglas, (NEGATIVO[0], POSITIVO[0]))),
+                                 num_columnas)
+        color_texto = combinar_columna(None, col, colores_por_condicion(zip(reglas, (NEGATIVO[1], POSITIVO[1]))),
+                                       num_columnas)
+
+    return renderizar_tabla(data, spec["encabezados"], replace(ESTILO_AZUL, tamaño=spec["fuente"]),
+                            fondo=fondo, color_texto=color_texto, negrita=total)
+
+
 class SalesImageGenerator:
     def __init__(self):
         # *** RUTA ACTUALIZADA DEL ARCHIVO DE CANALES ***
@@ -589,23 +625,6 @@ class SalesImageGenerator:
 
         os.makedirs(self.ruta_imagenes, exist_ok=True)
 
-        plt.style.use("default")
-        sns.set_palette("husl")
-
-        plt.rcParams.update({
-            "figure.autolayout": False,
-            "figure.constrained_layout.use": False,
-            "figure.constrained_layout.h_pad": 0,
-            "figure.constrained_layout.w_pad": 0,
-            "figure.constrained_layout.hspace": 0,
-            "figure.constrained_layout.wspace": 0,
-            "figure.subplot.hspace": 0,
-            "figure.subplot.wspace": 0,
-            "figure.subplot.left": 0,
-            "figure.subplot.right": 1,
-            "figure.subplot.top": 1,
-            "figure.subplot.bottom": 0,
-        })
 
     def seleccionar_archivo_excel(self):
         root = tk.Tk()
@@ -736,154 +755,8 @@ class SalesImageGenerator:
 
         return df_long
 
-    def recortar_franjas_blancas(self, ruta_imagen):
-        try:
-            img = Image.open(ruta_imagen)
-            img_array = np.array(img)
-
-            def encontrar_limites_no_blancos(array):
-                if len(array.shape) == 3:
-                    gray = np.mean(array, axis=2)
-                else:
-                    gray = array
-
-                no_blancos = gray < 255
-
-                if not np.any(no_blancos):
-                    return 0, 0, array.shape[1], array.shape[0]
-
-                filas_no_blancas = np.any(no_blancos, axis=1)
-                columnas_no_blancas = np.any(no_blancos, axis=0)
-
-                top = np.argmax(filas_no_blancas)
-                bottom = len(filas_no_blancas) - np.argmax(filas_no_blancas[::-1])
-                left = np.argmax(columnas_no_blancas)
-                right = len(columnas_no_blancas) - np.argmax(columnas_no_blancas[::-1])
-
-                return left, top, right, bottom
-
-            left, top, right, bottom = encontrar_limites_no_blancos(img_array)
-            img_recortada = img.crop((left, top, right, bottom))
-            img_recortada.save(ruta_imagen, "PNG", dpi=(300, 300))
-
-            return True
-        except Exception as e:
-            print(f"Error al recortar franjas blancas de {os.path.basename(ruta_imagen)}: {e}")
-            return False
-
-    def _aplicar_formato_condicional_alcance(self, tabla, data, col_idx, num_filas, total_idx=None):
-        for i in range(num_filas):
-            fila_idx = i + 1
-            try:
-                valor_texto = data[i][col_idx]
-                valor_numerico = float(valor_texto.replace("%", "")) / 100
-
-                if valor_numerico < 1:
-                    tabla[(fila_idx, col_idx)].set_facecolor("#ffcccc")
-                    tabla[(fila_idx, col_idx)].set_text_props(color="#cc0000")
-                elif valor_numerico > 1:
-                    if total_idx is not None and i == total_idx:
-                        tabla[(fila_idx, col_idx)].set_facecolor("#ccffcc")
-                        tabla[(fila_idx, col_idx)].set_text_props(weight="bold", color="#006600")
-                    else:
-                        tabla[(fila_idx, col_idx)].set_facecolor("#ccffcc")
-                        tabla[(fila_idx, col_idx)].set_text_props(color="#006600")
-                else:
-                    if total_idx is not None and i == total_idx:
-                        tabla[(fila_idx, col_idx)].set_facecolor("#bdc3c7")
-                        tabla[(fila_idx, col_idx)].set_text_props(weight="bold", color="black")
-                    else:
-                        tabla[(fila_idx, col_idx)].set_facecolor("white")
-                        tabla[(fila_idx, col_idx)].set_text_props(color="black")
-            except (ValueError, IndexError):
-                continue
-
-    def crear_imagen_resumen_general(self, resumen, fecha_objetivo):
-        fig = plt.figure(figsize=(14, 8), facecolor="white", dpi=300)
-        ax = fig.add_axes([0, 0, 1, 1])
-        ax.set_facecolor("white")
-
-        data = []
-        colores_fila = []
-
-        for _, row in resumen.iterrows():
-            avance = float(row["AVANCE"])
-            meta = float(row["META"]) if pd.notna(row["META"]) else 0
-            alcance = (avance / meta) if meta else 0
-
-            data.append([
-                row["CANAL_VENTA"],
-                f"S/ {avance:,.0f}",
-                f"S/ {meta:,.0f}",
-                f"{alcance:.0%}",
-            ])
-
-            if row["CANAL_VENTA"] == "TOTAL":
-                colores_fila.append("#bdc3c7")
-            else:
-                colores_fila.append("white")
-
-        tabla = ax.table(
-            cellText=data,
-            colLabels=[
-                "Canal de Venta",
-                "Avance",
-                "Meta",
-                "Alcance %",
-            ],
-            cellLoc="center",
-            loc="center",
-        )
-
-        tabla.auto_set_font_size(False)
-        tabla.set_fontsize(9)
-        tabla.scale(1.2, 1.8)
-        tabla.auto_set_column_width(col=list(range(4)))
-
-        cell_dict = tabla.get_celld()
-        for i in range(len(data) + 1):
-            cell_dict[(i, 0)].set_width(0.35)
-            for j in range(1, 4):
-                cell_dict[(i, j)].set_width(0.16)
-
-        for i, color in enumerate(colores_fila):
-            for j in range(4):
-                if i == len(colores_fila) - 1:
-                    tabla[(i + 1, j)].set_facecolor("#bdc3c7")
-                    tabla[(i + 1, j)].set_text_props(weight="bold")
-                else:
-                    tabla[(i + 1, j)].set_facecolor(color)
-                    tabla[(i + 1, j)].set_text_props(weight="normal")
-
-        self._aplicar_formato_condicional_alcance(tabla, data, 3, len(data), len(data) - 1)
-
-        for j in range(4):
-            tabla[(0, j)].set_facecolor("#3498db")
-            tabla[(0, j)].set_text_props(weight="bold", color="white")
-
-        ax.axis("off")
-        ax.set_xlim(0, 1)
-        ax.set_ylim(0, 1)
-
-        fecha_txt = fecha_objetivo.strftime("%d-%m-%Y")
-        nombre_archivo = f"01_resumen_general_meta_{fecha_txt}.png"
-        ruta_completa = os.path.join(self.ruta_imagenes, nombre_archivo)
-
-        plt.savefig(
-            ruta_completa,
-            dpi=300,
-            bbox_inches="tight",
-            facecolor="white",
-            pad_inches=0,
-            edgecolor="none",
-            transparent=False,
-            format="png",
-        )
-        plt.close()
-
-        self.recortar_franjas_blancas(ruta_completa)
-
-        return ruta_completa
+    def _ruta_imagen(self, nombre_archivo):
+        return os.path.join(self.ruta_imagenes, nombre_archivo)
 
     def _normalizar_nombre_archivo(self, texto):
         reemplazos = {
@@ -899,19 +772,32 @@ class SalesImageGenerator:
             texto = texto.replace(origen, destino)
         return texto.replace(" ", "_").replace("/", "_").lower()
 
-    def crear_imagen_canal_simple(self, df_canal, canal):
-        fig = plt.figure(figsize=(12, 6), facecolor="white", dpi=300)
-        ax = fig.add_axes([0, 0, 1, 1])
-        ax.set_facecolor("white")
+    def tabla_resumen_general(self, resumen, fecha_objetivo):
+        data = []
+        for _, row in resumen.iterrows():
+            avance = float(row["AVANCE"])
+            meta = float(row["META"]) if pd.notna(row["META"]) else 0
+            alcance = (avance / meta) if meta else 0
 
-        if df_canal.empty:
-            return None
+            data.append([
+                row["CANAL_VENTA"],
+                f"S/ {avance:,.0f}",
+                f"S/ {meta:,.0f}",
+                f"{alcance:.0%}",
+            ])
 
-        if canal == "ALO CÁLIDDA":
-            columna_grupo = "ASESOR DE VENTAS"
-        else:
-            columna_grupo = "SEDE"
+        fecha_txt = fecha_objetivo.strftime("%d-%m-%Y")
+        spec = {
+            "datos": data,
+            "encabezados": ["Canal de Venta", "Avance", "Meta", "Alcance %"],
+            "fuente": 9,
+            "fila_total": True,
+            "col_alcance": 3,
+        }
+        return spec, self._ruta_imagen(f"01_resumen_general_meta_{fecha_txt}.png")
 
+    def _tabla_importe_transacciones(self, df_canal, canal, columna_grupo, titulo_grupo, total=True):
+        """Filas Importe / Transacciones por `columna_grupo` (más la fila TOTAL del canal)."""
         tabla_base = df_canal.groupby(columna_grupo).agg(
             Importe=("IMPORTE_NUM", "sum"),
             Transacciones=("codigo_unico", "nunique"),
@@ -926,249 +812,83 @@ class SalesImageGenerator:
                 f"{row['Transacciones']:,.0f}",
             ])
 
-        total_importe = tabla_base["Importe"].sum()
-        total_trans = tabla_base["Transacciones"].sum()
-        data.append([
-            f"TOTAL {canal}",
-            f"S/ {total_importe:,.0f}",
-            f"{total_trans:,.0f}",
-        ])
-
-        tabla = ax.table(
-            cellText=data,
-            colLabels=[columna_grupo, "Importe", "Transacciones"],
-            cellLoc="center",
-            loc="center",
-        )
-
-        tabla.auto_set_font_size(False)
-        tabla.set_fontsize(8)
-        tabla.scale(1.2, 1.6)
-
-        cell_dict = tabla.get_celld()
-        for i in range(len(data) + 1):
-            cell_dict[(i, 0)].set_width(0.45)
-            cell_dict[(i, 1)].set_width(0.2)
-            cell_dict[(i, 2)].set_width(0.2)
-
-        num_filas = len(data)
-        for i in range(num_filas):
-            for j in range(3):
-                if i == num_filas - 1:
-                    tabla[(i + 1, j)].set_facecolor("#bdc3c7")
-                    tabla[(i + 1, j)].set_text_props(weight="bold")
-                else:
-                    tabla[(i + 1, j)].set_facecolor("white")
-                    tabla[(i + 1, j)].set_text_props(weight="normal")
-
-        for j in range(3):
-            tabla[(0, j)].set_facecolor("#3498db")
-            tabla[(0, j)].set_text_props(weight="bold", color="white")
-
-        ax.axis("off")
-        ax.set_xlim(0, 1)
-        ax.set_ylim(0, 1)
-
-        canal_archivo = self._normalizar_nombre_archivo(canal)
-        nombre_archivo = f"{canal_archivo}.png"
-        ruta_completa = os.path.join(self.ruta_imagenes, nombre_archivo)
-
-        plt.savefig(
-            ruta_completa,
-            dpi=300,
-            bbox_inches="tight",
-            facecolor="white",
-            pad_inches=0,
-            edgecolor="none",
-            transparent=False,
-            format="png",
-        )
-        plt.close()
-
-        self.recortar_franjas_blancas(ruta_completa)
-
-        return ruta_completa
-
-    def crear_imagen_canal_resumen(self, df_canal, canal):
-        fig = plt.figure(figsize=(12, 6), facecolor="white", dpi=300)
-        ax = fig.add_axes([0, 0, 1, 1])
-        ax.set_facecolor("white")
-
-        if df_canal.empty:
-            return None
-
-        tabla_base = df_canal.groupby("ALIADO COMERCIAL").agg(
-            Importe=("IMPORTE_NUM", "sum"),
-            Transacciones=("codigo_unico", "nunique"),
-        )
-        tabla_base = tabla_base.reset_index()
-
-        data = []
-        for _, row in tabla_base.iterrows():
+        if total:
+            total_importe = tabla_base["Importe"].sum()
+            total_trans = tabla_base["Transacciones"].sum()
             data.append([
-                row["ALIADO COMERCIAL"],
-                f"S/ {row['Importe']:,.0f}",
-                f"{row['Transacciones']:,.0f}",
+                f"TOTAL {canal}",
+                f"S/ {total_importe:,.0f}",
+                f"{total_trans:,.0f}",
             ])
 
-        total_importe = tabla_base["Importe"].sum()
-        total_trans = tabla_base["Transacciones"].sum()
-        data.append([
-            f"TOTAL {canal}",
-            f"S/ {total_importe:,.0f}",
-            f"{total_trans:,.0f}",
-        ])
-
-        tabla = ax.table(
-            cellText=data,
-            colLabels=["Aliado Comercial", "Importe", "Transacciones"],
-            cellLoc="center",
-            loc="center",
-        )
-
-        tabla.auto_set_font_size(False)
-        tabla.set_fontsize(7)
-        tabla.scale(1.1, 1.4)
-
-        cell_dict = tabla.get_celld()
-        for i in range(len(data) + 1):
-            cell_dict[(i, 0)].set_width(0.4)
-            cell_dict[(i, 1)].set_width(0.2)
-            cell_dict[(i, 2)].set_width(0.2)
-
-        num_filas = len(data)
-        for i in range(num_filas):
-            for j in range(3):
-                if i == num_filas - 1:
-                    tabla[(i + 1, j)].set_facecolor("#bdc3c7")
-                    tabla[(i + 1, j)].set_text_props(weight="bold")
-                else:
-                    tabla[(i + 1, j)].set_facecolor("white")
-                    tabla[(i + 1, j)].set_text_props(weight="normal")
-
-        for j in range(3):
-            tabla[(0, j)].set_facecolor("#3498db")
-            tabla[(0, j)].set_text_props(weight="bold", color="white")
-
-        ax.axis("off")
-        ax.set_xlim(0, 1)
-        ax.set_ylim(0, 1)
-
+        spec = {
+            "datos": data,
+            "encabezados": [titulo_grupo, "Importe", "Transacciones"],
+            "fila_total": total,
+        }
         canal_archivo = self._normalizar_nombre_archivo(canal)
-        nombre_archivo = f"{canal_archivo}.png"
-        ruta_completa = os.path.join(self.ruta_imagenes, nombre_archivo)
-
-        plt.savefig(
-            ruta_completa,
-            dpi=300,
-            bbox_inches="tight",
-            facecolor="white",
-            pad_inches=0,
-            edgecolor="none",
-            transparent=False,
-            format="png",
-        )
-        plt.close()
-
-        self.recortar_franjas_blancas(ruta_completa)
-
-        return ruta_completa
-
-    def crear_imagen_canal(self, df_canal, canal):
-        fig = plt.figure(figsize=(12, 6), facecolor="white", dpi=300)
-        ax = fig.add_axes([0, 0, 1, 1])
-        ax.set_facecolor("white")
+        return spec, self._ruta_imagen(f"{canal_archivo}.png")
 
+    def tabla_canal_simple(self, df_canal, canal):
         if df_canal.empty:
             return None
 
-        tabla_base = df_canal.groupby("ALIADO COMERCIAL").agg(
-            Importe=("IMPORTE_NUM", "sum"),
-            Transacciones=("codigo_unico", "nunique"),
-        )
-        tabla_base = tabla_base.reset_index()
-
-        data = []
-        for _, row in tabla_base.iterrows():
-            data.append([
-                row["ALIADO COMERCIAL"],
-                f"S/ {row['Importe']:,.0f}",
-                f"{row['Transacciones']:,.0f}",
-            ])
-
-        tabla = ax.table(
-            cellText=data,
-            colLabels=["Aliado Comercial", "Importe", "Transacciones"],
-            cellLoc="center",
-            loc="center",
-        )
-
-        tabla.auto_set_font_size(False)
-        tabla.set_fontsize(8)
-        tabla.scale(1.2, 1.6)
-
-        cell_dict = tabla.get_celld()
-        for i in range(len(data) + 1):
-            cell_dict[(i, 0)].set_width(0.4)
-            cell_dict[(i, 1)].set_width(0.2)
-            cell_dict[(i, 2)].set_width(0.2)
+        if canal == "ALO CÁLIDDA":
+            columna_grupo = "ASESOR DE VENTAS"
+        else:
+            columna_grupo = "SEDE"
 
-        for i in range(len(data)):
-            for j in range(3):
-                tabla[(i + 1, j)].set_facecolor("white")
-                tabla[(i + 1, j)].set_text_props(weight="normal")
+        spec, ruta = self._tabla_importe_transacciones(df_canal, canal, columna_grupo, columna_grupo)
+        spec["fuente"] = 8
+        return spec, ruta
 
-        for j in range(3):
-            tabla[(0, j)].set_facecolor("#3498db")
-            tabla[(0, j)].set_text_props(weight="bold", color="white")
+    def tabla_canal_resumen(self, df_canal, canal):
+        if df_canal.empty:
+            return None
 
-        ax.axis("off")
-        ax.set_xlim(0, 1)
-        ax.set_ylim(0, 1)
+        spec, ruta = self._tabla_importe_transacciones(df_canal, canal, "ALIADO COMERCIAL", "Aliado Comercial")
+        spec["fuente"] = 7
+        return spec, ruta
 
-        canal_archivo = self._normalizar_nombre_archivo(canal)
-        nombre_archivo = f"{canal_archivo}.png"
-        ruta_completa = os.path.join(self.ruta_imagenes, nombre_archivo)
-
-        plt.savefig(
-            ruta_completa,
-            dpi=300,
-            bbox_inches="tight",
-            facecolor="white",
-            pad_inches=0,
-            edgecolor="none",
-            transparent=False,
-            format="png",
-        )
-        plt.close()
-
-        self.recortar_franjas_blancas(ruta_completa)
+    def tabla_canal(self, df_canal, canal):
+        if df_canal.empty:
+            return None
 
-        return ruta_completa
+        spec, ruta = self._tabla_importe_transacciones(df_canal, canal, "ALIADO COMERCIAL", "Aliado Comercial",
+                                                       total=False)
+        spec["fuente"] = 8
+        return spec, ruta
 
     def generar_imagenes(self, df_final, fecha_objetivo, resumen):
-        imagenes = []
-
-        print("Generando imagen de resumen general...")
-        ruta_resumen = self.crear_imagen_resumen_general(resumen, fecha_objetivo)
-        if ruta_resumen:
-            imagenes.append(ruta_resumen)
-            print(f"   OK: {os.path.basename(ruta_resumen)}")
+        # 1) Datos de todas las tablas (proceso principal)
+        print("Preparando tablas de imágenes...")
+        tablas = [("resumen general", self.tabla_resumen_general(resumen, fecha_objetivo))]
 
         canales = sorted(df_final["CANAL_VENTA"].dropna().unique().tolist())
         canales_simple = {"ALO CÁLIDDA", "CSC", "DIGITAL", "TIENDAS CÁLIDDA"}
+        grupos = dict(tuple(df_final.groupby("CANAL_VENTA", sort=False)))
         for canal in canales:
-            df_canal = df_final[df_final["CANAL_VENTA"] == canal].copy()
-            print(f"Generando imagen para canal: {canal}")
+            df_canal = grupos[canal]
             if canal in canales_simple:
-                ruta_canal = self.crear_imagen_canal_simple(df_canal, canal)
+                tablas.append((canal, self.tabla_canal_simple(df_canal, canal)))
             else:
-                ruta_canal = self.crear_imagen_canal_resumen(df_canal, canal)
-            if ruta_canal:
-                imagenes.append(ruta_canal)
-                print(f"   OK: {os.path.basename(ruta_canal)}")
+                tablas.append((canal, self.tabla_canal_resumen(df_canal, canal)))
+
+        # 2) Render; las rutas vuelven en el mismo orden
+        tareas = []
+        for nombre, tabla in tablas:
+            if tabla is None:
+                print(f"   Sin datos para canal: {nombre}")
             else:
-                print(f"   Sin datos para canal: {canal}")
+                spec, ruta = tabla
+                tareas.append((dibujar_tabla, spec, ruta))
+
+        print(f"Generando {len(tareas)} imágenes...")
+        imagenes = []
+        for ruta in renderizar_imagenes(tareas):
+            if ruta:
+                imagenes.append(ruta)
+                print(f"   OK: {os.path.basename(ruta)}")
 
         return imagenes
 
@@ -3,7 +3,6 @@
 import pandas as pd
 import numpy as np
 import os
-from datetime import datetime
 import tkinter as tk
 from tkinter import filedialog
 import warnings
@@ -11,9 +10,16 @@ from typing import Dict, List
 import logging
 import time
 import xlwings as xw
-from openpyxl import load_workbook
-from openpyxl.styles import Font
 from openpyxl.utils.dataframe import dataframe_to_rows
+import sys
+from pathlib import Path
+
+# Librería compartida del repositorio (fnb_comun)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from fnb_comun.ingesta.fechas import parsear_fechas, proporcion_no_convertida
+from fnb_comun.calendario import CalendarioHabil
+from fnb_comun.escritura_excel import escribir_excel
+from fnb_comun.excel import leer_excel
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -82,7 +88,7 @@ class SalesDataProcessor:
         for idx, archivo in enumerate(archivos, 1):
             try:
                 logger.info(f"Cargando archivo {idx}/{len(archivos)}: {os.path.basename(archivo)}")
-                df = pd.read_excel(archivo)
+                df = leer_excel(archivo)
                 
                 if df.empty:
                     logger.warning(f"Archivo vacío: {os.path.basename(archivo)}")
@@ -201,7 +207,7 @@ class SalesDataProcessor:
         Normaliza ambas columnas a mayúsculas para matching confiable.
         """
         try:
-            df_canal = pd.read_excel(self.ruta_canal_fija, sheet_name='Hoja1')
+            df_canal = leer_excel(self.ruta_canal_fija, sheet_name='Hoja1')
             if len(df_canal.columns) >= 2:
                 # Normalizar SEDE (columna A) a mayúsculas
                 sedes_normalizadas = df_canal.iloc[:, 0].astype(str).str.strip().str.upper()
@@ -215,57 +221,18 @@ class SalesDataProcessor:
             logger.warning(f"Error leyendo archivo de canales: {e}")
         return {}
 
-    def _cargar_feriados(self) -> set:
+    def _cargar_calendario(self) -> CalendarioHabil:
         try:
             archivo = os.path.join(self.ruta_feriados, "Feriados.xlsx")
             if not os.path.exists(archivo):
                 logger.warning(f"No se encontró archivo de feriados: {archivo}")
-                return set()
-            df = pd.read_excel(archivo)
-            fechas = pd.to_datetime(df.iloc[:, 0], errors='coerce').dt.date
-            feriados = set(f for f in fechas if not pd.isna(f))
-            logger.info(f"Feriados cargados: {len(feriados)}")
-            return feriados
+                return CalendarioHabil()
+            calendario = CalendarioHabil.desde_excel(archivo)
+            logger.info(f"Feriados cargados: {len(calendario.feriados)}")
+            return calendario
         except Exception as e:
             logger.error(f"Error cargando feriados: {e}")
-            return set()
-
-    def _calcular_dias_habiles(self, fecha_venta: pd.Timestamp, feriados: set) -> int:
-        if pd.isna(fecha_venta):
-            return 0
-        hoy = datetime.now().date()
-        if isinstance(fecha_venta, pd.Timestamp):
-            fecha_venta = fecha_venta.date()
-        if fecha_venta > hoy:
-            return 0
-        dias_totales = pd.date_range(fecha_venta, hoy, freq='D')
-        dias_habiles = [d for d in dias_totales if d.weekday() < 6 and d.date() not in feriados]
-        return max(len(dias_habiles) - 1, 0)
-
-    def _calcular_tiempo_exacto(self, fecha_venta, fecha_entrega, feriados):
-        hoy = datetime.now().date()
-
-        if pd.isna(fecha_venta):
-            return 0
-
-        inicio = fecha_venta.date() if isinstance(fecha_venta, pd.Timestamp) else fecha_venta
-        if pd.isna(inicio):
-            return 0
-
-        if pd.isna(fecha_entrega):
-            fin = hoy
-        else:
-            fin = fecha_entrega.date() if isinstance(fecha_entrega, pd.Timestamp) else fecha_entrega
-
-        if inicio > fin:
-            return 0
-
-        dias_totales = pd.date_range(inicio, fin, freq='D')
-        # Solo se excluyen domingos (weekday=6) y feriados
-        dias_habiles = [d for d in dias_totales if d.weekday() != 6 and d.date() not in feriados]
-
-        resultado = len(dias_habiles) - 1
-        return 0 if resultado == -1 else resultado
+            return CalendarioHabil()
 
     def _determinar_canal_venta_vectorizado(self, df: pd.DataFrame, mapeo: Dict[str, str]) -> tuple:
         """
@@ -340,110 +307,35 @@ class SalesDataProcessor:
 
         return df_g2_pivot[columnas_finales]
 
-    def _parsear_fecha_dd_mm_yyyy(self, fecha_str):
-        """
-        Parsea fechas en formato dd/mm/yyyy específicamente
-        """
-        if pd.isna(fecha_str) or fecha_str == '':
-            return pd.NaT
+    def _parsear_fechas(self, serie: pd.Series, columna: str) -> pd.Series:
+        """Parsea una columna de fecha (dd/mm/yyyy, ISO, seriales de Excel...) de forma vectorizada"""
+        fechas = parsear_fechas(serie, clave=('ventas_fnb', columna))
+        no_convertidas = proporcion_no_convertida(serie, fechas)
+        if no_convertidas:
+            logger.warning(f"{columna}: {no_convertidas:.1%} de valores no reconocidos como fecha")
+        return fechas
+
+    def _guardar_excel(self, df: pd.DataFrame, archivo_salida: str):
+        """Guarda el Excel ya formateado (fechas, hora, importes, Aptos 8, alto y anchos) en una sola pasada"""
+        formatos = {}
+        for col in df.columns:
+            nombre = str(col).upper()
+            if 'HORA' in nombre:
+                formatos[col] = '@'  # Texto: muestra solo HH:MM
+            elif 'FECHA' in nombre:
+                formatos[col] = 'DD/MM/YYYY'
+        for col in ["IMPORTE (S./)", "CRÉDITO UTILIZADO"]:
+            if col in df.columns:
+                formatos[col] = '#,##0.00'
 
         try:
-            fecha_str = str(fecha_str).strip()
-            # Si ya es datetime, convertir a string primero
-            if isinstance(fecha_str, pd.Timestamp):
-                return fecha_str
-
-            # Intentar varios formatos de fecha
-            formatos = ['%d/%m/%Y', '%d-%m-%Y', '%d.%m.%Y', '%Y-%m-%d']
-
-            for formato in formatos:
-                try:
-                    return pd.to_datetime(fecha_str, format=formato)
-                except:
-                    continue
-
-            # Si no funciona ningún formato específico, usar dayfirst=True
-            return pd.to_datetime(fecha_str, dayfirst=True, errors='coerce')
-
-        except Exception as e:
-            logger.warning(f"Error parseando fecha '{fecha_str}': {e}")
-            return pd.NaT
-
-    def _aplicar_formato_excel(self, archivo_salida: str):
-        """Aplica formato específico al archivo Excel"""
-        try:
-            wb = load_workbook(archivo_salida)
-            ws = wb.active
-
-            # Aplicar formato de fecha a columnas de fecha
-            from openpyxl.styles import NamedStyle
-            date_style = NamedStyle(name='date_style', number_format='DD/MM/YYYY')
-
-            for col_idx, col_name in enumerate(ws[1], 1):
-                if col_name.value and 'FECHA' in str(col_name.value).upper():
-                    col_letter = ws.cell(row=1, column=col_idx).column_letter
-                    for row in range(2, ws.max_row + 1):
-                        try:
-                            ws[f'{col_letter}{row}'].style = date_style
-                        except:
-                            pass
-
-            # Aplicar formato de hora a columnas de hora (formato texto para mostrar solo HH:MM)
-            text_time_style = NamedStyle(name='text_time_style', number_format='@')
-
-            for col_idx, col_name in enumerate(ws[1], 1):
-                if col_name.value and 'HORA' in str(col_name.value).upper():
-                    col_letter = ws.cell(row=1, column=col_idx).column_letter
-                    for row in range(2, ws.max_row + 1):
-                        try:
-                            ws[f'{col_letter}{row}'].style = text_time_style
-                        except:
-                            pass
-
-            # Aplicar formato numérico a columnas de importes
-            currency_style = NamedStyle(name='currency_style', number_format='#,##0.00')
-
-            for col_idx, col_name in enumerate(ws[1], 1):
-                if col_name.value and col_name.value in ["IMPORTE (S./)", "CRÉDITO UTILIZADO"]:
-                    col_letter = ws.cell(row=1, column=col_idx).column_letter
-                    for row in range(2, ws.max_row + 1):
-                        try:
-                            ws[f'{col_letter}{row}'].style = currency_style
-                        except:
-                            pass
-
-            # Definir fuente y aplicar a todas las celdas
-            font_aptos = Font(name='Aptos', size=8)
-
-            for row in ws.iter_rows():
-                for cell in row:
-                    cell.font = font_aptos
-
-            # Ajustar altura de filas
-            for row_num in range(1, ws.max_row + 1):
-                ws.row_dimensions[row_num].height = 11.25
-
-            # Autoajustar ancho de columnas
-            for column in ws.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-
-                # Ajustar ancho con un mínimo de 8 y máximo de 50
-                adjusted_width = min(max(max_length + 2, 8), 50)
-                ws.column_dimensions[column_letter].width = adjusted_width
-
-            wb.save(archivo_salida)
+            escribir_excel(df, archivo_salida, fuente='Aptos', tamaño=8, alto_fila=11.25,
+                           formatos=formatos, encabezado={'alineacion': 'center'},
+                           ancho_min=8, ancho_max=50)
             logger.info("Formato aplicado correctamente al archivo Excel")
-
         except Exception as e:
             logger.error(f"Error aplicando formato Excel: {e}")
+            df.to_excel(archivo_salida, index=False)
 
     def procesar(self):
         try:
@@ -478,7 +370,7 @@ class SalesDataProcessor:
             for fecha_col in columnas_fecha:
                 if fecha_col in df.columns:
                     logger.info(f"Parseando columna de fecha: {fecha_col}")
-                    df[fecha_col] = df[fecha_col].apply(self._parsear_fecha_dd_mm_yyyy)
+                    df[fecha_col] = self._parsear_fechas(df[fecha_col], fecha_col)
                     logger.info(f"Fechas parseadas para {fecha_col}")
 
             # Parsear columnas de hora
@@ -515,7 +407,7 @@ class SalesDataProcessor:
                 df_final['RANGO HORA'] = self._asignar_rango_hora_vectorizado(df_final['HORA VENTA'])
 
             # === CÁLCULO DE TIEMPO Y RANGO DE ENTREGA ===
-            feriados = self._cargar_feriados()
+            calendario = self._cargar_calendario()
 
             # Cálculo de TipoProducto (excluye MULTIPUNTO)
             producto_upper = df_final['PRODUCTO_1'].astype(str).str.upper()
@@ -530,16 +422,8 @@ class SalesDataProcessor:
             # Cálculo de tiempo en días hábiles (de FECHA VENTA a FECHA ENTREGA o HOY)
             col_fecha_entrega = 'FECHA ENTREGA' if 'FECHA ENTREGA' in df_final.columns else None
 
-            if col_fecha_entrega:
-                df_final['Tiempo'] = df_final.apply(
-                    lambda row: self._calcular_tiempo_exacto(row['FECHA VENTA'], row[col_fecha_entrega], feriados) + 1,
-                    axis=1
-                )
-            else:
-                df_final['Tiempo'] = df_final.apply(
-                    lambda row: self._calcular_tiempo_exacto(row['FECHA VENTA'], pd.NaT, feriados) + 1,
-                    axis=1
-                )
+            fin_tiempo = df_final[col_fecha_entrega] if col_fecha_entrega else None
+            df_final['Tiempo'] = calendario.dias_habiles(df_final['FECHA VENTA'], fin_tiempo) + 1
 
             # Determinar canal de venta (con validaciones integradas)
             mapeo = self._cargar_mapeo_canales()
@@ -612,11 +496,8 @@ class SalesDataProcessor:
             # Crear directorio si no existe
             os.makedirs(self.ruta_salida, exist_ok=True)
 
-            # Guardar sin formato primero
-            df_final.to_excel(salida, index=False)
-
-            # Aplicar formato específico
-            self._aplicar_formato_excel(salida)
+            # Guardar con formato en una sola escritura
+            self._guardar_excel(df_final, salida)
 
             logger.info(f"Archivo generado: {salida}")
             print(f"✅ Archivos procesados: {len(archivos)}")
@@ -13,8 +13,13 @@ import warnings
 from typing import Dict, List
 import logging
 import time
-from openpyxl import load_workbook
-from openpyxl.styles import Font
+from pathlib import Path
+
+# Librería compartida del repositorio (fnb_comun)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from fnb_comun.ingesta.fechas import parsear_fechas, proporcion_no_convertida
+from fnb_comun.escritura_excel import escribir_excel
+from fnb_comun.excel import leer_excel
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -116,29 +121,13 @@ class SalesDataRestructurer:
             logger.info("Proporcione la ruta del archivo como argumento: python 01.2.RestructuraFNB.py <ruta_archivo>")
             return None
 
-    def _parsear_fecha_dd_mm_yyyy(self, fecha_str):
-        """Parsea fechas en formato dd/mm/yyyy"""
-        if pd.isna(fecha_str) or fecha_str == '':
-            return pd.NaT
-
-        try:
-            fecha_str = str(fecha_str).strip()
-            if isinstance(fecha_str, pd.Timestamp):
-                return fecha_str
-
-            formatos = ['%d/%m/%Y', '%d-%m-%Y', '%d.%m.%Y', '%Y-%m-%d']
-
-            for formato in formatos:
-                try:
-                    return pd.to_datetime(fecha_str, format=formato)
-                except:
-                    continue
-
-            return pd.to_datetime(fecha_str, dayfirst=True, errors='coerce')
-
-        except Exception as e:
-            logger.warning(f"Error parseando fecha '{fecha_str}': {e}")
-            return pd.NaT
+    def _parsear_fechas(self, serie: pd.Series, columna: str) -> pd.Series:
+        """Parsea una columna de fecha (dd/mm/yyyy, ISO, seriales de Excel...) de forma vectorizada"""
+        fechas = parsear_fechas(serie, clave=('ventas_fnb', columna))
+        no_convertidas = proporcion_no_convertida(serie, fechas)
+        if no_convertidas:
+            logger.warning(f"{columna}: {no_convertidas:.1%} de valores no reconocidos como fecha")
+        return fechas
 
     def _determinar_columnas_dinamicas(self, columnas_archivo: List[str]):
         """Determina qué columnas son grupo 1 y grupo 2"""
@@ -201,73 +190,27 @@ class SalesDataRestructurer:
         else:
             return ""
 
-    def _aplicar_formato_excel(self, archivo_salida: str):
-        """Aplica formato específico al archivo Excel"""
+    def _guardar_excel(self, df: pd.DataFrame, archivo_salida: str):
+        """Guarda el Excel ya formateado (fechas, hora, importes, Aptos 8, alto y anchos) en una sola pasada"""
+        formatos = {}
+        for col in df.columns:
+            nombre = str(col).upper()
+            if 'HORA' in nombre:
+                formatos[col] = '@'  # Texto: muestra solo HH:MM
+            elif 'FECHA' in nombre:
+                formatos[col] = 'DD/MM/YYYY'
+        for col in ["IMPORTE (S./)", "CRÉDITO UTILIZADO"]:
+            if col in df.columns:
+                formatos[col] = '#,##0.00'
+
         try:
-            wb = load_workbook(archivo_salida)
-            ws = wb.active
-
-            # Aplicar formato de fecha a columnas de fecha
-            for col_idx, col_name in enumerate(ws[1], 1):
-                if col_name.value and 'FECHA' in str(col_name.value).upper():
-                    col_letter = ws.cell(row=1, column=col_idx).column_letter
-                    for row in range(2, ws.max_row + 1):
-                        try:
-                            ws[f'{col_letter}{row}'].number_format = 'DD/MM/YYYY'
-                        except:
-                            pass
-
-            # Aplicar formato de hora
-            for col_idx, col_name in enumerate(ws[1], 1):
-                if col_name.value and 'HORA' in str(col_name.value).upper():
-                    col_letter = ws.cell(row=1, column=col_idx).column_letter
-                    for row in range(2, ws.max_row + 1):
-                        try:
-                            ws[f'{col_letter}{row}'].number_format = '@'
-                        except:
-                            pass
-
-            # Aplicar formato numérico a importes
-            for col_idx, col_name in enumerate(ws[1], 1):
-                if col_name.value and col_name.value in ["IMPORTE (S./)", "CRÉDITO UTILIZADO"]:
-                    col_letter = ws.cell(row=1, column=col_idx).column_letter
-                    for row in range(2, ws.max_row + 1):
-                        try:
-                            ws[f'{col_letter}{row}'].number_format = '#,##0.00'
-                        except:
-                            pass
-
-            # Aplicar fuente Aptos tamaño 8 a todas las celdas
-            font_aptos = Font(name='Aptos', size=8)
-
-            for row in ws.iter_rows():
-                for cell in row:
-                    cell.font = font_aptos
-
-            # Ajustar altura de filas
-            for row_num in range(1, ws.max_row + 1):
-                ws.row_dimensions[row_num].height = 11.25
-
-            # Autoajustar ancho de columnas
-            for column in ws.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-
-                adjusted_width = min(max(max_length + 2, 8), 50)
-                ws.column_dimensions[column_letter].width = adjusted_width
-
-            wb.save(archivo_salida)
+            escribir_excel(df, archivo_salida, fuente='Aptos', tamaño=8, alto_fila=11.25,
+                           formatos=formatos, encabezado={'alineacion': 'center'},
+                           ancho_min=8, ancho_max=50)
             logger.info("Formato aplicado correctamente al archivo Excel")
-
         except Exception as e:
             logger.error(f"Error aplicando formato Excel: {e}")
+            df.to_excel(archivo_salida, index=False)
 
     def procesar(self, archivo_entrada: str = None):
         try:
@@ -280,7 +223,7 @@ class SalesDataRestructurer:
             logger.info(f"Archivo seleccionado: {archivo}")
 
             # Cargar datos
-            df = pd.read_excel(archivo)
+            df = leer_excel(archivo, cache=True)
             
             if df.empty:
                 raise ValueError("Archivo sin datos")
@@ -299,7 +242,7 @@ class SalesDataRestructurer:
             for fecha_col in columnas_fecha:
                 if fecha_col in df.columns:
                     logger.info(f"Parseando columna de fecha: {fecha_col}")
-                    df[fecha_col] = df[fecha_col].apply(self._parsear_fecha_dd_mm_yyyy)
+                    df[fecha_col] = self._parsear_fechas(df[fecha_col], fecha_col)
 
             # Parsear horas
             for hora_col in columnas_hora:
@@ -516,11 +459,8 @@ class SalesDataRestructurer:
             nombre_archivo = "Archivo_Reestructurado.xlsx"
             ruta_salida = os.path.join(ruta_origen, nombre_archivo)
 
-            # Guardar sin formato primero
-            df_final.to_excel(ruta_salida, index=False)
-
-            # Aplicar formato
-            self._aplicar_formato_excel(ruta_salida)
+            # Guardar con formato en una sola escritura
+            self._guardar_excel(df_final, ruta_salida)
 
             logger.info(f"Archivo generado: {ruta_salida}")
             print(f"EXITO:{len(df_final)}")  # Mensaje simple para el launcher
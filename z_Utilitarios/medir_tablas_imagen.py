@@ -0,0 +1,92 @@
+# medir_tablas_imagen.py
+"""
+Comparación de tiempos: tabla como imagen con matplotlib vs fnb_comun.tabla_imagen.
+
+Reproduce el camino anterior de los reportes (figura matplotlib a 300 dpi,
+guardado, recorte de blancos con PIL y reescalado LANCZOS a 927 px) y el nuevo
+(`guardar_tabla` dibujando directo con PIL al ancho final) sobre tablas
+sintéticas de 7 columnas, y muestra el tiempo medio por imagen.
+
+    python z_Utilitarios/medir_tablas_imagen.py
+"""
+
+import os
+import sys
+import tempfile
+import time
+from dataclasses import replace
+from pathlib import Path
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+from PIL import Image, ImageOps
+
+# Librería compartida del repositorio (fnb_comun)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from fnb_comun.tabla_imagen import ESTILO_SIMPLE, guardar_tabla
+
+# Ancho final de las imágenes de WhatsApp y tamaños de tabla a medir
+ANCHO_IMAGEN = 927
+FILAS = (10, 30, 80)
+REPETICIONES = {"matplotlib": 3, "tabla_imagen": 20}
+
+ESTILO = replace(ESTILO_SIMPLE, tamaño=8.5)
+
+
+def tabla_sintetica(filas, semilla=0):
+    """Tabla con la forma de las de los reportes: responsable, importes y transacciones."""
+    rng = np.random.default_rng(semilla)
+    return pd.DataFrame({
+        "RESPONSABLE\nDE VENTA": [f"RESPONSABLE {i}" for i in range(filas)],
+        **{f"IMPORTE S/\nCOL {k}": [f"{v:,}" for v in rng.integers(0, 10**6, filas)] for k in range(3)},
+        **{f"# TRX\nCOL {k}": rng.integers(0, 500, filas) for k in range(3)},
+    })
+
+
+def con_matplotlib(df, ruta):
+    """Camino anterior: figura a 300 dpi, recorte de blancos y reescalado."""
+    fig, ax = plt.subplots(figsize=(12, max(6, len(df) * 0.5)))
+    ax.axis('off')
+    tabla = ax.table(cellText=df.values, colLabels=df.columns, cellLoc='center', loc='center')
+    tabla.auto_set_font_size(False)
+    tabla.set_fontsize(8.5)
+    tabla.scale(1.2, 1.4)
+    plt.tight_layout()
+    plt.savefig(ruta, dpi=300, bbox_inches='tight')
+    plt.close(fig)
+
+    img = Image.open(ruta).convert("RGB")
+    img = img.crop(ImageOps.invert(ImageOps.grayscale(img)).getbbox())
+    img.save(ruta)
+    with Image.open(ruta) as img:
+        alto = int(img.size[1] * ANCHO_IMAGEN / img.size[0])
+        img.resize((ANCHO_IMAGEN, alto), Image.Resampling.LANCZOS).save(ruta)
+
+
+def con_tabla_imagen(df, ruta):
+    """Camino nuevo: PIL directo al ancho final."""
+    guardar_tabla(df, ruta, estilo=ESTILO, ancho=ANCHO_IMAGEN)
+
+
+def medir(funcion, df, ruta, repeticiones):
+    """Milisegundos por imagen (la primera llamada calienta fuentes y cachés)."""
+    funcion(df, ruta)
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion(df, ruta)
+    return (time.perf_counter() - inicio) / repeticiones * 1000
+
+
+if __name__ == "__main__":
+    ruta = os.path.join(tempfile.gettempdir(), "medir_tablas_imagen.png")
+    print(f"📏 Tablas de 7 columnas a {ANCHO_IMAGEN}px")
+    for filas in FILAS:
+        df = tabla_sintetica(filas)
+        antes = medir(con_matplotlib, df, ruta, REPETICIONES["matplotlib"])
+        ahora = medir(con_tabla_imagen, df, ruta, REPETICIONES["tabla_imagen"])
+        print(f"   {filas:>3} filas: matplotlib {antes:>6.0f} ms → tabla_imagen {ahora:>5.0f} ms "
+              f"({antes / ahora:.0f}x)")
+    os.remove(ruta)